@@ -25,25 +25,44 @@ b. Optimize loops.
 """
 
 from __future__ import print_function
+import argparse
 import signal
 import sys
-from pypsi import wizard as wiz
-from pypsi.shell import Shell
+import costs
+import hardware
+import metrics
+from answers import Answers, METRIC_FIELDS
+from engine import Inference, get_engine, infer, resolve, SUPERVISED, UNSUPERVISED, REINFORCEMENT
+from specs import (Bcolors, GENERIC, MAIN_L1, MAIN_L2_A, MAIN_L2_B, MAIN_L3, MAIN_L4,
+                   REINFORCEMENT_QUESTIONS, UNSUPERVISED_QUESTIONS)
 
-# pylint: disable=line-too-long,too-few-public-methods,too-many-instance-attributes, too-many-nested-blocks, too-many-return-statements, too-many-branches
+# pylint: disable=line-too-long,too-few-public-methods,too-many-instance-attributes, too-many-nested-blocks, too-many-return-statements, too-many-branches, no-member
 
-class Bcolors:
+# pypsi WizardSteps by WizardSpec - built on first use. A WizardStep keeps
+# no state between runs (a PromptWizard does), so they are shared.
+_WIZARD_STEPS = {}
+
+def wizard_steps(spec):
+    """
+    The pypsi WizardSteps of a WizardSpec.
+    """
+    steps = _WIZARD_STEPS.get(spec)
+    if steps is None:
+        from pypsi import wizard as wiz
+        steps = tuple(wiz.WizardStep(id=step.id, name=step.name, help=step.help,
+                                     validators=wiz.required_validator, default=step.default)
+                      for step in spec.steps)
+        _WIZARD_STEPS[spec] = steps
+    return steps
+
+def prompt_wizard(spec, steps=None):
     """
-    For Coloring
+    A new PromptWizard for spec, over its shared steps (or only steps).
     """
-    HEADER = '\033[95m'
-    OKBLUE = '\033[94m'
-    OKGREEN = '\033[92m'
-    WARNING = '\033[93m'
-    FAIL = '\033[91m'
-    ENDC = '\033[0m'
-    BOLD = '\033[1m'
-    UNDERLINE = '\033[4m'
+    from pypsi import wizard as wiz
+    return wiz.PromptWizard(name=spec.name, description="",
+                            steps=wizard_steps(spec) if steps is None else steps)
+
 
 class AlgoSelectorWizard():
     """
@@ -53,7 +72,7 @@ class AlgoSelectorWizard():
         """
         Perform Initialization.
         """
-        self.shell = Shell()
+        self._shell = None
         self.main_values = {}
         self.main_l1_values = {}
         self.main_l2a_values = {}
@@ -63,6 +82,7 @@ class AlgoSelectorWizard():
         self.unsup_values = {}
         self.ri_values = {}
         self.gen_values = {}
+        self.answers = Answers()
         self.wiz_main = None
         self.wiz_main_l1 = None
         self.wiz_main_l2_a = None
@@ -72,6 +92,19 @@ class AlgoSelectorWizard():
         self.wiz_generic = None
         self.wiz_unsupervised = None
         self.wiz_reinforcement = None
+        self.steps = {}
+        self.hardware = None
+        self.profile = None
+        self.correlation = None
+        self.relations = None
+        self.clusters = None
+        self.timeseries = None
+        self.corpus = None
+        self.bakeoff = None
+        self.history = None
+        self.top = None
+        self.prefilled = {}
+        self.advice = None
         self.ml_needed = False
         self.supervised = False
         self.unsupervised = False
@@ -82,6 +115,16 @@ class AlgoSelectorWizard():
         self.ftod_ratio = 'low'
         self.reproducibility = False
 
+    @property
+    def shell(self):
+        """
+        The pypsi Shell the wizards run in - created on first use, so
+        that headless use never loads the interactive stack.
+        """
+        if self._shell is None:
+            from pypsi.shell import Shell
+            self._shell = Shell()
+        return self._shell
 
     ############# All the Wizards ##################################
 
@@ -90,483 +133,53 @@ class AlgoSelectorWizard():
         """
         The Main Wizard L1
         """
-        self.wiz_main_l1 = wiz.PromptWizard(
-            name=Bcolors.OKBLUE+"Do you Need ML - Data Availability"+Bcolors.ENDC,
-            description="",
-            steps=(
-                # The list of input prompts to ask the user.
-                wiz.WizardStep(
-                    # ID where the value will be stored
-                    id="data_availability",
-                    # Display name
-                    name=Bcolors.HEADER+"Do you have access to data about different situations, or that describes a lot of examples of situations"+Bcolors.ENDC,
-                    # Help message
-                    help="Y/N/U - Yes/No/Unknown",
-                    validators=(wiz.required_validator),
-                    default='Y',
-                ),
-            )
-        )
+        self.wiz_main_l1 = prompt_wizard(MAIN_L1)
 
     def main_wizard_l2_a(self):
         """
         The Main Wizard L2-A
         """
-        self.wiz_main_l2_a = wiz.PromptWizard(
-            name=Bcolors.OKBLUE+"Do you Need ML - Data Creation"+Bcolors.ENDC,
-            description="",
-            steps=(
-                # The list of input prompts to ask the user.
-                wiz.WizardStep(
-                    # ID where the value will be stored
-                    id="data_creativity",
-                    # Display name
-                    name=Bcolors.HEADER+"Will a system be able to gather a lot of data by trying sequences of actions in many different situations and seeing the results"+Bcolors.ENDC,
-                    # Help message
-                    help="Y/N/U - Yes/No/Unknown",
-                    validators=(wiz.required_validator),
-                    default='Y',
-                ),
-            )
-        )
+        self.wiz_main_l2_a = prompt_wizard(MAIN_L2_A)
 
     def main_wizard_l2_b(self):
         """
         The Main Wizard L2-B
         """
-        label = """ One or more meaningful and informative 'tag' to provide context so that a machine learning model can learn from it. For example, labels might indicate whether a photo contains a bird or car, which words were uttered in an audio recording, or if an x-ray contains a tumor. Data labeling is required for a variety of use cases including computer vision, natural language processing, and speech recognition."""
-        self.wiz_main_l2_b = wiz.PromptWizard(
-            name=Bcolors.OKBLUE+"Do you Need ML - Data Programmability"+Bcolors.ENDC,
-            description="",
-            steps=(
-                # The list of input prompts to ask the user.
-                wiz.WizardStep(
-                    # ID where the value will be stored
-                    id="data_label",
-                    # Display name
-                    name=Bcolors.HEADER+" Do you have Labelled data? (Type Y/N/U - Yes/No/Unknown). Type help for description of label. "+Bcolors.ENDC,
-                    # Help message
-                    help=label,
-                    validators=(wiz.required_validator),
-                    default='Y',
-                ),
-                wiz.WizardStep(
-                    # ID where the value will be stored
-                    id="data_programmability",
-                    # Display name
-                    name=Bcolors.HEADER+"Can a program or set of rules decide what actions to take based on the data you have about the situations"+Bcolors.ENDC,
-                    # Help message
-                    help="Y/N/U - Yes/No/Unknown",
-                    validators=(wiz.required_validator),
-                    default='Y',
-                ),
-            )
-        )
+        self.wiz_main_l2_b = prompt_wizard(MAIN_L2_B)
 
 
     def main_wizard_l3(self):
         """
         The Main Wizard L3
         """
-        self.wiz_main_l3 = wiz.PromptWizard(
-            name=Bcolors.OKBLUE+"Do you Need ML - Data Knowledge"+Bcolors.ENDC,
-            description="",
-            steps=(
-                # The list of input prompts to ask the user.
-                wiz.WizardStep(
-                    # ID where the value will be stored
-                    id="data_knowledge",
-                    # Display name
-                    name=Bcolors.HEADER+"Could a knowledgeable human decide what actions to take based on the data you have about the situations"+Bcolors.ENDC,
-                    # Help message
-                    help="Y/N/U - Yes/No/Unknown",
-                    validators=(wiz.required_validator),
-                    default='Y',
-                ),
-            )
-        )
+        self.wiz_main_l3 = prompt_wizard(MAIN_L3)
 
     def main_wizard_l4(self):
         """
         The Main Wizard - L4
         """
-        self.wiz_main_l4 = wiz.PromptWizard(
-            name=Bcolors.OKBLUE+"Do you Need ML - Data Pattern"+Bcolors.ENDC,
-            description="",
-            steps=(
-                # The list of input prompts to ask the user.
-                wiz.WizardStep(
-                    # ID where the value will be stored
-                    id="data_pattern",
-                    # Display name
-                    name=Bcolors.HEADER+"Could there be patterns in these situations that the humans haven't recognized before"+Bcolors.ENDC,
-                    # Help message
-                    help="Y/N/U - Yes/No/Unknown",
-                    validators=(wiz.required_validator),
-                    default='Y'
-                ),
-            )
-        )
+        self.wiz_main_l4 = prompt_wizard(MAIN_L4)
+
     ### GENERIC Wizards - GOAL, METRICS, DATA ##############################
     def gen_wizard(self):
         """
         Generic Wizard - Goal, metrics, data
         """
-        self.wiz_generic = wiz.PromptWizard(
-            name=Bcolors.OKBLUE+"Understanding Goal, Metrics, Data and Output Type"+Bcolors.ENDC,
-            description="",
-            steps=(
-                # The list of input prompts to ask the user.
-                wiz.WizardStep(
-                    # ID where the value will be stored
-                    id="data_goal",
-                    # Display name
-                    name=Bcolors.HEADER+" What is your goal with the data? Predict, Describe or Explore"+Bcolors.ENDC,
-                    # Help message
-                    help="Enter one of Predict/Describe/Explore",
-                    validators=(wiz.required_validator),
-                    default='Explore'
-                ),
-                wiz.WizardStep(
-                    # ID where the value will be stored
-                    id="metric_accuracy",
-                    # Display name
-                    name=Bcolors.HEADER+" How important the metric 'Accuracy' is for you? 1-5: 1- Least important 5- Most Important"+Bcolors.ENDC,
-                    # Help message
-                    help="Enter 1-5: 1 being least important, and 5 being most important",
-                    validators=(wiz.required_validator),
-                    default='1'
-                ),
-                wiz.WizardStep(
-                    # ID where the value will be stored
-                    id="metric_speed",
-                    # Display name
-                    name=Bcolors.HEADER+" How important the metric 'Speed' is for you? 1-5: 1- Least important 5- Most Important"+Bcolors.ENDC,
-                    # Help message
-                    help="Enter 1-5: 1 being least important, and 5 being most important",
-                    validators=(wiz.required_validator),
-                    default='1'
-                ),
-                wiz.WizardStep(
-                    # ID where the value will be stored
-                    id="metric_interpretability",
-                    # Display name
-                    name=Bcolors.HEADER+" How important the metric 'Interpretability' is for you? 1-5: 1- Least important 5- Most Important"+Bcolors.ENDC,
-                    # Help message
-                    help="Enter 1-5: 1 being least important, and 5 being most important",
-                    validators=(wiz.required_validator),
-                    default='1'
-                ),
-                wiz.WizardStep(
-                    # ID where the value will be stored
-                    id="metric_reproducibility",
-                    # Display name
-                    name=Bcolors.HEADER+" How important the metric 'Reproducibility' is for you? 1-5: 1- Least important 5- Most Important"+Bcolors.ENDC,
-                    # Help message
-                    help="Enter 1-5: 1 being least important, and 5 being most important",
-                    validators=(wiz.required_validator),
-                    default='1'
-                ),
-                wiz.WizardStep(
-                    # ID where the value will be stored
-                    id="metric_implementation",
-                    # Display name
-                    name=Bcolors.HEADER+" How important the metric 'Ease of Implementation and Maintenance' is for you? 1-5: 1- Least important 5- Most Important"+Bcolors.ENDC,
-                    # Help message
-                    help="Enter 1-5: 1 being least important, and 5 being most important",
-                    validators=(wiz.required_validator),
-                    default='1'
-                ),
-                wiz.WizardStep(
-                    # ID where the value will be stored
-                    id="data_column",
-                    # Display name
-                    name=Bcolors.HEADER+" What does the data (columns) represent? well defined 'Features', 'signals' (Timeseries, pixels, etc) or Text - (Please type the associated number)"+Bcolors.ENDC,
-                    # Help message
-                    help="1. Well Defined Features\n 2. Signals\n 3. Text - Unstructured\n 4. None of the above\n",
-                    validators=(wiz.required_validator),
-                    default='Features'
-                ),
-                wiz.WizardStep(
-                    # ID where the value will be stored
-                    id="data_signal_type",
-                    # Display name
-                    name=Bcolors.HEADER+" If Signals, can you choose any one from the below list? "+Bcolors.ENDC,
-                    # Help message
-                    help="1. Image\n 2. Audio\n 3. Timeseries\n 4. None of the above\n 5. Not Applicable\n  ",
-                    validators=(wiz.required_validator),
-                    default='3'
-                ),
-                wiz.WizardStep(
-                    # ID where the value will be stored
-                    id="data_text_type",
-                    # Display name
-                    name=Bcolors.HEADER+" If Text, can you choose any one from the below list? "+Bcolors.ENDC,
-                    # Help message
-                    help="1. Webpages\n 2. Emails\n 3. Social-Media Posts\n 4. Books\n 5. Formal Articles\n 6. Speech converted to text\n 7. None of the above\n 8. Not Applicable\n  ",
-                    validators=(wiz.required_validator),
-                    default='3'
-                ),
-                wiz.WizardStep(
-                    # ID where the value will be stored
-                    id="data_features",
-                    # Display name
-                    name=Bcolors.HEADER+" If features, are they well defined? i.e., are all the variables well understood? "+Bcolors.ENDC,
-                    # Help message
-                    help="Y/N/NA",
-                    validators=(wiz.required_validator),
-                    default='Y'
-                ),
-                wiz.WizardStep(
-                    # ID where the value will be stored
-                    id="data_features_count",
-                    # Display name
-                    name=Bcolors.HEADER+" If features, How many are there? "+Bcolors.ENDC,
-                    # Help message
-                    help="Number or NA",
-                    validators=(wiz.required_validator),
-                    default='10'
-                ),
-                wiz.WizardStep(
-                    # ID where the value will be stored
-                    id="data_distribution",
-                    # Display name
-                    name=Bcolors.HEADER+" Are you aware of any 'Distribution' that is inherent to the data, we can take advantage of?"+Bcolors.ENDC,
-                    # Help message
-                    help="Y/N/U",
-                    validators=(wiz.required_validator),
-                    default='Y'
-                ),
-                wiz.WizardStep(
-                    # ID where the value will be stored
-                    id="data_io_relation",
-                    # Display name
-                    name=Bcolors.HEADER+" Is the probability of 'Linear Relation' between input and the output is high?"+Bcolors.ENDC,
-                    # Help message
-                    help="Y/N/U",
-                    validators=(wiz.required_validator),
-                    default='Y'
-                ),
-                wiz.WizardStep(
-                    # ID where the value will be stored
-                    id="data_correlation",
-                    # Display name
-                    name=Bcolors.HEADER+" Are you confident that there is NO high correlation among the independent variables in your day?"+Bcolors.ENDC,
-                    # Help message
-                    help="Y/N/U. Change in one  ",
-                    validators=(wiz.required_validator),
-                    default='Y'
-                ),
-                wiz.WizardStep(
-                    # ID where the value will be stored
-                    id="data_cond_indep",
-                    # Display name
-                    name=Bcolors.HEADER+" Are you confident that the variables are conditionally independent?"+Bcolors.ENDC,
-                    # Help message
-                    help="Y/N/U. If probability that it rains given lightining and thunder is same as probability that it rains given lightining, then rain and thunder are conditionally independent",
-                    validators=(wiz.required_validator),
-                    default='Y'
-                ),
-                wiz.WizardStep(
-                    # ID where the value will be stored
-                    id="data_missing",
-                    # Display name
-                    name=Bcolors.HEADER+" Are there any missing values in the data? "+Bcolors.ENDC,
-                    # Help message
-                    help="Y/N/U",
-                    validators=(wiz.required_validator),
-                    default='N'
-                ),
-                wiz.WizardStep(
-                    # ID where the value will be stored
-                    id="data_size_bytes",
-                    # Display name
-                    name=Bcolors.HEADER+" How big is the data in terms of size? (Use K/M/G Bytes unit) "+Bcolors.ENDC,
-                    # Help message
-                    help="Number(integer) and unit: K for Kilo, M for Mega and G for Giga. Ex: 10G for 10 Giga bytes",
-                    validators=(wiz.required_validator),
-                    default='1G'
-                ),
-                wiz.WizardStep(
-                    # ID where the value will be stored
-                    id="data_size_samples",
-                    # Display name
-                    name=Bcolors.HEADER+" How big is the data in terms of samples? (Use T/M/B Samples) "+Bcolors.ENDC,
-                    # Help message
-                    help="Number(integer) and unit: T for Thousand, M for Million and B for Billion. Ex: 1M for 1 Million Samples",
-                    validators=(wiz.required_validator),
-                    default='1M'
-                ),
-                wiz.WizardStep(
-                    # ID where the value will be stored
-                    id="data_type_output",
-                    # Display name
-                    name=Bcolors.HEADER+" What is the expected output data type ? (Please type number associated with type in 'help') "+Bcolors.ENDC,
-                    # Help message
-                    help=" 1:Numerical-Discrete\n 2:Numerical-Continuous\n 3:Ordinal\n 4:Categorical-Binary\n 5:Categorical-Multiclass",
-                    validators=(wiz.required_validator),
-                    default='1'
-                ),
-                wiz.WizardStep(
-                    # ID where the value will be stored
-                    id="data_output_prob",
-                    # Display name
-                    name=Bcolors.HEADER+" Is the expected output data a probability value ? "+Bcolors.ENDC,
-                    # Help message
-                    help="Y/N",
-                    validators=(wiz.required_validator),
-                    default='N'
-                ),
-            )
-        )
+        self.wiz_generic = prompt_wizard(GENERIC)
 
 
     def unsupervised_wizard(self):
         """
         The Un-Supervized Learning Wizard
         """
-        self.wiz_generic = wiz.PromptWizard(
-            name=Bcolors.OKBLUE+"Understanding Goal, Metrics, Data and Output Type"+Bcolors.ENDC,
-            description="",
-            steps=(
-                # The list of input prompts to ask the user.
-                wiz.WizardStep(
-                    # ID where the value will be stored
-                    id="unsup_goal",
-                    # Display name
-                    name=Bcolors.HEADER+" What is the main goal? (Please type number associated with type in 'help')"+Bcolors.ENDC,
-                    # Help message
-                    help="1: Explore Similar Groups (clustering) \n 2: Perform Dimensionality Reduction\n 3: Others\n",
-                    validators=(wiz.required_validator),
-                    default='1'
-                ),
-                wiz.WizardStep(
-                    # ID where the value will be stored
-                    id="unsup_dr_topic_mod",
-                    # Display name
-                    name=Bcolors.HEADER+" If dimensionality reduction, do you prefer topic modelling ? (Please type NA is you are not sure)"+Bcolors.ENDC,
-                    # Help message
-                    help="Y/N/NA",
-                    validators=(wiz.required_validator),
-                    default='NA'
-                ),
-                wiz.WizardStep(
-                    # ID where the value will be stored
-                    id="unsup_clus_dv",
-                    # Display name
-                    name=Bcolors.HEADER+" Are you aware of density variations in your data ? (Please type NA is you are not sure)"+Bcolors.ENDC,
-                    # Help message
-                    help="Y/N/NA",
-                    validators=(wiz.required_validator),
-                    default='NA'
-                ),
-                wiz.WizardStep(
-                    # ID where the value will be stored
-                    id="unsup_clus_outliers",
-                    # Display name
-                    name=Bcolors.HEADER+" Are there too many outliers in your data ? (Please type NA is you are not sure)"+Bcolors.ENDC,
-                    # Help message
-                    help="Y/N/NA",
-                    validators=(wiz.required_validator),
-                    default='NA'
-                ),
-                wiz.WizardStep(
-                    # ID where the value will be stored
-                    id="unsup_clus_groups",
-                    # Display name
-                    name=Bcolors.HEADER+" If clustering, do you know how many groups to form? (Please type NA is you are not sure)"+Bcolors.ENDC,
-                    # Help message
-                    help="Y/N/NA",
-                    validators=(wiz.required_validator),
-                    default='NA'
-                ),
-
-            )
-        )
+        self.wiz_unsupervised = prompt_wizard(UNSUPERVISED_QUESTIONS, [step for step in wizard_steps(UNSUPERVISED_QUESTIONS)
+                                                                       if step.id not in self.prefilled])
 
     def reinforcement_wizard(self):
         """
         The Reinforced Learning Wizard
         """
-        message = """
-            Reward  |--------|
-            |-------| Agent  |  Action
-            | |-----|        |-------|
-            | |	    |--------|       |
-            | |state                 |
-            | |	                     |
-            | |	   |-----------|     |
-            | |----|Environment|     |
-            |------|           |-----|
-    	           |-----------|
-            """
-        self.wiz_reinforcement = wiz.PromptWizard(
-            name=Bcolors.OKBLUE+"Reinforcement Specific"+Bcolors.ENDC,
-            description="",
-            steps=(
-                # The list of input prompts to ask the user.
-                wiz.WizardStep(
-                    # ID where the value will be stored
-                    id="ri_info",
-                    # Display name
-                    name=Bcolors.HEADER+" Type help for reference diagram for reinforcement-learning"+Bcolors.ENDC,
-                    # Help message
-                    help=message,
-                    validators=(wiz.required_validator),
-                    default='Type Help or Press Enter'
-                ),
-                wiz.WizardStep(
-                    # ID where the value will be stored
-                    id="ri_model_preference",
-                    # Display name
-                    name=Bcolors.HEADER+" Do you prefer model-based approach? (Type NA if you are not sure) "+Bcolors.ENDC,
-                    # Help message
-                    help="Y/N/NA",
-                    validators=(wiz.required_validator),
-                    default='Y'
-                ),
-                wiz.WizardStep(
-                    # ID where the value will be stored
-                    id="ri_model_availability",
-                    # Display name
-                    name=Bcolors.HEADER+" Do you have a model for model-based approach? (Type NA if not applicable) "+Bcolors.ENDC,
-                    # Help message
-                    help="Y/N/NA",
-                    validators=(wiz.required_validator),
-                    default='Y'
-                ),
-                wiz.WizardStep(
-                    # ID where the value will be stored
-                    id="ri_modelfree_value",
-                    # Display name
-                    name=Bcolors.HEADER+" In Model-Free approach, do you prefer value-based approach? (Type NA if not applicable) "+Bcolors.ENDC,
-                    # Help message
-                    help="Y/N/NA",
-                    validators=(wiz.required_validator),
-                    default='Y'
-                ),
-                wiz.WizardStep(
-                    # ID where the value will be stored
-                    id="ri_modelfree_value_state",
-                    # Display name
-                    name=Bcolors.HEADER+" In Model-Free Value-Based approach, do you prefer state-only model? (Type NA if not applicable) "+Bcolors.ENDC,
-                    # Help message
-                    help="Y/N/NA",
-                    validators=(wiz.required_validator),
-                    default='Y'
-                ),
-                wiz.WizardStep(
-                    # ID where the value will be stored
-                    id="ri_app_domain",
-                    # Display name
-                    name=Bcolors.HEADER+" What is the application domain ? (Please type number associated with type in 'help') "+Bcolors.ENDC,
-                    # Help message
-                    help=" 1:Computer Resource Mgmt.\n 2:Robotics\n 3:Traffic-Control\n 4:Reccommenders\n 5:Autonomous Vehicles\n 6:Games\n 7:Chemistry\n 8:Others\n",
-                    validators=(wiz.required_validator),
-                    default='1'
-                ),
-            )
-        )
+        self.wiz_reinforcement = prompt_wizard(REINFORCEMENT_QUESTIONS)
 
     ############### All the Run Operations ######################
     def run_mainwiz(self):
@@ -575,25 +188,29 @@ class AlgoSelectorWizard():
         """
         self.main_wizard_l1()
         self.main_l1_values = self.wiz_main_l1.run(self.shell)
-        if self.main_l1_values['data_availability'].lower() == 'y':
+        self.answers.update(self.main_l1_values)
+        if self.answers.data_availability:
             self.main_wizard_l2_b()
             self.main_l2b_values = self.wiz_main_l2_b.run(self.shell)
-            if self.main_l2b_values['data_labe'].lower() == 'y':
+            self.answers.update(self.main_l2b_values)
+            if self.answers.data_label:
                 self.supervised = True
             else:
                 self.unsupervised = True
-            if self.main_l2b_values['data_programmability'].lower() == 'y':
+            if self.answers.data_programmability:
                 print(Bcolors.FAIL+"ML is not required - Please consider alternate approaches\n"+Bcolors.ENDC)
             else:
                 self.main_wizard_l3()
                 self.main_l3_values = self.wiz_main_l3.run(self.shell)
-                if self.main_l3_values['data_knowledge'].lower() == 'y':
+                self.answers.update(self.main_l3_values)
+                if self.answers.data_knowledge:
                     print(Bcolors.OKGREEN+"Looks like you need ML, let's continue"+Bcolors.ENDC)
                     self.ml_needed = True
                 else:
                     self.main_wizard_l4()
                     self.main_l4_values = self.wiz_main_l4.run(self.shell)
-                    if self.main_l4_values['data_pattern'].lower() == 'y':
+                    self.answers.update(self.main_l4_values)
+                    if self.answers.data_pattern:
                         print(Bcolors.OKGREEN+"Looks like you need ML, let's continue"+Bcolors.ENDC)
                         self.ml_needed = True
                     else:
@@ -601,7 +218,8 @@ class AlgoSelectorWizard():
         else:
             self.main_wizard_l2_a()
             self.main_l2a_values = self.wiz_main_l2_a.run(self.shell)
-            if self.main_l2a_values['data_creativity'].lower() == 'y':
+            self.answers.update(self.main_l2a_values)
+            if self.answers.data_creativity:
                 print(Bcolors.OKGREEN+"Looks like you need ML, let's continue"+Bcolors.ENDC)
                 self.ml_needed = True
                 self.reinforcement = True
@@ -612,15 +230,23 @@ class AlgoSelectorWizard():
         """
         Run Generic Wizard
         """
-        self.gen_wizard()
-        self.gen_values = self.wiz_generic.run(self.shell)
+        self.wiz_generic = prompt_wizard(GENERIC, [step for step in wizard_steps(GENERIC)
+                                                   if step.id not in self.prefilled])
+        values = self.wiz_generic.run(self.shell)
+        self.answers.update(values)
+        self.gen_values = dict(self.prefilled)
+        self.gen_values.update((key, values[key]) for key in values)
 
     def run_unsupervised_wizard(self):
         """
         Run UnSupervised Learning Wizard.
         """
         self.unsupervised_wizard()
-        self.unsup_values = self.wiz_unsupervised.run(self.shell)
+        values = self.wiz_unsupervised.run(self.shell)
+        self.answers.update(values)
+        self.unsup_values = dict((step.id, self.prefilled[step.id]) for step in UNSUPERVISED_QUESTIONS.steps
+                                 if step.id in self.prefilled)
+        self.unsup_values.update((key, values[key]) for key in values)
 
     def run_reinforcement_wizard(self):
         """
@@ -628,184 +254,316 @@ class AlgoSelectorWizard():
         """
         self.reinforcement_wizard()
         self.ri_values = self.wiz_reinforcement.run(self.shell)
+        self.answers.update(self.ri_values)
+
+    def prefill(self, values):
+        """
+        Answers measured rather than asked (e.g. by the profiler) - they
+        are not prompted for again.
+        """
+        self.answers.update(values)
+        self.gen_values.update(values)
+        self.prefilled.update(values)
+
+    def prefill_profile(self):
+        """
+        Prefill what self.profile measured. The target column is only
+        the output, and not a feature, for labelled data.
+        """
+        values = self.profile.answers(labelled=self.supervised)
+        self.prefill(values)
+        print(Bcolors.OKBLUE+"Measured from {0}: {1}".format(
+            self.profile.path, ", ".join("{0}={1}".format(key, values[key]) for key in sorted(values)))+Bcolors.ENDC)
+
+    def prefill_correlation(self):
+        """
+        Prefill data_correlation from the self.correlation screening
+        (a correlation.Report) - it is only asked for labelled data.
+        """
+        import correlation
+        self.prefill({'data_correlation': correlation.answer(self.correlation)})
+        for line in correlation.describe(self.correlation):
+            print(Bcolors.OKBLUE+line+Bcolors.ENDC)
+
+    def prefill_relations(self):
+        """
+        Prefill data_io_relation and data_cond_indep from the
+        self.relations tests (a relations.Report) - only the answers
+        confident enough; the others are still asked.
+        """
+        import relations
+        self.prefill(relations.answers(self.relations))
+        for line in relations.describe(self.relations):
+            print(Bcolors.OKBLUE+line+Bcolors.ENDC)
+
+    def prefill_clusters(self):
+        """
+        Prefill the clustering questions from the self.clusters analysis
+        (a clusters.Report).
+        """
+        import clusters
+        self.prefill(clusters.answers(self.clusters))
+        for line in clusters.describe(self.clusters):
+            print(Bcolors.OKBLUE+line+Bcolors.ENDC)
+
+    def prefill_timeseries(self):
+        """
+        Prefill the data questions from the self.timeseries profile (a
+        timeseries.Report) - the data is time-series signals.
+        """
+        import timeseries
+        for line in timeseries.describe(self.timeseries):
+            print(Bcolors.OKBLUE+line+Bcolors.ENDC)
+        values = timeseries.answers(self.timeseries)
+        self.prefill(values)
+        print(Bcolors.OKBLUE+"Measured from {0}: {1}".format(
+            self.timeseries.path, ", ".join("{0}={1}".format(key, values[key]) for key in sorted(values)))+Bcolors.ENDC)
+
+    def prefill_corpus(self):
+        """
+        Prefill the data questions from the self.corpus profile (a
+        corpus.Report) - the data is text.
+        """
+        import corpus
+        for line in corpus.describe(self.corpus):
+            print(Bcolors.OKBLUE+line+Bcolors.ENDC)
+        values = corpus.answers(self.corpus)
+        self.prefill(values)
+        print(Bcolors.OKBLUE+"Measured from {0}: {1}".format(
+            self.corpus.path, ", ".join("{0}={1}".format(key, values[key]) for key in sorted(values)))+Bcolors.ENDC)
+
+    def question_steps(self):
+        """
+        The Generic, Unsupervised and Reinforcement wizard steps, by id,
+        with the WizardSpec and the values they belong to.
+        """
+        if not self.steps:
+            for spec, values in ((GENERIC, self.gen_values),
+                                 (UNSUPERVISED_QUESTIONS, self.unsup_values),
+                                 (REINFORCEMENT_QUESTIONS, self.ri_values)):
+                for step in wizard_steps(spec):
+                    self.steps[step.id] = (step, spec, values)
+        return self.steps
+
+    def ask(self, question):
+        """
+        Ask a single question, by WizardStep id.
+        """
+        step, wizard, values = self.question_steps()[question]
+        first = not any(asked in values for asked, (_, owner, _) in self.steps.items()
+                        if owner is wizard)
+        while True:
+            single = prompt_wizard(wizard, (step,))
+            answer = single.run(self.shell, print_header=first)
+            if answer is None:
+                raise KeyboardInterrupt
+            try:
+                self.answers.update({question: answer[question]})
+            except ValueError as err:
+                print(Bcolors.FAIL+" Invalid answer {0}, please try again".format(err)+Bcolors.ENDC)
+                first = False
+                continue
+            values[question] = answer[question]
+            return
+
+    def ask_adaptively(self):
+        """
+        Ask only the questions that can still change the decision, in
+        the order the decision tree needs them, and stop at the leaf.
+        """
+        if self.supervised:
+            learning = SUPERVISED
+        elif self.unsupervised:
+            learning = UNSUPERVISED
+        else:
+            learning = REINFORCEMENT
+        while True:
+            recommendation, question = resolve(self.answers, learning)
+            if recommendation is not None:
+                recommendation = self.fit_to_hardware(recommendation)
+                print(recommendation.message)
+                return recommendation
+            self.ask(question)
+
+    def fit_to_hardware(self, recommendation):
+        """
+        With self.hardware set, report the memory headroom and swap in the
+        out-of-core variant when the data will not fit.
+        """
+        if self.hardware is None:
+            return recommendation
+        self.advice = hardware.advise(recommendation, self.answers, self.hardware)
+        if self.advice is None:
+            return recommendation
+        color = Bcolors.OKBLUE if self.advice.headroom >= 0 else Bcolors.WARNING
+        for line in hardware.describe(self.advice):
+            print(color+line+Bcolors.ENDC)
+        return self.advice.recommendation
+
+    def inference(self):
+        """
+        The derived answers, as used by the decision engine.
+        """
+        return Inference(self.data_size, self.interpretability, self.faster,
+                         self.reproducibility, self.ftod_ratio)
 
     def decide_unsupervised(self):
         """
         Decide which Unsupervised-learning to use
         """
-        repro = False
-        clus_prob = False
-        if int(self.unsup_values['unsup_goal']) == 1:
-            # Clustering
-            if 'high' in self.data_size:
-                if not self.reproducibility:
-                    clus_prob = True
-                else:
-                    repro = True
-            else:
-                if 'y' in self.unsup_values['unsup_clus_dv'].tolower():
-                    if 'y' in self.unsup_values['unsup_clus_groups'].tolower():
-                        clus_prob = True
-                    else:
-                        print("Unsupervised Learning model to consider: Hierarchical Clustering")
-                        return
-                else:
-                    repro = True
-            if repro:
-                if 'y' in self.unsup_values['unsup_clus_outliers'].tolower():
-                    print("Unsupervised Learning model to consider: Hierarchical Clustering")
-                else:
-                    print("Unsupervised Learning model to consider: DBSCAN")
-                return
-            if clus_prob:
-                if 'y' in self.gen_values['data_output_prob'].tolower():
-                    print("Unsupervised Learning model to consider: Gaussian Mixture")
-                else:
-                    print("Unsupervised Learning model to consider: KMeans")
-                return
-        elif int(self.unsup_values['unsup_goal']) == 2:
-            # Dimensionality Reduction
-            if 'y' in self.unsup_values['unsup_dr_topic_mod'].tolower():
-                if 'y' in self.gen_values['data_output_prob'].tolower():
-                    print("Unsupervised Learning model to consider: SVD")
-                else:
-                    print("Unsupervised Learning model to consider: LDA")
-            else:
-                print("Unsupervised Learning model to consider: PCA")
-        else:
-            print("Sorry. We need to discuss, please connect with Anuket Thoth Project <sridhar.rao@spirent.com>")
+        recommendation = self.fit_to_hardware(get_engine().unsupervised(self.answers, self.inference()))
+        print(recommendation.message)
+        return recommendation
 
     def decide_reinforcement(self):
         """
         Decide which reinforement learning to use.
         """
-        if (int(self.gen_values['data_type_output']) == 2 or
-                'y' in self.ri_values['ri_model_preference'].tolower()):
-            # Model Bsaed
-            if 'y' in self.ri_values['ri_model_availability'].tolower():
-                print("Reinforcement Learning model to consider - AlphaZero")
-            else:
-                print("Reinforcement Learning models to consider - World Models, I2A, MBMF, and MBVE")
-        elif 'n' in self.ri_values['ri_model_preference'].tolower():
-            # Model-Free based approach.
-            if 'y' not in self.ri_values['ri_modelfree_value'].tolower():
-                print("Reinforcement Learning models to consider: Policy Gradient and Actor Critic")
-            else:
-                if 'y' in self.ri_values['ri_modelfree_value_state'].tolower():
-                    print("Reinforcement Learning models to consider - Monte Carlo, TD(0), and TD(Lambda)")
-                else:
-                    print("Reinforcement Learning models to consider - SARSA, QLearning, Deep Queue Nets")
-        else:
-            # Default
-            print("Sorry. We need to discuss, please connect with Anuket Thoth Project <sridhar.rao@spirent.com>")
+        recommendation = get_engine().reinforcement(self.answers)
+        print(recommendation.message)
+        return recommendation
 
     def perform_inference(self):
         """
         Perform Inferences. Used across all 3 types.
         """
-        # Decide whether data is Low or High
-        self.data_size = 'unknown'
-        if ('k' in self.gen_values['data_size_bytes'].lower() or
-                't' in self.gen_values['data_size_samples']):
-            self.data_size = 'low'
-
-        if int(self.gen_values['metric_interpretability']) >= 3 :
-            self.interpretability = True
-        if int(self.gen_values['metric_speed']) >= 3 :
-            self.faster = True
-        if int(self.gen_values['metric_reproducibility']) >= 3 :
-            self.reproducibility = True
-
-        # Decide Features relative to Data (ftod_ratio) - high/low
-        if ('k' in self.gen_values['data_size_bytes'].lower() or
-                't' in self.gen_values['data_size_samples']):
-            if int(self.gen_values['data_features_count']) > 50:
-                self.ftod_ratio = 'high'
-        elif ('m' in self.gen_values['data_size_bytes'].lower() or
-                'm' in self.gen_values['data_size_samples']):
-            if int(self.gen_values['data_features_count']) > 5000:
-                self.ftod_ratio = 'high'
-        else:
-            if int(self.gen_values['data_features_count']) > 500000:
-                self.ftod_ratio = 'high'
-
+        inference = infer(self.answers)
+        self.data_size = inference.data_size
+        self.interpretability = inference.interpretability
+        self.faster = inference.faster
+        self.reproducibility = inference.reproducibility
+        self.ftod_ratio = inference.ftod_ratio
 
     def decide_supervised(self):
         """
         Decide which Supervised learning to use.
         """
-        if 'high' in self.data_size:
-            # Cover: DT, RF, RNN, CNN, ANN and Naive Bayes
-            if self.interpretability:
-                if self.faster:
-                    print("Supervised Learning model to consider  - Decision Tree")
-                else:
-                    print("Supervised Learning model to consider  - Random Forest")
-            else:
-                if int(self.gen_values['data_column']) == 3:
-                    print("Supervised Learning model to consider  - RNN")
-                elif (int(self.gen_values['data_column']) == 2 and
-                        int(self.gen_values['data_signal_type']) == 1):
-                    print("Supervised Learning model to consider  - CNN")
-                elif (int(self.gen_values['data_column']) == 2 and
-                        (int(self.gen_values['data_signal_type']) == 2 or
-                            int(self.gen_values['data_signal_type']) == 3)):
-                    if 'y' in self.gen_values['data_output_prob'].tolower():
-                        print("Supervised Learning model to consider  - Naive Bayes")
-                    else:
-                        print("Supervised Learning model to consider  - ANN")
-                else:
-                    print("Supervised model to consider  Learning - ANN")
-        elif 'low' in self.data_size:
-            from_b = False
-            # Cover: Regressions
-            if 'high' in self.ftod_ratio:
-                from_b = True
-            else:
-                print("Supervised Learning model to consider  - SVN with Gaussian Kernel")
-                return
-            if int(self.gen_values['data_type_output']) != 2:
-                from_b = True
-            else:
-                if 'y' in self.gen_values['data_io_relation'].tolower():
-                    print("Supervised Learning model to consider  - Linear Regression or Linear SVM")
-                else:
-                    print("Supervised Learning model to consider  - Polynomial Regression or nonLinear SVM")
-                return
-            if from_b:
-                if int(self.gen_values['data_output_type']) == 4:
-                    if 'y' in self.gen_values['data_output_prob'].tolower():
-                        if 'y' in self.gen_values['data_cond_indep'].tolower():
-                            print("Supervised Learning model to consider  - Naive Bayes")
-                        else:
-                            if 'y' in self.gen_values['data_correlation'].tolower():
-                                print("Supervised Learning model to consider  - LASSO or Ridge Regression")
-                            else:
-                                print("Supervised Learning model to consider  - Logistic Regression")
-                    else:
-                        print("Supervised Learning model to consider  - Polynomial Regression or nonLinear SVM")
-
-                else:
-                    print("Supervised Learning model to consider - KNN")
-        else:
-            # Default
-            print("Sorry. We need to discuss, please connect with Anuket Thoth Project <sridhar.rao@spirent.com>")
-
-    def ask_and_decide(self):
+        recommendation = self.fit_to_hardware(get_engine().supervised(self.answers, self.inference()))
+        print(recommendation.message)
+        return recommendation
+
+    def show_costs(self, recommendation, ask_sizes=False):
+        """
+        Rank the candidate algorithms by estimated training time and
+        memory for the data's n x d. With ask_sizes, the size questions
+        the decision did not need are asked first.
+        """
+        if recommendation is None or recommendation.fallback:
+            return None
+        if ask_sizes and recommendation.learning in (SUPERVISED, UNSUPERVISED):
+            for question in ('data_size_samples', 'data_features_count', 'data_size_bytes'):
+                if getattr(self.answers, question) is None:
+                    self.ask(question)
+        limit = None
+        recommended = recommendation.leaf
+        if self.advice is not None:
+            limit = self.advice.available * hardware.USABLE_FRACTION
+            recommended = self.advice.original.leaf
+        ranking = costs.rank_answers(self.answers, recommendation.learning, limit)
+        if ranking:
+            print(Bcolors.OKBLUE+"Estimated training cost of the candidates, cheapest first:"+Bcolors.ENDC)
+            for line in costs.format_ranking(ranking, recommended):
+                print(line)
+        return ranking
+
+    def show_scores(self, recommendation):
+        """
+        With self.top set, rank the candidates by the weighted metric
+        ratings and the data-regime fit, asking the metric questions the
+        decision did not need (they are the weights).
+        """
+        if self.top is None or recommendation is None or recommendation.fallback:
+            return None
+        import scoring
+        for question in METRIC_FIELDS:
+            if getattr(self.answers, question) is None:
+                self.ask(question)
+        ranked = scoring.top_k(self.answers, recommendation.learning, self.top)
+        print(Bcolors.OKBLUE+"Best scoring candidates for your metrics and data:"+Bcolors.ENDC)
+        for line in scoring.format_top(ranked, recommendation.leaf.rsplit('_ooc', 1)[0]):
+            print(line)
+        return ranked
+
+    def bake_off(self, recommendation):
+        """
+        With a self.bakeoff budget (seconds) and a profiled data file,
+        train the recommendation and the next cheapest candidates on a
+        sample of the data, when 'Accuracy' or 'Speed' matters (3+).
+        """
+        if (self.bakeoff is None or self.profile is None or recommendation is None
+                or recommendation.fallback or recommendation.learning not in (SUPERVISED, UNSUPERVISED)):
+            return None
+        import bakeoff
+        for question in ('metric_accuracy', 'metric_speed'):
+            if getattr(self.answers, question) is None:
+                self.ask(question)
+        if not bakeoff.wanted(self.answers):
+            return None
+        print(Bcolors.OKBLUE+"Training the candidates on a sample of {0}, for at most {1:g}s ...".format(
+            self.profile.path, self.bakeoff)+Bcolors.ENDC)
+        try:
+            trials = bakeoff.bake_off(recommendation, self.answers, self.profile.path, self.profile.delimiter,
+                                      self.profile.target, self.bakeoff,
+                                      self.hardware.cores if self.hardware is not None else None)
+        except (OSError, ValueError) as err:
+            print(Bcolors.WARNING+"Cannot bake off the candidates: {0}".format(err)+Bcolors.ENDC)
+            return None
+        for line in bakeoff.format_trials(trials, recommendation.leaf.rsplit('_ooc', 1)[0]):
+            print(line)
+        return trials
+
+    def record_session(self, recommendation):
+        """
+        With a self.history store (a sessions.SessionStore), show what the
+        most similar stored sessions were recommended and used, then
+        store this one.
+        """
+        if self.history is None:
+            return None
+        import sessions
+        if recommendation is not None and len(self.history):
+            for line in sessions.describe(self.history.nearest(self.answers), len(self.history)):
+                print(Bcolors.OKBLUE+line+Bcolors.ENDC)
+        session = self.history.append(self.answers, recommendation)
+        print("Stored as session {0} in {1}".format(session, self.history.path))
+        return session
+
+    def ask_and_decide(self, adaptive=True, ask_sizes=False):
         """
         THe Main Engine
         """
+        recommendation = None
         self.run_mainwiz()
-        if self.ml_needed:
+        if self.ml_needed and self.profile is not None:
+            self.prefill_profile()
+        if self.ml_needed and self.timeseries is not None:
+            self.prefill_timeseries()
+        if self.ml_needed and self.corpus is not None:
+            self.prefill_corpus()
+        if self.ml_needed and self.supervised and self.correlation is not None:
+            self.prefill_correlation()
+        if self.ml_needed and self.supervised and self.relations is not None:
+            self.prefill_relations()
+        if self.ml_needed and self.unsupervised and self.clusters is not None:
+            self.prefill_clusters()
+        if self.ml_needed and adaptive:
+            recommendation = self.ask_adaptively()
+        elif self.ml_needed:
             self.run_generic_wizard()
+            self.perform_inference()
             if self.supervised:
-                self.decide_supervised()
+                recommendation = self.decide_supervised()
             elif self.unsupervised:
                 self.run_unsupervised_wizard()
-                self.decide_unsupervised()
+                recommendation = self.decide_unsupervised()
             elif self.reinforcement:
                 self.run_reinforcement_wizard()
-                self.decide_reinforcement()
+                recommendation = self.decide_reinforcement()
+        self.show_costs(recommendation, ask_sizes)
+        self.show_scores(recommendation)
+        self.bake_off(recommendation)
+        self.record_session(recommendation)
+        return recommendation
 
 
 def signal_handler(signum, frame):
@@ -816,15 +574,177 @@ def signal_handler(signum, frame):
     print(signum, frame)
     sys.exit(0)
 
-def main():
+def run_batch(args):
+    """
+    The Batch (headless) Function
+    """
+    import batch
+    count = batch.run_batch(args.batch, args.output, args.input_format, args.output_format,
+                            args.columnar, args.chunk_size, args.workers, args.top)
+    print("Processed {0} answer records".format(count), file=sys.stderr)
+
+def parse_args(argv=None):
+    """
+    Command line options
+    """
+    parser = argparse.ArgumentParser(description="Suggests which ML approach is more applicable for a particular data and usecase.")
+    parser.add_argument('--all-questions', action='store_true',
+                        help="Ask the full questionnaire, instead of only the questions that can change the suggestion")
+    parser.add_argument('--costs', action='store_true',
+                        help="Always rank the candidates by estimated training cost, asking the data size questions if needed")
+    parser.add_argument('--profile', metavar='FILE',
+                        help="Measure the data size, feature count, missing values, output type, whether the output is a probability and whether the features follow a known distribution from a delimited data file")
+    parser.add_argument('--delimiter', metavar='CHAR',
+                        help="Delimiter of the --profile file (default: sniffed)")
+    parser.add_argument('--target', metavar='COLUMN',
+                        help="Output column of the --profile file, by name or index (default: the last)")
+    parser.add_argument('--correlation', action='store_true',
+                        help="Screen the --profile file's features for highly correlated groups, to answer the correlation question (requires numpy)")
+    parser.add_argument('--relations', action='store_true',
+                        help="Test a sample of the --profile file for a linear input/output relation and conditionally independent features, to answer those questions (requires numpy)")
+    parser.add_argument('--clusters', action='store_true',
+                        help="Analyse a sample of the --profile file's rows for density variations, outliers and a clear number of groups, to answer the clustering questions (requires numpy)")
+    parser.add_argument('--timeseries', metavar='FILE',
+                        help="Profile a file of many time series (.npy, or delimited: one series per line, or id,time,value rows) to answer the signal and data questions (requires numpy)")
+    parser.add_argument('--series-layout', choices=('auto', 'npy', 'wide', 'long'), default='auto',
+                        help="Layout of the --timeseries file (default: .npy by extension, long for 2-3 columns, else wide)")
+    parser.add_argument('--corpus', metavar='PATH',
+                        help="Profile a directory of documents or a JSONL file (one per line) to answer the text-type and data-size questions, with --workers processes")
+    parser.add_argument('--text-field', default='text', metavar='NAME',
+                        help="Field holding the text of a JSONL --corpus record (default: text)")
+    parser.add_argument('--top', type=int, metavar='K',
+                        help="Rank the top K candidates by your metric ratings and the data-regime fit - also per batch record (requires numpy)")
+    parser.add_argument('--bakeoff', type=float, metavar='SECONDS',
+                        help="When Accuracy or Speed is rated 3+, train the top candidates on a sample of the --profile file within SECONDS (requires numpy)")
+    parser.add_argument('--history', metavar='DIR',
+                        help="Session store: show what the most similar past sessions got, and store this one (requires numpy)")
+    parser.add_argument('--memory', metavar='SIZE',
+                        help="Memory available for training, e.g. 64g (default: detected)")
+    parser.add_argument('--cores', type=int, metavar='N',
+                        help="Cores available for training (default: detected)")
+    parser.add_argument('--no-hardware', action='store_true',
+                        help="Do not check the recommendation against the machine's memory")
+    parser.add_argument('--metrics', metavar='FILE',
+                        help="Record step/wizard/decision timings and leaf counts, and write them to FILE at exit")
+    parser.add_argument('--metrics-format', choices=('json', 'prometheus'),
+                        help="Metrics format (default: prometheus for .prom/.txt, else json)")
+    parser.add_argument('--serve', metavar='ADDRESS',
+                        help="Server mode: host interactive sessions on HOST:PORT or unix:PATH, in one process")
+    parser.add_argument('--api', metavar='HOST:PORT',
+                        help="Serve the JSON recommendation API (POST /recommend) - --workers processes share the port")
+    parser.add_argument('--idle-timeout', type=float, default=300.0, metavar='SECONDS',
+                        help="Close server sessions idle for longer than this (default 300)")
+    parser.add_argument('--batch', metavar='FILE',
+                        help="Headless mode: read answer records (JSONL or CSV, '-' for stdin) instead of prompting")
+    parser.add_argument('--output', metavar='FILE', default='-',
+                        help="Where batch results are written (JSONL or CSV, default stdout)")
+    parser.add_argument('--input-format', choices=('jsonl', 'csv'),
+                        help="Batch input format (default: from the file name)")
+    parser.add_argument('--output-format', choices=('jsonl', 'csv'),
+                        help="Batch output format (default: from the file name)")
+    parser.add_argument('--columnar', action='store_true',
+                        help="Evaluate batch records in NumPy columns (requires numpy)")
+    parser.add_argument('--chunk-size', type=int, default=65536, metavar='N',
+                        help="Records per columnar chunk or worker shard (default 65536)")
+    parser.add_argument('--workers', type=int, default=1, metavar='N',
+                        help="Worker processes for batch mode, --profile, --corpus and --api, 0 for one per core (default 1)")
+    return parser.parse_args(argv)
+
+def main(argv=None):
     """
     The Main Function
     """
+    args = parse_args(argv)
+    if args.top is not None and args.top < 1:
+        sys.exit("--top needs K >= 1")
+    if args.cores is not None and args.cores < 1:
+        sys.exit("--cores needs N >= 1")
+    if args.batch:
+        run_batch(args)
+        return
+    if args.api:
+        import api
+        api.serve(args.api, args.workers)
+        return
+    if args.serve:
+        import server
+        server.serve(args.serve, args.idle_timeout)
+        return
+    if args.correlation and not args.profile:
+        sys.exit("--correlation needs a --profile file")
+    if args.relations and not args.profile:
+        sys.exit("--relations needs a --profile file")
+    if args.clusters and not args.profile:
+        sys.exit("--clusters needs a --profile file")
+    if args.bakeoff is not None and not args.profile:
+        sys.exit("--bakeoff needs a --profile file")
+    profile = None
+    screening = None
+    tests = None
+    structure = None
+    if args.profile:
+        import profiler
+        try:
+            profile = profiler.profile_file(args.profile, args.delimiter, args.target,
+                                            workers=args.workers)
+            if args.correlation:
+                import correlation
+                screening = correlation.screen_file(args.profile, args.delimiter, args.target)
+            if args.relations:
+                import relations
+                tests = relations.evaluate_file(args.profile, args.delimiter, args.target)
+            if args.clusters:
+                import clusters
+                structure = clusters.analyse_file(args.profile, args.delimiter, target=args.target,
+                                                  labelled=args.target is not None)
+        except (OSError, ValueError) as err:
+            sys.exit("Cannot profile {0}: {1}".format(args.profile, err))
+    series = None
+    if args.timeseries:
+        import timeseries
+        try:
+            series = timeseries.profile_series(args.timeseries, args.delimiter, args.series_layout)
+        except (OSError, ValueError) as err:
+            sys.exit("Cannot profile {0}: {1}".format(args.timeseries, err))
+    documents = None
+    if args.corpus:
+        import corpus
+        try:
+            documents = corpus.profile_corpus(args.corpus, args.text_field, args.workers)
+        except (OSError, ValueError) as err:
+            sys.exit("Cannot profile {0}: {1}".format(args.corpus, err))
+    history = None
+    if args.history:
+        import sessions
+        try:
+            history = sessions.SessionStore(args.history)
+        except (OSError, ValueError) as err:
+            sys.exit("Cannot open the session store {0}: {1}".format(args.history, err))
+    machine = None
+    if not args.no_hardware:
+        try:
+            machine = hardware.detect(args.memory, args.cores)
+        except ValueError:
+            sys.exit("--memory needs a size such as 64g or 16000000000, not {0!r}".format(args.memory))
+    registry = metrics.enable(AlgoSelectorWizard) if args.metrics else None
     try:
         algowiz = AlgoSelectorWizard()
-        algowiz.ask_and_decide()
+        algowiz.profile = profile
+        algowiz.correlation = screening
+        algowiz.relations = tests
+        algowiz.clusters = structure
+        algowiz.timeseries = series
+        algowiz.corpus = documents
+        algowiz.bakeoff = args.bakeoff
+        algowiz.history = history
+        algowiz.top = args.top
+        algowiz.hardware = machine
+        algowiz.ask_and_decide(adaptive=not args.all_questions, ask_sizes=args.costs)
     except(KeyboardInterrupt, MemoryError):
         print("Some Error Occured - No Suggestion can be provided")
+    finally:
+        if registry is not None:
+            metrics.export(registry, args.metrics, args.metrics_format)
 
     print("Thanks for using the Algoselector-Wizard, " +
             "Hope our suggestion will be useful")
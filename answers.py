@@ -0,0 +1,193 @@
+# Copyright 2021 Spirent Communications.
+# sridhar.rao@spirent.com
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Typed Answers.
+Every WizardStep answer is validated and converted exactly once, into
+the small ints and booleans the decision engine works on, and kept in
+a compact __slots__ record.
+"""
+
+from __future__ import print_function
+import functools
+import sys
+
+# pylint: disable=line-too-long,too-few-public-methods
+
+# Y/N/U answers - same 'y' in / 'n' in substring tests as the wizard.
+UNKNOWN, YES, NO = 0, 1, 2
+# A count answered with 'NA'.
+NOT_APPLICABLE = -1
+
+# Textual answers accepted for data_column, besides the numbers in 'help'.
+COLUMN_ALIASES = {'features': 1, 'signals': 2, 'text': 3}
+GOALS = {'predict': 1, 'describe': 2, 'explore': 3}
+
+
+def yes_no(value):
+    """
+    Canonical code of a Y/N/U (or NA) answer.
+    """
+    value = value.lower()
+    if 'y' in value:
+        return YES
+    if 'n' in value:
+        return NO
+    return UNKNOWN
+
+def exactly_yes(value):
+    """
+    The strict Y test of the main wizard - 'yes' is not 'y' there.
+    """
+    return value.strip().lower() == 'y'
+
+def choice(value, options, aliases=None):
+    """
+    Canonical code of a numbered answer - 0 for anything not in options.
+    """
+    if aliases:
+        alias = aliases.get(value.strip().lower())
+        if alias is not None:
+            return alias
+    number = int(value)
+    return number if 1 <= number <= options else 0
+
+def count(value):
+    """
+    A number, or NA.
+    """
+    if value.strip().lower() == 'na':
+        return NOT_APPLICABLE
+    return int(value)
+
+def size(value):
+    """
+    Data size with its unit, e.g. '10g' - interned, as there are few distinct ones.
+    """
+    return sys.intern(value.strip().lower())
+
+def goal(value):
+    """
+    Predict/Describe/Explore code, 0 for anything else.
+    """
+    return GOALS.get(value.strip().lower(), 0)
+
+
+# WizardStep id groups, by the kind of answer.
+GATE_FIELDS = ('data_availability', 'data_label', 'data_programmability',
+               'data_knowledge', 'data_pattern', 'data_creativity')
+METRIC_FIELDS = ('metric_accuracy', 'metric_speed', 'metric_interpretability',
+                 'metric_reproducibility', 'metric_implementation')
+COUNT_FIELDS = ('data_features_count',)
+SIZE_FIELDS = ('data_size_bytes', 'data_size_samples')
+# Numbered answers: field -> (number of options in 'help', aliases)
+CHOICE_FIELDS = {
+    'data_column': (4, COLUMN_ALIASES),
+    'data_signal_type': (5, None),
+    'data_text_type': (8, None),
+    'data_type_output': (5, None),
+    'unsup_goal': (3, None),
+    'ri_app_domain': (8, None),
+}
+YES_NO_FIELDS = ('data_features', 'data_distribution', 'data_io_relation',
+                 'data_correlation', 'data_cond_indep', 'data_missing',
+                 'data_output_prob', 'unsup_dr_topic_mod', 'unsup_clus_dv',
+                 'unsup_clus_outliers', 'unsup_clus_groups',
+                 'ri_model_preference', 'ri_model_availability',
+                 'ri_modelfree_value', 'ri_modelfree_value_state')
+
+CONVERTERS = {'data_goal': goal}
+CONVERTERS.update((field, exactly_yes) for field in GATE_FIELDS)
+CONVERTERS.update((field, int) for field in METRIC_FIELDS)
+CONVERTERS.update((field, count) for field in COUNT_FIELDS)
+CONVERTERS.update((field, size) for field in SIZE_FIELDS)
+CONVERTERS.update((field, yes_no) for field in YES_NO_FIELDS)
+CONVERTERS.update((field, functools.partial(choice, options=options, aliases=aliases))
+                  for field, (options, aliases) in CHOICE_FIELDS.items())
+FIELDS = tuple(sorted(CONVERTERS))
+
+# Answers repeat a lot across sessions - converted values (immutable
+# ints, bools and interned strings) are remembered per field and raw answer.
+CACHE_SIZE = 1024
+_CONVERTED = dict((field, {}) for field in CONVERTERS)
+
+
+class Answers():
+    """
+    All the answers of one session. Unanswered questions are None.
+    """
+    __slots__ = FIELDS
+
+    def __init__(self, *values):
+        """
+        Perform Initialization, from any number of WizardStep-id -> answer dicts.
+        """
+        for field in FIELDS:
+            setattr(self, field, None)
+        for answers in values:
+            self.update(answers)
+
+    def update(self, values):
+        """
+        Validate and convert answers - a dict, or the Namespace a
+        PromptWizard returns. Ids that are not questions (ri_info,
+        record ids, ...) are ignored.
+        Raises ValueError naming the answer that does not convert.
+        """
+        for field in values:
+            converted = _CONVERTED.get(field)
+            if converted is None:
+                continue
+            value = values[field]
+            try:
+                setattr(self, field, converted[value])
+                continue
+            except (KeyError, TypeError):
+                pass
+            try:
+                code = CONVERTERS[field](value)
+            except (ValueError, AttributeError):
+                raise ValueError("{0}={1!r}".format(field, value)) from None
+            if len(converted) < CACHE_SIZE:
+                converted[value] = code
+            setattr(self, field, code)
+        return self
+
+    def require(self, *fields):
+        """
+        Raise KeyError for the first of fields that is unanswered.
+        """
+        for field in fields:
+            if getattr(self, field) is None:
+                raise KeyError(field)
+
+    def as_dict(self):
+        """
+        The answered questions, as converted.
+        """
+        return dict((field, getattr(self, field)) for field in FIELDS
+                    if getattr(self, field) is not None)
+
+    def __eq__(self, other):
+        return isinstance(other, Answers) and all(
+            getattr(self, field) == getattr(other, field) for field in FIELDS)
+
+    def __ne__(self, other):
+        return not self == other
+
+    __hash__ = None
+
+    def __repr__(self):
+        return "Answers({0!r})".format(self.as_dict())
@@ -0,0 +1,232 @@
+# Copyright 2021 Spirent Communications.
+# sridhar.rao@spirent.com
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+JSON Recommendation API.
+A small HTTP/1.1 server (asyncio Protocol, keep-alive and pipelining)
+over the headless decision logic - no wizard or Shell per request.
+    POST /recommend   {answers}            -> {result}
+    POST /recommend   [{answers}, ...]     -> [{result}, ...]
+    POST /recommend?top=K                  -> results with the top K scored candidates
+    GET  /health                           -> {"status": "ok"}
+Answers and results are the batch mode records. A batch is evaluated in
+one columnar (NumPy) pass when numpy is installed, and scored (top=K,
+requires numpy) in one matrix product. Identical single
+payloads are answered from a small cache of encoded responses.
+With workers > 1, that many processes share the port (SO_REUSEPORT).
+"""
+
+from __future__ import print_function
+import asyncio
+import importlib.util
+import json
+import multiprocessing
+import os
+import socket
+
+import batch
+from engine import get_engine
+
+# pylint: disable=line-too-long
+
+MAX_BODY = 64 * 2 ** 20
+MAX_HEADER = 16384
+CACHE_SIZE = 4096
+# Batches at least this large go through the columnar evaluator.
+COLUMNAR_BATCH = 32
+
+REASONS = {200: 'OK', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed',
+           411: 'Length Required', 413: 'Payload Too Large', 431: 'Request Header Fields Too Large',
+           501: 'Not Implemented'}
+
+HAVE_COLUMNAR = importlib.util.find_spec('numpy') is not None
+
+
+def _error(message):
+    return {'error': message}
+
+def evaluate_payload(payload, engine=None, top=None):
+    """
+    Result(s) for a decoded JSON payload: an answer object, or a list of
+    them (evaluated in one pass) - with top, each with its top scored
+    candidates. Raises ValueError for anything else.
+    """
+    engine = engine or get_engine()
+    if isinstance(payload, dict):
+        record = batch.json_record(payload)
+        if top:
+            return next(batch.evaluate_records([record], top=top))
+        return batch.evaluate(record, 0, engine)
+    if not isinstance(payload, list) or not all(isinstance(item, dict) for item in payload):
+        raise ValueError("expected an answer object or a list of them")
+    records = [batch.json_record(item) for item in payload]
+    return list(batch.evaluate_records(records, HAVE_COLUMNAR and len(records) >= COLUMNAR_BATCH,
+                                       max(len(records), 1), top=top))
+
+
+def response(status, body, keep_alive=True):
+    """
+    A complete HTTP/1.1 response, with a JSON body (bytes).
+    """
+    return b''.join((
+        "HTTP/1.1 {0} {1}\r\nContent-Type: application/json\r\nContent-Length: {2}\r\n{3}\r\n".format(
+            status, REASONS[status], len(body), '' if keep_alive else 'Connection: close\r\n').encode(),
+        body))
+
+def _json(value):
+    return json.dumps(value, sort_keys=True).encode() + b'\n'
+
+HEALTH = _json({'status': 'ok'})
+
+
+class RecommendationProtocol(asyncio.Protocol):
+    """
+    One HTTP connection. Requests are parsed from the buffered bytes as
+    they arrive, and answered in order.
+    """
+    def __init__(self, cache, engine):
+        """
+        Perform Initialization.
+        """
+        self.cache = cache
+        self.engine = engine
+        self.transport = None
+        self.buffer = bytearray()
+
+    def connection_made(self, transport):
+        self.transport = transport
+
+    def data_received(self, data):
+        self.buffer += data
+        while self.transport is not None and not self.transport.is_closing():
+            end = self.buffer.find(b'\r\n\r\n')
+            if end < 0:
+                if len(self.buffer) > MAX_HEADER:
+                    self._reply(431, _json(_error("headers too large")), False)
+                return
+            head = bytes(self.buffer[:end]).decode('latin-1').split('\r\n')
+            parts = head[0].split()
+            if len(parts) != 3:
+                self._reply(400, _json(_error("bad request line")), False)
+                return
+            method, target, version = parts
+            headers = {}
+            for line in head[1:]:
+                name, _, value = line.partition(':')
+                headers[name.strip().lower()] = value.strip()
+            if 'chunked' in headers.get('transfer-encoding', '').lower():
+                self._reply(501, _json(_error("chunked bodies are not supported")), False)
+                return
+            try:
+                length = int(headers.get('content-length', '0'))
+            except ValueError:
+                length = -1
+            if length < 0:
+                self._reply(400, _json(_error("bad Content-Length")), False)
+                return
+            if length > MAX_BODY:
+                self._reply(413, _json(_error("body too large")), False)
+                return
+            if len(self.buffer) < end + 4 + length:
+                return
+            body = bytes(self.buffer[end + 4:end + 4 + length])
+            del self.buffer[:end + 4 + length]
+            connection = headers.get('connection', '').lower()
+            keep_alive = connection != 'close' and (version == 'HTTP/1.1' or connection == 'keep-alive')
+            status, payload = self.route(method, target, body)
+            self._reply(status, payload, keep_alive)
+
+    def _reply(self, status, body, keep_alive):
+        self.transport.write(response(status, body, keep_alive))
+        if not keep_alive:
+            self.transport.close()
+
+    def route(self, method, target, body):
+        """
+        (status, JSON body) for one request.
+        """
+        path, _, query = target.partition('?')
+        if path == '/health':
+            return 200, HEALTH
+        if path != '/recommend':
+            return 404, _json(_error("not found"))
+        if method != 'POST':
+            return 405, _json(_error("use POST"))
+        top = None
+        for name, _, value in (item.partition('=') for item in query.split('&') if item):
+            if name == 'top':
+                if not value.isdigit() or int(value) < 1:
+                    return 400, _json(_error("top must be a positive integer"))
+                if not HAVE_COLUMNAR:
+                    return 501, _json(_error("top needs numpy"))
+                top = int(value)
+        key = (top, body) if top else body
+        cached = self.cache.get(key)
+        if cached is not None:
+            return 200, cached
+        try:
+            payload = json.loads(body)
+            result = _json(evaluate_payload(payload, self.engine, top))
+        except ValueError as err:
+            return 400, _json(_error(str(err)))
+        if isinstance(payload, dict):
+            if len(self.cache) >= CACHE_SIZE:
+                self.cache.clear()
+            self.cache[key] = result
+        return 200, result
+
+    def connection_lost(self, exc):
+        self.transport = None
+
+
+async def _serve(host, port, reuse_port):
+    cache = {}
+    engine = get_engine()
+    loop = asyncio.get_event_loop()
+    server = await loop.create_server(lambda: RecommendationProtocol(cache, engine), host, port,
+                                      reuse_port=reuse_port, backlog=1024)
+    async with server:
+        await server.serve_forever()
+
+def _run(host, port, reuse_port):
+    try:
+        asyncio.run(_serve(host, port, reuse_port))
+    except KeyboardInterrupt:
+        pass
+
+def serve(address, workers=1):
+    """
+    Serve the API on HOST:PORT (':PORT' for all interfaces), in workers
+    processes (0 for one per core) sharing the port.
+    """
+    host, _, port = address.rpartition(':')
+    host, port = host or None, int(port)
+    if workers == 0:
+        workers = os.cpu_count() or 1
+    print("Serving the recommendation API on http://{0}:{1}/recommend".format(host or '0.0.0.0', port))
+    if workers == 1:
+        _run(host, port, False)
+        return
+    if not hasattr(socket, 'SO_REUSEPORT'):
+        raise ValueError("several workers need SO_REUSEPORT")
+    processes = [multiprocessing.Process(target=_run, args=(host, port, True)) for _ in range(workers)]
+    for process in processes:
+        process.start()
+    try:
+        for process in processes:
+            process.join()
+    except KeyboardInterrupt:
+        for process in processes:
+            process.join()
@@ -0,0 +1,929 @@
+# Copyright 2021 Spirent Communications.
+# sridhar.rao@spirent.com
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Time-budgeted Bake-off.
+Trains the recommended algorithm and the next cheapest candidates on a
+sample of the user's data, each in its own worker process, and measures
+the fit time, the predict throughput and a holdout score. Whatever has
+not finished when the wall-clock budget runs out is terminated.
+Uses scikit-learn when it is installed, and otherwise small NumPy
+baselines of the same model families - everything runs offline.
+Requires numpy.
+"""
+
+from __future__ import print_function
+import csv
+import importlib.util
+import mmap
+import multiprocessing
+import os
+import time
+from collections import namedtuple
+from multiprocessing.connection import wait
+
+import numpy as np
+
+import costs
+import hardware
+import profiler
+from engine import LEAVES, LEAF_IDS, SUPERVISED, UNSUPERVISED
+
+# pylint: disable=line-too-long,too-many-arguments,too-many-locals,too-few-public-methods,invalid-name,attribute-defined-outside-init,unused-argument
+
+SAMPLE_ROWS = 5000
+# ... and at most this many values, for wide data.
+SAMPLE_VALUES = 5 * 10 ** 6
+# Larger files are sampled at random offsets instead of read through.
+SCAN_LIMIT = 64 * 2 ** 20
+HOLDOUT = 0.25
+CANDIDATES = 4
+BUDGET = 60.0
+# Rows used for the O(m^2) silhouette score of the clusterings.
+SILHOUETTE_ROWS = 1000
+# Unsupervised leaves scored by the holdout variance their projection
+# keeps - the other unsupervised leaves are clusterings.
+PROJECTIONS = ('unsup_pca', 'unsup_svd')
+
+Sample = namedtuple('Sample', 'features target classification names')
+Trial = namedtuple('Trial', 'leaf algorithm backend status fit_seconds predict_rate score metric')
+
+
+############### Sampling ######################
+
+def _reservoir(stream, rows, rng):
+    """
+    A uniform sample of up to rows non-blank lines (Algorithm R).
+    """
+    sample = []
+    seen = 0
+    for line in stream:
+        if not line.strip():
+            continue
+        if seen < rows:
+            sample.append(line)
+        else:
+            slot = rng.integers(0, seen + 1)
+            if slot < rows:
+                sample[slot] = line
+        seen += 1
+    return sample
+
+def _seek_sample(path, start, rows, rng):
+    """
+    About rows lines, each the first whole line after a random offset
+    past start - one short read per row, however large the file. Long
+    lines are a little less likely to be drawn than short ones.
+    """
+    with open(path, 'rb') as stream, \
+         mmap.mmap(stream.fileno(), 0, access=mmap.ACCESS_READ) as data:
+        sample = []
+        for offset in np.unique(rng.integers(start, len(data), rows)):
+            first = data.find(b'\n', int(offset)) + 1
+            last = data.find(b'\n', first)
+            line = data[first:len(data) if last < 0 else last]
+            if first and line.strip():
+                sample.append(line.decode('utf-8', 'replace'))
+    return sample
+
+def _encode(values):
+    """
+    A column of strings as floats: numbers as they are, anything else as
+    category codes, and missing values as NaN.
+    """
+    missing = [value in profiler.MISSING_VALUES for value in values]
+    try:
+        return np.array([np.nan if gap else float(value) for value, gap in zip(values, missing)]), False
+    except ValueError:
+        codes = dict((value, code) for code, value in enumerate(sorted(set(values))))
+        return np.array([np.nan if gap else codes[value] for value, gap in zip(values, missing)], dtype=float), True
+
+def load_sample(path, delimiter=None, target=None, labelled=True, rows=SAMPLE_ROWS, seed=0):
+    """
+    A Sample of up to rows rows of a delimited file: the features as a
+    float matrix (missing values filled with the column mean) and, for
+    labelled data, the target column - class codes when it holds at most
+    MAX_CLASSES distinct integers or any non-numbers, else the values.
+    Files larger than SCAN_LIMIT are sampled without reading them through.
+    """
+    shape = profiler.layout(path, delimiter)
+    rows = max(10, min(rows, SAMPLE_VALUES // max(shape.columns, 1)))
+    if os.path.getsize(path) - shape.start > SCAN_LIMIT:
+        lines = _seek_sample(path, shape.start, rows, np.random.default_rng(seed))
+    else:
+        with open(path, 'r', encoding='utf-8', errors='replace', newline='') as stream:
+            stream.seek(shape.start)
+            lines = _reservoir(stream, rows, np.random.default_rng(seed))
+    table = [(row + [''] * shape.columns)[:shape.columns]
+             for row in csv.reader(lines, delimiter=shape.delimiter)]
+    if not table:
+        raise ValueError("no data rows")
+    columns = [[field.strip() for field in column] for column in zip(*table)]
+    names = shape.header or [str(column) for column in range(shape.columns)]
+    keep = list(range(shape.columns))
+    y = None
+    classification = False
+    if labelled and shape.columns > 1:
+        index = profiler.target_index(shape.header, shape.columns, target)
+        keep.remove(index)
+        y, categorical = _encode(columns[index])
+        known = ~np.isnan(y)
+        distinct = np.unique(y[known])
+        classification = categorical or (len(distinct) <= profiler.MAX_CLASSES and np.all(distinct == np.round(distinct)))
+        if classification:
+            y = np.searchsorted(distinct, y)
+        columns = [[value for value, good in zip(column, known) if good] for column in columns]
+        y = y[known]
+    X = np.column_stack([_encode(columns[column])[0] for column in keep] or [np.zeros((len(columns[0]), 0))])
+    with np.errstate(invalid='ignore'):
+        means = np.nan_to_num(np.nanmean(X, axis=0)) if len(X) else np.zeros(len(keep))
+    gaps = np.isnan(X)
+    X[gaps] = np.take(means, np.nonzero(gaps)[1])
+    return Sample(X, y, classification, [names[column] for column in keep])
+
+
+############### Built-in Baselines ######################
+
+def _one_hot(y, classes):
+    out = np.zeros((len(y), classes))
+    out[np.arange(len(y)), y] = 1.0
+    return out
+
+def _votes(labels, classes, axis):
+    """
+    Count of each class along axis - rows x classes.
+    """
+    return np.stack([(labels == label).sum(axis=axis) for label in range(classes)], axis=-1)
+
+def _ridge(X, Y, alpha):
+    """
+    Closed-form ridge weights, with an unpenalized intercept.
+    """
+    mean_x, mean_y = X.mean(axis=0), Y.mean(axis=0)
+    Xc = X - mean_x
+    weights = np.linalg.solve(Xc.T @ Xc + alpha * np.eye(X.shape[1]), Xc.T @ (Y - mean_y))
+    return weights, mean_y - mean_x @ weights
+
+
+class _Supervised():
+    """
+    fit(X, y) / predict(X), for classes 0..k-1 or real values.
+    """
+    def __init__(self, classification, seed=0):
+        """
+        Perform Initialization.
+        """
+        self.classification = classification
+        self.rng = np.random.default_rng(seed)
+        self.classes = 0
+
+    def _targets(self, y):
+        if self.classification:
+            self.classes = int(y.max()) + 1
+            return _one_hot(y, self.classes)
+        return y[:, None]
+
+    def _output(self, scores):
+        return scores.argmax(axis=1) if self.classification else scores[:, 0]
+
+
+class Ridge(_Supervised):
+    """
+    Least squares with an L2 penalty; alpha=0 is Linear Regression.
+    """
+    def __init__(self, classification, seed=0, alpha=1.0):
+        """
+        Perform Initialization.
+        """
+        _Supervised.__init__(self, classification, seed)
+        self.alpha = alpha
+
+    def expand(self, X):
+        """
+        The model's input features.
+        """
+        return X
+
+    def fit(self, X, y):
+        """
+        Fit.
+        """
+        self.weights, self.bias = _ridge(self.expand(X), self._targets(y), max(self.alpha, 1e-8))
+        return self
+
+    def predict(self, X):
+        """
+        Predict.
+        """
+        return self._output(self.expand(X) @ self.weights + self.bias)
+
+
+class Polynomial(Ridge):
+    """
+    Ridge on the degree-2 terms of (at most 40 of) the features.
+    """
+    LIMIT = 40
+
+    def fit(self, X, y):
+        """
+        Fit.
+        """
+        self.columns = np.sort(self.rng.permutation(X.shape[1])[:self.LIMIT])
+        return Ridge.fit(self, X, y)
+
+    def expand(self, X):
+        """
+        The features and their pairwise products.
+        """
+        X = X[:, self.columns]
+        first, second = np.triu_indices(X.shape[1])
+        return np.hstack([X, X[:, first] * X[:, second]])
+
+
+class RandomFeatures(Ridge):
+    """
+    Ridge on random Fourier features - an approximate Gaussian-kernel SVM.
+    """
+    FEATURES = 500
+
+    def fit(self, X, y):
+        """
+        Fit.
+        """
+        self.projection = self.rng.standard_normal((X.shape[1], self.FEATURES)) / np.sqrt(max(X.shape[1], 1))
+        self.phase = self.rng.uniform(0, 2 * np.pi, self.FEATURES)
+        return Ridge.fit(self, X, y)
+
+    def expand(self, X):
+        """
+        cos(XW + b) features.
+        """
+        return np.sqrt(2.0 / self.FEATURES) * np.cos(X @ self.projection + self.phase)
+
+
+class Logistic(_Supervised):
+    """
+    Softmax regression by full-batch gradient descent (Linear
+    Regression for real-valued targets).
+    """
+    ITERATIONS = 200
+
+    def fit(self, X, y):
+        """
+        Fit.
+        """
+        if not self.classification:
+            self.linear = Ridge(False, alpha=1e-8).fit(X, y)
+            return self
+        Y = self._targets(y)
+        self.weights = np.zeros((X.shape[1], self.classes))
+        self.bias = np.zeros(self.classes)
+        rate = 1.0
+        for _ in range(self.ITERATIONS):
+            error = self._probabilities(X) - Y
+            self.weights -= rate * (X.T @ error / len(X) + 1e-4 * self.weights)
+            self.bias -= rate * error.mean(axis=0)
+        return self
+
+    def _probabilities(self, X):
+        scores = X @ self.weights + self.bias
+        scores = np.exp(scores - scores.max(axis=1, keepdims=True))
+        return scores / scores.sum(axis=1, keepdims=True)
+
+    def predict(self, X):
+        """
+        Predict.
+        """
+        if not self.classification:
+            return self.linear.predict(X)
+        return self._probabilities(X).argmax(axis=1)
+
+
+class NaiveBayes(_Supervised):
+    """
+    Gaussian Naive Bayes (classification only).
+    """
+    def fit(self, X, y):
+        """
+        Fit.
+        """
+        self.classes = int(y.max()) + 1
+        self.means = np.array([X[y == label].mean(axis=0) if np.any(y == label) else np.zeros(X.shape[1])
+                               for label in range(self.classes)])
+        self.variances = np.array([X[y == label].var(axis=0) if np.any(y == label) else np.ones(X.shape[1])
+                                   for label in range(self.classes)]) + 1e-9 + 1e-9 * X.var(axis=0).max()
+        self.priors = np.log(np.bincount(y, minlength=self.classes) + 1.0)
+        return self
+
+    def predict(self, X):
+        """
+        Predict.
+        """
+        scores = [self.priors[label] - 0.5 * np.sum(np.log(self.variances[label]) + (X - self.means[label]) ** 2 / self.variances[label], axis=1)
+                  for label in range(self.classes)]
+        return np.argmax(scores, axis=0)
+
+
+class Neighbors(_Supervised):
+    """
+    Brute-force k nearest neighbours.
+    """
+    K = 5
+    BLOCK = 1024
+
+    def fit(self, X, y):
+        """
+        Fit (remember the data).
+        """
+        self.X, self.y = X, y
+        self.norms = (X ** 2).sum(axis=1)
+        if self.classification:
+            self.classes = int(y.max()) + 1
+        return self
+
+    def predict(self, X):
+        """
+        Predict, BLOCK rows at a time.
+        """
+        out = []
+        k = min(self.K, len(self.X))
+        for start in range(0, len(X), self.BLOCK):
+            block = X[start:start + self.BLOCK]
+            distances = self.norms - 2 * block @ self.X.T
+            nearest = self.y[np.argpartition(distances, k - 1, axis=1)[:, :k]]
+            if self.classification:
+                out.append(_votes(nearest, self.classes, axis=1).argmax(axis=1))
+            else:
+                out.append(nearest.mean(axis=1))
+        return np.concatenate(out) if out else np.zeros(0)
+
+
+class Tree(_Supervised):
+    """
+    CART on quantile-binned features (gini, or variance for real values).
+    With max_features, each split considers that many random features.
+    """
+    DEPTH = 8
+    MIN_LEAF = 5
+    BINS = 16
+
+    def __init__(self, classification, seed=0, max_features=None):
+        """
+        Perform Initialization.
+        """
+        _Supervised.__init__(self, classification, seed)
+        self.max_features = max_features
+
+    def _codes(self, X):
+        return np.column_stack([np.searchsorted(edges, X[:, column], side='right')
+                                for column, edges in enumerate(self.edges)])
+
+    def fit(self, X, y):
+        """
+        Fit.
+        """
+        quantiles = np.linspace(0, 1, self.BINS + 1)[1:-1]
+        self.edges = [np.unique(np.quantile(X[:, column], quantiles)) for column in range(X.shape[1])]
+        codes = self._codes(X)
+        if self.classification:
+            self.classes = int(y.max()) + 1
+        self.nodes = []
+        self._grow(codes, y, np.arange(len(y)), 0)
+        self.split_column = np.array([node[0] for node in self.nodes])
+        self.split_bin = np.array([node[1] for node in self.nodes])
+        self.children = np.array([node[2] for node in self.nodes])
+        self.values = np.array([node[3] for node in self.nodes])
+        return self
+
+    def _value(self, y):
+        if self.classification:
+            return np.bincount(y, minlength=self.classes).argmax()
+        return y.mean()
+
+    def _grow(self, codes, y, rows, depth):
+        node = len(self.nodes)
+        self.nodes.append([-1, 0, (0, 0), self._value(y[rows])])
+        if depth >= self.DEPTH or len(rows) < 2 * self.MIN_LEAF or np.all(y[rows] == y[rows[0]]):
+            return node
+        columns = np.arange(codes.shape[1])
+        if self.max_features:
+            columns = np.sort(self.rng.choice(codes.shape[1], min(self.max_features, codes.shape[1]), replace=False))
+        split = self._best_split(codes[np.ix_(rows, columns)], y[rows])
+        if split is None:
+            return node
+        column, threshold = columns[split[0]], split[1]
+        left = codes[rows, column] <= threshold
+        self.nodes[node][:2] = [column, threshold]
+        self.nodes[node][2] = (self._grow(codes, y, rows[left], depth + 1),
+                               self._grow(codes, y, rows[~left], depth + 1))
+        return node
+
+    def _best_split(self, codes, y):
+        count, width = codes.shape
+        slot = codes + np.arange(width) * self.BINS
+        if self.classification:
+            histogram = np.bincount((slot * self.classes + y[:, None]).ravel(),
+                                    minlength=width * self.BINS * self.classes).reshape((width, self.BINS, self.classes))
+            left = np.cumsum(histogram, axis=1)[:, :-1]
+            right = histogram.sum(axis=1)[:, None] - left
+            sizes_left, sizes_right = left.sum(axis=2), right.sum(axis=2)
+            with np.errstate(invalid='ignore', divide='ignore'):
+                gain = (left ** 2).sum(axis=2) / sizes_left + (right ** 2).sum(axis=2) / sizes_right
+        else:
+            sizes = np.bincount(slot.ravel(), minlength=width * self.BINS).reshape((width, self.BINS))
+            sums = np.bincount(slot.ravel(), weights=np.repeat(y, width), minlength=width * self.BINS).reshape((width, self.BINS))
+            sizes_left, sums_left = np.cumsum(sizes, axis=1)[:, :-1], np.cumsum(sums, axis=1)[:, :-1]
+            sizes_right, sums_right = count - sizes_left, sums.sum(axis=1)[:, None] - sums_left
+            with np.errstate(invalid='ignore', divide='ignore'):
+                gain = sums_left ** 2 / sizes_left + sums_right ** 2 / sizes_right
+        gain[(sizes_left < self.MIN_LEAF) | (sizes_right < self.MIN_LEAF) | np.isnan(gain)] = -np.inf
+        best = np.argmax(gain)
+        if not np.isfinite(gain.flat[best]):
+            return None
+        return divmod(int(best), self.BINS - 1)
+
+    def predict(self, X):
+        """
+        Predict.
+        """
+        codes = self._codes(X)
+        node = np.zeros(len(X), dtype=int)
+        for _ in range(self.DEPTH):
+            inner = self.split_column[node] >= 0
+            if not inner.any():
+                break
+            rows = np.flatnonzero(inner)
+            current = node[rows]
+            go_left = codes[rows, self.split_column[current]] <= self.split_bin[current]
+            node[rows] = np.where(go_left, self.children[current, 0], self.children[current, 1])
+        return self.values[node]
+
+
+class Forest(_Supervised):
+    """
+    Bagged Trees, each on a bootstrap sample, splitting on the best of
+    sqrt(d) random features.
+    """
+    TREES = 20
+
+    def fit(self, X, y):
+        """
+        Fit.
+        """
+        width = max(1, int(np.sqrt(X.shape[1])))
+        if self.classification:
+            self.classes = int(y.max()) + 1
+        self.trees = []
+        for _ in range(self.TREES):
+            rows = self.rng.integers(0, len(X), len(X))
+            tree = Tree(self.classification, self.rng.integers(2 ** 32), max_features=width)
+            self.trees.append(tree.fit(X[rows], y[rows]))
+        return self
+
+    def predict(self, X):
+        """
+        Predict - the majority vote, or the mean.
+        """
+        votes = np.array([tree.predict(X) for tree in self.trees])
+        if self.classification:
+            return _votes(votes.astype(int), self.classes, axis=0).argmax(axis=1)
+        return votes.mean(axis=0)
+
+
+class Network(_Supervised):
+    """
+    One hidden ReLU layer, trained with Adam on mini-batches.
+    """
+    HIDDEN = 64
+    EPOCHS = 20
+    BATCH = 64
+    RATE = 1e-3
+
+    def fit(self, X, y):
+        """
+        Fit.
+        """
+        Y = self._targets(y)
+        if not self.classification:
+            self.offset, self.scale = Y.mean(), Y.std() or 1.0
+            Y = (Y - self.offset) / self.scale
+        shapes = [(X.shape[1], self.HIDDEN), (self.HIDDEN,), (self.HIDDEN, Y.shape[1]), (Y.shape[1],)]
+        self.params = [self.rng.standard_normal(shape) * np.sqrt(2.0 / shape[0]) if len(shape) == 2 else np.zeros(shape)
+                       for shape in shapes]
+        moments = [[np.zeros(shape), np.zeros(shape)] for shape in shapes]
+        step = 0
+        for _ in range(self.EPOCHS):
+            order = self.rng.permutation(len(X))
+            for start in range(0, len(X), self.BATCH):
+                batch = order[start:start + self.BATCH]
+                step += 1
+                for param, moment, grad in zip(self.params, moments, self._gradients(X[batch], Y[batch])):
+                    moment[0] = 0.9 * moment[0] + 0.1 * grad
+                    moment[1] = 0.999 * moment[1] + 0.001 * grad ** 2
+                    param -= self.RATE * (moment[0] / (1 - 0.9 ** step)) / (np.sqrt(moment[1] / (1 - 0.999 ** step)) + 1e-8)
+        return self
+
+    def _forward(self, X):
+        hidden = np.maximum(X @ self.params[0] + self.params[1], 0)
+        out = hidden @ self.params[2] + self.params[3]
+        if self.classification:
+            out = np.exp(out - out.max(axis=1, keepdims=True))
+            out /= out.sum(axis=1, keepdims=True)
+        return hidden, out
+
+    def _gradients(self, X, Y):
+        hidden, out = self._forward(X)
+        error = (out - Y) / len(X)
+        back = (error @ self.params[2].T) * (hidden > 0)
+        return [X.T @ back, back.sum(axis=0), hidden.T @ error, error.sum(axis=0)]
+
+    def predict(self, X):
+        """
+        Predict.
+        """
+        out = self._forward(X)[1]
+        if self.classification:
+            return out.argmax(axis=1)
+        return out[:, 0] * self.scale + self.offset
+
+
+class KMeans():
+    """
+    Lloyd's algorithm from a k-means++ start.
+    """
+    ITERATIONS = 50
+
+    def __init__(self, clusters=costs.CLUSTERS, seed=0):
+        """
+        Perform Initialization.
+        """
+        self.clusters = clusters
+        self.rng = np.random.default_rng(seed)
+
+    def _distances(self, X):
+        return (X ** 2).sum(axis=1)[:, None] - 2 * X @ self.centers.T + (self.centers ** 2).sum(axis=1)
+
+    def _seed(self, X):
+        centers = [X[self.rng.integers(len(X))]]
+        for _ in range(1, min(self.clusters, len(X))):
+            nearest = np.min([((X - center) ** 2).sum(axis=1) for center in centers], axis=0)
+            total = nearest.sum()
+            centers.append(X[self.rng.choice(len(X), p=nearest / total)] if total > 0 else X[self.rng.integers(len(X))])
+        return np.array(centers)
+
+    def fit(self, X, y=None):
+        """
+        Fit.
+        """
+        self.centers = self._seed(X)
+        for _ in range(self.ITERATIONS):
+            labels = self.predict(X)
+            centers = np.array([X[labels == label].mean(axis=0) if np.any(labels == label) else self.centers[label]
+                                for label in range(len(self.centers))])
+            if np.allclose(centers, self.centers):
+                break
+            self.centers = centers
+        return self
+
+    def predict(self, X):
+        """
+        The nearest center of each row.
+        """
+        return self._distances(X).argmin(axis=1)
+
+
+class GaussianMixture(KMeans):
+    """
+    Diagonal-covariance Gaussian mixture, fitted by EM.
+    """
+    def _log_likelihoods(self, X):
+        return (np.log(self.weights) - 0.5 * np.sum(np.log(self.variances), axis=1)
+                - 0.5 * (((X[:, None, :] - self.centers) ** 2) / self.variances).sum(axis=2))
+
+    def fit(self, X, y=None):
+        """
+        Fit.
+        """
+        self.centers = self._seed(X)
+        self.variances = np.tile(X.var(axis=0) + 1e-6, (len(self.centers), 1))
+        self.weights = np.full(len(self.centers), 1.0 / len(self.centers))
+        for _ in range(self.ITERATIONS):
+            scores = self._log_likelihoods(X)
+            scores = np.exp(scores - scores.max(axis=1, keepdims=True))
+            resp = scores / scores.sum(axis=1, keepdims=True)
+            totals = resp.sum(axis=0) + 1e-10
+            self.weights = totals / len(X)
+            self.centers = resp.T @ X / totals[:, None]
+            self.variances = resp.T @ X ** 2 / totals[:, None] - self.centers ** 2 + 1e-6
+        return self
+
+    def predict(self, X):
+        """
+        The most likely component of each row.
+        """
+        return self._log_likelihoods(X).argmax(axis=1)
+
+
+class Projection():
+    """
+    The top components of the data by SVD - centred for PCA.
+    """
+    def __init__(self, components, centred=True):
+        """
+        Perform Initialization.
+        """
+        self.components = components
+        self.centred = centred
+
+    def fit(self, X, y=None):
+        """
+        Fit.
+        """
+        self.mean = X.mean(axis=0) if self.centred else np.zeros(X.shape[1])
+        self.basis = np.linalg.svd(X - self.mean, full_matrices=False)[2][:self.components]
+        return self
+
+    def transform(self, X):
+        """
+        Project.
+        """
+        return (X - self.mean) @ self.basis.T
+
+    def inverse_transform(self, projected):
+        """
+        Reconstruct from the projection.
+        """
+        return projected @ self.basis + self.mean
+
+
+def _components(features):
+    """
+    Components kept by PCA/SVD: half the features, at most COMPONENTS.
+    """
+    return max(1, min(costs.COMPONENTS, features // 2))
+
+# leaf -> built-in baseline factory(classification, seed, features)
+BASELINES = {
+    'sup_linear': lambda classification, seed, features: Ridge(classification, seed, alpha=0.0),
+    'sup_lasso': lambda classification, seed, features: Ridge(classification, seed),
+    'sup_poly': lambda classification, seed, features: Polynomial(classification, seed),
+    'sup_svm': lambda classification, seed, features: RandomFeatures(classification, seed),
+    'sup_logistic': lambda classification, seed, features: Logistic(classification, seed),
+    'sup_nb': lambda classification, seed, features: NaiveBayes(classification, seed) if classification else None,
+    'sup_knn': lambda classification, seed, features: Neighbors(classification, seed),
+    'sup_dt': lambda classification, seed, features: Tree(classification, seed),
+    'sup_rf': lambda classification, seed, features: Forest(classification, seed),
+    'sup_ann': lambda classification, seed, features: Network(classification, seed),
+    'unsup_kmeans': lambda classification, seed, features: KMeans(seed=seed),
+    'unsup_gmm': lambda classification, seed, features: GaussianMixture(seed=seed),
+    'unsup_pca': lambda classification, seed, features: Projection(_components(features)),
+    'unsup_svd': lambda classification, seed, features: Projection(_components(features), centred=False),
+}
+
+
+def _sklearn_model(leaf, classification, seed, features):
+    """
+    The scikit-learn estimator for leaf, or None if there is none.
+    """
+    components = _components(features)
+    # pylint: disable=import-outside-toplevel
+    from sklearn import cluster, decomposition, ensemble, linear_model, mixture, naive_bayes, neighbors, neural_network, pipeline, preprocessing, svm, tree
+    if classification:
+        factories = {
+            'sup_linear': lambda: svm.LinearSVC(random_state=seed),
+            'sup_lasso': linear_model.RidgeClassifier,
+            'sup_poly': lambda: pipeline.make_pipeline(preprocessing.PolynomialFeatures(2), linear_model.RidgeClassifier()),
+            'sup_svm': svm.SVC,
+            'sup_logistic': lambda: linear_model.LogisticRegression(max_iter=1000),
+            'sup_nb': naive_bayes.GaussianNB,
+            'sup_knn': neighbors.KNeighborsClassifier,
+            'sup_dt': lambda: tree.DecisionTreeClassifier(random_state=seed),
+            'sup_rf': lambda: ensemble.RandomForestClassifier(random_state=seed),
+            'sup_ann': lambda: neural_network.MLPClassifier(random_state=seed),
+        }
+    else:
+        factories = {
+            'sup_linear': linear_model.LinearRegression,
+            'sup_lasso': linear_model.Lasso,
+            'sup_poly': lambda: pipeline.make_pipeline(preprocessing.PolynomialFeatures(2), linear_model.Ridge()),
+            'sup_svm': svm.SVR,
+            'sup_knn': neighbors.KNeighborsRegressor,
+            'sup_dt': lambda: tree.DecisionTreeRegressor(random_state=seed),
+            'sup_rf': lambda: ensemble.RandomForestRegressor(random_state=seed),
+            'sup_ann': lambda: neural_network.MLPRegressor(random_state=seed),
+        }
+    factories.update({
+        'unsup_kmeans': lambda: cluster.KMeans(costs.CLUSTERS, n_init=1, random_state=seed),
+        'unsup_gmm': lambda: mixture.GaussianMixture(costs.CLUSTERS, random_state=seed),
+        'unsup_dbscan': cluster.DBSCAN,
+        'unsup_hc': lambda: cluster.AgglomerativeClustering(costs.CLUSTERS),
+        'unsup_pca': lambda: decomposition.PCA(components),
+        'unsup_svd': lambda: decomposition.TruncatedSVD(components, random_state=seed),
+    })
+    factory = factories.get(leaf)
+    return None if factory is None else factory()
+
+def sklearn_available():
+    """
+    True if scikit-learn can be imported.
+    """
+    return importlib.util.find_spec('sklearn') is not None
+
+def make_model(leaf, classification, backend, seed=0, features=1):
+    """
+    An untrained model for leaf from backend ('sklearn' or 'builtin'),
+    for features input columns - or None if backend has none.
+    """
+    if backend == 'sklearn':
+        return _sklearn_model(leaf, classification, seed, features)
+    factory = BASELINES.get(leaf)
+    return None if factory is None else factory(classification, seed, features)
+
+
+############### Scoring ######################
+
+def silhouette(X, labels):
+    """
+    Mean silhouette coefficient of a clustering (0 for a single cluster).
+    """
+    if len(np.unique(labels)) < 2:
+        return 0.0
+    squares = (X ** 2).sum(axis=1)
+    distances = np.sqrt(np.maximum(squares[:, None] - 2 * X @ X.T + squares, 0))
+    names, labels = np.unique(labels, return_inverse=True)
+    sizes = np.bincount(labels, minlength=len(names))
+    totals = np.column_stack([distances[:, labels == label].sum(axis=1) for label in range(len(names))])
+    own = sizes[labels]
+    inner = totals[np.arange(len(X)), labels] / np.maximum(own - 1, 1)
+    totals[np.arange(len(X)), labels] = np.inf
+    outer = (totals / sizes).min(axis=1)
+    scores = np.where(own > 1, (outer - inner) / np.maximum(np.maximum(outer, inner), 1e-12), 0.0)
+    return float(scores.mean())
+
+def _score(leaf, model, X_test, y_test, classification):
+    """
+    (metric, score, predict seconds) of a trained model on the holdout,
+    by the kind of leaf: variance kept for PROJECTIONS, silhouette for
+    the clusterings, accuracy or R^2 for supervised learning.
+    """
+    start = time.perf_counter()
+    if leaf in PROJECTIONS:
+        projected = model.transform(X_test)
+        seconds = time.perf_counter() - start
+        residual = X_test - model.inverse_transform(projected)
+        total = ((X_test - X_test.mean(axis=0)) ** 2).sum()
+        return 'variance', float(1 - (residual ** 2).sum() / total) if total else 1.0, seconds
+    if LEAVES[LEAF_IDS[leaf]].learning == UNSUPERVISED:
+        labels = model.predict(X_test) if hasattr(model, 'predict') else model.fit_predict(X_test)
+        seconds = time.perf_counter() - start
+        return 'silhouette', silhouette(X_test[:SILHOUETTE_ROWS], labels[:SILHOUETTE_ROWS]), seconds
+    predicted = model.predict(X_test)
+    seconds = time.perf_counter() - start
+    if classification:
+        return 'accuracy', float(np.mean(predicted == y_test)), seconds
+    total = ((y_test - y_test.mean()) ** 2).sum()
+    return 'R^2', float(1 - ((y_test - predicted) ** 2).sum() / total) if total else 0.0, seconds
+
+
+############### Running ######################
+
+def holdout_split(sample, holdout=HOLDOUT, seed=0):
+    """
+    (X_train, y_train, X_test, y_test) - standardized with the training
+    rows' mean and deviation.
+    """
+    order = np.random.default_rng(seed).permutation(len(sample.features))
+    cut = max(1, int(len(order) * (1 - holdout)))
+    train, test = order[:cut], order[cut:]
+    X = sample.features
+    mean, deviation = X[train].mean(axis=0), X[train].std(axis=0)
+    deviation[deviation == 0] = 1.0
+    X = (X - mean) / deviation
+    y = sample.target
+    return (X[train], None if y is None else y[train],
+            X[test], None if y is None else y[test])
+
+def trial(leaf, backend, data, classification, seed=0):
+    """
+    Train and score one leaf: (status, fit seconds, predict rows/s, score, metric).
+    """
+    X_train, y_train, X_test, y_test = data
+    model = make_model(leaf, classification, backend, seed, X_train.shape[1])
+    if model is None:
+        return 'no baseline', None, None, None, None
+    start = time.perf_counter()
+    model.fit(X_train, y_train)
+    fit_seconds = time.perf_counter() - start
+    metric, score, seconds = _score(leaf, model, X_test, y_test, classification)
+    rate = len(X_test) / seconds if seconds > 0 else None
+    return 'ok', fit_seconds, rate, score, metric
+
+def _trial_process(conn, leaf, backend, data, classification, seed):
+    try:
+        conn.send(trial(leaf, backend, data, classification, seed))
+    except Exception as err:  # pylint: disable=broad-except
+        conn.send(('error: {0}'.format(err), None, None, None, None))
+    finally:
+        conn.close()
+
+def candidates(recommendation, answers, count=CANDIDATES, samples=None, features=None):
+    """
+    The leaves to bake off: the recommended one, then the cheapest other
+    candidates by the cost model that fit (see costs.rank).
+    """
+    leaf = recommendation.leaf.rsplit('_ooc', 1)[0]
+    dims = costs.shape(answers)
+    leaves = costs.GOAL_LEAVES.get(answers.unsup_goal) if recommendation.learning == UNSUPERVISED else None
+    ranking = costs.rank(dims.samples or samples or 1, dims.features or features or 1,
+                         recommendation.learning, None, leaves)
+    chosen = [leaf]
+    for est in ranking:
+        if len(chosen) >= count:
+            break
+        if est.leaf != leaf:
+            chosen.append(est.leaf)
+    return chosen
+
+def run(sample, leaves, budget=BUDGET, workers=None, backend=None, seed=0):
+    """
+    Bake off leaves on sample, each in its own process, at most workers
+    (default: the available cores) at a time. Trials still running when
+    budget seconds have passed are terminated; ones not started by then
+    are not run. Returns a Trial per leaf, in order.
+    """
+    backend = backend or ('sklearn' if sklearn_available() else 'builtin')
+    workers = workers or hardware.available_cores()
+    data = holdout_split(sample, seed=seed)
+    deadline = time.monotonic() + budget
+    results = dict((leaf, ('not run', None, None, None, None)) for leaf in leaves)
+    pending = list(leaves)
+    running = {}
+    while (pending or running) and time.monotonic() < deadline:
+        while pending and len(running) < workers:
+            leaf = pending.pop(0)
+            receiver, sender = multiprocessing.Pipe(duplex=False)
+            process = multiprocessing.Process(target=_trial_process, daemon=True,
+                                              args=(sender, leaf, backend, data, sample.classification, seed))
+            process.start()
+            sender.close()
+            running[receiver] = (leaf, process)
+        for receiver in wait(list(running), timeout=max(0.0, deadline - time.monotonic())):
+            leaf, process = running.pop(receiver)
+            try:
+                results[leaf] = receiver.recv()
+            except EOFError:
+                results[leaf] = ('error: worker exited with {0}'.format(process.exitcode), None, None, None, None)
+            process.join()
+    for leaf, process in running.values():
+        process.terminate()
+        process.join()
+        results[leaf] = ('timeout', None, None, None, None)
+    return [Trial(leaf, LEAVES[LEAF_IDS[leaf]].algorithm, backend, *results[leaf]) for leaf in leaves]
+
+def wanted(answers):
+    """
+    True when 'Accuracy' or 'Speed' was rated 3 or higher.
+    """
+    return any((getattr(answers, field) or 0) >= 3 for field in ('metric_accuracy', 'metric_speed'))
+
+def bake_off(recommendation, answers, path, delimiter=None, target=None, budget=BUDGET,
+             workers=None, rows=SAMPLE_ROWS, seed=0):
+    """
+    Sample path and bake off the recommendation against the next
+    cheapest candidates. None for other than Supervised or Unsupervised.
+    """
+    if recommendation.learning not in (SUPERVISED, UNSUPERVISED):
+        return None
+    sample = load_sample(path, delimiter, target, recommendation.learning == SUPERVISED, rows, seed)
+    if len(sample.features) < 4 or not sample.features.shape[1]:
+        raise ValueError("too few rows or columns to train on")
+    leaves = candidates(recommendation, answers, samples=len(sample.features), features=sample.features.shape[1])
+    return run(sample, leaves, budget, workers, seed=seed)
+
+def format_trials(trials, recommended=None):
+    """
+    The bake-off as printable lines, the recommended leaf marked with '*'.
+    """
+    backends = set(result.backend for result in trials)
+    lines = ["Measured with {0}:".format('scikit-learn' if 'sklearn' in backends else 'the built-in NumPy baselines'),
+             "  #  {0:<38} {1:>8} {2:>7} {3:>5}  {4}".format("Algorithm", "Fit", "Rows/s", "Score", "Metric")]
+    for position, result in enumerate(trials, 1):
+        fit = costs.human_seconds(result.fit_seconds) if result.fit_seconds is not None else '-'
+        rate = "{0:.2g}".format(result.predict_rate) if result.predict_rate else '-'
+        score = "{0:.3f}".format(result.score) if result.score is not None else '-'
+        lines.append("{0}{1:2d}. {2:<38} {3:>8} {4:>7} {5:>5}  {6}".format(
+            '*' if result.leaf == recommended else ' ', position, result.algorithm, fit, rate, score,
+            result.metric if result.status == 'ok' else result.status))
+    return lines
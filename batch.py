@@ -0,0 +1,323 @@
+# Copyright 2021 Spirent Communications.
+# sridhar.rao@spirent.com
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Headless batch mode.
+Answer profiles (one flat record of WizardStep ids per line, JSONL or
+CSV) are streamed in, and one result record per input is streamed out.
+Nothing is accumulated, so inputs larger than RAM are fine.
+"""
+
+from __future__ import print_function
+import collections
+import csv
+import functools
+import io
+import itertools
+import json
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+from answers import Answers
+from engine import get_engine, recommend
+
+RESULT_FIELDS = ('id', 'ml_needed', 'learning', 'leaf', 'algorithm', 'message', 'error')
+# With top-k scoring (scoring.py), results also carry the ranked candidates.
+TOP_FIELD = 'top'
+
+
+def _answer(value):
+    """
+    Answers are strings in the wizard - JSON numbers and booleans are not.
+    """
+    if isinstance(value, bool):
+        return 'Y' if value else 'N'
+    return str(value)
+
+def guess_format(path):
+    """
+    jsonl or csv, from the file name.
+    """
+    return 'csv' if path.lower().endswith('.csv') else 'jsonl'
+
+class UnreadableRecord(dict):
+    """
+    An input line that is not a JSON object - an empty record that
+    evaluates to an error result, so one bad line does not stop the run.
+    """
+    def __init__(self, error):
+        """
+        Perform Initialization.
+        """
+        dict.__init__(self)
+        self.error = error
+
+
+def _csv_record(row):
+    return dict((key, value) for key, value in row.items()
+                if key and value not in (None, ''))
+
+def read_records(stream, fmt='jsonl'):
+    """
+    Generator of answer dicts - an UnreadableRecord for a JSONL line
+    that is not a JSON object.
+    """
+    if fmt == 'csv':
+        for row in csv.DictReader(stream):
+            yield _csv_record(row)
+        return
+    for line in stream:
+        line = line.strip()
+        if line:
+            try:
+                obj = json.loads(line)
+            except ValueError as err:
+                yield UnreadableRecord("invalid JSON: {0}".format(err))
+                continue
+            if not isinstance(obj, dict):
+                yield UnreadableRecord("not a JSON object: {0}".format(type(obj).__name__))
+                continue
+            yield json_record(obj)
+
+def json_record(obj):
+    """
+    Answer dict from a decoded JSON object - values as the wizard's strings.
+    """
+    return {key: value if key == 'id' or type(value) is str else _answer(value)  # pylint: disable=unidiomatic-typecheck
+            for key, value in obj.items() if value is not None and value != ''}
+
+def evaluate(record, number, engine=None):
+    """
+    Result record for one answer record.
+    """
+    result = dict.fromkeys(RESULT_FIELDS)
+    result['id'] = record.get('id', number)
+    if isinstance(record, UnreadableRecord):
+        result['error'] = record.error
+        return result
+    try:
+        verdict, recommendation = recommend(Answers(record), engine)
+    except KeyError as err:
+        result['error'] = "missing answer: {0}".format(err.args[0])
+        return result
+    except ValueError as err:
+        result['error'] = "invalid answer: {0}".format(err)
+        return result
+    result['ml_needed'] = verdict.ml_needed
+    result['learning'] = verdict.learning
+    if recommendation is None:
+        result['message'] = verdict.message
+    else:
+        result.update(recommendation.as_dict())
+        result['learning'] = verdict.learning
+    return result
+
+def evaluate_stream(records, start=0):
+    """
+    Generator of result records, one per answer record.
+    """
+    engine = get_engine()
+    for number, record in enumerate(records, start):
+        yield evaluate(record, number, engine)
+
+def evaluate_stream_columnar(records, chunk_size=65536, start=0):
+    """
+    Same as evaluate_stream, but evaluates chunk_size records at a time
+    with NumPy. Rows with unanswered or unparsable questions go through
+    evaluate(), for the error message.
+    """
+    import columnar
+    engine = get_engine()
+    records = iter(records)
+    number = start
+    while True:
+        chunk = list(itertools.islice(records, chunk_size))
+        if not chunk:
+            return
+        ids = [record.get('id', number + offset) for offset, record in enumerate(chunk)]
+        result = columnar.evaluate_columns(columnar.records_to_columns(chunk), engine)
+        for offset, record in enumerate(columnar.result_records(result, ids)):
+            yield record if record is not None else evaluate(chunk[offset], number + offset, engine)
+        number += len(chunk)
+
+def evaluate_records(records, columnar=False, chunk_size=65536, start=0, top=None):
+    """
+    evaluate_stream, or evaluate_stream_columnar - and with top, the top
+    scored candidates of every chunk_size records in one matrix product
+    (scoring.top_k_records), on the results that have a recommendation.
+    """
+    if not top:
+        if columnar:
+            return evaluate_stream_columnar(records, chunk_size, start)
+        return evaluate_stream(records, start)
+    return _evaluate_ranked(records, columnar, chunk_size, start, top)
+
+def _evaluate_ranked(records, columnar, chunk_size, start, top):
+    import scoring
+    records = iter(records)
+    number = start
+    while True:
+        chunk = list(itertools.islice(records, chunk_size))
+        if not chunk:
+            return
+        results = evaluate_stream_columnar(chunk, chunk_size, number) if columnar else evaluate_stream(chunk, number)
+        for result, ranked in zip(results, scoring.top_k_records(chunk, top)):
+            result[TOP_FIELD] = ranked if result['leaf'] is not None else None
+            yield result
+        number += len(chunk)
+
+
+class ResultWriter():
+    """
+    Writes result records as JSONL or CSV.
+    """
+    def __init__(self, stream, fmt='jsonl', header=True, top=False):
+        """
+        Perform Initialization.
+        """
+        self.stream = stream
+        self.csv = None
+        if fmt == 'csv':
+            self.csv = csv.DictWriter(stream, fieldnames=RESULT_FIELDS + ((TOP_FIELD,) if top else ()))
+            if header:
+                self.csv.writeheader()
+
+    def write(self, result):
+        """
+        Write one result record.
+        """
+        if self.csv:
+            if result.get(TOP_FIELD):
+                result = dict(result)
+                result[TOP_FIELD] = ';'.join('{0}:{1}'.format(item['leaf'], item['score']) for item in result[TOP_FIELD])
+            self.csv.writerow(result)
+        else:
+            self.stream.write(json.dumps(result, sort_keys=True) + '\n')
+
+
+############### Sharded (process pool) execution ######################
+
+def read_shards(stream, fmt='jsonl', shard_size=65536):
+    """
+    Generator of (first-record-number, fmt, payload) shards of up to
+    shard_size records. Payloads are raw JSONL lines, or (header, rows)
+    for CSV, which are cheap to send to a worker process.
+    """
+    number = 0
+    if fmt == 'csv':
+        reader = csv.reader(stream)
+        header = next(reader, None)
+        if header is None:
+            return
+        while True:
+            rows = list(itertools.islice(reader, shard_size))
+            if not rows:
+                return
+            yield number, fmt, (header, rows)
+            number += len(rows)
+    lines = []
+    for line in stream:
+        if line.strip():
+            lines.append(line)
+            if len(lines) == shard_size:
+                yield number, fmt, lines
+                number += len(lines)
+                lines = []
+    if lines:
+        yield number, fmt, lines
+
+def evaluate_shard(shard, output_format='jsonl', columnar=False, top=None):
+    """
+    Evaluate one shard. Returns (record count, formatted results).
+    Runs in a worker process.
+    """
+    number, fmt, payload = shard
+    if fmt == 'csv':
+        header, rows = payload
+        size = len(rows)
+        records = (_csv_record(dict(zip(header, row))) for row in rows)
+    else:
+        size = len(payload)
+        records = read_records(payload, fmt)
+    # The whole shard is one columnar (and scoring) chunk.
+    results = evaluate_records(records, columnar, size, number, top)
+    block = io.StringIO()
+    writer = ResultWriter(block, output_format, header=False, top=bool(top))
+    count = 0
+    for result in results:
+        writer.write(result)
+        count += 1
+    return count, block.getvalue()
+
+def evaluate_parallel(shards, workers, output_format='jsonl', columnar=False, top=None):
+    """
+    Fan shards out to a process pool, and yield their (count, text)
+    results in input order. At most 2 * workers shards are in flight,
+    so memory stays bounded however long the input is.
+    """
+    task = functools.partial(evaluate_shard, output_format=output_format, columnar=columnar, top=top)
+    pending = collections.deque()
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        for shard in shards:
+            pending.append(executor.submit(task, shard))
+            if len(pending) >= 2 * workers:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+def _open(path, mode):
+    if path == '-':
+        return sys.stdin if 'r' in mode else sys.stdout
+    if path.lower().endswith('.csv'):
+        return open(path, mode, newline='', encoding='utf-8')
+    return open(path, mode, encoding='utf-8')
+
+def run_batch(input_path, output_path='-', input_format=None, output_format=None,
+              columnar=False, chunk_size=65536, workers=1, top=None):
+    """
+    Stream input_path through the decision logic into output_path.
+    With workers > 1 (0 for all cores), chunk_size-record shards are
+    evaluated in a process pool. With top, results carry the top scored
+    candidates. Returns the number of records processed.
+    """
+    input_format = input_format or guess_format(input_path)
+    output_format = output_format or guess_format(output_path)
+    if workers == 0:
+        workers = os.cpu_count() or 1
+    count = 0
+    instream = _open(input_path, 'r')
+    outstream = _open(output_path, 'w')
+    try:
+        writer = ResultWriter(outstream, output_format, top=bool(top))
+        if workers > 1:
+            shards = read_shards(instream, input_format, chunk_size)
+            for shard_count, block in evaluate_parallel(shards, workers, output_format, columnar, top):
+                outstream.write(block)
+                count += shard_count
+            return count
+        records = read_records(instream, input_format)
+        for result in evaluate_records(records, columnar, chunk_size, top=top):
+            writer.write(result)
+            count += 1
+    finally:
+        if instream is not sys.stdin:
+            instream.close()
+        if outstream is not sys.stdout:
+            outstream.close()
+        else:
+            outstream.flush()
+    return count
@@ -0,0 +1,353 @@
+# Copyright 2021 Spirent Communications.
+# sridhar.rao@spirent.com
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Benchmark Suite.
+Times the decide_* functions, perform_inference, wizard construction,
+scripted ask_and_decide sessions and the cold start of algoselector.py,
+and writes the results as JSON - so two runs can be diffed, or
+compared with --compare to catch regressions.
+The imports group is also a gate: it fails (status 1) when importing
+algoselector takes longer than the import budget, or when a headless
+module loads the interactive (pypsi) stack.
+
+    python benchmark.py --output base.json
+    python benchmark.py --compare base.json
+    python benchmark.py --only imports --import-budget 50
+"""
+
+from __future__ import print_function
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import time
+import timeit
+
+import algoselector
+from engine import get_engine
+
+# pylint: disable=line-too-long
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+YES_NO = ('Y', 'N', 'NA', 'U')
+
+# Cold-start budget: cumulative -X importtime of algoselector, in ms.
+IMPORT_BUDGET_MS = 60.0
+# Modules used without a wizard, and the packages they must not import.
+HEADLESS_MODULES = ('algoselector', 'batch', 'api', 'server', 'explorer')
+INTERACTIVE_PACKAGES = ('pypsi',)
+
+# Scripted stdin for ask_and_decide: (name, adaptive, answers)
+SESSIONS = (
+    ('session_supervised', True, 'Y\nY\nN\nY\n10k\n1t\n100\n2\nY\n'),
+    ('session_unsupervised', True, 'Y\nN\nN\nY\n2\nN\n'),
+    ('session_reinforcement', True, 'N\nY\n1\nN\nY\nN\n'),
+    ('session_all_questions', False, 'Y\nY\nN\nY\n' + '\n' * 30),
+)
+
+
+def synthetic_profile(rnd):
+    """
+    One random, complete set of raw answers.
+    """
+    profile = dict(
+        metric_accuracy=str(rnd.randint(1, 5)),
+        metric_speed=str(rnd.randint(1, 5)),
+        metric_interpretability=str(rnd.randint(1, 5)),
+        metric_reproducibility=str(rnd.randint(1, 5)),
+        metric_implementation=str(rnd.randint(1, 5)),
+        data_size_bytes=rnd.choice(('10K', '5M', '1G')),
+        data_size_samples=rnd.choice(('1T', '1M', '1B')),
+        data_features_count=str(rnd.choice((1, 60, 6000, 600000))),
+        data_column=str(rnd.randint(1, 4)),
+        data_signal_type=str(rnd.randint(1, 5)),
+        data_type_output=str(rnd.randint(1, 5)),
+        unsup_goal=str(rnd.randint(1, 3)))
+    for field in ('data_io_relation', 'data_correlation', 'data_cond_indep',
+                  'data_output_prob', 'unsup_dr_topic_mod', 'unsup_clus_dv',
+                  'unsup_clus_groups', 'unsup_clus_outliers', 'ri_model_preference',
+                  'ri_model_availability', 'ri_modelfree_value', 'ri_modelfree_value_state'):
+        profile[field] = rnd.choice(YES_NO)
+    return profile
+
+def loaded_wizards(count, seed=1):
+    """
+    count AlgoSelectorWizards with their answers filled in.
+    """
+    rnd = random.Random(seed)
+    wizards = []
+    for _ in range(count):
+        wizard = algoselector.AlgoSelectorWizard()
+        wizard.answers.update(synthetic_profile(rnd))
+        wizard.perform_inference()
+        wizards.append(wizard)
+    return wizards
+
+
+def measure(name, func, ops=1, repeat=5):
+    """
+    Time func (which does ops operations) - best and median of repeat
+    runs, each long enough (about 0.2s) to be above timer noise.
+    """
+    timer = timeit.Timer(func)
+    number = timer.autorange()[0]
+    runs = [elapsed / number for elapsed in timer.repeat(repeat, number)]
+    best = min(runs)
+    return {
+        'name': name,
+        'ops': ops,
+        'number': number,
+        'best_s': best,
+        'median_s': statistics.median(runs),
+        'per_op_us': best / ops * 1e6,
+        'ops_per_s': ops / best if best else None,
+    }
+
+def _quiet(func):
+    def run():
+        with contextlib.redirect_stdout(io.StringIO()):
+            func()
+    return run
+
+def _session(adaptive, script):
+    def run():
+        stdin = sys.stdin
+        sys.stdin = io.StringIO(script)
+        try:
+            with contextlib.redirect_stdout(io.StringIO()):
+                algoselector.AlgoSelectorWizard().ask_and_decide(adaptive)
+        finally:
+            sys.stdin = stdin
+    return run
+
+
+def bench_decide(profiles, repeat):
+    """
+    decide_* throughput, over synthetic profiles.
+    """
+    get_engine()
+    wizards = loaded_wizards(profiles)
+    results = []
+    for name in ('decide_supervised', 'decide_unsupervised', 'decide_reinforcement'):
+        calls = [getattr(wizard, name) for wizard in wizards]
+        def run(calls=calls):
+            for call in calls:
+                call()
+        results.append(measure(name, _quiet(run), len(calls), repeat))
+    return results
+
+def bench_inference(profiles, repeat):
+    """
+    perform_inference cost.
+    """
+    wizards = loaded_wizards(profiles)
+    def run():
+        for wizard in wizards:
+            wizard.perform_inference()
+    return [measure('perform_inference', run, len(wizards), repeat)]
+
+def bench_wizards(repeat):
+    """
+    Cost of building the PromptWizards, and the whole AlgoSelectorWizard.
+    """
+    wizard = algoselector.AlgoSelectorWizard()
+    results = [measure('AlgoSelectorWizard', algoselector.AlgoSelectorWizard, 1, repeat)]
+    for name in ('main_wizard_l1', 'main_wizard_l2_a', 'main_wizard_l2_b', 'main_wizard_l3',
+                 'main_wizard_l4', 'gen_wizard', 'unsupervised_wizard', 'reinforcement_wizard'):
+        results.append(measure(name, getattr(wizard, name), 1, repeat))
+    return results
+
+def bench_sessions(repeat):
+    """
+    End-to-end ask_and_decide sessions, driven through a fake stdin.
+    """
+    get_engine()
+    return [measure(name, _session(adaptive, script), 1, repeat)
+            for name, adaptive, script in SESSIONS]
+
+def bench_cold_start(repeat):
+    """
+    Wall time of fresh interpreters: import only, --help, and a
+    scripted (adaptive, supervised) session.
+    """
+    script = os.path.join(HERE, 'algoselector.py')
+    commands = (
+        ('cold_import', [sys.executable, '-c', 'import algoselector'], ''),
+        ('cold_help', [sys.executable, script, '--help'], ''),
+        ('cold_session', [sys.executable, script], SESSIONS[0][2]),
+    )
+    results = []
+    for name, command, stdin in commands:
+        runs = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            subprocess.run(command, input=stdin, cwd=HERE, check=True, universal_newlines=True,
+                           stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+            runs.append(time.perf_counter() - start)
+        best = min(runs)
+        results.append({'name': name, 'ops': 1, 'number': 1, 'best_s': best,
+                        'median_s': statistics.median(runs), 'per_op_us': best * 1e6,
+                        'ops_per_s': 1 / best})
+    return results
+
+def import_time(module):
+    """
+    (cumulative import time of module in a fresh interpreter, in seconds
+    - from -X importtime - and the interactive modules it loaded).
+    """
+    code = "import sys, {0}; print(' '.join(sorted(name for name in sys.modules if name.split('.')[0] in {1!r})))".format(
+        module, INTERACTIVE_PACKAGES)
+    done = subprocess.run([sys.executable, '-X', 'importtime', '-c', code], cwd=HERE, check=True,
+                          universal_newlines=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    for line in done.stderr.splitlines():
+        fields = line.split('|')
+        if len(fields) == 3 and fields[2].strip() == module:
+            return int(fields[1]) / 1e6, done.stdout.split()
+    raise ValueError("no import time reported for {0}".format(module))
+
+def bench_imports(repeat):
+    """
+    Import time of the headless modules, and what they loaded of the
+    interactive stack (which should be nothing).
+    """
+    results = []
+    for module in HEADLESS_MODULES:
+        runs = []
+        for _ in range(repeat):
+            seconds, loaded = import_time(module)
+            runs.append(seconds)
+        best = min(runs)
+        results.append({'name': 'import_' + module, 'ops': 1, 'number': 1, 'best_s': best,
+                        'median_s': statistics.median(runs), 'per_op_us': best * 1e6,
+                        'ops_per_s': 1 / best, 'interactive_modules': loaded})
+    return results
+
+def import_problems(report, budget=IMPORT_BUDGET_MS):
+    """
+    Messages for the imports results over budget (ms, algoselector only)
+    or loading interactive modules.
+    """
+    problems = []
+    for result in report['results']:
+        if result['group'] != 'imports':
+            continue
+        if result['name'] == 'import_algoselector' and result['best_s'] * 1e3 > budget:
+            problems.append("IMPORT BUDGET algoselector: {0:.1f}ms > {1:g}ms".format(result['best_s'] * 1e3, budget))
+        if result['interactive_modules']:
+            problems.append("INTERACTIVE IMPORT {0}: {1}".format(
+                result['name'][len('import_'):], ', '.join(result['interactive_modules'])))
+    return problems
+
+
+def run_suite(profiles=2000, repeat=5, only=None):
+    """
+    Run every benchmark (or those whose name contains one of only).
+    Returns the report dict.
+    """
+    groups = (
+        ('decide', lambda: bench_decide(profiles, repeat)),
+        ('inference', lambda: bench_inference(profiles, repeat)),
+        ('wizards', lambda: bench_wizards(repeat)),
+        ('sessions', lambda: bench_sessions(repeat)),
+        ('cold_start', lambda: bench_cold_start(repeat)),
+        ('imports', lambda: bench_imports(repeat)),
+    )
+    results = []
+    for group, bench in groups:
+        if only and not any(name in group for name in only):
+            continue
+        for result in bench():
+            result['group'] = group
+            results.append(result)
+    return {
+        'suite': 'algoselector',
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+        'python': platform.python_version(),
+        'implementation': platform.python_implementation(),
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'profiles': profiles,
+        'repeat': repeat,
+        'results': results,
+    }
+
+def compare(report, baseline, tolerance=0.1):
+    """
+    Benchmarks whose best time grew by more than tolerance (a fraction)
+    against baseline, as (name, baseline_s, current_s) tuples.
+    """
+    before = dict((result['name'], result['best_s']) for result in baseline['results'])
+    regressions = []
+    for result in report['results']:
+        old = before.get(result['name'])
+        if old and result['best_s'] > old * (1 + tolerance):
+            regressions.append((result['name'], old, result['best_s']))
+    return regressions
+
+
+def parse_args(argv=None):
+    """
+    Command line options
+    """
+    parser = argparse.ArgumentParser(description="Benchmark the algoselector decision, inference and session paths.")
+    parser.add_argument('--output', metavar='FILE', default='-',
+                        help="Where the JSON report is written (default stdout)")
+    parser.add_argument('--profiles', type=int, default=2000, metavar='N',
+                        help="Synthetic profiles per decide/inference benchmark (default 2000)")
+    parser.add_argument('--repeat', type=int, default=5, metavar='N',
+                        help="Timed repetitions per benchmark (default 5)")
+    parser.add_argument('--only', action='append', metavar='GROUP',
+                        help="Run only this group: decide, inference, wizards, sessions, cold_start or imports (repeatable)")
+    parser.add_argument('--compare', metavar='FILE',
+                        help="Baseline JSON report - exit with status 1 on regressions")
+    parser.add_argument('--tolerance', type=float, default=0.1,
+                        help="Allowed slowdown against the baseline, as a fraction (default 0.1)")
+    parser.add_argument('--import-budget', type=float, default=IMPORT_BUDGET_MS, metavar='MS',
+                        help="Fail when importing algoselector takes longer (default {0:g})".format(IMPORT_BUDGET_MS))
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    """
+    The Main Function
+    """
+    args = parse_args(argv)
+    report = run_suite(args.profiles, args.repeat, args.only)
+    text = json.dumps(report, indent=2, sort_keys=True) + '\n'
+    if args.output == '-':
+        sys.stdout.write(text)
+    else:
+        with open(args.output, 'w', encoding='utf-8') as stream:
+            stream.write(text)
+    status = 0
+    for problem in import_problems(report, args.import_budget):
+        print(problem, file=sys.stderr)
+        status = 1
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as stream:
+            regressions = compare(report, json.load(stream), args.tolerance)
+        for name, old, new in regressions:
+            print("REGRESSION {0}: {1:.6g}s -> {2:.6g}s".format(name, old, new), file=sys.stderr)
+        return 1 if regressions else status
+    return status
+
+if __name__ == "__main__":
+    sys.exit(main())
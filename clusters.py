@@ -0,0 +1,248 @@
+# Copyright 2021 Spirent Communications.
+# sridhar.rao@spirent.com
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Cluster Structure Analysis.
+Answers the clustering questions from a sample of the data:
+unsup_clus_dv (density variations), unsup_clus_outliers (too many
+outliers?) and unsup_clus_groups (is the number of groups known?).
+The k nearest neighbours of every sampled row come from a random
+projection LSH index: each of TABLES tables quantizes PROJECTIONS random
+projections into equal-frequency bins (randomly shifted), and rows are
+only compared with the next WINDOW rows of their bucket - O(n log n),
+not O(n^2). The distance to the k-th neighbour gives each row's local
+density; a row much sparser than its neighbours (a simplified local
+outlier factor), or than the rows overall (a robust z-score of the log
+distance), is an outlier. The number of groups is the best
+silhouette of a mini-batch k-means sweep over 2..MAX_CLUSTERS, scored on
+a fixed-size subsample; it is known when that silhouette is clear.
+Density variation is the spread of the density across those groups.
+Requires numpy.
+"""
+
+from __future__ import print_function
+from collections import namedtuple
+
+import numpy as np
+
+import bakeoff
+
+# pylint: disable=line-too-long,too-many-locals,invalid-name,attribute-defined-outside-init
+
+SAMPLE_ROWS = 5000
+# Features beyond this are randomly projected down to it.
+MAX_DIMENSIONS = 32
+NEIGHBOURS = 10
+TABLES = 8
+PROJECTIONS = 3
+# Rows per LSH bucket, on average, and how far along a bucket rows are compared.
+BUCKET_ROWS = 64
+WINDOW = 16
+# Candidate pairs measured at a time - bounds the temporary arrays.
+PAIR_BLOCK = 65536
+# A row this many times sparser than its neighbours, or this many
+# (median absolute) deviations sparser than the rows overall, is an
+# outlier; "too many" is more than OUTLIER_SHARE of the rows.
+OUTLIER_RATIO = 2.0
+ROBUST_Z = 3.5
+OUTLIER_SHARE = 0.05
+MAX_CLUSTERS = 10
+BATCH_ROWS = 256
+BATCHES = 100
+SILHOUETTE_ROWS = 1000
+CLEAR_SILHOUETTE = 0.5
+# Groups (of at least MIN_GROUP_SHARE of the rows) whose median
+# neighbour distance differs by this factor vary in density.
+DENSITY_RATIO = 2.0
+MIN_GROUP_SHARE = 0.05
+
+Report = namedtuple('Report', 'samples features outlier_share density_ratio clusters silhouette elbow '
+                              'density_variation outliers groups')
+
+
+def _prepare(X, rng):
+    """
+    Standardized features - constant ones dropped, and randomly projected
+    to MAX_DIMENSIONS when there are more.
+    """
+    deviation = X.std(axis=0)
+    X = (X[:, deviation > 0] - X[:, deviation > 0].mean(axis=0)) / deviation[deviation > 0]
+    if X.shape[1] > MAX_DIMENSIONS:
+        X = X @ rng.standard_normal((X.shape[1], MAX_DIMENSIONS)) / np.sqrt(MAX_DIMENSIONS)
+    return X
+
+def lsh_neighbours(X, k=NEIGHBOURS, seed=0):
+    """
+    (indices, distances) of about the k nearest neighbours of every row,
+    rows x k, nearest first - from the LSH candidates, padded with -1 /
+    inf when a row has fewer.
+    """
+    rng = np.random.default_rng(seed)
+    rows = len(X)
+    bins = max(1, int(round((rows / float(BUCKET_ROWS)) ** (1.0 / PROJECTIONS))))
+    found_rows, found_others = [], []
+    for _ in range(TABLES):
+        projected = X @ rng.standard_normal((X.shape[1], PROJECTIONS))
+        ranks = np.argsort(np.argsort(projected, axis=0), axis=0)
+        codes = np.floor(ranks * bins / float(rows) + rng.random(PROJECTIONS)).astype(np.int64)
+        keys = codes @ (bins + 1) ** np.arange(PROJECTIONS)
+        order = np.lexsort((projected[:, 0], keys))
+        keys = keys[order]
+        for step in range(1, WINDOW + 1):
+            same = np.flatnonzero(keys[step:] == keys[:-step])
+            if not same.size:
+                break
+            found_rows.append(order[same])
+            found_others.append(order[same + step])
+    if not found_rows:
+        return np.full((rows, k), -1, dtype=np.int64), np.full((rows, k), np.inf)
+    first, second = np.concatenate(found_rows), np.concatenate(found_others)
+    pairs = np.minimum(first, second) * rows + np.maximum(first, second)
+    pairs.sort()
+    pairs = pairs[np.r_[True, pairs[1:] != pairs[:-1]]]
+    first, second = pairs // rows, pairs % rows
+    distances = np.concatenate([np.sqrt(((X[first[start:start + PAIR_BLOCK]] - X[second[start:start + PAIR_BLOCK]]) ** 2).sum(axis=1))
+                                for start in range(0, len(first), PAIR_BLOCK)])
+    first, second = np.concatenate([first, second]), np.concatenate([second, first])
+    distances = np.concatenate([distances, distances])
+    order = np.lexsort((distances, first))
+    first, second, distances = first[order], second[order], distances[order]
+    starts = np.searchsorted(first, np.arange(rows))
+    position = np.arange(len(first)) - starts[first]
+    keep = position < k
+    indices = np.full((rows, k), -1, dtype=np.int64)
+    nearest = np.full((rows, k), np.inf)
+    indices[first[keep], position[keep]] = second[keep]
+    nearest[first[keep], position[keep]] = distances[keep]
+    return indices, nearest
+
+def outliers(indices, distances):
+    """
+    Which rows are outliers: their k-distance is OUTLIER_RATIO times the
+    median k-distance of their neighbours, or its log is ROBUST_Z
+    deviations above the median of all rows. Rows without k neighbours
+    are not counted either way.
+    """
+    reach = np.where(np.isfinite(distances[:, -1]) & (distances[:, -1] > 0), distances[:, -1], np.nan)
+    neighbour_reach = np.where(indices >= 0, reach[np.maximum(indices, 0)], np.nan)
+    logs = np.log(reach)
+    median = np.nanmedian(logs)
+    spread = 1.4826 * np.nanmedian(np.abs(logs - median))
+    with np.errstate(invalid='ignore', divide='ignore'):
+        local = reach / np.nanmedian(neighbour_reach, axis=1)
+        overall = (logs - median) / spread if spread > 0 else np.zeros(len(logs))
+    return np.isfinite(reach), (local > OUTLIER_RATIO) | (overall > ROBUST_Z)
+
+
+class MiniBatchKMeans(bakeoff.KMeans):
+    """
+    k-means on BATCHES mini-batches of BATCH_ROWS rows (Sculley), from a
+    k-means++ start - the cost does not grow with the rows.
+    """
+    def fit(self, X, y=None):
+        """
+        Fit.
+        """
+        self.centers = self._seed(X[self.rng.choice(len(X), min(len(X), 10 * BATCH_ROWS), replace=False)]).astype(float)
+        counts = np.zeros(len(self.centers))
+        for _ in range(BATCHES):
+            batch = X[self.rng.integers(0, len(X), BATCH_ROWS)]
+            labels = self.predict(batch)
+            for label in np.unique(labels):
+                members = batch[labels == label]
+                counts[label] += len(members)
+                self.centers[label] += (members.sum(axis=0) - len(members) * self.centers[label]) / counts[label]
+        return self
+
+    def inertia(self, X):
+        """
+        Sum of squared distances of the rows to their nearest center.
+        """
+        return float(np.maximum(self._distances(X).min(axis=1), 0).sum())
+
+
+def sweep(X, max_clusters=MAX_CLUSTERS, seed=0):
+    """
+    (best k by silhouette, its silhouette, the elbow k, labels for the
+    best k) over k = 2..max_clusters.
+    """
+    rng = np.random.default_rng(seed)
+    scored = X[rng.choice(len(X), min(len(X), SILHOUETTE_ROWS), replace=False)]
+    results = []
+    for clusters in range(2, max(2, min(max_clusters, len(X) - 1)) + 1):
+        model = MiniBatchKMeans(clusters, seed).fit(X)
+        results.append((clusters, bakeoff.silhouette(scored, model.predict(scored)), model.inertia(X), model))
+    if not results:
+        return 1, 0.0, 1, np.zeros(len(X), dtype=int)
+    best = max(results, key=lambda result: result[1])
+    inertias = np.array([X.var(axis=0).sum() * len(X)] + [result[2] for result in results])
+    # Elbow: where the drop in inertia slows down the most (k starts at 1).
+    elbow = int(np.argmax(inertias[:-2] - 2 * inertias[1:-1] + inertias[2:])) + 2 if len(inertias) > 2 else 2
+    return best[0], float(best[1]), elbow, best[3].predict(X)
+
+def analyse_sample(features, seed=0):
+    """
+    A Report for a samples x features matrix.
+    """
+    rng = np.random.default_rng(seed)
+    X = _prepare(np.asarray(features, dtype=float), rng)
+    if len(X) <= NEIGHBOURS + 1 or not X.shape[1]:
+        raise ValueError("too few rows or varying features to analyse")
+    indices, distances = lsh_neighbours(X, NEIGHBOURS, seed)
+    known, isolated = outliers(indices, distances)
+    outlier_share = float(np.mean(isolated[known])) if known.any() else 0.0
+    clusters, best, elbow, labels = sweep(X, MAX_CLUSTERS, seed)
+    if best < CLEAR_SILHOUETTE:
+        clusters, labels = 1, np.zeros(len(X), dtype=int)
+    reach = distances[:, -1]
+    medians = [np.median(reach[(labels == label) & np.isfinite(reach)]) for label in np.unique(labels)
+               if np.sum((labels == label) & np.isfinite(reach)) >= MIN_GROUP_SHARE * len(X)]
+    if len(medians) > 1:
+        density_ratio = float(max(medians) / max(min(medians), 1e-12))
+    else:
+        finite = reach[np.isfinite(reach)]
+        quartiles = np.percentile(finite, [25, 75]) if finite.size else (1.0, 1.0)
+        density_ratio = float(quartiles[1] / max(quartiles[0], 1e-12))
+    return Report(len(X), X.shape[1], outlier_share, density_ratio, clusters, best, elbow,
+                  'Y' if density_ratio >= DENSITY_RATIO else 'N',
+                  'Y' if outlier_share > OUTLIER_SHARE else 'N',
+                  'Y' if best >= CLEAR_SILHOUETTE else 'N')
+
+def analyse_file(path, delimiter=None, target=None, labelled=False, rows=SAMPLE_ROWS, seed=0):
+    """
+    Analyse a sample of up to rows rows of a delimited file - the
+    features only, with labelled data.
+    """
+    return analyse_sample(bakeoff.load_sample(path, delimiter, target, labelled, rows, seed).features, seed)
+
+def answers(report):
+    """
+    The clustering answers of a Report.
+    """
+    return {'unsup_clus_dv': report.density_variation,
+            'unsup_clus_outliers': report.outliers,
+            'unsup_clus_groups': report.groups}
+
+def describe(report):
+    """
+    Printable lines for a Report.
+    """
+    return ["Cluster analysis of {0} sampled rows ({1} dimensions):".format(report.samples, report.features),
+            " outliers: {0:.1%} of the rows are much sparser than their neighbours or the rest".format(report.outlier_share),
+            " groups: {0} (silhouette {1:.2f}, elbow at {2}){3}".format(
+                report.clusters if report.clusters > 1 else 'no clear number', report.silhouette, report.elbow,
+                '' if report.groups == 'Y' else ' - below {0}'.format(CLEAR_SILHOUETTE)),
+            " density varies {0:.1f}x across {1}".format(
+                report.density_ratio, 'the groups' if report.clusters > 1 else 'the rows (quartiles)')]
@@ -0,0 +1,375 @@
+# Copyright 2021 Spirent Communications.
+# sridhar.rao@spirent.com
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Columnar (NumPy) evaluation.
+Every answer field is encoded once into an array of canonical codes,
+run_mainwiz and perform_inference are evaluated with boolean masks and
+np.select, and the decide_* trees are evaluated by gathering from the
+compiled engine tables with a vectorized mixed-radix index.
+"""
+
+from __future__ import print_function
+from collections import namedtuple
+
+import numpy as np
+
+import engine
+from answers import (CHOICE_FIELDS, COUNT_FIELDS, GATE_FIELDS, METRIC_FIELDS,
+                     NO, NOT_APPLICABLE, SIZE_FIELDS, UNKNOWN, YES, YES_NO_FIELDS,
+                     choice, count)
+from engine import (LEAVES, REINFORCEMENT, SIZE_HIGH, SIZE_LOW, SUPERVISED,
+                    TABLE_OPTIONS, UNSUPERVISED, get_engine)
+
+# pylint: disable=line-too-long,too-many-locals
+
+# Learning codes
+LEARNING_NONE, LEARNING_SUPERVISED, LEARNING_UNSUPERVISED, LEARNING_REINFORCEMENT = 0, 1, 2, 3
+LEARNING_NAMES = (None, SUPERVISED, UNSUPERVISED, REINFORCEMENT)
+# Leaf code of rows that had no decision (ML not needed, or invalid answers)
+NO_LEAF = 255
+# Code of an answer that could not be parsed
+INVALID = -128
+INT64_MAX = np.iinfo(np.int64).max
+
+NUMBER_FIELDS = METRIC_FIELDS + COUNT_FIELDS
+FIELDS = GATE_FIELDS + YES_NO_FIELDS + tuple(CHOICE_FIELDS) + NUMBER_FIELDS + SIZE_FIELDS
+# Inputs of perform_inference
+INFERENCE_FIELDS = SIZE_FIELDS + COUNT_FIELDS + ('metric_interpretability', 'metric_speed',
+                                                 'metric_reproducibility')
+
+ColumnarResult = namedtuple('ColumnarResult', 'ml_needed learning leaf invalid')
+ColumnarResult.__doc__ = """
+Per-row outcome arrays. leaf indexes engine.LEAVES (NO_LEAF when there
+is no decision); invalid flags rows whose needed answers did not parse.
+"""
+
+
+def _by_unique(values, convert, dtype):
+    """
+    Apply convert to the distinct values only, then broadcast back.
+    """
+    uniq, inverse = np.unique(values, return_inverse=True)
+    return np.array([convert(value) for value in uniq], dtype=dtype)[inverse.reshape(-1)]
+
+def _safe(convert):
+    def wrapped(value):
+        try:
+            number = convert(str(value))
+        except ValueError:
+            return INVALID
+        # Answers are only compared with small thresholds (or NA, -1):
+        # clamping them above INVALID and into int64 decides the same.
+        return min(max(number, INVALID + 1), INT64_MAX)
+    return wrapped
+
+def _text(values):
+    """
+    Answers as a fixed-width unicode array.
+    """
+    values = np.asarray(values)
+    return values if values.dtype.kind == 'U' else values.astype(str)
+
+def _codepoints(values):
+    """
+    (rows, width) uint32 view of a fixed-width unicode array - NUL padded.
+    """
+    width = max(values.dtype.itemsize // 4, 1)
+    if values.dtype.itemsize == 0:
+        return np.zeros((len(values), 1), dtype=np.uint32)
+    return values.view(np.uint32).reshape(len(values), width)
+
+def _has_letter(chars, letter):
+    """
+    Case-insensitive 'letter in value', one character column at a time.
+    """
+    code = ord(letter.lower())
+    found = np.zeros(len(chars), dtype=bool)
+    for column in range(chars.shape[1]):
+        # ASCII letters differ from their upper case only in bit 0x20.
+        found |= (chars[:, column] | 32) == code
+    return found
+
+def _yes_no_codes(chars):
+    return np.where(_has_letter(chars, 'y'), np.int8(YES),
+                    np.where(_has_letter(chars, 'n'), np.int8(NO), np.int8(UNKNOWN)))
+
+def _is_yes_chars(chars):
+    nonblank = np.zeros(len(chars), dtype=np.int8)
+    for column in range(chars.shape[1]):
+        code = chars[:, column]
+        nonblank += ~((code == 0) | (code == 32) | ((code >= 9) & (code <= 13)))
+    return (nonblank == 1) & _has_letter(chars, 'y')
+
+def encode_yes_no(values):
+    """
+    Y/N/U codes. Booleans map straight to YES/NO.
+    """
+    values = np.asarray(values)
+    if values.dtype.kind == 'b':
+        return np.where(values, YES, NO).astype(np.int8)
+    return _yes_no_codes(_codepoints(_text(values)))
+
+def _is_yes(values):
+    """
+    The exact == 'y' test of run_mainwiz.
+    """
+    values = np.asarray(values)
+    if values.dtype.kind == 'b':
+        return values
+    return _is_yes_chars(_codepoints(_text(values)))
+
+def _parse_int(values, fallback):
+    """
+    Vectorized int() for plain digit strings; anything else (signs,
+    spaces, words) goes through fallback on its distinct values.
+    """
+    values = _text(values)
+    chars = _codepoints(values)
+    digit = (chars >= 48) & (chars <= 57)
+    plain = (digit | (chars == 0)).all(axis=1) & digit[:, 0] & (chars.shape[1] <= 18)
+    number = np.zeros(len(values), dtype=np.int64)
+    for column in range(chars.shape[1]):
+        step = digit[:, column]
+        number = np.where(step, number * 10 + (chars[:, column].astype(np.int64) - 48), number)
+    if not plain.all():
+        irregular = ~plain
+        number[irregular] = _by_unique(values[irregular], _safe(fallback), np.int64)
+    return number, plain
+
+def encode_choice(values, options, aliases=None):
+    """
+    Numbered answer codes, 0 when out of range, INVALID when not a number.
+    """
+    values = np.asarray(values)
+    if values.dtype.kind in 'iu':
+        return np.where((values >= 1) & (values <= options), values, 0).astype(np.int8)
+    number, plain = _parse_int(values, lambda value: choice(value, options, aliases))
+    in_range = (number >= 1) & (number <= options)
+    return np.where(plain, np.where(in_range, number, 0), number).astype(np.int8)
+
+def encode_int(values, convert=int):
+    """
+    Plain integer answers, INVALID when not a number.
+    """
+    values = np.asarray(values)
+    if values.dtype.kind in 'iu':
+        return values.astype(np.int64)
+    return _parse_int(values, convert)[0]
+
+def _column(columns, field, blank):
+    values = np.asarray(columns.get(field, blank))
+    return values if values.dtype.kind in 'iu' else _text(values)
+
+def _unanswered(values):
+    if values.dtype.kind != 'U':
+        return np.zeros(len(values), dtype=bool)
+    return _codepoints(values)[:, 0] == 0
+
+def encode(columns):
+    """
+    Encode a mapping of field -> array-like of answers into code arrays.
+    Missing fields, and empty strings, are unanswered.
+    """
+    length = len(next(iter(columns.values())))
+    blank = np.full(length, '', dtype='U1')
+    codes = {}
+    for field in GATE_FIELDS + YES_NO_FIELDS + SIZE_FIELDS:
+        values = np.asarray(columns.get(field, blank))
+        if values.dtype.kind == 'b':
+            codes[field + '_missing'] = np.zeros(length, dtype=bool)
+            codes[field] = np.where(values, YES, NO).astype(np.int8)
+            codes[field + '_y'] = values
+            continue
+        chars = _codepoints(_text(values))
+        codes[field + '_missing'] = chars[:, 0] == 0
+        if field in SIZE_FIELDS:
+            codes[field + '_chars'] = chars
+        elif field in GATE_FIELDS:
+            codes[field + '_y'] = _is_yes_chars(chars)
+        else:
+            codes[field] = _yes_no_codes(chars)
+    for field, (options, aliases) in CHOICE_FIELDS.items():
+        values = _column(columns, field, blank)
+        codes[field + '_missing'] = _unanswered(values)
+        codes[field] = encode_choice(values, options, aliases)
+    for field in NUMBER_FIELDS:
+        values = _column(columns, field, blank)
+        codes[field + '_missing'] = _unanswered(values)
+        codes[field] = encode_int(values, count if field in COUNT_FIELDS else int)
+    size_bytes = codes.pop('data_size_bytes_chars')
+    size_samples = codes.pop('data_size_samples_chars')
+    codes['size_small'] = _has_letter(size_bytes, 'k') | _has_letter(size_samples, 't')
+    codes['size_medium'] = _has_letter(size_bytes, 'm') | _has_letter(size_samples, 'm')
+    return codes
+
+def records_to_columns(records):
+    """
+    List of answer dicts -> dict of field -> array of strings.
+    """
+    return dict((field, np.array([record.get(field, '') for record in records], dtype=str))
+                for field in FIELDS)
+
+
+def gate(codes):
+    """
+    Vectorized run_mainwiz: (ml_needed, learning code) arrays.
+    """
+    available = codes['data_availability_y']
+    labelled = codes['data_label_y']
+    needed_ml = (~codes['data_programmability_y'] &
+                 (codes['data_knowledge_y'] | codes['data_pattern_y']))
+    ml_needed = np.where(available, needed_ml, codes['data_creativity_y'])
+    learning = np.select(
+        [available & labelled, available, codes['data_creativity_y']],
+        [LEARNING_SUPERVISED, LEARNING_UNSUPERVISED, LEARNING_REINFORCEMENT],
+        LEARNING_NONE).astype(np.int8)
+    return ml_needed, learning
+
+def infer(codes):
+    """
+    Vectorized perform_inference: arrays of the engine.Inference codes.
+    """
+    small = codes['size_small']
+    medium = ~small & codes['size_medium']
+    data_size = np.where(small, SIZE_LOW, SIZE_HIGH).astype(np.int8)
+    threshold = np.select([small, medium], [50, 5000], 500000)
+    features = codes['data_features_count']
+    ftod_ratio = ((features != NOT_APPLICABLE) & (features > threshold)).astype(np.int8)
+    return {
+        'data_size': data_size,
+        'interpretability': (codes['metric_interpretability'] >= 3).astype(np.int8),
+        'faster': (codes['metric_speed'] >= 3).astype(np.int8),
+        'reproducibility': (codes['metric_reproducibility'] >= 3).astype(np.int8),
+        'ftod_ratio': ftod_ratio,
+    }
+
+def _any(codes, fields, suffix='_missing'):
+    mask = np.zeros(len(codes['data_availability_missing']), dtype=bool)
+    for field in fields:
+        mask |= codes[field + suffix]
+    return mask
+
+def malformed(codes):
+    """
+    Rows with an answer that answers.Answers would refuse.
+    """
+    mask = np.zeros(len(codes['data_availability_missing']), dtype=bool)
+    for field in tuple(CHOICE_FIELDS) + NUMBER_FIELDS:
+        mask |= (codes[field] == INVALID) & ~codes[field + '_missing']
+    return mask
+
+def unanswered(codes):
+    """
+    Rows where a question read by run_mainwiz was not answered, and rows
+    per learning type where a question read by perform_inference or
+    decide_* was not answered.
+    """
+    available = codes['data_availability_y']
+    programmable = codes['data_programmability_y']
+    knowledge = codes['data_knowledge_y']
+    gating = (_any(codes, ('data_availability',)) |
+              (available & _any(codes, ('data_label', 'data_programmability'))) |
+              (available & ~programmable & _any(codes, ('data_knowledge',))) |
+              (available & ~programmable & ~knowledge & _any(codes, ('data_pattern',))) |
+              (~available & _any(codes, ('data_creativity',))))
+    inference = _any(codes, INFERENCE_FIELDS)
+    sup = inference | _any(codes, ('data_column', 'data_type_output', 'data_output_prob',
+                                   'data_io_relation', 'data_cond_indep', 'data_correlation'))
+    sup |= (codes['data_column'] == 2) & codes['data_signal_type_missing']
+    unsup = inference | _any(codes, ('unsup_goal', 'data_output_prob', 'unsup_clus_dv',
+                                     'unsup_clus_groups', 'unsup_clus_outliers',
+                                     'unsup_dr_topic_mod'))
+    reinf = _any(codes, ('data_type_output', 'ri_model_preference', 'ri_model_availability',
+                         'ri_modelfree_value', 'ri_modelfree_value_state'))
+    return gating, sup, unsup, reinf
+
+def _table_code(codes, field):
+    return np.where(codes[field] > TABLE_OPTIONS[field], 0, codes[field]).astype(np.int8)
+
+def _gather(table, keys):
+    """
+    Leaf ids for columns of canonical codes, via the mixed-radix index.
+    """
+    index = np.zeros(len(keys[0]), dtype=np.int32)
+    for codes, stride in zip(keys, table.strides):
+        index += codes * np.int32(stride)
+    # INVALID codes give an out of range index; those rows are discarded
+    # by the caller, wrapping just keeps the gather in bounds.
+    return np.frombuffer(table.leaf_ids, dtype=np.uint8).take(index, mode='wrap')
+
+def evaluate_codes(codes, decisions=None):
+    """
+    Evaluate encoded answers. Returns a ColumnarResult.
+    """
+    decisions = decisions or get_engine()
+    ml_needed, learning = gate(codes)
+    derived = infer(codes)
+    column = _table_code(codes, 'data_column')
+    signal = np.where(column == 2, _table_code(codes, 'data_signal_type'), 0).astype(np.int8)
+    output_type = _table_code(codes, 'data_type_output')
+
+    sup = ml_needed & (learning == LEARNING_SUPERVISED)
+    unsup = ml_needed & (learning == LEARNING_UNSUPERVISED)
+    reinf = ml_needed & (learning == LEARNING_REINFORCEMENT)
+    gating, sup_missing, unsup_missing, ri_missing = unanswered(codes)
+    invalid = malformed(codes) | gating | (sup & sup_missing) | (unsup & unsup_missing) | (reinf & ri_missing)
+
+    sup_leaf = _gather(decisions.supervised_table, (
+        derived['data_size'], derived['interpretability'], derived['faster'],
+        derived['ftod_ratio'], column, signal, output_type,
+        codes['data_output_prob'], codes['data_io_relation'],
+        codes['data_cond_indep'], codes['data_correlation']))
+    unsup_leaf = _gather(decisions.unsupervised_table, (
+        _table_code(codes, 'unsup_goal'), derived['data_size'], derived['reproducibility'],
+        codes['unsup_clus_dv'], codes['unsup_clus_groups'],
+        codes['unsup_clus_outliers'], codes['unsup_dr_topic_mod'],
+        codes['data_output_prob']))
+    ri_leaf = _gather(decisions.reinforcement_table, (
+        output_type, codes['ri_model_preference'], codes['ri_model_availability'],
+        codes['ri_modelfree_value'], codes['ri_modelfree_value_state']))
+
+    no_leaf = np.uint8(NO_LEAF)
+    leaf = np.select([invalid, sup, unsup, reinf],
+                     [no_leaf, sup_leaf, unsup_leaf, ri_leaf], no_leaf)
+    return ColumnarResult(ml_needed, learning, leaf, invalid)
+
+def evaluate_columns(columns, decisions=None):
+    """
+    Evaluate a mapping of field -> array-like of answers.
+    """
+    return evaluate_codes(encode(columns), decisions)
+
+def result_records(result, ids):
+    """
+    Generator of batch result dicts (see batch.RESULT_FIELDS) for rows
+    that are not invalid - invalid rows yield None.
+    """
+    for row, ident in enumerate(ids):
+        if result.invalid[row]:
+            yield None
+            continue
+        leaf = int(result.leaf[row])
+        learning = LEARNING_NAMES[result.learning[row]]
+        ml_needed = bool(result.ml_needed[row])
+        if leaf == NO_LEAF:
+            yield {'id': ident, 'ml_needed': ml_needed, 'learning': learning,
+                   'leaf': None, 'algorithm': None, 'error': None,
+                   'message': engine.NOT_REQUIRED}
+            continue
+        record = LEAVES[leaf].as_dict()
+        record.update({'id': ident, 'ml_needed': ml_needed,
+                       'learning': learning, 'error': None})
+        yield record
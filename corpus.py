@@ -0,0 +1,332 @@
+# Copyright 2021 Spirent Communications.
+# sridhar.rao@spirent.com
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Text-Corpus Profiler.
+Streams a corpus - a directory of documents (one per file, or one per
+line of its .jsonl files) or a JSONL file - and answers the questions of
+text data: data_column (text), data_text_type, data_size_bytes,
+data_size_samples (documents) and data_features_count (the estimated
+vocabulary, as a bag of words would see it).
+Every document is tokenized and checked for the markers of each text
+type (HTML tags, email headers, mentions and hashtags, chapters,
+citations, speaker turns and fillers); the type that most documents
+show is the answer, if enough do. The vocabulary is a HyperLogLog and
+the document lengths a quantile sketch (sketches.py), so the state is a
+few kilobytes per worker however many documents there are; documents
+are read up to MAX_DOCUMENT_BYTES each.
+With workers > 1 (0 for one per core), JSONL files are cut into
+newline-aligned byte ranges and directories into lists of files, which
+a process pool profiles - a bounded number in flight - and the partial
+profiles are merged.
+"""
+
+from __future__ import print_function
+import json
+import os
+import re
+import time
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+
+import profiler
+from sketches import HyperLogLog, QuantileSketch
+
+# pylint: disable=line-too-long,too-many-instance-attributes
+
+MAX_DOCUMENT_BYTES = 8 * 2 ** 20
+FILES_PER_TASK = 256
+# Byte ranges of a JSONL file handed to worker processes.
+RANGE_SIZE = 32 * 2 ** 20
+# A text type is the answer when at least this share of the documents shows it.
+TYPE_SHARE = 0.3
+TEXT_FIELD = 'text'
+
+# data_text_type options
+WEBPAGES, EMAILS, SOCIAL, BOOKS, ARTICLES, SPEECH, OTHER_TEXT = '1', '2', '3', '4', '5', '6', '7'
+TYPE_NAMES = {WEBPAGES: 'webpages', EMAILS: 'emails', SOCIAL: 'social-media posts', BOOKS: 'books',
+              ARTICLES: 'formal articles', SPEECH: 'speech transcripts', OTHER_TEXT: 'none of the above'}
+
+_TOKEN = re.compile(r"\w+(?:'\w+)?")
+_HTML = re.compile(r'<(?:!doctype|html|head|body|div|span|p|a|br|table|tr|td|script|style|meta|li|ul|h[1-6])\b|&(?:nbsp|amp|lt|gt|quot);', re.I)
+_EMAIL_HEADER = re.compile(r'^(?:from|to|subject|date|cc|bcc|reply-to|message-id|sent):[ \t]', re.I | re.M)
+_EMAIL_BODY = re.compile(r'^(?:dear|hi|hello)\b.*,\s*$|^(?:regards|best regards|thanks|sincerely|cheers),?\s*$|^-- ?$', re.I | re.M)
+_SOCIAL = re.compile(r'(?<![\w@])[@#]\w{2,}|\bRT @|https?://t\.co/|[\U0001F300-\U0001FAFF]')
+_CHAPTER = re.compile(r'^\s*(?:chapter|book|part)\s+(?:[ivxlc]+|\d+|one|two|three)\b', re.I | re.M)
+_CITATION = re.compile(r'\[\d+(?:[,-]\d+)*\]|\bet al\.|\(\w+(?: and \w+)?,? (?:19|20)\d\d\)|^\s*(?:abstract|references|bibliography|conclusions?|introduction)\s*$|\bdoi:', re.I | re.M)
+_SPEAKER = re.compile(r'^\s*(?:[A-Z]{2,}(?: [A-Z]{2,})?|speaker ?\d+)\s*:|\[\d{1,2}:\d{2}(?::\d{2})?\]', re.M)
+_FILLERS = frozenset(('uh', 'um', 'uhm', 'er', 'erm', 'hmm', 'mm', 'yeah', 'okay', 'gonna', 'wanna'))
+_STOPWORDS = frozenset(('the', 'of', 'and', 'to', 'a', 'in', 'is', 'it', 'that', 'for', 'you', 'was', 'on',
+                        'with', 'as', 'are', 'this', 'be', 'at', 'have', 'not', 'but', 'they', 'from'))
+
+
+def markers(text, tokens):
+    """
+    The text types a document shows the markers of.
+    """
+    found = set()
+    if len(_HTML.findall(text, 0, 65536)) >= 3:
+        found.add(WEBPAGES)
+    if len(_EMAIL_HEADER.findall(text, 0, 8192)) >= 2 or _EMAIL_BODY.search(text, 0, 65536):
+        found.add(EMAILS)
+    if len(text) <= 1000 and _SOCIAL.search(text):
+        found.add(SOCIAL)
+    if len(tokens) >= 20000 or len(_CHAPTER.findall(text)) >= 2:
+        found.add(BOOKS)
+    if len(_CITATION.findall(text)) >= 3:
+        found.add(ARTICLES)
+    fillers = sum(1 for token in tokens if token in _FILLERS)
+    if len(_SPEAKER.findall(text, 0, 65536)) >= 3 or (tokens and fillers >= max(2, 0.02 * len(tokens))):
+        found.add(SPEECH)
+    return found
+
+
+class CorpusStats():
+    """
+    Mergeable, fixed-size statistics of a stream of documents.
+    """
+    def __init__(self):
+        """
+        Perform Initialization.
+        """
+        self.documents = 0
+        self.bytes = 0
+        self.tokens = 0
+        self.skipped = 0
+        self.english = 0
+        self.non_ascii = 0
+        self.vocabulary = HyperLogLog()
+        self.lengths = QuantileSketch()
+        self.types = dict((text_type, 0) for text_type in TYPE_NAMES)
+
+    def add(self, text, size=None):
+        """
+        Account for one document (size is its size in bytes, when it was
+        read only in part).
+        """
+        self.documents += 1
+        self.bytes += len(text.encode('utf-8', 'replace')) if size is None else size
+        tokens = _TOKEN.findall(text.lower())
+        self.tokens += len(tokens)
+        self.lengths.add(len(tokens))
+        for token in set(tokens):
+            self.vocabulary.add(token)
+        if tokens and sum(1 for token in tokens if token in _STOPWORDS) >= 0.15 * len(tokens):
+            self.english += 1
+        if any(ord(character) > 127 for character in text[:4096]):
+            self.non_ascii += 1
+        for text_type in markers(text, tokens):
+            self.types[text_type] += 1
+
+    def merge(self, other):
+        """
+        Fold in the stats of another part of the corpus.
+        """
+        self.documents += other.documents
+        self.bytes += other.bytes
+        self.tokens += other.tokens
+        self.skipped += other.skipped
+        self.english += other.english
+        self.non_ascii += other.non_ascii
+        self.vocabulary.merge(other.vocabulary)
+        self.lengths.merge(other.lengths)
+        for text_type, count in other.types.items():
+            self.types[text_type] += count
+
+    def text_type(self):
+        """
+        data_text_type: the type most documents show, if at least
+        TYPE_SHARE of them do - else 'none of the above'.
+        """
+        if not self.documents:
+            return None
+        best = max(sorted(self.types), key=lambda text_type: self.types[text_type])
+        return best if self.types[best] >= TYPE_SHARE * self.documents else OTHER_TEXT
+
+
+############### Reading ######################
+
+def document_text(line, field=TEXT_FIELD):
+    """
+    The text of a JSONL line: its field, or all of its strings - None
+    when it is not a JSON object or has no text.
+    """
+    try:
+        record = json.loads(line)
+    except ValueError:
+        return None
+    if not isinstance(record, dict):
+        return record if isinstance(record, str) else None
+    value = record.get(field)
+    if isinstance(value, str):
+        return value
+    strings = [item for item in record.values() if isinstance(item, str)]
+    return '\n'.join(strings) if strings else None
+
+def scan_jsonl(path, start, end, field=TEXT_FIELD):
+    """
+    CorpusStats of the documents in bytes [start, end) of a JSONL file -
+    start and end are line starts (or the end of the file). Runs in a
+    worker process.
+    """
+    stats = CorpusStats()
+    with open(path, 'rb') as stream:
+        stream.seek(start)
+        position = start
+        while position < end:
+            line = stream.readline(MAX_DOCUMENT_BYTES)
+            if not line:
+                break
+            position += len(line)
+            if not line.endswith(b'\n') and position < end:
+                # Longer than MAX_DOCUMENT_BYTES: skip the rest of it.
+                rest = stream.readline()
+                position += len(rest)
+                stats.skipped += 1
+                continue
+            if not line.strip():
+                continue
+            text = document_text(line.decode('utf-8', 'replace'), field)
+            if text is None:
+                stats.skipped += 1
+            else:
+                stats.add(text, len(line))
+    return stats
+
+def scan_files(paths, field=TEXT_FIELD):
+    """
+    CorpusStats of a list of document files (.jsonl files hold one
+    document per line). Runs in a worker process.
+    """
+    stats = CorpusStats()
+    for path in paths:
+        try:
+            if path.endswith('.jsonl'):
+                stats.merge(scan_jsonl(path, 0, os.path.getsize(path), field))
+                continue
+            size = os.path.getsize(path)
+            with open(path, 'rb') as stream:
+                data = stream.read(MAX_DOCUMENT_BYTES)
+        except OSError:
+            stats.skipped += 1
+            continue
+        if b'\0' in data[:1024]:
+            stats.skipped += 1
+            continue
+        stats.add(data.decode('utf-8', 'replace'), size)
+    return stats
+
+def _scan_task(task):
+    kind, arguments = task
+    return scan_jsonl(*arguments) if kind == 'jsonl' else scan_files(*arguments)
+
+def _walk(root):
+    for directory, subdirectories, files in os.walk(root):
+        subdirectories.sort()
+        for name in sorted(files):
+            if not name.startswith('.'):
+                yield os.path.join(directory, name)
+
+def tasks(path, field=TEXT_FIELD, parts=1):
+    """
+    The work for a corpus, lazily: byte ranges of a JSONL file, lists
+    of FILES_PER_TASK files of a directory, or a single document file.
+    """
+    if os.path.isdir(path):
+        batch = []
+        for name in _walk(path):
+            batch.append(name)
+            if len(batch) == FILES_PER_TASK:
+                yield ('files', (batch, field))
+                batch = []
+        if batch:
+            yield ('files', (batch, field))
+        return
+    if not path.endswith('.jsonl'):
+        yield ('files', ([path], field))
+        return
+    size = os.path.getsize(path)
+    parts = max(parts, size // RANGE_SIZE) if parts > 1 else 1
+    for start, end in profiler.split_ranges(path, 0, size, parts):
+        yield ('jsonl', (path, start, end, field))
+
+
+Report = namedtuple('Report', 'path stats seconds')
+
+
+def profile_corpus(path, field=TEXT_FIELD, workers=1):
+    """
+    A Report of the corpus at path (a directory or a JSONL file), with
+    workers processes (0 for one per core) and at most twice as many
+    tasks in flight.
+    """
+    start = time.perf_counter()
+    if not os.path.exists(path):
+        raise ValueError("{0} does not exist".format(path))
+    if workers == 0:
+        workers = os.cpu_count() or 1
+    stats = CorpusStats()
+    work = tasks(path, field, workers * 4)
+    if workers == 1:
+        for task in work:
+            stats.merge(_scan_task(task))
+        return Report(path, stats, time.perf_counter() - start)
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        pending = set()
+        for task in work:
+            pending.add(executor.submit(_scan_task, task))
+            if len(pending) >= 2 * workers:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    stats.merge(future.result())
+        for future in pending:
+            stats.merge(future.result())
+    return Report(path, stats, time.perf_counter() - start)
+
+
+def answers(report):
+    """
+    The WizardStep answers a Report gives.
+    """
+    stats = report.stats
+    if not stats.documents:
+        return {}
+    return {
+        'data_column': '3',
+        'data_text_type': stats.text_type(),
+        'data_size_bytes': profiler.format_bytes(stats.bytes),
+        'data_size_samples': profiler.format_samples(stats.documents),
+        'data_features_count': str(max(1, stats.vocabulary.estimate())),
+    }
+
+def describe(report):
+    """
+    Printable lines for a Report.
+    """
+    stats = report.stats
+    lines = ["Corpus profile of {0} documents ({1}) in {2:.2f}s{3}:".format(
+        stats.documents, profiler.format_bytes(stats.bytes), report.seconds,
+        ', {0} skipped'.format(stats.skipped) if stats.skipped else '')]
+    if not stats.documents:
+        return lines
+    quartiles = stats.lengths.quantiles((0.25, 0.5, 0.75))
+    lines.append(" tokens: {0}, vocabulary ~{1}, per document {2} / {3} / {4} (quartiles), max {5}".format(
+        stats.tokens, stats.vocabulary.estimate(), quartiles[0], quartiles[1], quartiles[2], stats.lengths.maximum))
+    lines.append(" language: {0:.0%} English-like, {1:.0%} with non-ASCII text".format(
+        stats.english / float(stats.documents), stats.non_ascii / float(stats.documents)))
+    lines.append(" markers: " + ', '.join('{0} {1:.0%}'.format(TYPE_NAMES[text_type], count / float(stats.documents))
+                                         for text_type, count in sorted(stats.types.items()) if text_type != OTHER_TEXT))
+    lines.append(" text type: {0}".format(TYPE_NAMES[stats.text_type()]))
+    return lines
@@ -0,0 +1,263 @@
+# Copyright 2021 Spirent Communications.
+# sridhar.rao@spirent.com
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Correlation Screening for Wide Data.
+Answers data_correlation ("NO high correlation among the independent
+variables?") from the data, without a d x d correlation matrix.
+One streaming pass folds the rows into a count-sketch: every row is
+added, with a random sign, to one of width buckets, giving a width x d
+summary whose column cosines estimate the feature correlations (with a
+standard error of about 1/sqrt(width)). Highly correlated pairs are then
+found by comparing all columns when d is small, or among the columns
+that share a random-hyperplane (SimHash) signature when it is not.
+Requires numpy.
+"""
+
+from __future__ import print_function
+from collections import namedtuple
+
+import numpy as np
+
+import profiler
+
+# pylint: disable=line-too-long,too-many-locals
+
+WIDTH = 128
+THRESHOLD = 0.9
+# Up to this many features, every pair is compared.
+EXACT_LIMIT = 4096
+# SimHash signatures: BANDS signatures of BITS bits each, and each
+# feature is compared with the next WINDOW features of equal signature.
+BANDS = 64
+BITS = 20
+WINDOW = 4
+# Rows parsed and folded in at a time, at most this many bytes of text.
+BLOCK_BYTES = 16 * 2 ** 20
+# Sketch columns centred and scaled at a time.
+COLUMN_CHUNK = 8192
+
+Report = namedtuple('Report', 'samples features groups max_correlation width threshold names')
+
+
+class CorrelationSketch():
+    """
+    Streaming count-sketch of the columns of a samples x features matrix.
+    Memory is width x features float32 values, however many rows. Rows
+    are folded in relative to the mean of the first block, so that
+    float32 keeps the precision of columns far from zero. Each feature's
+    sketch is contiguous (Fortran order), for the column-wise passes.
+    """
+    def __init__(self, features, width=WIDTH, seed=0):
+        """
+        Perform Initialization.
+        """
+        self.width = width
+        self.rng = np.random.default_rng(seed)
+        self.sketch = np.zeros((width, features), dtype=np.float32, order='F')
+        self.bucket_signs = np.zeros(width)
+        self.samples = 0
+        self.shift = None
+        self.mean = np.zeros(features)
+        self.squares = np.zeros(features)
+
+    def update(self, rows):
+        """
+        Fold in a block of rows (a 2-D array; NaN for missing values,
+        which are replaced by the column mean).
+        """
+        rows = np.array(rows, dtype=float)
+        if not rows.size:
+            return
+        missing = np.isnan(rows)
+        if missing.any():
+            with np.errstate(invalid='ignore'):
+                fill = np.where(np.isnan(np.nanmean(rows, axis=0)), self.mean, np.nanmean(rows, axis=0))
+            rows[missing] = np.take(fill, np.nonzero(missing)[1])
+        count = len(rows)
+        if self.shift is None:
+            self.shift = rows.mean(axis=0)
+        # Running mean and sum of squared deviations, merged per block (Chan et al.)
+        mean = rows.mean(axis=0)
+        squares = ((rows - mean) ** 2).sum(axis=0)
+        delta = mean - self.mean
+        total = self.samples + count
+        self.squares += squares + delta ** 2 * self.samples * count / total
+        self.mean += delta * count / total
+        self.samples = total
+        buckets = self.rng.integers(0, self.width, count)
+        signs = self.rng.choice((-1.0, 1.0), count)
+        order = np.argsort(buckets, kind='stable')
+        buckets = buckets[order]
+        starts = np.flatnonzero(np.r_[True, buckets[1:] != buckets[:-1]])
+        self.sketch[buckets[starts]] += np.add.reduceat((rows[order] - self.shift) * signs[order, None], starts, axis=0)
+        self.bucket_signs += np.bincount(buckets, weights=signs[order], minlength=self.width)
+
+    def normalized(self):
+        """
+        (columns, unit sketches) - the sketch of each non-constant
+        feature, centred and scaled to unit length. The sketch is
+        centred and scaled in place, COLUMN_CHUNK columns at a time, so
+        this is called once, after the last update; only when some
+        features are constant are the others copied out.
+        """
+        features = self.sketch.shape[1]
+        norms = np.zeros(features)
+        if self.shift is not None:
+            offset = self.mean - self.shift
+            for start in range(0, features, COLUMN_CHUNK):
+                block = self.sketch[:, start:start + COLUMN_CHUNK]
+                block -= np.outer(self.bucket_signs, offset[start:start + COLUMN_CHUNK]).astype(np.float32)
+                norms[start:start + COLUMN_CHUNK] = np.sqrt(np.einsum('ij,ij->j', block, block, dtype=np.float64))
+                block /= np.maximum(norms[start:start + COLUMN_CHUNK], 1e-30).astype(np.float32)
+        varying = np.flatnonzero((self.squares > 1e-12 * np.maximum(1.0, self.mean ** 2) * max(self.samples, 1))
+                                 & (norms > 0))
+        return varying, self.sketch if len(varying) == features else self.sketch[:, varying]
+
+    def correlated_pairs(self, threshold=THRESHOLD, seed=1):
+        """
+        (i, j, estimated correlation) for the feature pairs whose
+        absolute estimated correlation is at least threshold.
+        """
+        columns, units = self.normalized()
+        count = units.shape[1]
+        if count < 2:
+            return []
+        if count <= EXACT_LIMIT:
+            gram = units.T @ units
+            first, second = np.nonzero(np.triu(np.abs(gram) >= threshold, 1))
+            return [(int(columns[i]), int(columns[j]), float(gram[i, j])) for i, j in zip(first, second)]
+        return self._hashed_pairs(columns, units, threshold, np.random.default_rng(seed))
+
+    @staticmethod
+    def _hashed_pairs(columns, units, threshold, rng):
+        # Each sketch is hashed alongside its negation (projected < 0), so
+        # strongly negative correlations share signatures just like
+        # strongly positive ones - without a negated copy of the sketches.
+        count = units.shape[1]
+        found = {}
+        for _ in range(BANDS):
+            planes = rng.standard_normal((BITS, units.shape[0])).astype(np.float32)
+            projected = planes @ units
+            keys = np.zeros(2 * count, dtype=np.int64)
+            for bit in range(BITS):
+                keys[:count] |= (projected[bit] > 0).astype(np.int64) << bit
+                keys[count:] |= (projected[bit] < 0).astype(np.int64) << bit
+            order = np.argsort(keys, kind='stable')
+            keys = keys[order]
+            for step in range(1, WINDOW + 1):
+                same = np.flatnonzero(keys[step:] == keys[:-step])
+                first, second = order[same] % count, order[same + step] % count
+                distinct = first != second
+                first, second = first[distinct], second[distinct]
+                if not first.size:
+                    break
+                estimate = np.einsum('ij,ij->j', units[:, first], units[:, second])
+                strong = np.abs(estimate) >= threshold
+                for i, j, value in zip(first[strong], second[strong], estimate[strong]):
+                    found[(min(i, j), max(i, j))] = float(value)
+        return [(int(columns[i]), int(columns[j]), value) for (i, j), value in sorted(found.items())]
+
+def groups_of(pairs):
+    """
+    Connected groups of features, from correlated pairs - largest first.
+    """
+    parent = {}
+    def root(node):
+        while parent.setdefault(node, node) != node:
+            parent[node] = parent[parent[node]]
+            node = parent[node]
+        return node
+    for first, second, _ in pairs:
+        parent[root(first)] = root(second)
+    groups = {}
+    for node in parent:
+        groups.setdefault(root(node), []).append(node)
+    return sorted((sorted(group) for group in groups.values()), key=lambda group: (-len(group), group))
+
+
+def _parse_block(lines, delimiter, columns):
+    """
+    Rows of numbers from lines of text - NaN for what does not parse.
+    """
+    text = delimiter.join(line.rstrip('\r\n') for line in lines)
+    try:
+        values = np.fromstring(text, sep=delimiter)
+        if values.size == len(lines) * columns:
+            return values.reshape(len(lines), columns)
+    except ValueError:
+        pass
+    rows = np.full((len(lines), columns), np.nan)
+    for number, line in enumerate(lines):
+        for column, field in enumerate(line.rstrip('\r\n').split(delimiter)[:columns]):
+            try:
+                rows[number, column] = float(field)
+            except ValueError:
+                pass
+    return rows
+
+def screen_file(path, delimiter=None, target=None, labelled=True, width=WIDTH,
+                threshold=THRESHOLD, seed=0):
+    """
+    Screen the features of a delimited file for highly correlated groups,
+    in one streaming pass. With labelled data the target column (the
+    last, unless given) is not a feature.
+    """
+    shape = profiler.layout(path, delimiter)
+    keep = np.arange(shape.columns)
+    if labelled and shape.columns > 1:
+        keep = np.delete(keep, profiler.target_index(shape.header, shape.columns, target))
+    sketch = CorrelationSketch(len(keep), width, seed)
+    with open(path, 'r', encoding='utf-8', errors='replace', newline='') as stream:
+        stream.seek(shape.start)
+        lines = []
+        size = 0
+        for line in stream:
+            if not line.strip():
+                continue
+            lines.append(line)
+            size += len(line)
+            if size >= BLOCK_BYTES:
+                sketch.update(_parse_block(lines, shape.delimiter, shape.columns)[:, keep])
+                lines = []
+                size = 0
+        if lines:
+            sketch.update(_parse_block(lines, shape.delimiter, shape.columns)[:, keep])
+    pairs = sketch.correlated_pairs(threshold, seed + 1)
+    names = [shape.header[column] for column in keep] if shape.header else [str(column) for column in keep]
+    return Report(sketch.samples, len(keep), groups_of(pairs),
+                  max((abs(value) for _, _, value in pairs), default=None), width, threshold, names)
+
+def answer(report):
+    """
+    data_correlation for a Report: 'Y' (confident there is NO high
+    correlation) unless a correlated group was found.
+    """
+    return 'N' if report.groups else 'Y'
+
+def describe(report, limit=5):
+    """
+    Printable lines for a Report.
+    """
+    lines = ["Correlation screening of {0} features over {1} samples (|r| >= {2}, +/- {3:.2f}):".format(
+        report.features, report.samples, report.threshold, 1 / np.sqrt(report.width))]
+    if not report.groups:
+        lines.append(" no highly correlated features found")
+    for group in report.groups[:limit]:
+        shown = ', '.join(report.names[member] for member in group[:8])
+        lines.append(" correlated group of {0}: {1}{2}".format(len(group), shown, ', ...' if len(group) > 8 else ''))
+    if len(report.groups) > limit:
+        lines.append(" ... and {0} more groups".format(len(report.groups) - limit))
+    return lines
@@ -0,0 +1,212 @@
+# Copyright 2021 Spirent Communications.
+# sridhar.rao@spirent.com
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Training Cost Model.
+Parses the data size answers into numbers, and estimates the training
+time and peak memory of each algorithm the selector can recommend for
+n samples x d features - so candidates can be ranked by cost, and the
+ones that can never fit (O(n^2) memory on a large n) stand out.
+The estimates are asymptotic, with textbook default hyper-parameters;
+they are for ranking, not for prediction.
+"""
+
+from __future__ import print_function
+import math
+import re
+from collections import namedtuple
+
+from answers import NOT_APPLICABLE
+from engine import LEAVES, LEAF_IDS, SUPERVISED, UNSUPERVISED
+
+# pylint: disable=line-too-long
+
+WORD = 8                # bytes per float64 value
+OPS_PER_SECOND = 1e9    # rough single-core throughput, to turn ops into seconds
+TREES = 100             # Random Forest
+ITERATIONS = 100        # iterative solvers: LASSO, Logistic, KMeans, GMM, LDA
+EPOCHS = 10             # ANN, CNN, RNN
+HIDDEN = 128            # ANN, CNN, RNN layer width
+CLUSTERS = 8            # KMeans, GMM
+COMPONENTS = 50         # SVD, LDA, PCA (capped at d)
+
+# Units of the size answers - "Use K/M/G Bytes unit", "Use T/M/B Samples"
+BYTE_UNITS = {'': 1, 'b': 1, 'k': 2 ** 10, 'kb': 2 ** 10, 'm': 2 ** 20, 'mb': 2 ** 20,
+              'g': 2 ** 30, 'gb': 2 ** 30, 't': 2 ** 40, 'tb': 2 ** 40}
+SAMPLE_UNITS = {'': 1, 't': 1e3, 'k': 1e3, 'm': 1e6, 'b': 1e9, 'g': 1e9}
+_QUANTITY = re.compile(r'^\s*([0-9]*\.?[0-9]+)\s*([a-z]*)\s*$')
+
+Shape = namedtuple('Shape', 'samples features size_bytes')
+Estimate = namedtuple('Estimate', 'leaf algorithm seconds memory fits')
+
+
+def _quantity(value, units):
+    if value is None:
+        return None
+    match = _QUANTITY.match(value.lower())
+    if match is None or match.group(2) not in units:
+        return None
+    return float(match.group(1)) * units[match.group(2)]
+
+def parse_bytes(value):
+    """
+    '10k', '5 MB', '1G' - the size in bytes, or None if it does not parse.
+    """
+    return _quantity(value, BYTE_UNITS)
+
+def parse_samples(value):
+    """
+    '1t' (thousand), '2m' (million), '1b' (billion) - the sample count, or None.
+    """
+    return _quantity(value, SAMPLE_UNITS)
+
+def shape(answers):
+    """
+    The numeric n x d of Answers, or None where unknown. A missing sample
+    count is estimated from the size in bytes, at WORD bytes per value.
+    """
+    size_bytes = parse_bytes(answers.data_size_bytes)
+    samples = parse_samples(answers.data_size_samples)
+    features = answers.data_features_count
+    if features is None or features == NOT_APPLICABLE or features < 1:
+        features = None
+    if samples is None and size_bytes and features:
+        samples = max(1.0, size_bytes / (WORD * features))
+    return Shape(samples, features, size_bytes)
+
+
+def _log(value):
+    return math.log2(max(value, 2))
+
+def _components(d):
+    return min(d, COMPONENTS)
+
+# leaf -> (training ops, peak bytes) as functions of n and d.
+# The input matrix itself (n * d * WORD) is counted in every memory estimate.
+MODELS = {
+    'sup_dt': (lambda n, d: n * d * _log(n),
+               lambda n, d: n * d * WORD + n * WORD),
+    'sup_rf': (lambda n, d: TREES * n * math.sqrt(d) * _log(n),
+               lambda n, d: n * d * WORD + TREES * n * WORD),
+    'sup_rnn': (lambda n, d: EPOCHS * n * (d * HIDDEN + HIDDEN * HIDDEN),
+                lambda n, d: n * d * WORD + (d + HIDDEN) * HIDDEN * WORD * 4),
+    'sup_cnn': (lambda n, d: EPOCHS * n * d * HIDDEN * 9,
+                lambda n, d: n * d * WORD + HIDDEN * HIDDEN * 9 * WORD * 4),
+    'sup_nb': (lambda n, d: n * d,
+               lambda n, d: n * d * WORD + d * WORD * 2),
+    'sup_ann': (lambda n, d: EPOCHS * n * (d * HIDDEN + HIDDEN * HIDDEN),
+                lambda n, d: n * d * WORD + (d + HIDDEN) * HIDDEN * WORD * 4),
+    # Gaussian kernel: the n x n Gram matrix dominates both.
+    'sup_svm': (lambda n, d: n * n * d + n ** 3 / 10,
+                lambda n, d: n * d * WORD + n * n * WORD),
+    'sup_linear': (lambda n, d: n * d * d + d ** 3,
+                   lambda n, d: n * d * WORD + d * d * WORD),
+    # Degree 2: d * (d + 1) / 2 expanded features.
+    'sup_poly': (lambda n, d: n * (d * d / 2) ** 2 + (d * d / 2) ** 3,
+                 lambda n, d: n * (d * d / 2 + d) * WORD + (d * d / 2) ** 2 * WORD),
+    'sup_lasso': (lambda n, d: ITERATIONS * n * d,
+                  lambda n, d: n * d * WORD + d * WORD),
+    'sup_logistic': (lambda n, d: ITERATIONS * n * d,
+                     lambda n, d: n * d * WORD + d * WORD * 2),
+    # Building the index; every query then costs about d * log(n).
+    'sup_knn': (lambda n, d: n * d * _log(n),
+                lambda n, d: n * d * WORD + n * WORD),
+    # Agglomerative: the condensed n x n distance matrix.
+    'unsup_hc': (lambda n, d: n * n * d + n * n * _log(n),
+                 lambda n, d: n * d * WORD + n * (n - 1) / 2 * WORD),
+    'unsup_dbscan': (lambda n, d: n * d * _log(n) * 10,
+                     lambda n, d: n * d * WORD + n * WORD * 10),
+    'unsup_gmm': (lambda n, d: ITERATIONS * n * CLUSTERS * d * d,
+                  lambda n, d: n * d * WORD + n * CLUSTERS * WORD + CLUSTERS * d * d * WORD),
+    'unsup_kmeans': (lambda n, d: ITERATIONS * n * CLUSTERS * d,
+                     lambda n, d: n * d * WORD + n * WORD + CLUSTERS * d * WORD),
+    'unsup_svd': (lambda n, d: n * d * _components(d),
+                  lambda n, d: n * d * WORD + (n + d) * _components(d) * WORD),
+    'unsup_lda': (lambda n, d: ITERATIONS * n * d * _components(d) / 10,
+                  lambda n, d: n * d * WORD + (n + d) * _components(d) * WORD),
+    'unsup_pca': (lambda n, d: n * d * d + d ** 3,
+                  lambda n, d: n * d * WORD + d * d * WORD),
+}
+
+# Unsupervised candidates that answer the same unsup_goal.
+GOAL_LEAVES = {
+    1: ('unsup_hc', 'unsup_dbscan', 'unsup_gmm', 'unsup_kmeans'),
+    2: ('unsup_svd', 'unsup_lda', 'unsup_pca'),
+}
+
+
+def estimate(leaf, samples, features, memory_limit=None):
+    """
+    Estimate for one leaf. fits is None without a memory_limit (bytes).
+    """
+    ops, peak = MODELS[leaf]
+    memory = peak(samples, features)
+    fits = None if memory_limit is None else memory <= memory_limit
+    return Estimate(leaf, LEAVES[LEAF_IDS[leaf]].algorithm,
+                    ops(samples, features) / OPS_PER_SECOND, memory, fits)
+
+def rank(samples, features, learning=None, memory_limit=None, leaves=None):
+    """
+    Estimates for every modelled algorithm (of the given learning type,
+    or among leaves), cheapest first. With a memory_limit, the ones that
+    fit come first.
+    """
+    estimates = [estimate(leaf, samples, features, memory_limit) for leaf in leaves or MODELS
+                 if learning is None or LEAVES[LEAF_IDS[leaf]].learning == learning]
+    estimates.sort(key=lambda est: (est.fits is False, est.seconds, est.memory))
+    return estimates
+
+def rank_answers(answers, learning, memory_limit=None):
+    """
+    rank() for the n x d in Answers, or None if it is not known.
+    Only Supervised and Unsupervised algorithms are modelled.
+    """
+    dims = shape(answers)
+    if learning not in (SUPERVISED, UNSUPERVISED) or not dims.samples or not dims.features:
+        return None
+    leaves = GOAL_LEAVES.get(answers.unsup_goal) if learning == UNSUPERVISED else None
+    return rank(dims.samples, dims.features, learning, memory_limit, leaves)
+
+
+def human_bytes(value):
+    """
+    1536 -> '1.5 KiB'
+    """
+    for unit in ('B', 'KiB', 'MiB', 'GiB', 'TiB', 'PiB'):
+        if value < 1024 or unit == 'PiB':
+            return "{0:.3g} {1}".format(value, unit)
+        value /= 1024.0
+    return None
+
+def human_seconds(value):
+    """
+    Seconds, in the largest unit that keeps the number readable.
+    """
+    for unit, size in (('years', 31557600.0), ('days', 86400.0), ('h', 3600.0), ('min', 60.0), ('s', 1.0)):
+        if value >= size:
+            return "{0:.3g} {1}".format(value / size, unit)
+    return "{0:.3g} ms".format(value * 1e3)
+
+def format_ranking(estimates, recommended=None):
+    """
+    The ranking as printable lines, the recommended leaf marked with '*'.
+    """
+    lines = ["  #  {0:<38} {1:>10} {2:>10}".format("Algorithm", "Time", "Memory")]
+    for position, est in enumerate(estimates, 1):
+        lines.append("{0}{1:2d}. {2:<38} {3:>10} {4:>10}{5}".format(
+            '*' if est.leaf == recommended else ' ', position, est.algorithm,
+            human_seconds(est.seconds), human_bytes(est.memory),
+            ' no fit' if est.fits is False else ''))
+    return lines
@@ -0,0 +1,558 @@
+# Copyright 2021 Spirent Communications.
+# sridhar.rao@spirent.com
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Decision Engine.
+The decide_* trees of the AlgoSelectorWizard are compiled once into
+flat lookup tables. Every answer is first reduced to a canonical code,
+the codes form a mixed-radix index, and the index selects a leaf
+(Recommendation) in O(1).
+"""
+
+from __future__ import print_function
+import itertools
+from array import array
+from collections import namedtuple
+
+from answers import NO, NOT_APPLICABLE, YES
+
+# pylint: disable=line-too-long,too-many-arguments,too-many-return-statements,too-many-branches
+
+CONTACT = "Sorry. We need to discuss, please connect with Anuket Thoth Project <sridhar.rao@spirent.com>"
+
+SUPERVISED = 'supervised'
+UNSUPERVISED = 'unsupervised'
+REINFORCEMENT = 'reinforcement'
+
+
+class Recommendation(namedtuple('Recommendation', 'leaf learning algorithm message')):
+    """
+    Leaf of a decision tree.
+    """
+    __slots__ = ()
+
+    @property
+    def fallback(self):
+        """
+        True when the tree could not recommend anything.
+        """
+        return self.algorithm is None
+
+    def as_dict(self):
+        """
+        Plain dict, for JSON output.
+        """
+        return {'leaf': self.leaf, 'learning': self.learning,
+                'algorithm': self.algorithm, 'message': self.message}
+
+
+def _sup(leaf, algorithm, prefix="Supervised Learning model to consider  - "):
+    return Recommendation(leaf, SUPERVISED, algorithm, prefix + algorithm)
+
+def _unsup(leaf, algorithm):
+    return Recommendation(leaf, UNSUPERVISED, algorithm,
+                          "Unsupervised Learning model to consider: " + algorithm)
+
+def _ri(leaf, algorithm, prefix="Reinforcement Learning models to consider - "):
+    return Recommendation(leaf, REINFORCEMENT, algorithm, prefix + algorithm)
+
+# All the leaves, in a fixed order. The position is the leaf id.
+LEAVES = (
+    Recommendation('contact', None, None, CONTACT),
+    _sup('sup_dt', "Decision Tree"),
+    _sup('sup_rf', "Random Forest"),
+    _sup('sup_rnn', "RNN"),
+    _sup('sup_cnn', "CNN"),
+    _sup('sup_nb', "Naive Bayes"),
+    _sup('sup_ann', "ANN"),
+    _sup('sup_svm', "SVM with Gaussian Kernel"),
+    _sup('sup_linear', "Linear Regression or Linear SVM"),
+    _sup('sup_poly', "Polynomial Regression or nonLinear SVM"),
+    _sup('sup_lasso', "LASSO or Ridge Regression"),
+    _sup('sup_logistic', "Logistic Regression"),
+    _sup('sup_knn', "KNN", "Supervised Learning model to consider - "),
+    _unsup('unsup_hc', "Hierarchical Clustering"),
+    _unsup('unsup_dbscan', "DBSCAN"),
+    _unsup('unsup_gmm', "Gaussian Mixture"),
+    _unsup('unsup_kmeans', "KMeans"),
+    _unsup('unsup_svd', "SVD"),
+    _unsup('unsup_lda', "LDA"),
+    _unsup('unsup_pca', "PCA"),
+    _ri('ri_alphazero', "AlphaZero", "Reinforcement Learning model to consider - "),
+    _ri('ri_world_models', "World Models, I2A, MBMF, and MBVE"),
+    _ri('ri_policy_gradient', "Policy Gradient and Actor Critic",
+        "Reinforcement Learning models to consider: "),
+    _ri('ri_td', "Monte Carlo, TD(0), and TD(Lambda)"),
+    _ri('ri_sarsa', "SARSA, QLearning, Deep Queue Nets"),
+)
+LEAF_IDS = dict((rec.leaf, idx) for idx, rec in enumerate(LEAVES))
+
+# Streaming, mini-batch or partial-fit variants of the leaves, for data
+# that does not fit in memory. They are not decision-tree leaves - the
+# hardware check swaps them in after the decision.
+OUT_OF_CORE = dict((rec.leaf.rsplit('_ooc', 1)[0], rec) for rec in (
+    _sup('sup_dt_ooc', "Hoeffding Tree (streaming Decision Tree)"),
+    _sup('sup_rf_ooc', "Adaptive Random Forest (streaming) or Gradient Boosting with external memory"),
+    _sup('sup_rnn_ooc', "RNN trained on mini-batches streamed from disk"),
+    _sup('sup_cnn_ooc', "CNN trained on mini-batches streamed from disk"),
+    _sup('sup_nb_ooc', "Naive Bayes with partial_fit"),
+    _sup('sup_ann_ooc', "ANN trained on mini-batches streamed from disk"),
+    _sup('sup_svm_ooc', "Random Fourier Features with an SGD-trained Linear SVM"),
+    _sup('sup_linear_ooc', "SGD Regressor or SGD Linear SVM (partial_fit)"),
+    _sup('sup_poly_ooc', "SGD Regressor on streamed Polynomial Features"),
+    _sup('sup_lasso_ooc', "SGD Regressor with L1/L2 penalty (partial_fit)"),
+    _sup('sup_logistic_ooc', "SGD Logistic Regression (partial_fit)"),
+    _sup('sup_knn_ooc', "Approximate Nearest Neighbours over an on-disk index"),
+    _unsup('unsup_hc_ooc', "BIRCH (incremental Hierarchical Clustering)"),
+    _unsup('unsup_dbscan_ooc', "BIRCH, or DBSCAN on a sample"),
+    _unsup('unsup_gmm_ooc', "Mini-Batch KMeans, or online EM Gaussian Mixture"),
+    _unsup('unsup_kmeans_ooc', "Mini-Batch KMeans"),
+    _unsup('unsup_svd_ooc', "Randomized SVD over streamed blocks"),
+    _unsup('unsup_lda_ooc', "Online LDA (mini-batch variational Bayes)"),
+    _unsup('unsup_pca_ooc', "Incremental PCA"),
+))
+
+############### Canonical Answer Codes ######################
+
+# Data size and features-to-data ratio, as set by perform_inference.
+SIZE_UNKNOWN, SIZE_LOW, SIZE_HIGH = 0, 1, 2
+SIZE_CODES = {'unknown': SIZE_UNKNOWN, 'low': SIZE_LOW, 'high': SIZE_HIGH}
+RATIO_LOW, RATIO_HIGH = 0, 1
+RATIO_CODES = {'low': RATIO_LOW, 'high': RATIO_HIGH}
+# The trees only tell some of the numbered answers apart - everything
+# else is 'other' (0) in the tables.
+TABLE_OPTIONS = {'data_column': 3, 'data_signal_type': 5,
+                 'data_type_output': 5, 'unsup_goal': 2}
+
+
+def table_code(field, code):
+    """
+    Numbered answer code as the decision tables see it.
+    """
+    return code if code <= TABLE_OPTIONS[field] else 0
+
+
+Inference = namedtuple('Inference', 'data_size interpretability faster reproducibility ftod_ratio')
+Inference.__doc__ = """
+Derived answers, as computed by perform_inference.
+"""
+DEFAULT_INFERENCE = Inference('high', False, False, False, 'low')
+
+
+def size_class(size_bytes, size_samples):
+    """
+    data_size, and the number of features above which ftod_ratio is high.
+    K bytes or thousands of samples is low; anything bigger is high -
+    the data_size the original wizard decided with.
+    """
+    if 'k' in size_bytes or 't' in size_samples:
+        return 'low', 50
+    if 'm' in size_bytes or 'm' in size_samples:
+        return 'high', 5000
+    return 'high', 500000
+
+def high_ratio(features, threshold):
+    """
+    Is ftod_ratio high - an NA features count is not, as ftod_ratio
+    stays at its initial 'low' when no number says otherwise.
+    """
+    return features != NOT_APPLICABLE and features > threshold
+
+def infer(answers):
+    """
+    Pure form of AlgoSelectorWizard.perform_inference, over typed Answers.
+    """
+    answers.require('data_size_bytes', 'data_size_samples', 'data_features_count',
+                    'metric_interpretability', 'metric_speed', 'metric_reproducibility')
+    data_size, threshold = size_class(answers.data_size_bytes, answers.data_size_samples)
+    return Inference(data_size,
+                     answers.metric_interpretability >= 3,
+                     answers.metric_speed >= 3,
+                     answers.metric_reproducibility >= 3,
+                     'high' if high_ratio(answers.data_features_count, threshold) else 'low')
+
+############### The Rules ######################
+# Each rule is the original decide_* tree, written over canonical codes.
+# key is a complete table key while compiling the tables, or a LazyKey
+# when questions are asked adaptively.
+
+def supervised_rule(key):
+    """
+    decide_supervised
+    """
+    if key.data_size == SIZE_HIGH:
+        # Cover: DT, RF, RNN, CNN, ANN and Naive Bayes
+        if key.interpretability:
+            return 'sup_dt' if key.faster else 'sup_rf'
+        if key.data_column == 3:
+            return 'sup_rnn'
+        if key.data_column == 2 and key.data_signal_type == 1:
+            return 'sup_cnn'
+        if key.data_column == 2 and key.data_signal_type in (2, 3):
+            return 'sup_nb' if key.data_output_prob == YES else 'sup_ann'
+        return 'sup_ann'
+    if key.data_size == SIZE_LOW:
+        # Cover: Regressions
+        if key.ftod_ratio != RATIO_HIGH:
+            return 'sup_svm'
+        if key.data_type_output == 2:
+            return 'sup_linear' if key.data_io_relation == YES else 'sup_poly'
+        if key.data_type_output == 4:
+            if key.data_output_prob != YES:
+                return 'sup_poly'
+            if key.data_cond_indep == YES:
+                return 'sup_nb'
+            return 'sup_lasso' if key.data_correlation == YES else 'sup_logistic'
+        return 'sup_knn'
+    return 'contact'
+
+def unsupervised_rule(key):
+    """
+    decide_unsupervised
+    """
+    if key.unsup_goal == 1:
+        # Clustering
+        if key.data_size == SIZE_HIGH:
+            repro = key.reproducibility
+        elif key.unsup_clus_dv == YES:
+            if key.unsup_clus_groups != YES:
+                return 'unsup_hc'
+            repro = False
+        else:
+            repro = True
+        if repro:
+            return 'unsup_hc' if key.unsup_clus_outliers == YES else 'unsup_dbscan'
+        return 'unsup_gmm' if key.data_output_prob == YES else 'unsup_kmeans'
+    if key.unsup_goal == 2:
+        # Dimensionality Reduction
+        if key.unsup_dr_topic_mod == YES:
+            return 'unsup_svd' if key.data_output_prob == YES else 'unsup_lda'
+        return 'unsup_pca'
+    return 'contact'
+
+def reinforcement_rule(key):
+    """
+    decide_reinforcement
+    """
+    if key.data_type_output == 2 or key.ri_model_preference == YES:
+        # Model Based
+        return 'ri_alphazero' if key.ri_model_availability == YES else 'ri_world_models'
+    if key.ri_model_preference == NO:
+        # Model-Free based approach.
+        if key.ri_modelfree_value != YES:
+            return 'ri_policy_gradient'
+        return 'ri_td' if key.ri_modelfree_value_state == YES else 'ri_sarsa'
+    return 'contact'
+
+RULES = {SUPERVISED: supervised_rule, UNSUPERVISED: unsupervised_rule,
+         REINFORCEMENT: reinforcement_rule}
+
+############### Adaptive Questions ######################
+
+# The questions behind the derived (perform_inference) table fields.
+DERIVED_QUESTIONS = {
+    'data_size': ('data_size_bytes', 'data_size_samples'),
+    'ftod_ratio': ('data_size_bytes', 'data_size_samples', 'data_features_count'),
+    'interpretability': ('metric_interpretability',),
+    'faster': ('metric_speed',),
+    'reproducibility': ('metric_reproducibility',),
+}
+
+
+class Unanswered(Exception):
+    """
+    A rule needs the answer to a question that was not asked yet.
+    """
+    def __init__(self, question):
+        Exception.__init__(self, question)
+        self.question = question
+
+
+class LazyKey():
+    """
+    Table key whose codes are computed from partial Answers as a rule
+    reads them. Reading a code whose question is unanswered raises
+    Unanswered - so a rule only ever asks for what its path consumes.
+    """
+    def __init__(self, answers):
+        """
+        Perform Initialization.
+        """
+        self.answers = answers
+
+    def _answer(self, question):
+        value = getattr(self.answers, question)
+        if value is None:
+            raise Unanswered(question)
+        return value
+
+    def __getattr__(self, field):
+        value = self._answer(field)
+        return table_code(field, value) if field in TABLE_OPTIONS else value
+
+    def _size_class(self):
+        return size_class(self._answer('data_size_bytes'), self._answer('data_size_samples'))
+
+    @property
+    def data_size(self):
+        """
+        As perform_inference.
+        """
+        return SIZE_CODES[self._size_class()[0]]
+
+    @property
+    def ftod_ratio(self):
+        """
+        As perform_inference.
+        """
+        threshold = self._size_class()[1]
+        return RATIO_HIGH if high_ratio(self._answer('data_features_count'), threshold) else RATIO_LOW
+
+    @property
+    def interpretability(self):
+        """
+        As perform_inference.
+        """
+        return self._answer('metric_interpretability') >= 3
+
+    @property
+    def faster(self):
+        """
+        As perform_inference.
+        """
+        return self._answer('metric_speed') >= 3
+
+    @property
+    def reproducibility(self):
+        """
+        As perform_inference.
+        """
+        return self._answer('metric_reproducibility') >= 3
+
+
+def resolve(answers, learning):
+    """
+    Walk the tree for learning over partial Answers.
+    Returns (Recommendation, None) once a leaf is reached, or
+    (None, question) with the next question that can change the outcome.
+    """
+    try:
+        return LEAVES[LEAF_IDS[RULES[learning](LazyKey(answers))]], None
+    except Unanswered as need:
+        return None, need.question
+
+def dependencies(table):
+    """
+    Every question a compiled table's rule can consume, in table order.
+    """
+    questions = []
+    for field in table.fields:
+        for question in DERIVED_QUESTIONS.get(field, (field,)):
+            if question not in questions:
+                questions.append(question)
+    return tuple(questions)
+
+############### The Tables ######################
+
+class DecisionTable():
+    """
+    One rule, compiled into a flat table of leaf ids.
+    """
+    def __init__(self, name, fields, rule):
+        """
+        fields is a sequence of (field-name, number-of-codes).
+        """
+        self.name = name
+        self.fields = tuple(field for field, _ in fields)
+        self.radix = tuple(size for _, size in fields)
+        strides = []
+        stride = 1
+        for size in reversed(self.radix):
+            strides.append(stride)
+            stride *= size
+        self.strides = tuple(reversed(strides))
+        key_type = namedtuple('Key', self.fields)
+        self.leaf_ids = array('B', (LEAF_IDS[rule(key_type._make(key))] for key in
+                                    itertools.product(*[range(size) for size in self.radix])))
+
+    def __len__(self):
+        return len(self.leaf_ids)
+
+    def index(self, key):
+        """
+        Mixed-radix index of a canonical key.
+        """
+        return sum(code * stride for code, stride in zip(key, self.strides))
+
+    def lookup(self, key):
+        """
+        Recommendation for a canonical key.
+        """
+        return LEAVES[self.leaf_ids[self.index(key)]]
+
+
+class DecisionEngine():
+    """
+    Compiled form of decide_supervised, decide_unsupervised and decide_reinforcement.
+    """
+    def __init__(self):
+        """
+        Compile the tables.
+        """
+        flag = 2
+        yes_no_u = 3
+        self.supervised_table = DecisionTable(SUPERVISED, (
+            ('data_size', 3), ('interpretability', flag), ('faster', flag),
+            ('ftod_ratio', 2), ('data_column', 4), ('data_signal_type', 6),
+            ('data_type_output', 6), ('data_output_prob', yes_no_u),
+            ('data_io_relation', yes_no_u), ('data_cond_indep', yes_no_u),
+            ('data_correlation', yes_no_u)), supervised_rule)
+        self.unsupervised_table = DecisionTable(UNSUPERVISED, (
+            ('unsup_goal', 3), ('data_size', 3), ('reproducibility', flag),
+            ('unsup_clus_dv', yes_no_u), ('unsup_clus_groups', yes_no_u),
+            ('unsup_clus_outliers', yes_no_u), ('unsup_dr_topic_mod', yes_no_u),
+            ('data_output_prob', yes_no_u)), unsupervised_rule)
+        self.reinforcement_table = DecisionTable(REINFORCEMENT, (
+            ('data_type_output', 6), ('ri_model_preference', yes_no_u),
+            ('ri_model_availability', yes_no_u), ('ri_modelfree_value', yes_no_u),
+            ('ri_modelfree_value_state', yes_no_u)), reinforcement_rule)
+
+    ### Canonical keys ##############################
+    @staticmethod
+    def supervised_key(answers, inference):
+        """
+        Canonical key for decide_supervised.
+        """
+        answers.require('data_column', 'data_type_output', 'data_output_prob',
+                        'data_io_relation', 'data_cond_indep', 'data_correlation')
+        data_column = table_code('data_column', answers.data_column)
+        # The signal type is only read for signals.
+        signal_type = 0
+        if data_column == 2:
+            answers.require('data_signal_type')
+            signal_type = table_code('data_signal_type', answers.data_signal_type)
+        return (SIZE_CODES.get(inference.data_size, SIZE_UNKNOWN),
+                int(inference.interpretability), int(inference.faster),
+                RATIO_CODES.get(inference.ftod_ratio, RATIO_LOW),
+                data_column, signal_type,
+                table_code('data_type_output', answers.data_type_output),
+                answers.data_output_prob, answers.data_io_relation,
+                answers.data_cond_indep, answers.data_correlation)
+
+    @staticmethod
+    def unsupervised_key(answers, inference):
+        """
+        Canonical key for decide_unsupervised.
+        """
+        answers.require('unsup_goal', 'unsup_clus_dv', 'unsup_clus_groups',
+                        'unsup_clus_outliers', 'unsup_dr_topic_mod', 'data_output_prob')
+        return (table_code('unsup_goal', answers.unsup_goal),
+                SIZE_CODES.get(inference.data_size, SIZE_UNKNOWN),
+                int(inference.reproducibility),
+                answers.unsup_clus_dv, answers.unsup_clus_groups,
+                answers.unsup_clus_outliers, answers.unsup_dr_topic_mod,
+                answers.data_output_prob)
+
+    @staticmethod
+    def reinforcement_key(answers):
+        """
+        Canonical key for decide_reinforcement.
+        """
+        answers.require('data_type_output', 'ri_model_preference', 'ri_model_availability',
+                        'ri_modelfree_value', 'ri_modelfree_value_state')
+        return (table_code('data_type_output', answers.data_type_output),
+                answers.ri_model_preference, answers.ri_model_availability,
+                answers.ri_modelfree_value, answers.ri_modelfree_value_state)
+
+    ### Decisions ##############################
+    def supervised(self, answers, inference=DEFAULT_INFERENCE):
+        """
+        Recommendation for supervised learning.
+        """
+        return self.supervised_table.lookup(self.supervised_key(answers, inference))
+
+    def unsupervised(self, answers, inference=DEFAULT_INFERENCE):
+        """
+        Recommendation for unsupervised learning.
+        """
+        return self.unsupervised_table.lookup(self.unsupervised_key(answers, inference))
+
+    def reinforcement(self, answers):
+        """
+        Recommendation for reinforcement learning.
+        """
+        return self.reinforcement_table.lookup(self.reinforcement_key(answers))
+
+
+_ENGINE = []
+
+def get_engine():
+    """
+    The shared, compiled engine. Tables are built on first use.
+    """
+    if not _ENGINE:
+        _ENGINE.append(DecisionEngine())
+    return _ENGINE[0]
+
+
+############### Need for ML ######################
+
+NOT_REQUIRED = "ML is not required - Please consider alternate approaches"
+NEEDED = "Looks like you need ML, let's continue"
+
+Gate = namedtuple('Gate', 'ml_needed learning message')
+Gate.__doc__ = """
+Outcome of the main wizard: is ML needed, and which kind of learning.
+"""
+
+
+def gate(answers):
+    """
+    Pure form of AlgoSelectorWizard.run_mainwiz, over typed Answers.
+    """
+    answers.require('data_availability')
+    if answers.data_availability:
+        answers.require('data_label', 'data_programmability')
+        learning = SUPERVISED if answers.data_label else UNSUPERVISED
+        if answers.data_programmability:
+            return Gate(False, learning, NOT_REQUIRED)
+        answers.require('data_knowledge')
+        if answers.data_knowledge:
+            return Gate(True, learning, NEEDED)
+        answers.require('data_pattern')
+        if answers.data_pattern:
+            return Gate(True, learning, NEEDED)
+        return Gate(False, learning, NOT_REQUIRED)
+    answers.require('data_creativity')
+    if answers.data_creativity:
+        return Gate(True, REINFORCEMENT, NEEDED)
+    return Gate(False, None, NOT_REQUIRED)
+
+
+def recommend(answers, engine=None):
+    """
+    Full headless decision over the typed Answers of one session.
+    Returns the Gate and, when ML is needed, the Recommendation.
+    """
+    engine = engine or get_engine()
+    verdict = gate(answers)
+    if not verdict.ml_needed:
+        return verdict, None
+    if verdict.learning == REINFORCEMENT:
+        return verdict, engine.reinforcement(answers)
+    inference = infer(answers)
+    if verdict.learning == SUPERVISED:
+        return verdict, engine.supervised(answers, inference)
+    return verdict, engine.unsupervised(answers, inference)
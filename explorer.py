@@ -0,0 +1,314 @@
+# Copyright 2021 Spirent Communications.
+# sridhar.rao@spirent.com
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Decision-Space Explorer.
+Enumerates every path through the main wizard gate and the decide_*
+rules, with the recommendation each one reaches - for auditing what the
+tool can say, and for which answers.
+The rules are run as they are (no copy of the trees): an answer is only
+chosen when a rule reads it, and then every class of that answer is
+tried in turn - so only the questions a path consumes are on it, and
+each one by its classes (Y/N/U, 1-2/3-5, K/M/G ...), not by its raw
+values. Every path is then replayed through recommend() (the compiled
+tables, as batch and api use) and resolve() (the adaptive wizard). Paths
+that raise or disagree, and unreachable leaves, are defects: they are
+reported and the exit status is 1.
+
+    python explorer.py
+    python explorer.py --format jsonl --output paths.jsonl
+"""
+
+from __future__ import print_function
+import argparse
+import json
+import sys
+import time
+from collections import namedtuple
+
+from specs import STEP_SPECS
+from answers import Answers, CHOICE_FIELDS, FIELDS, GATE_FIELDS, METRIC_FIELDS, YES_NO_FIELDS
+from engine import gate, get_engine, recommend, resolve, LazyKey, LEAVES, LEAF_IDS, RULES, TABLE_OPTIONS
+
+# pylint: disable=line-too-long,too-few-public-methods
+
+# The classes of every answer, as (label, representative raw answer).
+# Two answers in one class get the same code, or codes no rule or
+# threshold tells apart.
+CLASSES = {
+    'data_size_bytes': (('K', '10K'), ('M', '10M'), ('G', '10G')),
+    'data_size_samples': (('T', '10T'), ('M', '10M'), ('B', '10B')),
+    # Above 50, 5000 and 500000 features, ftod_ratio is high - by data size.
+    'data_features_count': (('<=50', '10'), ('51-5000', '100'), ('5001-500000', '10000'),
+                            ('>500000', '1000000'), ('NA', 'NA')),
+}
+CLASSES.update((field, (('Y', 'Y'), ('not Y', 'N'))) for field in GATE_FIELDS)
+CLASSES.update((field, (('Y', 'Y'), ('N', 'N'), ('U', 'U'))) for field in YES_NO_FIELDS)
+CLASSES.update((field, (('1-2', '1'), ('3-5', '3'))) for field in METRIC_FIELDS)
+# Numbered answers: the options the tables tell apart, and 'other' (the
+# first option they do not, or an out-of-range number).
+CLASSES.update((field, tuple((str(number), str(number)) for number in range(1, TABLE_OPTIONS.get(field, options) + 1))
+                + (('other', str(TABLE_OPTIONS[field] + 1) if TABLE_OPTIONS.get(field, options) < options else '0'),))
+               for field, (options, _) in CHOICE_FIELDS.items())
+
+Path = namedtuple('Path', 'conditions learning leaf error')
+Path.__doc__ = """
+One path: the (question, class label) pairs it consumed, in the order
+read, and its outcome - the learning and leaf (None when ML is not
+needed), or the error it raised.
+"""
+
+
+class BranchingAnswers():
+    """
+    Stands in for Answers in gate() and the rules. The first read of a
+    question picks one of its classes - the next one the explorer has
+    not tried at that point of the path - and records it.
+    """
+    def __init__(self, choices):
+        """
+        choices is the explorer's stack of [class index, class count]
+        branch points, replayed and extended as questions are read.
+        """
+        self.choices = choices
+        self.depth = 0
+        self.answers = Answers()
+        self.raw = {}
+        self.conditions = []
+
+    def __getattr__(self, question):
+        value = getattr(self.answers, question)
+        if value is None:
+            classes = CLASSES[question]
+            if self.depth == len(self.choices):
+                self.choices.append([0, len(classes)])
+            label, raw = classes[self.choices[self.depth][0]]
+            self.depth += 1
+            self.answers.update({question: raw})
+            self.raw[question] = raw
+            self.conditions.append((question, label))
+            value = getattr(self.answers, question)
+        return value
+
+    @staticmethod
+    def require(*_):
+        """
+        Every question can be answered - on demand.
+        """
+
+
+def _walk(answers):
+    verdict = gate(answers)
+    if not verdict.ml_needed:
+        return verdict.learning, None
+    return verdict.learning, LEAVES[LEAF_IDS[RULES[verdict.learning](LazyKey(answers))]].leaf
+
+def walk_paths():
+    """
+    Every path, depth first, with the raw answers that take it.
+    """
+    choices = []
+    while True:
+        answers = BranchingAnswers(choices)
+        try:
+            learning, leaf = _walk(answers)
+            error = None
+        except (ValueError, KeyError, TypeError, AttributeError) as err:
+            learning, leaf, error = None, None, "{0}: {1}".format(type(err).__name__, err)
+        del choices[answers.depth:]
+        yield Path(tuple(answers.conditions), learning, leaf, error), answers.raw
+        while choices and choices[-1][0] + 1 == choices[-1][1]:
+            choices.pop()
+        if not choices:
+            return
+        choices[-1][0] += 1
+
+def defaults():
+    """
+    The wizard defaults, for the questions a path does not consume.
+    """
+    return dict((step.id, step.default) for step in STEP_SPECS.values() if step.id in FIELDS)
+
+def replay(path, raw, engine=None, base=None):
+    """
+    Problems replaying a path's answers: through recommend(), with the
+    other questions at their defaults, and through resolve() with only
+    the path's answers. Empty when both agree with the path.
+    """
+    engine = engine or get_engine()
+    full = dict(base or defaults())
+    full.update(raw)
+    problems = []
+    try:
+        verdict, recommendation = recommend(Answers(full), engine)
+        outcome = (verdict.learning, recommendation.leaf if recommendation else None, None)
+    except (ValueError, KeyError, TypeError, AttributeError) as err:
+        outcome = (None, None, "{0}: {1}".format(type(err).__name__, err))
+    if (outcome[2] is None) != (path.error is None) or outcome[:2] != (path.learning, path.leaf):
+        problems.append("recommend() gives {0}".format(outcome[2] or outcome[1]))
+    if path.leaf is not None:
+        try:
+            recommendation, question = resolve(Answers(raw), path.learning)
+            if question is not None:
+                problems.append("resolve() asks for {0}".format(question))
+            elif recommendation.leaf != path.leaf:
+                problems.append("resolve() gives {0}".format(recommendation.leaf))
+        except (ValueError, KeyError, TypeError, AttributeError) as err:
+            problems.append("resolve() raises {0}: {1}".format(type(err).__name__, err))
+    return problems
+
+def merge(paths):
+    """
+    Fold paths that only differ in one question, over all of its
+    classes, into one path without that question - repeated until
+    nothing folds. Order is kept (by first path).
+    """
+    paths = list(paths)
+    changed = True
+    while changed:
+        changed = False
+        groups = {}
+        for number, path in enumerate(paths):
+            for position, (question, label) in enumerate(path.conditions):
+                rest = path.conditions[:position] + path.conditions[position + 1:]
+                key = (question, rest, path.learning, path.leaf, path.error)
+                groups.setdefault(key, []).append((number, label))
+        merged = set()
+        folded = []
+        for (question, rest, learning, leaf, error), members in groups.items():
+            numbers = [number for number, _ in members]
+            if (len(set(label for _, label in members)) < len(CLASSES[question])
+                    or merged.intersection(numbers)):
+                continue
+            merged.update(numbers)
+            folded.append((min(numbers), Path(rest, learning, leaf, error)))
+        if merged:
+            changed = True
+            kept = [(number, path) for number, path in enumerate(paths) if number not in merged]
+            paths = [path for _, path in sorted(kept + folded, key=lambda item: item[0])]
+    return paths
+
+Report = namedtuple('Report', 'paths merged problems unreachable seconds')
+
+def explore(fold=True):
+    """
+    The whole decision space: a Report of the paths (merged with fold),
+    the raw path count, the replay problems (path, messages) and the
+    leaves no path reaches.
+    """
+    start = time.perf_counter()
+    engine = get_engine()
+    base = defaults()
+    paths = []
+    problems = []
+    for path, raw in walk_paths():
+        paths.append(path)
+        messages = replay(path, raw, engine, base)
+        if messages:
+            problems.append((path, messages))
+    reached = set(path.leaf for path in paths)
+    unreachable = tuple(leaf.leaf for leaf in LEAVES if leaf.leaf not in reached)
+    shown = merge(paths) if fold else paths
+    return Report(shown, len(paths), problems, unreachable, time.perf_counter() - start)
+
+
+def outcome_of(path):
+    """
+    What a path ends in, as shown.
+    """
+    if path.error:
+        return 'raises ' + path.error
+    if path.leaf is None:
+        return 'no ML'
+    return path.leaf
+
+def _conditions(path):
+    return ' '.join('{0}={1}'.format(question, label) for question, label in path.conditions)
+
+def format_report(report):
+    """
+    Printable lines: the path -> recommendation table, then the summary.
+    """
+    lines = ["{0:<20} {1}".format('outcome', 'answers (question=class)')]
+    lines.extend("{0:<20} {1}".format(outcome_of(path), _conditions(path)) for path in report.paths)
+    counts = {}
+    for path in report.paths:
+        counts[outcome_of(path)] = counts.get(outcome_of(path), 0) + 1
+    lines.append("")
+    lines.append("{0} paths ({1} before merging) in {2:.2f}s".format(
+        len(report.paths), report.merged, report.seconds))
+    for outcome in sorted(counts):
+        lines.append(" {0:<20} {1} paths".format(outcome, counts[outcome]))
+    lines.append("Unreachable leaves: {0}".format(', '.join(report.unreachable) or 'none'))
+    raising = [path for path in report.paths if path.error]
+    lines.append("Paths that raise: {0}".format(len(raising)))
+    lines.extend(" {0}  <- {1}".format(path.error, _conditions(path)) for path in raising)
+    lines.append("Replay problems: {0}".format(len(report.problems)))
+    lines.extend(" {0}  <- {1}".format('; '.join(messages), _conditions(path)) for path, messages in report.problems)
+    return lines
+
+def defects(report):
+    """
+    What makes a Report fail: paths that raise, replay problems and
+    unreachable leaves, as printable lines - empty when there are none.
+    """
+    lines = ["path raises {0}  <- {1}".format(path.error, _conditions(path)) for path in report.paths if path.error]
+    lines.extend("replay: {0}  <- {1}".format('; '.join(messages), _conditions(path)) for path, messages in report.problems)
+    lines.extend("unreachable leaf: {0}".format(leaf) for leaf in report.unreachable)
+    return lines
+
+def json_lines(report):
+    """
+    One JSON object per path.
+    """
+    for path in report.paths:
+        yield json.dumps({'answers': dict(path.conditions), 'order': [question for question, _ in path.conditions],
+                          'learning': path.learning, 'leaf': path.leaf, 'error': path.error}, sort_keys=True)
+
+
+def parse_args(argv=None):
+    """
+    Command line options
+    """
+    parser = argparse.ArgumentParser(description="Enumerate every answer path through the algoselector decisions, and its recommendation.")
+    parser.add_argument('--output', metavar='FILE', default='-',
+                        help="Where the table is written (default stdout)")
+    parser.add_argument('--format', choices=('text', 'jsonl'), default='text',
+                        help="A table with a summary, or one JSON object per path (default text)")
+    parser.add_argument('--no-merge', action='store_true',
+                        help="Show every path, without folding the ones a question does not change")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    """
+    The Main Function - exits with status 1 when there are defects(),
+    listed on stderr.
+    """
+    args = parse_args(argv)
+    report = explore(fold=not args.no_merge)
+    lines = format_report(report) if args.format == 'text' else json_lines(report)
+    text = ''.join(line + '\n' for line in lines)
+    if args.output == '-':
+        sys.stdout.write(text)
+    else:
+        with open(args.output, 'w', encoding='utf-8') as stream:
+            stream.write(text)
+    failures = defects(report)
+    for line in failures:
+        print(line, file=sys.stderr)
+    return 1 if failures else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,151 @@
+# Copyright 2021 Spirent Communications.
+# sridhar.rao@spirent.com
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Hardware-aware Recommendations.
+Detects the memory and cores available to this process (or takes them
+as given), compares them with the estimated peak memory of the
+recommended algorithm for the data, and swaps in the streaming,
+mini-batch or partial-fit variant when it will not fit.
+"""
+
+from __future__ import print_function
+import os
+from collections import namedtuple
+
+import costs
+from engine import OUT_OF_CORE
+
+# pylint: disable=line-too-long
+
+# Only this fraction of the available memory is planned for - the
+# estimates are rough, and the interpreter and the OS need some too.
+USABLE_FRACTION = 0.8
+CGROUP_LIMITS = ('/sys/fs/cgroup/memory.max',
+                 '/sys/fs/cgroup/memory/memory.limit_in_bytes')
+
+Hardware = namedtuple('Hardware', 'memory cores')
+Advice = namedtuple('Advice', 'recommendation original needed available headroom cores')
+
+
+def _meminfo(path='/proc/meminfo'):
+    """
+    MemAvailable (or MemFree, for old kernels) in bytes, or None.
+    """
+    fields = {}
+    try:
+        with open(path, encoding='utf-8') as stream:
+            for line in stream:
+                name, _, value = line.partition(':')
+                fields[name] = int(value.split()[0]) * 1024
+    except (OSError, ValueError, IndexError):
+        return None
+    return fields.get('MemAvailable', fields.get('MemFree'))
+
+def _cgroup_limit():
+    for path in CGROUP_LIMITS:
+        try:
+            with open(path, encoding='utf-8') as stream:
+                value = stream.read().strip()
+        except OSError:
+            continue
+        if value.isdigit():
+            return int(value)
+    return None
+
+def _sysconf_memory():
+    try:
+        return os.sysconf('SC_PAGE_SIZE') * os.sysconf('SC_AVPHYS_PAGES')
+    except (AttributeError, ValueError, OSError):
+        return None
+
+def available_memory():
+    """
+    Bytes of memory this process can use: what the kernel reports as
+    available, capped by a cgroup (container) limit. None if unknown.
+    """
+    memory = _meminfo() or _sysconf_memory()
+    limit = _cgroup_limit()
+    if limit is not None and (memory is None or limit < memory):
+        memory = limit
+    return memory
+
+def available_cores():
+    """
+    Cores this process may run on.
+    """
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+def detect(memory=None, cores=None):
+    """
+    Hardware, with memory ('16g', or bytes) and cores overriding detection.
+    """
+    if isinstance(memory, str):
+        parsed = costs.parse_bytes(memory)
+        if parsed is None:
+            raise ValueError("memory={0!r}".format(memory))
+        memory = parsed
+    if cores is not None and cores < 1:
+        raise ValueError("cores={0!r}".format(cores))
+    return Hardware(memory if memory is not None else available_memory(),
+                    cores if cores is not None else available_cores())
+
+
+def needed_memory(leaf, answers):
+    """
+    Estimated peak bytes for leaf on the data in Answers: from the cost
+    model when n x d is known, else the data size itself. None if unknown.
+    """
+    dims = costs.shape(answers)
+    if dims.samples and dims.features and leaf in costs.MODELS:
+        return costs.estimate(leaf, dims.samples, dims.features).memory
+    return dims.size_bytes
+
+def advise(recommendation, answers, hardware):
+    """
+    Advice for a recommendation, or None when the memory needed or
+    available is unknown. When the estimate exceeds the usable memory
+    and there is an out-of-core variant, that is recommended instead.
+    """
+    if recommendation is None or recommendation.fallback or not hardware.memory:
+        return None
+    needed = needed_memory(recommendation.leaf, answers)
+    if needed is None:
+        return None
+    usable = hardware.memory * USABLE_FRACTION
+    chosen = recommendation
+    if needed > usable:
+        chosen = OUT_OF_CORE.get(recommendation.leaf, recommendation)
+    return Advice(chosen, recommendation, needed, hardware.memory,
+                  usable - needed, hardware.cores)
+
+def describe(advice):
+    """
+    Printable lines for an Advice.
+    """
+    lines = ["Memory: needs ~{0}, {1} available, headroom {3}{4} ({2} cores)".format(
+        costs.human_bytes(advice.needed), costs.human_bytes(advice.available), advice.cores,
+        '' if advice.headroom >= 0 else '-', costs.human_bytes(abs(advice.headroom)))]
+    if advice.headroom < 0:
+        if advice.recommendation is not advice.original:
+            lines.append("{0} will not fit in memory - use the out-of-core variant instead.".format(
+                advice.original.algorithm))
+        else:
+            lines.append("{0} will not fit in memory - train on a sample, or on a larger machine.".format(
+                advice.original.algorithm))
+    return lines
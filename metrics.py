@@ -0,0 +1,238 @@
+# Copyright 2021 Spirent Communications.
+# sridhar.rao@spirent.com
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Opt-in Instrumentation.
+enable() wraps the AlgoSelectorWizard run_*/decide_* methods and the
+WizardStep prompt with timers and leaf counters. Nothing is wrapped
+until then, so when disabled the cost is exactly zero (pypsi is not
+even imported).
+Metrics are exported as a JSON snapshot or in the Prometheus text format.
+"""
+
+from __future__ import print_function
+import functools
+import json
+import time
+
+# pylint: disable=line-too-long,global-statement
+
+STEP_SECONDS = 'algoselector_step_seconds'
+WIZARD_SECONDS = 'algoselector_wizard_seconds'
+DECIDE_SECONDS = 'algoselector_decide_seconds'
+RECOMMENDATIONS = 'algoselector_recommendations_total'
+FALLBACKS = 'algoselector_fallbacks_total'
+
+HELP = {
+    STEP_SECONDS: "Wall time of one WizardStep prompt, answer included.",
+    WIZARD_SECONDS: "Wall time of a run_* wizard call.",
+    DECIDE_SECONDS: "Latency of a decide_* call.",
+    RECOMMENDATIONS: "Recommendations made, by decision-tree leaf.",
+    FALLBACKS: "Sessions that ended in the 'Sorry. We need to discuss' fallback.",
+}
+
+# Wrapped AlgoSelectorWizard methods: name -> (metric, labels, count leaves)
+WIZARD_METHODS = {
+    'run_mainwiz': (WIZARD_SECONDS, (('wizard', 'main'),), False),
+    'run_generic_wizard': (WIZARD_SECONDS, (('wizard', 'generic'),), False),
+    'run_unsupervised_wizard': (WIZARD_SECONDS, (('wizard', 'unsupervised'),), False),
+    'run_reinforcement_wizard': (WIZARD_SECONDS, (('wizard', 'reinforcement'),), False),
+    'ask_adaptively': (WIZARD_SECONDS, (('wizard', 'adaptive'),), True),
+    'decide_supervised': (DECIDE_SECONDS, (('learning', 'supervised'),), True),
+    'decide_unsupervised': (DECIDE_SECONDS, (('learning', 'unsupervised'),), True),
+    'decide_reinforcement': (DECIDE_SECONDS, (('learning', 'reinforcement'),), True),
+}
+
+
+class Summary():
+    """
+    Count, sum, min and max of observed values.
+    """
+    __slots__ = ('count', 'total', 'minimum', 'maximum')
+
+    def __init__(self):
+        """
+        Perform Initialization.
+        """
+        self.count = 0
+        self.total = 0.0
+        self.minimum = None
+        self.maximum = None
+
+    def observe(self, value):
+        """
+        Add one observation.
+        """
+        self.count += 1
+        self.total += value
+        if self.minimum is None or value < self.minimum:
+            self.minimum = value
+        if self.maximum is None or value > self.maximum:
+            self.maximum = value
+
+    def as_dict(self):
+        """
+        JSON form.
+        """
+        return {'count': self.count, 'sum': self.total, 'min': self.minimum, 'max': self.maximum}
+
+
+class Registry():
+    """
+    Counters and summaries, keyed by metric name and a tuple of
+    (label, value) pairs.
+    """
+    def __init__(self):
+        """
+        Perform Initialization.
+        """
+        self.counters = {}
+        self.summaries = {}
+
+    def inc(self, name, labels=(), amount=1):
+        """
+        Increment a counter.
+        """
+        key = (name, labels)
+        self.counters[key] = self.counters.get(key, 0) + amount
+
+    def observe(self, name, value, labels=()):
+        """
+        Add an observation to a summary.
+        """
+        key = (name, labels)
+        summary = self.summaries.get(key)
+        if summary is None:
+            summary = self.summaries[key] = Summary()
+        summary.observe(value)
+
+    def snapshot(self):
+        """
+        All metrics, as a JSON-able dict.
+        """
+        report = {'counters': {}, 'summaries': {}}
+        for (name, labels), value in sorted(self.counters.items()):
+            report['counters'].setdefault(name, []).append(
+                {'labels': dict(labels), 'value': value})
+        for (name, labels), summary in sorted(self.summaries.items(), key=lambda item: item[0]):
+            entry = summary.as_dict()
+            entry['labels'] = dict(labels)
+            report['summaries'].setdefault(name, []).append(entry)
+        return report
+
+    def prometheus(self):
+        """
+        All metrics, in the Prometheus text exposition format.
+        """
+        lines = []
+        last = None
+        for (name, labels), value in sorted(self.counters.items()):
+            if name != last:
+                lines.extend(_header(name, 'counter'))
+                last = name
+            lines.append("{0}{1} {2}".format(name, _labels(labels), value))
+        for (name, labels), summary in sorted(self.summaries.items(), key=lambda item: item[0]):
+            if name != last:
+                lines.extend(_header(name, 'summary'))
+                last = name
+            lines.append("{0}_count{1} {2}".format(name, _labels(labels), summary.count))
+            lines.append("{0}_sum{1} {2!r}".format(name, _labels(labels), summary.total))
+        for (name, labels), summary in sorted(self.summaries.items(), key=lambda item: item[0]):
+            if name + '_max' != last:
+                lines.append("# TYPE {0}_max gauge".format(name))
+                last = name + '_max'
+            lines.append("{0}_max{1} {2!r}".format(name, _labels(labels), summary.maximum))
+        return '\n'.join(lines) + '\n'
+
+def _header(name, kind):
+    return ["# HELP {0} {1}".format(name, HELP.get(name, name)),
+            "# TYPE {0} {1}".format(name, kind)]
+
+def _labels(labels):
+    if not labels:
+        return ''
+    return '{' + ','.join('{0}="{1}"'.format(label, str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n'))
+                          for label, value in labels) + '}'
+
+
+############### Enabling ######################
+
+REGISTRY = None
+_ORIGINALS = {}
+
+
+def _wrap(func, metric, labels, count_leaves):
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            result = func(*args, **kwargs)
+        finally:
+            REGISTRY.observe(metric, time.perf_counter() - start, labels)
+        if count_leaves and result is not None:
+            REGISTRY.inc(RECOMMENDATIONS, (('leaf', result.leaf),))
+            if result.fallback:
+                REGISTRY.inc(FALLBACKS)
+        return result
+    return wrapper
+
+def _get_input(step, prompt):
+    start = time.perf_counter()
+    try:
+        return _ORIGINALS[type(step), 'get_input'](step, prompt)
+    finally:
+        REGISTRY.observe(STEP_SECONDS, time.perf_counter() - start, (('step', step.id),))
+
+def enable(wizard_class):
+    """
+    Start recording: wrap wizard_class (AlgoSelectorWizard) and the
+    WizardStep prompt. Returns the Registry.
+    """
+    global REGISTRY
+    from pypsi import wizard as wiz
+    if REGISTRY is None:
+        REGISTRY = Registry()
+    if not _ORIGINALS:
+        for name, (metric, labels, count_leaves) in WIZARD_METHODS.items():
+            func = getattr(wizard_class, name)
+            _ORIGINALS[wizard_class, name] = func
+            setattr(wizard_class, name, _wrap(func, metric, labels, count_leaves))
+        _ORIGINALS[wiz.WizardStep, 'get_input'] = wiz.WizardStep.get_input
+        wiz.WizardStep.get_input = _get_input
+    return REGISTRY
+
+def disable():
+    """
+    Stop recording and restore the wrapped methods. Returns the last Registry.
+    """
+    global REGISTRY
+    for (owner, name), func in _ORIGINALS.items():
+        setattr(owner, name, func)
+    _ORIGINALS.clear()
+    registry, REGISTRY = REGISTRY, None
+    return registry
+
+def export(registry, path, fmt=None):
+    """
+    Write registry to path - Prometheus text for .prom/.txt (or
+    fmt='prometheus'), a JSON snapshot otherwise.
+    """
+    fmt = fmt or ('prometheus' if path.lower().endswith(('.prom', '.txt')) else 'json')
+    if fmt == 'prometheus':
+        text = registry.prometheus()
+    else:
+        text = json.dumps(registry.snapshot(), indent=2, sort_keys=True) + '\n'
+    with open(path, 'w', encoding='utf-8') as stream:
+        stream.write(text)
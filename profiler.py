@@ -0,0 +1,631 @@
+# Copyright 2021 Spirent Communications.
+# sridhar.rao@spirent.com
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Dataset Profiler.
+Reads a delimited file once and measures what users otherwise guess:
+data_size_bytes, data_size_samples, data_features_count, data_missing,
+data_type_output, data_output_prob and data_distribution.
+Unquoted files are memory-mapped and scanned in fixed-size blocks with
+bytes-level searches, close to disk bandwidth - in parallel across
+newline-aligned byte ranges for large files. Memory stays bounded by
+the block size (plus the longest line), whatever the size of the file.
+Files with quoted fields go through the csv module.
+The target column, and up to MAX_SKETCHED numeric feature columns, are
+also summarised in fixed-size sketches (sketches.py): distinct count,
+quantiles and a reservoir sample whose fit to a known distribution
+answers data_distribution - constant memory however large the file.
+"""
+
+from __future__ import print_function
+import csv
+import io
+import math
+import mmap
+import os
+import re
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+
+from sketches import fit_distribution, HyperLogLog, QuantileSketch, Reservoir, QUANTILE_K, RESERVOIR_SIZE
+
+# pylint: disable=line-too-long,too-many-instance-attributes
+
+CHUNK_SIZE = 4 * 2 ** 20
+SNIFF_SIZE = 64 * 2 ** 10
+# Byte ranges handed to worker processes - a few per worker, for balance.
+RANGE_SIZE = 64 * 2 ** 20
+# Lines per block whose fields are parsed - stats need a sample, not every row.
+# Only the target column is parsed in most of them; values past them are not
+# seen at all (see Profile.answers).
+SAMPLE_LINES = 64
+TARGET_LINES = 1024
+# Distinct target values remembered, and up to how many integers are classes.
+MAX_DISTINCT = 1024
+MAX_CLASSES = 20
+# Feature columns sketched (evenly spaced), and the size of their sketches -
+# the target gets the sketches.py defaults.
+MAX_SKETCHED = 64
+FEATURE_QUANTILE_K = 64
+FEATURE_RESERVOIR_SIZE = 256
+MISSING_TOKENS = (b'NA', b'N/A', b'nan', b'NaN', b'null', b'NULL', b'None', b'?')
+MISSING_VALUES = frozenset([''] + [token.decode() for token in MISSING_TOKENS])
+
+# data_type_output options
+DISCRETE, CONTINUOUS, ORDINAL, BINARY, MULTICLASS = '1', '2', '3', '4', '5'
+
+
+def format_bytes(value):
+    """
+    Bytes as the wizard expects them - an integer and K/M/G, rounded up.
+    """
+    for unit, size in (('G', 2 ** 30), ('M', 2 ** 20)):
+        if value >= size:
+            return "{0}{1}".format(int(math.ceil(value / float(size))), unit)
+    return "{0}K".format(max(1, int(math.ceil(value / 1024.0))))
+
+def format_samples(value):
+    """
+    A sample count as the wizard expects it - an integer and T/M/B, rounded up.
+    """
+    for unit, size in (('B', 10 ** 9), ('M', 10 ** 6)):
+        if value >= size:
+            return "{0}{1}".format(int(math.ceil(value / float(size))), unit)
+    return "{0}T".format(max(1, int(math.ceil(value / 1000.0))))
+
+
+class ColumnStats():
+    """
+    Mergeable statistics of the sampled values of one column.
+    """
+    __slots__ = ('values', 'nulls', 'numeric', 'integral', 'minimum', 'maximum',
+                 'distinct', 'many_distinct', 'cardinality', 'quantiles', 'reservoir')
+
+    def __init__(self):
+        """
+        Perform Initialization.
+        """
+        self.values = 0
+        self.nulls = 0
+        self.numeric = True
+        self.integral = True
+        self.minimum = None
+        self.maximum = None
+        self.distinct = set()
+        self.many_distinct = False
+        self.cardinality = None
+        self.quantiles = None
+        self.reservoir = None
+
+    def add_sketches(self, quantile_k, reservoir_size, seed=0, cardinality=False):
+        """
+        Also summarise the numbers in a quantile sketch and a reservoir
+        sample, and (with cardinality) the distinct values in a
+        HyperLogLog - once there are more than MAX_DISTINCT of them.
+        """
+        self.quantiles = QuantileSketch(quantile_k, seed)
+        self.reservoir = Reservoir(reservoir_size, seed)
+        if cardinality:
+            self.cardinality = HyperLogLog()
+
+    def observe(self, value):
+        """
+        Account for one (decoded, stripped) value.
+        """
+        self.values += 1
+        if value in MISSING_VALUES:
+            self.nulls += 1
+            return
+        if self.numeric:
+            try:
+                number = int(value)
+            except ValueError:
+                self.integral = False
+                try:
+                    number = float(value)
+                except ValueError:
+                    self.numeric = False
+            if self.numeric:
+                if self.minimum is None or number < self.minimum:
+                    self.minimum = number
+                if self.maximum is None or number > self.maximum:
+                    self.maximum = number
+                if self.quantiles is not None:
+                    self.quantiles.add(number)
+                    self.reservoir.add(number)
+        if self.many_distinct:
+            if self.cardinality is not None:
+                self.cardinality.add(value)
+        else:
+            self.distinct.add(value)
+            if len(self.distinct) > MAX_DISTINCT:
+                self._too_many()
+
+    def _too_many(self):
+        if self.cardinality is not None:
+            for value in self.distinct:
+                self.cardinality.add(value)
+        self.many_distinct = True
+        self.distinct = set()
+
+    def merge(self, other):
+        """
+        Fold in the stats of another part of the same column.
+        """
+        self.values += other.values
+        self.nulls += other.nulls
+        self.integral = self.integral and other.integral
+        self.numeric = self.numeric and other.numeric
+        for number in (other.minimum, other.maximum):
+            if number is not None:
+                if self.minimum is None or number < self.minimum:
+                    self.minimum = number
+                if self.maximum is None or number > self.maximum:
+                    self.maximum = number
+        if not self.numeric:
+            self.minimum = self.maximum = None
+        if other.many_distinct:
+            self._too_many()
+            if self.cardinality is not None and other.cardinality is not None:
+                self.cardinality.merge(other.cardinality)
+        elif self.many_distinct:
+            if self.cardinality is not None:
+                for value in other.distinct:
+                    self.cardinality.add(value)
+        else:
+            self.distinct |= other.distinct
+            if len(self.distinct) > MAX_DISTINCT:
+                self._too_many()
+        if self.quantiles is not None and other.quantiles is not None:
+            self.quantiles.merge(other.quantiles)
+            self.reservoir.merge(other.reservoir)
+
+    def kind(self):
+        """
+        'integer', 'float' or 'text' - None if only nulls were seen.
+        """
+        if self.values == self.nulls:
+            return None
+        if not self.numeric:
+            return 'text'
+        return 'integer' if self.integral else 'float'
+
+    def output_type(self):
+        """
+        data_type_output, for this column as the output - None if it has no
+        values. Ordinal cannot be told from the data.
+        """
+        kind = self.kind()
+        if kind is None:
+            return None
+        if not self.many_distinct and len(self.distinct) <= 2:
+            return BINARY
+        if kind == 'text':
+            return MULTICLASS
+        if kind == 'float':
+            return CONTINUOUS
+        if self.many_distinct or len(self.distinct) > MAX_CLASSES:
+            return DISCRETE
+        return MULTICLASS
+
+    def distinct_count(self):
+        """
+        Number of distinct values - exact up to MAX_DISTINCT, then the
+        HyperLogLog estimate (None without one).
+        """
+        if not self.many_distinct:
+            return len(self.distinct)
+        return None if self.cardinality is None else self.cardinality.estimate()
+
+    def is_probability(self):
+        """
+        True for fractional numbers all within [0, 1] - None if not told.
+        """
+        if self.kind() is None:
+            return None
+        return (self.kind() == 'float' and self.output_type() != BINARY
+                and self.minimum >= 0 and self.maximum <= 1)
+
+    def fit(self):
+        """
+        fit_distribution of the reservoir sample - None without one (or
+        with too few numbers).
+        """
+        if self.reservoir is None or not self.numeric:
+            return None
+        return fit_distribution(self.reservoir.items)
+
+    def as_dict(self):
+        """
+        JSON form.
+        """
+        result = {'sampled': self.values, 'nulls': self.nulls, 'kind': self.kind(),
+                  'min': self.minimum, 'max': self.maximum, 'distinct': self.distinct_count()}
+        if self.quantiles is not None and self.numeric and self.quantiles.count:
+            result['quartiles'] = self.quantiles.quantiles((0.25, 0.5, 0.75))
+            result['skewness'], result['tail_weight'] = self.quantiles.shape()
+            fit = self.fit()
+            result['fit'] = fit and {'family': fit[0], 'distance': round(fit[1], 4), 'fits': fit[2]}
+        return result
+
+
+class Profile():
+    """
+    What was measured about one file. Rows and missing values are exact;
+    the column stats are over a sample of the rows.
+    """
+    def __init__(self, path, size_bytes=0, columns=0):
+        """
+        Perform Initialization.
+        """
+        self.path = path
+        self.size_bytes = size_bytes
+        self.delimiter = ','
+        self.header = None
+        self.target = None
+        self.target_index = None
+        self.rows = 0
+        self.missing = False
+        self.stats = [ColumnStats() for _ in range(columns)]
+
+    @property
+    def columns(self):
+        """
+        Number of columns.
+        """
+        return len(self.stats)
+
+    def observe_row(self, fields):
+        """
+        Account for the (decoded) fields of one sampled row.
+        """
+        for stats, value in zip(self.stats, fields):
+            stats.observe(value.strip())
+
+    def merge(self, other):
+        """
+        Fold in the profile of another part of the same file.
+        """
+        self.rows += other.rows
+        self.missing = self.missing or other.missing
+        for stats, more in zip(self.stats, other.stats):
+            stats.merge(more)
+
+    def target_stats(self):
+        """
+        ColumnStats of the target column, or None.
+        """
+        if self.target_index is None or self.target_index >= self.columns:
+            return None
+        return self.stats[self.target_index]
+
+    def add_sketches(self, seed=0):
+        """
+        Sketch the target column and up to MAX_SKETCHED evenly spaced
+        feature columns - once target_index is set.
+        """
+        target = self.target_stats()
+        if target is not None:
+            target.add_sketches(QUANTILE_K, RESERVOIR_SIZE, seed, cardinality=True)
+        features = [index for index in range(self.columns) if index != self.target_index]
+        count = min(len(features), MAX_SKETCHED)
+        for number in range(count):
+            self.stats[features[number * len(features) // count]].add_sketches(
+                FEATURE_QUANTILE_K, FEATURE_RESERVOIR_SIZE, seed + number + 1)
+
+    def output_type(self):
+        """
+        data_type_output, from the target column - None if unknown.
+        """
+        target = self.target_stats()
+        return None if target is None else target.output_type()
+
+    def output_prob(self):
+        """
+        data_output_prob, from the target column - None if unknown.
+        """
+        target = self.target_stats()
+        probability = None if target is None else target.is_probability()
+        return None if probability is None else ('Y' if probability else 'N')
+
+    def distribution(self, labelled=True):
+        """
+        data_distribution: 'Y' when at least half of the sketched numeric
+        features (the target too, for unlabelled data) fit a known
+        distribution - None when none has enough numbers to tell.
+        """
+        fits = [stats.fit() for index, stats in enumerate(self.stats)
+                if not (labelled and index == self.target_index)]
+        fits = [fit[2] for fit in fits if fit is not None]
+        if not fits:
+            return None
+        return 'Y' if 2 * sum(fits) >= len(fits) else 'N'
+
+    def answers(self, labelled=True):
+        """
+        The measured WizardStep answers. With labelled data the target
+        column is the output, not a feature.
+        Sizes, rows and data_missing are exact. data_type_output,
+        data_output_prob and data_distribution are from a sample: the
+        first SAMPLE_LINES rows of each CHUNK_SIZE block for the
+        features, and the first TARGET_LINES for the target. A value
+        seen only past those lines (one fractional number in an integer
+        target, a rare class, a target value outside [0, 1]) is missed,
+        and can tilt the answers - e.g. MULTICLASS for a target that is
+        DISCRETE, or a probability output that is not.
+        """
+        values = {
+            'data_size_bytes': format_bytes(self.size_bytes),
+            'data_size_samples': format_samples(self.rows),
+            'data_missing': 'Y' if self.missing else 'N',
+        }
+        features = self.columns - 1 if labelled and self.columns > 1 else self.columns
+        if features:
+            values['data_features_count'] = str(features)
+        if labelled:
+            for field, value in (('data_type_output', self.output_type()), ('data_output_prob', self.output_prob())):
+                if value:
+                    values[field] = value
+        distribution = self.distribution(labelled)
+        if distribution:
+            values['data_distribution'] = distribution
+        return values
+
+
+def _sniff(sample, delimiter=None):
+    """
+    (delimiter, has_header, quoted) of the first bytes of a file.
+    """
+    text = sample.decode('utf-8', 'replace')
+    sniffer = csv.Sniffer()
+    if delimiter is None:
+        try:
+            delimiter = sniffer.sniff(text, delimiters=',;\t|').delimiter
+        except csv.Error:
+            delimiter = ','
+    try:
+        has_header = sniffer.has_header(text)
+    except csv.Error:
+        has_header = False
+    return delimiter, has_header, '"' in text
+
+class _LineScanner():
+    """
+    Bytes-level accounting of blocks of whole lines: rows, missing fields
+    and a sample of parsed rows.
+    Newlines are mapped to the delimiter, so searching for two adjacent
+    delimiters finds every empty field (a blank line is two adjacent
+    newlines, and is skipped).
+    """
+    def __init__(self, delimiter, crlf=False):
+        """
+        Perform Initialization.
+        """
+        delim = re.escape(delimiter)
+        self.delimiter = delimiter
+        self.text_delimiter = delimiter.decode()
+        self.table = bytes.maketrans(b'\n', delimiter)
+        self.pairs = (delimiter * 2, delimiter + b'\r') if crlf else (delimiter * 2,)
+        self.blank = b'\n\r\n' if crlf else b'\n\n'
+        self.blank_lines = re.compile(b'\n(?=\r?\n)')
+        self.first = set(token[:1] for token in MISSING_TOKENS)
+        tokens = b'|'.join(re.escape(token) for token in MISSING_TOKENS)
+        self.tokens = re.compile(b'(?:^|' + delim + b')(?:' + tokens + b')(?=' + delim + b'|\r?$)', re.M)
+
+    def missing(self, data):
+        """
+        True if a field in the lines of data is empty or NA-like.
+        """
+        if data.startswith(self.delimiter):
+            return True
+        translated = data.translate(self.table)
+        for pair in self.pairs:
+            pos = translated.find(pair)
+            while pos >= 0:
+                if data[pos:pos + 1] != b'\n' or data[pos + 1:pos + 2] not in (b'\n', b'\r'):
+                    return True
+                pos = translated.find(pair, pos + 1)
+        # Searching single bytes is a memchr - only run the regex when a token may be there.
+        if any(first in data for first in self.first) and \
+           any(token in data for token in MISSING_TOKENS):
+            return self.tokens.search(data) is not None
+        return False
+
+    def scan(self, profile, data):
+        """
+        Account for data - whole lines, each ending in a newline.
+        """
+        rows = data.count(b'\n')
+        if self.blank in data:
+            rows -= len(self.blank_lines.findall(data))
+        if data.startswith(self.blank[1:]):
+            rows -= 1
+        profile.rows += rows
+        if not profile.missing:
+            profile.missing = self.missing(data)
+        lines = data.split(b'\n', TARGET_LINES)
+        del lines[-1]
+        for line in lines[:SAMPLE_LINES]:
+            if line.strip():
+                profile.observe_row(line.decode('utf-8', 'replace').rstrip('\r').split(self.text_delimiter))
+        target = profile.target_stats()
+        if target is not None:
+            index = profile.target_index
+            for line in lines[SAMPLE_LINES:]:
+                fields = line.rstrip(b'\r').split(self.delimiter)
+                if len(fields) > index:
+                    target.observe(fields[index].strip().decode('utf-8', 'replace'))
+
+
+def _line_start(data, position, end):
+    """
+    The start of the first line at or after position (end if none).
+    """
+    if position == 0:
+        return 0
+    found = data.find(b'\n', position - 1, end)
+    return end if found < 0 else found + 1
+
+def scan_range(path, start, end, delimiter, columns, target, crlf, chunk_size=CHUNK_SIZE):
+    """
+    Profile of the lines in bytes [start, end) of path - start and end
+    are line starts (or the end of the file); target is the target
+    column index. The file is memory-mapped
+    and read in chunk_size blocks, so memory stays flat however large
+    the range. Runs in a worker process.
+    """
+    profile = Profile(path, 0, columns)
+    profile.target_index = target
+    profile.add_sketches(seed=start)
+    scanner = _LineScanner(delimiter.encode(), crlf)
+    with open(path, 'rb') as stream, \
+         mmap.mmap(stream.fileno(), 0, access=mmap.ACCESS_READ) as data:
+        if hasattr(data, 'madvise'):
+            data.madvise(mmap.MADV_SEQUENTIAL)
+        position = start
+        while position < end:
+            stop = min(position + chunk_size, end)
+            if stop < end:
+                newline = data.rfind(b'\n', position, stop)
+                if newline < 0:
+                    newline = data.find(b'\n', stop, end)
+                stop = end if newline < 0 else newline + 1
+            block = data[position:stop]
+            if not block.endswith(b'\n'):
+                block += b'\n'
+            scanner.scan(profile, block)
+            position = stop
+    return profile
+
+def _scan_range_task(task):
+    return scan_range(*task)
+
+def split_ranges(path, start, end, parts):
+    """
+    [start, end) of path cut into up to parts newline-aligned ranges.
+    """
+    if end <= start:
+        return []
+    with open(path, 'rb') as stream, \
+         mmap.mmap(stream.fileno(), 0, access=mmap.ACCESS_READ) as data:
+        step = max(1, (end - start) // parts)
+        cuts = [start]
+        for number in range(1, parts):
+            cut = _line_start(data, start + number * step, end)
+            if cut > cuts[-1] and cut < end:
+                cuts.append(cut)
+        cuts.append(end)
+    return list(zip(cuts[:-1], cuts[1:]))
+
+
+def _scan_csv(stream, profile):
+    """
+    The exact path, for quoted fields - the csv module, one row at a time.
+    """
+    text = io.TextIOWrapper(stream, encoding='utf-8', errors='replace', newline='')
+    for number, row in enumerate(csv.reader(text, delimiter=profile.delimiter)):
+        if not row:
+            continue
+        profile.rows += 1
+        if not profile.missing and any(field.strip() in MISSING_VALUES for field in row):
+            profile.missing = True
+        if number % 8 == 0:
+            profile.observe_row(row)
+    text.detach()
+
+
+Layout = namedtuple('Layout', 'delimiter header columns start quoted crlf')
+
+
+def _is_number(value):
+    try:
+        float(value)
+    except ValueError:
+        return False
+    return True
+
+def layout(path, delimiter=None):
+    """
+    How a delimited file is laid out: its delimiter, header (or None),
+    number of columns, the offset of the first data row, and whether it
+    has quoted fields or CRLF line ends.
+    """
+    with open(path, 'rb') as stream:
+        sample = stream.read(SNIFF_SIZE)
+        stream.seek(0)
+        first = stream.readline()
+    delimiter, has_header, quoted = _sniff(sample, delimiter)
+    fields = next(csv.reader([first.decode('utf-8', 'replace').rstrip('\r\n')],
+                             delimiter=delimiter), [])
+    if sample.count(b'\n') < 2:
+        # Lines too wide for the sniffer - a header is what does not parse as numbers.
+        has_header = not all(_is_number(field) for field in fields)
+    header = [field.strip() for field in fields] if has_header else None
+    return Layout(delimiter, header, len(fields), len(first) if has_header else 0,
+                  quoted, b'\r\n' in sample)
+
+def target_index(header, columns, target):
+    """
+    Column index of target - a header name, a number, or None for the last column.
+    """
+    if target is None:
+        return columns - 1
+    if header and target in header:
+        return header.index(target)
+    try:
+        index = int(target)
+    except ValueError:
+        raise ValueError("target column {0!r} not found".format(target)) from None
+    if not -columns <= index < columns:
+        raise ValueError("target column {0} out of range".format(index))
+    return index % columns
+
+def profile_file(path, delimiter=None, target=None, chunk_size=CHUNK_SIZE, workers=1):
+    """
+    Profile a delimited file in one pass.
+    target is the output column (a header name or an index); the last
+    column by default. With workers > 1 (0 for one per core), files
+    larger than RANGE_SIZE are cut into newline-aligned byte ranges that
+    are profiled in a process pool, and the partial profiles merged.
+    """
+    size = os.path.getsize(path)
+    shape = layout(path, delimiter)
+    profile = Profile(path, size, shape.columns)
+    profile.delimiter = shape.delimiter
+    profile.header = shape.header
+    if profile.columns:
+        profile.target_index = target_index(shape.header, shape.columns, target)
+        profile.target = shape.header[profile.target_index] if shape.header else profile.target_index
+        profile.add_sketches()
+    start = shape.start
+    if shape.quoted:
+        with open(path, 'rb') as stream:
+            stream.seek(start)
+            _scan_csv(stream, profile)
+        return profile
+    if workers == 0:
+        workers = os.cpu_count() or 1
+    if workers > 1 and size - start > RANGE_SIZE:
+        parts = max(workers * 4, (size - start) // RANGE_SIZE)
+        tasks = [(path, first, last, shape.delimiter, profile.columns, profile.target_index,
+                  shape.crlf, chunk_size)
+                 for first, last in split_ranges(path, start, size, parts)]
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            for part in executor.map(_scan_range_task, tasks):
+                profile.merge(part)
+    elif size > start:
+        profile.merge(scan_range(path, start, size, shape.delimiter, profile.columns,
+                                 profile.target_index, shape.crlf, chunk_size))
+    return profile
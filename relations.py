@@ -0,0 +1,215 @@
+# Copyright 2021 Spirent Communications.
+# sridhar.rao@spirent.com
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Input/Output Relation Tests.
+Answers data_io_relation (is the relation between the inputs and the
+output linear?) and data_cond_indep (are the features conditionally
+independent, given the output?) from a sample of a labelled file.
+Linearity: least-squares fits of the output on the features, and on the
+features with their squares (and pairwise products, for a few
+features) - linear unless the quadratic terms cut the residual variance
+(adjusted for the extra terms) by LINEAR_GAIN or more.
+Independence: the features' correlations once the output is regressed
+out (within-class correlations, for classes) - independent unless a
+pair is correlated by DEPENDENCE or more, significantly at the
+SIGNIFICANCE level over all the pairs tested (Bonferroni): one strongly
+dependent pair is enough to break Naive Bayes' assumption.
+Both are decided again on BOOTSTRAP Poisson-weighted resamples, all
+solved as one batch of normal equations; the share that agrees is the
+confidence. The sample is a fixed number of rows (bakeoff.load_sample),
+so the time does not depend on the size of the file.
+Requires numpy.
+"""
+
+from __future__ import print_function
+import statistics
+from collections import namedtuple
+
+import numpy as np
+
+import bakeoff
+
+# pylint: disable=line-too-long,invalid-name
+
+SAMPLE_ROWS = 4000
+# Features tested, evenly spaced - and up to how many get pairwise products.
+MAX_FEATURES = 40
+INTERACTION_LIMIT = 10
+BOOTSTRAP = 32
+LINEAR_GAIN = 0.05
+DEPENDENCE = 0.3
+# Family-wise level of the Fisher z-tests of the pair correlations.
+SIGNIFICANCE = 0.05
+# Answers less certain than this are shown, but still asked.
+MIN_CONFIDENCE = 0.8
+RIDGE = 1e-8
+
+Report = namedtuple('Report', 'samples features io_relation io_confidence linear_r2 quadratic_gain '
+                              'cond_indep cond_confidence dependent_pairs pairs names')
+
+
+def _standardize(X):
+    """
+    Columns of X scaled to mean 0 and variance 1 - constant ones dropped.
+    """
+    deviation = X.std(axis=0)
+    keep = np.flatnonzero(deviation > 0)
+    return (X[:, keep] - X[:, keep].mean(axis=0)) / deviation[keep], keep
+
+def _weighted_fits(A, Y, weights):
+    """
+    Weighted least squares of the columns of Y on A, once per row of
+    weights: the residuals, resamples x rows x outputs.
+    """
+    grams = np.stack([(A * row[:, None]).T @ A for row in weights])
+    moments = np.stack([(A * row[:, None]).T @ Y for row in weights])
+    grams += RIDGE * np.trace(grams, axis1=1, axis2=2)[:, None, None] * np.eye(A.shape[1])
+    coefficients = np.linalg.solve(grams, moments)
+    return Y[None, :, :] - A[None, :, :] @ coefficients
+
+def _quadratic(X):
+    """
+    The squares of the (standardized) features, and their pairwise
+    products when there are at most INTERACTION_LIMIT of them.
+    """
+    terms = [X ** 2]
+    if X.shape[1] <= INTERACTION_LIMIT:
+        first, second = np.triu_indices(X.shape[1], 1)
+        terms.append(X[:, first] * X[:, second])
+    return np.hstack(terms)
+
+def linearity(X, y, weights):
+    """
+    Per resample: (linear R^2, adjusted residual-variance gain of the
+    quadratic terms).
+    """
+    ones = np.ones((len(X), 1))
+    linear = np.hstack([ones, X])
+    quadratic = np.hstack([linear, _quadratic(X)])
+    target = y[:, None]
+    totals = weights.sum(axis=1)
+    def variance(residuals, terms):
+        return (weights * residuals[:, :, 0] ** 2).sum(axis=1) / np.maximum(totals - terms, 1)
+    spread = variance(_weighted_fits(ones, target, weights), 1)
+    linear_variance = variance(_weighted_fits(linear, target, weights), linear.shape[1])
+    quadratic_variance = variance(_weighted_fits(quadratic, target, weights), quadratic.shape[1])
+    floor = 1e-12 * np.maximum(spread, 1e-300)
+    return (1 - linear_variance / np.maximum(spread, floor),
+            1 - quadratic_variance / np.maximum(linear_variance, floor))
+
+def z_critical(tests):
+    """
+    Two-sided critical value of a z-test at SIGNIFICANCE over tests
+    tests (Bonferroni).
+    """
+    return statistics.NormalDist().inv_cdf(1 - SIGNIFICANCE / (2.0 * max(tests, 1)))
+
+def dependence(X, outputs, weights):
+    """
+    Per resample: the number of feature pairs that stay correlated once
+    the outputs (a one-hot class matrix, or the output with an
+    intercept) are regressed out.
+    """
+    residuals = _weighted_fits(outputs, X, weights)
+    first, second = np.triu_indices(X.shape[1], 1)
+    critical = z_critical(len(first))
+    counts = []
+    for row, residual in zip(weights, residuals):
+        covariance = (residual * row[:, None]).T @ residual
+        scale = np.sqrt(np.maximum(np.diag(covariance), 1e-300))
+        correlation = np.clip((covariance / np.outer(scale, scale))[first, second], -0.999999, 0.999999)
+        freedom = max(row.sum() - outputs.shape[1] - 3, 1)
+        significant = np.abs(np.arctanh(correlation)) * np.sqrt(freedom) > critical
+        counts.append(int((significant & (np.abs(correlation) >= DEPENDENCE)).sum()))
+    return np.array(counts)
+
+def _agreement(decisions):
+    """
+    (answer of the full sample, share of the resamples that agree).
+    """
+    return ('Y' if decisions[0] else 'N'), float(np.mean(decisions[1:] == decisions[0]))
+
+def evaluate_sample(sample, bootstrap=BOOTSTRAP, seed=0):
+    """
+    A Report for a bakeoff.Sample. The answers are None when they cannot
+    be told: linearity needs a numeric (not class) output, independence
+    at least two features.
+    """
+    if sample.target is None:
+        raise ValueError("the relation tests need labelled data")
+    X, keep = _standardize(sample.features)
+    if X.shape[1] > MAX_FEATURES:
+        spaced = np.arange(MAX_FEATURES) * X.shape[1] // MAX_FEATURES
+        X, keep = X[:, spaced], keep[spaced]
+    rows = len(X)
+    rng = np.random.default_rng(seed)
+    weights = np.vstack([np.ones(rows), rng.poisson(1.0, (bootstrap, rows))]).astype(float)
+    io_relation = io_confidence = linear_r2 = quadratic_gain = None
+    y = sample.target.astype(float)
+    if not sample.classification and X.shape[1] and y.std() > 0 and rows > 2 * (1 + 2 * X.shape[1]):
+        r2, gain = linearity(X, (y - y.mean()) / y.std(), weights)
+        io_relation, io_confidence = _agreement(gain < LINEAR_GAIN)
+        linear_r2, quadratic_gain = float(r2[0]), float(gain[0])
+    cond_indep = cond_confidence = dependent = None
+    pairs = X.shape[1] * (X.shape[1] - 1) // 2
+    if pairs:
+        if sample.classification:
+            outputs = (sample.target[:, None] == np.unique(sample.target)[None, :]).astype(float)
+        else:
+            outputs = np.column_stack([np.ones(rows), y])
+        counts = dependence(X, outputs, weights)
+        cond_indep, cond_confidence = _agreement(counts == 0)
+        dependent = int(counts[0])
+    return Report(rows, X.shape[1], io_relation, io_confidence, linear_r2, quadratic_gain,
+                  cond_indep, cond_confidence, dependent, pairs, [sample.names[column] for column in keep])
+
+def evaluate_file(path, delimiter=None, target=None, rows=SAMPLE_ROWS, bootstrap=BOOTSTRAP, seed=0):
+    """
+    Run the tests on a sample of up to rows rows of a labelled file.
+    """
+    return evaluate_sample(bakeoff.load_sample(path, delimiter, target, True, rows, seed), bootstrap, seed)
+
+def answers(report, min_confidence=MIN_CONFIDENCE):
+    """
+    The answers of a Report certain enough to be taken as they are.
+    """
+    values = {}
+    for field, value, confidence in (('data_io_relation', report.io_relation, report.io_confidence),
+                                     ('data_cond_indep', report.cond_indep, report.cond_confidence)):
+        if value is not None and confidence >= min_confidence:
+            values[field] = value
+    return values
+
+def describe(report, min_confidence=MIN_CONFIDENCE):
+    """
+    Printable lines for a Report.
+    """
+    lines = ["Relation tests of {0} features over {1} sampled rows ({2} resamples agreeing is the confidence):".format(
+        report.features, report.samples, BOOTSTRAP)]
+    if report.io_relation is None:
+        lines.append(" linear relation: not tested (needs a numeric output)")
+    else:
+        lines.append(" linear relation: {0} (confidence {1:.0%}) - linear R^2 {2:.2f}, quadratic terms explain {3:.1%} more".format(
+            report.io_relation, report.io_confidence, report.linear_r2, max(report.quadratic_gain, 0.0)))
+    if report.cond_indep is None:
+        lines.append(" conditional independence: not tested (needs two features)")
+    else:
+        lines.append(" conditional independence: {0} (confidence {1:.0%}) - {2} of {3} feature pairs dependent given the output".format(
+            report.cond_indep, report.cond_confidence, report.dependent_pairs, report.pairs))
+    for field, confidence in (('data_io_relation', report.io_confidence), ('data_cond_indep', report.cond_confidence)):
+        if confidence is not None and confidence < min_confidence:
+            lines.append(" {0} is still asked - the confidence is below {1:.0%}".format(field, min_confidence))
+    return lines
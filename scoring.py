@@ -0,0 +1,188 @@
+# Copyright 2021 Spirent Communications.
+# sridhar.rao@spirent.com
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Multi-Criteria Scoring.
+Rates every algorithm 1-5 on accuracy, speed, interpretability,
+reproducibility, ease of implementation and its fit to each data regime
+(data size x features-to-data ratio, as perform_inference derives them).
+A user's weights are the five metric_* answers (1-5, unanswered is 1,
+the wizard default) and DATA_FIT_WEIGHT on the column of their regime;
+the scores are the weighted mean ratings - one matrix product, for one
+user or a whole batch - and the top-k candidates of the user's learning
+type (and unsup_goal) are returned, best first.
+Requires numpy.
+"""
+
+from __future__ import print_function
+from collections import namedtuple
+
+import numpy as np
+
+import columnar
+from answers import METRIC_FIELDS, NOT_APPLICABLE
+from engine import LEAVES, LEAF_IDS, RATIO_HIGH, RATIO_LOW, REINFORCEMENT, SIZE_CODES, SUPERVISED, UNSUPERVISED, size_class
+
+# pylint: disable=line-too-long
+
+CRITERIA = ('accuracy', 'speed', 'interpretability', 'reproducibility', 'implementation')
+# (data_size, ftod_ratio) of each data-fit column.
+REGIMES = (('unknown', 'low'), ('unknown', 'high'), ('low', 'low'), ('low', 'high'),
+           ('high', 'low'), ('high', 'high'))
+COLUMNS = CRITERIA + tuple('fit_{0}_{1}'.format(size, ratio) for size, ratio in REGIMES)
+# Weight of the data-regime fit - as a metric rated 3.
+DATA_FIT_WEIGHT = 3
+UNANSWERED_WEIGHT = 1
+TOP = 3
+
+# leaf -> ratings in CRITERIA order, then the fit to each of REGIMES.
+# Reinforcement learning does not learn from a dataset: its fit is neutral.
+RATINGS = {
+    #                accu spd int rep impl   unk/lo unk/hi low/lo low/hi high/lo high/hi
+    'sup_dt':       ((3, 5, 5, 5, 5),        (4, 3, 4, 2, 4, 3)),
+    'sup_rf':       ((4, 3, 3, 4, 4),        (5, 4, 4, 3, 5, 4)),
+    'sup_rnn':      ((4, 1, 1, 2, 2),        (3, 4, 1, 1, 4, 5)),
+    'sup_cnn':      ((5, 1, 1, 2, 2),        (3, 4, 1, 1, 4, 5)),
+    'sup_nb':       ((2, 5, 4, 5, 5),        (4, 4, 4, 5, 4, 4)),
+    'sup_ann':      ((4, 2, 1, 2, 3),        (4, 4, 2, 1, 5, 5)),
+    'sup_svm':      ((4, 2, 2, 5, 3),        (2, 2, 5, 4, 1, 1)),
+    'sup_linear':   ((2, 5, 5, 5, 5),        (4, 3, 4, 3, 4, 3)),
+    'sup_poly':     ((3, 3, 3, 5, 4),        (3, 1, 4, 1, 2, 1)),
+    'sup_lasso':    ((3, 4, 4, 5, 4),        (4, 5, 3, 5, 4, 4)),
+    'sup_logistic': ((3, 5, 4, 5, 5),        (4, 4, 4, 4, 4, 4)),
+    'sup_knn':      ((3, 3, 3, 5, 5),        (3, 1, 5, 2, 2, 1)),
+    'unsup_hc':     ((3, 1, 4, 5, 4),        (2, 2, 5, 4, 1, 1)),
+    'unsup_dbscan': ((4, 3, 3, 5, 3),        (4, 2, 4, 2, 3, 1)),
+    'unsup_gmm':    ((4, 2, 3, 2, 3),        (4, 2, 4, 2, 3, 2)),
+    'unsup_kmeans': ((3, 5, 4, 2, 5),        (5, 3, 3, 3, 5, 4)),
+    'unsup_svd':    ((3, 4, 3, 5, 4),        (4, 5, 3, 5, 4, 5)),
+    'unsup_lda':    ((4, 2, 4, 2, 3),        (4, 4, 3, 4, 3, 4)),
+    'unsup_pca':    ((3, 4, 3, 5, 5),        (4, 4, 5, 4, 3, 3)),
+    'ri_alphazero':       ((5, 1, 1, 1, 1),  (3, 3, 3, 3, 3, 3)),
+    'ri_world_models':    ((4, 2, 1, 1, 1),  (3, 3, 3, 3, 3, 3)),
+    'ri_policy_gradient': ((4, 2, 1, 2, 2),  (3, 3, 3, 3, 3, 3)),
+    'ri_td':              ((3, 4, 3, 3, 4),  (3, 3, 3, 3, 3, 3)),
+    'ri_sarsa':           ((3, 3, 2, 3, 3),  (3, 3, 3, 3, 3, 3)),
+}
+
+# The score matrix: one row per engine leaf (all zero for 'contact'),
+# one column per COLUMNS.
+SCORES = np.zeros((len(LEAVES), len(COLUMNS)))
+for _leaf, (_criteria, _fit) in RATINGS.items():
+    SCORES[LEAF_IDS[_leaf]] = _criteria + _fit
+
+# Candidates by (learning code, unsup_goal code), as in costs.GOAL_LEAVES:
+# clustering or dimensionality reduction only, when the goal says so.
+GOALS = {1: ('unsup_hc', 'unsup_dbscan', 'unsup_gmm', 'unsup_kmeans'),
+         2: ('unsup_svd', 'unsup_lda', 'unsup_pca')}
+LEARNING_CODES = dict((name, code) for code, name in enumerate(columnar.LEARNING_NAMES))
+CANDIDATES = np.zeros((len(columnar.LEARNING_NAMES), 4, len(LEAVES)), dtype=bool)
+for _leaf in RATINGS:
+    _learning = LEARNING_CODES[LEAVES[LEAF_IDS[_leaf]].learning]
+    for _goal in range(4):
+        CANDIDATES[_learning, _goal, LEAF_IDS[_leaf]] = (
+            LEAVES[LEAF_IDS[_leaf]].learning != UNSUPERVISED or _leaf in GOALS.get(_goal, (_leaf,)))
+
+Ranked = namedtuple('Ranked', 'leaf algorithm score')
+
+
+def rank(weights, candidates, top=TOP):
+    """
+    The core: (users x COLUMNS) weights and (users x leaves) candidate
+    masks -> (leaf ids, scores), users x top, best first. Scores are the
+    weighted mean ratings (1-5); -1 leaf ids / NaN scores pad the rows
+    with fewer candidates.
+    """
+    weights = np.asarray(weights, dtype=float)
+    scores = (weights @ SCORES.T) / weights.sum(axis=1, keepdims=True)
+    scores = np.where(candidates, scores, -np.inf)
+    order = np.argsort(-scores, axis=1, kind='stable')[:, :top]
+    best = np.take_along_axis(scores, order, axis=1)
+    valid = np.isfinite(best)
+    return np.where(valid, order, -1), np.where(valid, best, np.nan)
+
+def weight_row(answers):
+    """
+    The weights of one user's Answers.
+    """
+    row = np.zeros(len(COLUMNS))
+    row[:len(CRITERIA)] = [min(max(getattr(answers, field) or UNANSWERED_WEIGHT, UNANSWERED_WEIGHT), 5)
+                           for field in METRIC_FIELDS]
+    features = answers.data_features_count
+    if (answers.data_size_bytes is not None and answers.data_size_samples is not None
+            and features is not None and features != NOT_APPLICABLE):
+        data_size, threshold = size_class(answers.data_size_bytes, answers.data_size_samples)
+        ratio = RATIO_HIGH if features > threshold else RATIO_LOW
+        row[len(CRITERIA) + SIZE_CODES[data_size] * 2 + ratio] = DATA_FIT_WEIGHT
+    return row
+
+def top_k(answers, learning, top=TOP):
+    """
+    The top candidates of learning for one user's Answers, as Ranked.
+    """
+    if learning not in (SUPERVISED, UNSUPERVISED, REINFORCEMENT):
+        return []
+    goal = answers.unsup_goal if answers.unsup_goal in GOALS else 0
+    leaf_ids, scores = rank(weight_row(answers)[None, :], CANDIDATES[LEARNING_CODES[learning], goal][None, :], top)
+    return [Ranked(LEAVES[leaf].leaf, LEAVES[leaf].algorithm, float(score))
+            for leaf, score in zip(leaf_ids[0], scores[0]) if leaf >= 0]
+
+def weight_matrix(codes):
+    """
+    The weights of every row of columnar codes (columnar.encode).
+    """
+    weights = np.zeros((len(codes['data_availability_missing']), len(COLUMNS)))
+    for column, field in enumerate(METRIC_FIELDS):
+        weights[:, column] = np.where(codes[field + '_missing'] | (codes[field] == columnar.INVALID),
+                                      UNANSWERED_WEIGHT, np.clip(codes[field], UNANSWERED_WEIGHT, 5))
+    derived = columnar.infer(codes)
+    known = ~(codes['data_size_bytes_missing'] | codes['data_size_samples_missing']
+              | codes['data_features_count_missing'] | (codes['data_features_count'] == NOT_APPLICABLE)
+              | (codes['data_features_count'] == columnar.INVALID))
+    rows = np.flatnonzero(known)
+    weights[rows, len(CRITERIA) + derived['data_size'][rows] * 2 + derived['ftod_ratio'][rows]] = DATA_FIT_WEIGHT
+    return weights
+
+def top_k_codes(codes, top=TOP):
+    """
+    The top candidates of every row of columnar codes, for the learning
+    type the main wizard gives it: (leaf ids, scores), rows x top.
+    Rows that do not need ML have no candidates.
+    """
+    ml_needed, learning = columnar.gate(codes)
+    goal = np.where(np.isin(codes['unsup_goal'], tuple(GOALS)), codes['unsup_goal'], 0)
+    candidates = CANDIDATES[np.where(ml_needed, learning, 0), goal]
+    return rank(weight_matrix(codes), candidates, top)
+
+def top_k_records(records, top=TOP):
+    """
+    top_k_codes for a list of answer records - one list of
+    {'leaf', 'score'} per record, best first.
+    """
+    leaf_ids, scores = top_k_codes(columnar.encode(columnar.records_to_columns(records)), top)
+    return [[{'leaf': LEAVES[leaf].leaf, 'score': round(float(score), 3)}
+             for leaf, score in zip(row_ids, row_scores) if leaf >= 0]
+            for row_ids, row_scores in zip(leaf_ids.tolist(), scores.tolist())]
+
+
+def format_top(ranked, recommended=None):
+    """
+    Printable lines for a top_k list, the recommended leaf marked with '*'.
+    """
+    lines = ["  #  {0:<38} {1:>6}".format("Algorithm", "Score")]
+    for position, item in enumerate(ranked, 1):
+        lines.append("{0}{1:2d}. {2:<38} {3:>6.2f}".format(
+            '*' if item.leaf == recommended else ' ', position, item.algorithm, item.score))
+    return lines
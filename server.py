@@ -0,0 +1,237 @@
+# Copyright 2021 Spirent Communications.
+# sridhar.rao@spirent.com
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Interactive Session Server.
+Hosts many concurrent wizard sessions in one asyncio event loop, over
+TCP or a Unix socket - one line-based text session per connection
+(nc/telnet/socat are enough as clients).
+A session is only its Answers and raw answers, so an idle one costs a
+few kilobytes; the question texts are shared, read once from the
+specs step definitions (pypsi is never loaded). The questions follow the main wizard gate,
+then only the ones that can still change the decision (as
+ask_adaptively does). Sessions idle for longer than the timeout are
+closed.
+"""
+
+from __future__ import print_function
+import asyncio
+import itertools
+import os
+import re
+from collections import namedtuple
+
+import costs
+from specs import STEP_SPECS
+from answers import Answers
+from engine import gate, resolve, SUPERVISED, UNSUPERVISED
+
+# pylint: disable=line-too-long,too-few-public-methods
+
+IDLE_TIMEOUT = 300.0
+# Longest answer line accepted - also the per-connection read buffer.
+LINE_LIMIT = 1024
+BANNER = ("Algoselector - suggests which ML approach is more applicable for your data and usecase.\n"
+          "Press Enter to take the [default], type 'help' about a question, or 'quit'.\n")
+_COLORS = re.compile(r'\x1b\[[0-9;]*m')
+
+Question = namedtuple('Question', 'prompt help default')
+
+
+def load_questions():
+    """
+    Every wizard step, by id: (prompt, help, default) without the colors.
+    """
+    return dict((step.id, Question(_COLORS.sub('', step.name).strip(), _COLORS.sub('', step.help or ''),
+                                   step.default)) for step in STEP_SPECS.values())
+
+
+class Session():
+    """
+    The state of one connection: its Answers, the raw answers by step id
+    (what main_l1_values ... ri_values hold in the wizard), the question
+    being asked and whether ML was found to be needed.
+    """
+    __slots__ = ('number', 'answers', 'values', 'question', 'verdict', 'last_active', 'writer')
+
+    def __init__(self, number, writer, now):
+        """
+        Perform Initialization.
+        """
+        self.number = number
+        self.answers = Answers()
+        self.values = {}
+        self.question = None
+        self.verdict = None
+        self.last_active = now
+        self.writer = writer
+
+    def advance(self):
+        """
+        The next question id and the lines to show first - the question
+        is None when the session is over.
+        """
+        lines = []
+        if self.verdict is None:
+            try:
+                verdict = gate(self.answers)
+            except KeyError as missing:
+                return missing.args[0], lines
+            self.verdict = verdict
+            lines.append(verdict.message)
+        if not self.verdict.ml_needed:
+            return None, lines
+        recommendation, question = resolve(self.answers, self.verdict.learning)
+        if question is not None:
+            return question, lines
+        lines.append(recommendation.message)
+        if not recommendation.fallback and recommendation.learning in (SUPERVISED, UNSUPERVISED):
+            ranking = costs.rank_answers(self.answers, recommendation.learning)
+            if ranking:
+                lines.append("Estimated training cost of the candidates, cheapest first:")
+                lines.extend(costs.format_ranking(ranking, recommendation.leaf))
+        return None, lines
+
+    def answer(self, text, default):
+        """
+        Take an answer to the current question; raises ValueError if it
+        does not convert.
+        """
+        value = text or default or ''
+        self.answers.update({self.question: value})
+        self.values[self.question] = value
+
+
+class SessionServer():
+    """
+    The sessions of one event loop, and their idle reaper.
+    """
+    def __init__(self, idle_timeout=IDLE_TIMEOUT, questions=None):
+        """
+        Perform Initialization.
+        """
+        self.idle_timeout = idle_timeout
+        self.questions = questions or load_questions()
+        self.sessions = {}
+        self.numbers = itertools.count(1)
+        self.server = None
+        self.reaper = None
+
+    async def start(self, address):
+        """
+        Listen on 'unix:PATH', or 'HOST:PORT' (':PORT' for all interfaces).
+        """
+        if address.startswith('unix:'):
+            path = address[len('unix:'):]
+            if os.path.exists(path):
+                os.unlink(path)
+            self.server = await asyncio.start_unix_server(self.handle, path, limit=LINE_LIMIT)
+        else:
+            host, _, port = address.rpartition(':')
+            self.server = await asyncio.start_server(self.handle, host or None, int(port), limit=LINE_LIMIT)
+        self.reaper = asyncio.ensure_future(self.reap())
+        return self.server
+
+    async def close(self):
+        """
+        Stop listening and end every session.
+        """
+        self.reaper.cancel()
+        self.server.close()
+        for session in list(self.sessions.values()):
+            session.writer.close()
+        await self.server.wait_closed()
+
+    async def reap(self):
+        """
+        Close the sessions idle for longer than idle_timeout.
+        """
+        loop = asyncio.get_event_loop()
+        while True:
+            await asyncio.sleep(max(self.idle_timeout / 4, 0.05))
+            now = loop.time()
+            for session in list(self.sessions.values()):
+                if now - session.last_active > self.idle_timeout:
+                    session.writer.write(b"\nIdle for too long - session closed.\n")
+                    session.writer.close()
+                    del self.sessions[session.number]
+
+    async def handle(self, reader, writer):
+        """
+        One session, for the lifetime of a connection.
+        """
+        loop = asyncio.get_event_loop()
+        session = Session(next(self.numbers), writer, loop.time())
+        self.sessions[session.number] = session
+        try:
+            writer.write(BANNER.encode())
+            while True:
+                try:
+                    question, lines = session.advance()
+                except ValueError as err:
+                    writer.write("Cannot decide: {0} - no suggestion can be provided\n".format(err).encode())
+                    break
+                for line in lines:
+                    writer.write(line.encode() + b'\n')
+                if question is None:
+                    writer.write(b"Thanks for using the Algoselector-Wizard, Hope our suggestion will be useful\n")
+                    break
+                session.question = question
+                step = self.questions[question]
+                writer.write("{0} [{1}]: ".format(step.prompt, step.default).encode())
+                await writer.drain()
+                try:
+                    line = await reader.readline()
+                except ValueError:
+                    # readline's LimitOverrunError
+                    writer.write("\nAnswer longer than {0} bytes - session closed.\n".format(LINE_LIMIT).encode())
+                    break
+                if not line:
+                    break
+                session.last_active = loop.time()
+                text = line.decode('utf-8', 'replace').strip()
+                if text.lower() in ('quit', 'exit'):
+                    break
+                if text.lower() in ('help', '?'):
+                    writer.write(step.help.encode() + b'\n')
+                    continue
+                try:
+                    session.answer(text, step.default)
+                except ValueError as err:
+                    writer.write(" Invalid answer {0}, please try again\n".format(err).encode())
+            await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            self.sessions.pop(session.number, None)
+            writer.close()
+
+def serve(address, idle_timeout=IDLE_TIMEOUT):
+    """
+    Run a SessionServer on address until interrupted.
+    """
+    async def run():
+        server = SessionServer(idle_timeout)
+        listener = await server.start(address)
+        print("Serving wizard sessions on {0}".format(address))
+        try:
+            async with listener:
+                await listener.serve_forever()
+        finally:
+            await server.close()
+    try:
+        asyncio.run(run())
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,456 @@
+# Copyright 2021 Spirent Communications.
+# sridhar.rao@spirent.com
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Session History Store.
+An append-only archive of completed sessions, kept as a directory of
+fixed-width column files that are memory-mapped for reading:
+    vectors.u8  - the encoded answers, VECTOR_WIDTH bytes per session
+    leaf.u8     - the recommended leaf (a code into meta.json 'leaves')
+    used.u8     - the leaf the team ended up using, set once known
+    time.f8     - when the session was stored (epoch seconds)
+The k-nearest-profile queries go through an inverted-file (IVF) index:
+k-means centroids over the vectors, with the vectors copied into
+per-centroid runs, so a query reads only the few runs nearest to it.
+Sessions stored after the index was built are scanned directly until
+the next build_index(). Requires numpy.
+"""
+
+from __future__ import print_function
+import argparse
+import json
+import os
+import sys
+import time
+from collections import Counter, namedtuple
+
+import numpy as np
+
+import costs
+from answers import (CHOICE_FIELDS, COUNT_FIELDS, GATE_FIELDS, GOALS, METRIC_FIELDS,
+                     NO, NOT_APPLICABLE, SIZE_FIELDS, UNKNOWN, YES, YES_NO_FIELDS)
+from engine import LEAVES, OUT_OF_CORE
+
+# pylint: disable=line-too-long,too-many-instance-attributes
+
+VERSION = 1
+NO_LEAF = 255
+MIDDLE = 128
+
+
+def _vector_fields():
+    """
+    (field, option) per vector byte - option is None for scalar fields.
+    """
+    layout = [(field, None) for field in GATE_FIELDS + YES_NO_FIELDS + METRIC_FIELDS + COUNT_FIELDS + SIZE_FIELDS]
+    for field, (options, _) in sorted(CHOICE_FIELDS.items()):
+        layout.extend((field, option) for option in range(1, options + 1))
+    layout.extend(('data_goal', option) for option in sorted(GOALS.values()))
+    return tuple(layout)
+
+VECTOR_FIELDS = _vector_fields()
+VECTOR_WIDTH = len(VECTOR_FIELDS)
+
+# Column file -> (dtype, values per session)
+COLUMNS = {
+    'vectors.u8': (np.uint8, VECTOR_WIDTH),
+    'leaf.u8': (np.uint8, 1),
+    'used.u8': (np.uint8, 1),
+    'time.f8': (np.float64, 1),
+}
+
+# Rows per chunk when streaming over the whole store.
+CHUNK_ROWS = 1 << 20
+# Row x centroid distances computed at a time.
+ASSIGN_VALUES = 1 << 22
+# Sessions sampled to train the index centroids.
+TRAIN_ROWS = 1 << 17
+PROBES = 8
+
+Neighbor = namedtuple('Neighbor', 'session distance leaf used')
+
+
+############### Encoding ######################
+
+def _scale(value, low, high):
+    return int(round(255 * min(max((value - low) / float(high - low), 0.0), 1.0)))
+
+def _log_scale(value, decades):
+    return _scale(np.log10(1.0 + value), 0.0, decades)
+
+_YES_NO_BYTES = {YES: 255, NO: 0, UNKNOWN: MIDDLE}
+
+def encode(answers):
+    """
+    The Answers as a VECTOR_WIDTH uint8 vector. Y/N questions are 255/0
+    (MIDDLE when unknown or unasked), numbered choices are one-hot,
+    ratings are linear, and counts and sizes are on a log scale.
+    """
+    vector = np.zeros(VECTOR_WIDTH, dtype=np.uint8)
+    for position, (field, option) in enumerate(VECTOR_FIELDS):
+        value = getattr(answers, field)
+        if option is not None:
+            vector[position] = 255 if value == option else 0
+        elif field in GATE_FIELDS:
+            vector[position] = MIDDLE if value is None else 255 * value
+        elif field in YES_NO_FIELDS:
+            vector[position] = _YES_NO_BYTES.get(value, MIDDLE)
+        elif field in METRIC_FIELDS:
+            vector[position] = MIDDLE if value is None else _scale(value, 1, 5)
+        elif field in COUNT_FIELDS:
+            vector[position] = 0 if value in (None, NOT_APPLICABLE) else _log_scale(max(value, 0), 9)
+        elif field == 'data_size_bytes':
+            vector[position] = _log_scale(costs.parse_bytes(value) or 0, 16) if value else 0
+        else:
+            vector[position] = _log_scale(costs.parse_samples(value) or 0, 12) if value else 0
+    return vector
+
+def _distances(vectors, query):
+    """
+    Squared Euclidean distances of uint8 rows to a float32 query.
+    """
+    rows = vectors.astype(np.float32)
+    return (rows * rows).sum(axis=1) - 2 * rows @ query + query @ query
+
+
+############### The Store ######################
+
+class SessionStore():
+    """
+    The session archive in directory path (created if missing).
+    """
+    def __init__(self, path):
+        """
+        Perform Initialization.
+        """
+        self.path = path
+        os.makedirs(path, exist_ok=True)
+        meta = self._file('meta.json')
+        if os.path.exists(meta):
+            with open(meta, encoding='utf-8') as stream:
+                self.meta = json.load(stream)
+            if self.meta.get('version') != VERSION or self.meta.get('vector') != [list(field) for field in VECTOR_FIELDS]:
+                raise ValueError("{0} was written with another answer encoding".format(path))
+        else:
+            self.meta = {'version': VERSION, 'vector': [list(field) for field in VECTOR_FIELDS],
+                         'leaves': [rec.leaf for rec in LEAVES] + sorted(rec.leaf for rec in OUT_OF_CORE.values())}
+            self._save_meta()
+        self.leaf_codes = dict((leaf, code) for code, leaf in enumerate(self.meta['leaves']))
+        self.count = self._repair()
+        self._maps = {}
+        self.index = None
+        self._load_index()
+
+    def _file(self, name):
+        return os.path.join(self.path, name)
+
+    def _save_meta(self):
+        temp = self._file('meta.json.tmp')
+        with open(temp, 'w', encoding='utf-8') as stream:
+            json.dump(self.meta, stream, indent=1)
+        os.replace(temp, self._file('meta.json'))
+
+    def _repair(self):
+        """
+        The number of complete sessions - column files left longer by an
+        interrupted append, or ending in part of a session, are cut back
+        to it.
+        """
+        sizes = dict((name, os.path.getsize(self._file(name)) if os.path.exists(self._file(name)) else None)
+                     for name in COLUMNS)
+        count = min((sizes[name] or 0) // (np.dtype(dtype).itemsize * width) for name, (dtype, width) in COLUMNS.items())
+        for name, (dtype, width) in COLUMNS.items():
+            if sizes[name] != count * np.dtype(dtype).itemsize * width:
+                with open(self._file(name), 'ab') as stream:
+                    stream.truncate(count * np.dtype(dtype).itemsize * width)
+        return count
+
+    def __len__(self):
+        return self.count
+
+    def column(self, name):
+        """
+        Read-only memory map of a column file - sessions x width.
+        """
+        dtype, width = COLUMNS[name]
+        cached = self._maps.get(name)
+        if cached is None or len(cached) != self.count:
+            if not self.count:
+                return np.zeros((0, width), dtype=dtype)
+            cached = np.memmap(self._file(name), dtype=dtype, mode='r', shape=(self.count, width))
+            self._maps[name] = cached
+        return cached
+
+    def leaf_code(self, leaf):
+        """
+        Code of a leaf name (None for NO_LEAF), adding new leaves to meta.json.
+        """
+        if leaf is None:
+            return NO_LEAF
+        code = self.leaf_codes.get(leaf)
+        if code is None:
+            if len(self.meta['leaves']) >= NO_LEAF:
+                raise ValueError("too many distinct leaves")
+            code = self.leaf_codes[leaf] = len(self.meta['leaves'])
+            self.meta['leaves'].append(leaf)
+            self._save_meta()
+        return code
+
+    def leaf_name(self, code):
+        """
+        Leaf name of a code, None for NO_LEAF.
+        """
+        return None if code == NO_LEAF else self.meta['leaves'][code]
+
+    def extend(self, vectors, leaves, used=None, when=None):
+        """
+        Append sessions: encoded vectors (sessions x VECTOR_WIDTH) and their
+        recommended leaf names. Returns the id of the first one.
+        """
+        vectors = np.asarray(vectors, dtype=np.uint8).reshape(-1, VECTOR_WIDTH)
+        count = len(vectors)
+        used = used if used is not None else [None] * count
+        when = np.full(count, time.time() if when is None else when, dtype=np.float64)
+        columns = {
+            'vectors.u8': vectors,
+            'leaf.u8': np.array([self.leaf_code(leaf) for leaf in leaves], dtype=np.uint8),
+            'used.u8': np.array([self.leaf_code(leaf) for leaf in used], dtype=np.uint8),
+            'time.f8': when,
+        }
+        first = self.count
+        for name, values in columns.items():
+            with open(self._file(name), 'ab') as stream:
+                stream.write(np.ascontiguousarray(values).tobytes())
+        self.count += count
+        return first
+
+    def append(self, answers, recommendation, used=None):
+        """
+        Store one completed session; returns its id.
+        """
+        return self.extend([encode(answers)], [recommendation.leaf if recommendation is not None else None],
+                           [used])
+
+    def set_used(self, session, leaf):
+        """
+        Record the leaf a stored session ended up using.
+        """
+        if not 0 <= session < self.count:
+            raise IndexError("no session {0}".format(session))
+        if leaf not in self.leaf_codes:
+            raise ValueError("unknown leaf {0!r}".format(leaf))
+        with open(self._file('used.u8'), 'r+b') as stream:
+            stream.seek(session)
+            stream.write(bytes([self.leaf_code(leaf)]))
+        self._maps.pop('used.u8', None)
+
+    ############### Index ######################
+
+    def _load_index(self):
+        name = self._file('index.json')
+        if not os.path.exists(name):
+            return
+        with open(name, encoding='utf-8') as stream:
+            info = json.load(stream)
+        if info['count'] > self.count:
+            return
+        self.index = {
+            'count': info['count'],
+            'centroids': np.load(self._file('index.centroids.npy')),
+            'offsets': np.load(self._file('index.offsets.npy')),
+        }
+        if info['count']:
+            self.index['ids'] = np.memmap(self._file('index.ids.u4'), dtype=np.uint32, mode='r')
+            self.index['vectors'] = np.memmap(self._file('index.vectors.u8'), dtype=np.uint8, mode='r',
+                                              shape=(info['count'], VECTOR_WIDTH))
+
+    def build_index(self, clusters=None, iterations=10, seed=0):
+        """
+        (Re)build the IVF index over all stored sessions: k-means on a
+        sample of TRAIN_ROWS, then two streaming passes over the vectors
+        to count and copy each session into its centroid's run.
+        clusters defaults to about sqrt(sessions).
+        """
+        count = self.count
+        if count >= 2 ** 32:
+            raise ValueError("too many sessions for a 32-bit index")
+        vectors = self.column('vectors.u8')
+        rng = np.random.default_rng(seed)
+        clusters = max(1, min(clusters or int(np.sqrt(count)), count, 1 << 16))
+        sample = vectors[np.sort(rng.choice(count, min(count, TRAIN_ROWS), replace=False))].astype(np.float32) if count else np.zeros((0, VECTOR_WIDTH), np.float32)
+        centroids = _kmeans(sample, clusters, iterations, rng) if count else np.zeros((0, VECTOR_WIDTH), np.float32)
+        counts = np.zeros(len(centroids), dtype=np.int64)
+        for start in range(0, count, CHUNK_ROWS):
+            counts += np.bincount(_nearest(vectors[start:start + CHUNK_ROWS], centroids), minlength=len(centroids))
+        offsets = np.concatenate([[0], np.cumsum(counts)])
+        self.index = None
+        self._maps.clear()
+        if count:
+            ids = np.memmap(self._file('index.ids.u4.tmp'), dtype=np.uint32, mode='w+', shape=(count,))
+            runs = np.memmap(self._file('index.vectors.u8.tmp'), dtype=np.uint8, mode='w+', shape=(count, VECTOR_WIDTH))
+            cursor = offsets[:-1].copy()
+            for start in range(0, count, CHUNK_ROWS):
+                chunk = vectors[start:start + CHUNK_ROWS]
+                assigned = _nearest(chunk, centroids)
+                order = np.argsort(assigned, kind='stable')
+                assigned = assigned[order]
+                chunk_counts = np.bincount(assigned, minlength=len(centroids))
+                rank = np.arange(len(order)) - (np.cumsum(chunk_counts) - chunk_counts)[assigned]
+                positions = cursor[assigned] + rank
+                ids[positions] = start + order
+                runs[positions] = chunk[order]
+                cursor += chunk_counts
+            ids.flush()
+            runs.flush()
+            del ids, runs
+            os.replace(self._file('index.ids.u4.tmp'), self._file('index.ids.u4'))
+            os.replace(self._file('index.vectors.u8.tmp'), self._file('index.vectors.u8'))
+        np.save(self._file('index.centroids.npy'), centroids)
+        np.save(self._file('index.offsets.npy'), offsets)
+        with open(self._file('index.json'), 'w', encoding='utf-8') as stream:
+            json.dump({'count': count, 'clusters': len(centroids)}, stream)
+        self._load_index()
+
+    def nearest(self, answers, k=10, probes=PROBES):
+        """
+        The k stored sessions nearest to Answers (or an encoded vector),
+        nearest first - from the probes closest index runs, plus every
+        session stored since the index was built.
+        """
+        query = (encode(answers) if not isinstance(answers, np.ndarray) else answers).astype(np.float32)
+        found_ids = []
+        found_distances = []
+        indexed = 0
+        if self.index is not None and self.index['count']:
+            indexed = self.index['count']
+            centroids, offsets = self.index['centroids'], self.index['offsets']
+            closest = np.argsort(((centroids - query) ** 2).sum(axis=1))[:probes]
+            for run in closest:
+                first, last = offsets[run], offsets[run + 1]
+                if first == last:
+                    continue
+                found_distances.append(_distances(self.index['vectors'][first:last], query))
+                found_ids.append(np.asarray(self.index['ids'][first:last], dtype=np.int64))
+        vectors = self.column('vectors.u8')
+        for start in range(indexed, self.count, CHUNK_ROWS):
+            found_distances.append(_distances(vectors[start:start + CHUNK_ROWS], query))
+            found_ids.append(np.arange(start, min(start + CHUNK_ROWS, self.count)))
+        if not found_ids:
+            return []
+        distances = np.concatenate(found_distances)
+        ids = np.concatenate(found_ids)
+        if len(ids) > k:
+            # Everything as near as the k-th, so ties are broken by id.
+            best = np.flatnonzero(distances <= np.partition(distances, k - 1)[k - 1])
+        else:
+            best = np.arange(len(ids))
+        best = best[np.lexsort((ids[best], distances[best]))][:k]
+        leaves = self.column('leaf.u8')
+        used = self.column('used.u8')
+        return [Neighbor(int(ids[pos]), float(np.sqrt(max(distances[pos], 0.0))),
+                         self.leaf_name(int(leaves[ids[pos], 0])), self.leaf_name(int(used[ids[pos], 0])))
+                for pos in best]
+
+
+def _nearest(vectors, centroids):
+    """
+    Index of the nearest centroid of each row, ASSIGN_VALUES distances
+    at a time.
+    """
+    squares = (centroids * centroids).sum(axis=1)
+    step = max(1, ASSIGN_VALUES // max(len(centroids), 1))
+    nearest = np.empty(len(vectors), dtype=np.int64)
+    for start in range(0, len(vectors), step):
+        rows = vectors[start:start + step].astype(np.float32)
+        nearest[start:start + step] = (squares - 2 * rows @ centroids.T).argmin(axis=1)
+    return nearest
+
+def _kmeans(sample, clusters, iterations, rng):
+    """
+    Lloyd's k-means from random distinct rows.
+    """
+    unique = np.unique(sample, axis=0)
+    centroids = unique[rng.choice(len(unique), min(clusters, len(unique)), replace=False)]
+    for _ in range(iterations):
+        assigned = _nearest(sample, centroids)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, assigned, sample)
+        sizes = np.bincount(assigned, minlength=len(centroids))
+        moved = sizes > 0
+        centroids[moved] = sums[moved] / sizes[moved, None]
+    return centroids
+
+def summarize(neighbors):
+    """
+    (recommended, used) - Counters of the neighbours' leaves.
+    """
+    return (Counter(neighbor.leaf for neighbor in neighbors if neighbor.leaf is not None),
+            Counter(neighbor.used for neighbor in neighbors if neighbor.used is not None))
+
+def _algorithm(leaf):
+    for rec in LEAVES + tuple(OUT_OF_CORE.values()):
+        if rec.leaf == leaf:
+            return rec.algorithm or "no recommendation"
+    return leaf
+
+def describe(neighbors, total):
+    """
+    Printable lines for the neighbours of a session.
+    """
+    if not neighbors:
+        return []
+    recommended, used = summarize(neighbors)
+    lines = ["The {0} most similar of {1} stored sessions were recommended:".format(len(neighbors), total)]
+    lines.extend("  {0:3d} x {1}".format(number, _algorithm(leaf)) for leaf, number in recommended.most_common(3))
+    if used:
+        lines.append("and {0} of them reported using:".format(sum(used.values())))
+        lines.extend("  {0:3d} x {1}".format(number, _algorithm(leaf)) for leaf, number in used.most_common(3))
+    return lines
+
+
+def parse_args(argv=None):
+    """
+    Command line options
+    """
+    parser = argparse.ArgumentParser(description="Maintain an algoselector session history store.")
+    parser.add_argument('store', metavar='DIR', help="The session store directory")
+    parser.add_argument('--build-index', action='store_true',
+                        help="(Re)build the nearest-profile index over all stored sessions")
+    parser.add_argument('--clusters', type=int, metavar='N',
+                        help="Index runs (default about sqrt(sessions))")
+    parser.add_argument('--used', nargs=2, metavar=('SESSION', 'LEAF'),
+                        help="Record the leaf (e.g. sup_rf) a stored session ended up using")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    """
+    The Main Function
+    """
+    args = parse_args(argv)
+    try:
+        store = SessionStore(args.store)
+        if args.used:
+            store.set_used(int(args.used[0]), args.used[1])
+        if args.build_index:
+            store.build_index(args.clusters)
+    except (OSError, ValueError, IndexError) as err:
+        print("Error: {0}".format(err), file=sys.stderr)
+        return 1
+    indexed = store.index['count'] if store.index is not None else 0
+    print("{0} sessions, {1} indexed".format(len(store), indexed))
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
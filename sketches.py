@@ -0,0 +1,286 @@
+# Copyright 2021 Spirent Communications.
+# sridhar.rao@spirent.com
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Bounded-Memory Sketches.
+Fixed-size summaries of a stream of values, mergeable across the parts
+of a file profiled in different processes:
+HyperLogLog (distinct count), a KLL quantile sketch (quantiles and the
+shape of a distribution) and a reservoir sample (for goodness-of-fit).
+Their size depends on their parameters only - never on the length of
+the stream. Pure Python; hashes are stable across processes.
+"""
+
+from __future__ import print_function
+import hashlib
+import math
+import random
+
+# pylint: disable=line-too-long
+
+HLL_PRECISION = 12
+QUANTILE_K = 128
+RESERVOIR_SIZE = 1024
+# Kolmogorov-Smirnov critical values at the 5% level, times sqrt(n) -
+# Lilliefors' for the families whose parameters are estimated from the sample.
+KS_CRITICAL = {'normal': 0.886, 'lognormal': 0.886, 'exponential': 1.06, 'uniform': 1.36}
+MIN_FIT_SAMPLES = 30
+
+
+def stable_hash(value):
+    """
+    64-bit hash of a str or bytes, the same in every process (unlike hash()).
+    """
+    if isinstance(value, str):
+        value = value.encode('utf-8', 'surrogatepass')
+    return int.from_bytes(hashlib.blake2b(value, digest_size=8).digest(), 'big')
+
+
+class HyperLogLog():
+    """
+    Distinct-count estimate, within about 1.04 / sqrt(2 ** precision)
+    (1.6% at the default), in 2 ** precision bytes.
+    """
+    def __init__(self, precision=HLL_PRECISION):
+        """
+        Perform Initialization.
+        """
+        self.precision = precision
+        self.registers = bytearray(1 << precision)
+
+    def add(self, value):
+        """
+        Account for one value (str or bytes).
+        """
+        self.add_hash(stable_hash(value))
+
+    def add_hash(self, hashed):
+        """
+        Account for one 64-bit stable_hash.
+        """
+        bits = 64 - self.precision
+        index = hashed >> bits
+        rank = bits - (hashed & ((1 << bits) - 1)).bit_length() + 1
+        if rank > self.registers[index]:
+            self.registers[index] = rank
+
+    def merge(self, other):
+        """
+        Fold in another HyperLogLog of the same precision.
+        """
+        self.registers = bytearray(map(max, self.registers, other.registers))
+
+    def estimate(self):
+        """
+        The estimated number of distinct values.
+        """
+        size = len(self.registers)
+        alpha = 0.7213 / (1 + 1.079 / size)
+        raw = alpha * size * size / sum(2.0 ** -rank for rank in self.registers)
+        zeros = self.registers.count(0)
+        if raw <= 2.5 * size and zeros:
+            # Linear counting - exact in practice for small counts.
+            return int(round(size * math.log(size / float(zeros))))
+        return int(round(raw))
+
+
+class QuantileSketch():
+    """
+    KLL quantile sketch: levels of items, an item at level h standing for
+    2 ** h values. A full level is sorted and every other item (from a
+    random offset) moves up. Rank error is about 1.7 / k; size about 3k
+    items, whatever the number of values.
+    """
+    def __init__(self, k=QUANTILE_K, seed=0):
+        """
+        Perform Initialization.
+        """
+        self.k = k
+        self.levels = [[]]
+        self.count = 0
+        self.minimum = None
+        self.maximum = None
+        self.rng = random.Random(seed)
+
+    def _capacity(self, level):
+        return max(2, int(math.ceil(self.k * (2.0 / 3) ** (len(self.levels) - level - 1))))
+
+    def add(self, value):
+        """
+        Account for one number.
+        """
+        self.count += 1
+        if self.minimum is None or value < self.minimum:
+            self.minimum = value
+        if self.maximum is None or value > self.maximum:
+            self.maximum = value
+        self.levels[0].append(value)
+        if len(self.levels[0]) >= self._capacity(0):
+            self._compress()
+
+    def _compress(self):
+        level = 0
+        while level < len(self.levels):
+            items = self.levels[level]
+            if len(items) >= self._capacity(level):
+                if level + 1 == len(self.levels):
+                    self.levels.append([])
+                items.sort()
+                keep = items[-1:] if len(items) % 2 else []
+                self.levels[level + 1].extend(items[self.rng.randint(0, 1):len(items) - len(keep):2])
+                self.levels[level] = keep
+            level += 1
+
+    def merge(self, other):
+        """
+        Fold in another QuantileSketch.
+        """
+        while len(self.levels) < len(other.levels):
+            self.levels.append([])
+        for level, items in enumerate(other.levels):
+            self.levels[level].extend(items)
+        self.count += other.count
+        for value in (other.minimum, other.maximum):
+            if value is not None:
+                if self.minimum is None or value < self.minimum:
+                    self.minimum = value
+                if self.maximum is None or value > self.maximum:
+                    self.maximum = value
+        self._compress()
+
+    def quantiles(self, fractions):
+        """
+        The values at the given fractions (0-1) of the distribution -
+        None for each when the sketch is empty.
+        """
+        if not self.count:
+            return [None] * len(fractions)
+        weighted = sorted((value, 1 << level) for level, items in enumerate(self.levels) for value in items)
+        total = float(sum(weight for _, weight in weighted))
+        result = []
+        for fraction in fractions:
+            if fraction <= 0:
+                result.append(self.minimum)
+                continue
+            if fraction >= 1:
+                result.append(self.maximum)
+                continue
+            seen = 0
+            for value, weight in weighted:
+                seen += weight
+                if seen >= fraction * total:
+                    result.append(value)
+                    break
+        return result
+
+    def shape(self):
+        """
+        (skewness, tail weight) from the quantiles - Bowley's skewness (0
+        for a symmetric distribution, -1..1) and Moors' kurtosis (1.23 for
+        a normal distribution, larger for heavier tails); None when they
+        cannot be told.
+        """
+        octiles = self.quantiles([index / 8.0 for index in range(1, 8)])
+        if octiles[0] is None:
+            return None, None
+        first, second, _, median, _, sixth, seventh = octiles
+        spread = sixth - second
+        if spread <= 0:
+            return None, None
+        skewness = (sixth + second - 2 * median) / spread
+        kurtosis = ((seventh - octiles[4]) + (octiles[2] - first)) / spread
+        return skewness, kurtosis
+
+
+class Reservoir():
+    """
+    Uniform sample of up to size values of a stream (algorithm R).
+    """
+    def __init__(self, size=RESERVOIR_SIZE, seed=0):
+        """
+        Perform Initialization.
+        """
+        self.size = size
+        self.items = []
+        self.seen = 0
+        self.rng = random.Random(seed)
+
+    def add(self, value):
+        """
+        Offer one value.
+        """
+        self.seen += 1
+        if len(self.items) < self.size:
+            self.items.append(value)
+            return
+        slot = self.rng.randrange(self.seen)
+        if slot < self.size:
+            self.items[slot] = value
+
+    def merge(self, other):
+        """
+        Fold in the reservoir of another part of the stream - each kept
+        item is drawn from either in proportion to how much each saw.
+        """
+        total = self.seen + other.seen
+        if len(self.items) + len(other.items) <= self.size:
+            self.items = self.items + other.items
+        elif total:
+            mine = sum(self.rng.random() < self.seen / float(total) for _ in range(self.size))
+            mine = min(max(mine, self.size - len(other.items)), len(self.items))
+            self.items = (self.rng.sample(self.items, mine)
+                          + self.rng.sample(other.items, min(self.size - mine, len(other.items))))
+        self.seen = total
+
+
+def _normal_cdf(value, mean, deviation):
+    return 0.5 * (1 + math.erf((value - mean) / (deviation * math.sqrt(2))))
+
+def ks_statistic(values, cdf):
+    """
+    Kolmogorov-Smirnov distance between sorted values and a CDF.
+    """
+    count = float(len(values))
+    return max(max((number + 1) / count - cdf(value), cdf(value) - number / count)
+               for number, value in enumerate(values))
+
+def _moments(values):
+    mean = math.fsum(values) / len(values)
+    return mean, math.sqrt(math.fsum((value - mean) ** 2 for value in values) / max(len(values) - 1, 1))
+
+def fit_distribution(values):
+    """
+    The family (normal, lognormal, exponential or uniform) that fits a
+    sample best, by the Kolmogorov-Smirnov distance, as (family,
+    distance, fits at the 5% level) - None for fewer than
+    MIN_FIT_SAMPLES values or a constant sample.
+    """
+    values = sorted(values)
+    count = len(values)
+    if count < MIN_FIT_SAMPLES or values[0] == values[-1]:
+        return None
+    mean, deviation = _moments(values)
+    low, high = values[0], values[-1]
+    candidates = [('normal', lambda value: _normal_cdf(value, mean, deviation)),
+                  ('uniform', lambda value: min(max((value - low) / (high - low), 0.0), 1.0))]
+    if low > 0:
+        log_mean, log_deviation = _moments([math.log(value) for value in values])
+        if log_deviation > 0:
+            candidates.append(('lognormal', lambda value: _normal_cdf(math.log(value), log_mean, log_deviation)))
+    if low >= 0 and mean > 0:
+        candidates.append(('exponential', lambda value: 1 - math.exp(-value / mean)))
+    family, distance = min(((name, ks_statistic(values, cdf)) for name, cdf in candidates),
+                           key=lambda item: item[1])
+    return family, distance, distance <= KS_CRITICAL[family] / math.sqrt(count)
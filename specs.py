@@ -0,0 +1,236 @@
+# Copyright 2021 Spirent Communications.
+# sridhar.rao@spirent.com
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Wizard Questions.
+Every question of the wizards as immutable data, shared by the
+interactive wizard, the session server and the explorer - without
+loading pypsi or the wizard itself.
+"""
+
+from __future__ import print_function
+from collections import namedtuple
+
+# pylint: disable=line-too-long,too-few-public-methods
+
+class Bcolors:
+    """
+    For Coloring
+    """
+    HEADER = '\033[95m'
+    OKBLUE = '\033[94m'
+    OKGREEN = '\033[92m'
+    WARNING = '\033[93m'
+    FAIL = '\033[91m'
+    ENDC = '\033[0m'
+    BOLD = '\033[1m'
+    UNDERLINE = '\033[4m'
+
+# The questions, as immutable data shared by every wizard and session:
+# a WizardSpec is a wizard title and its steps; a StepSpec is the id the
+# answer is stored under, the prompt, the help text and the default.
+StepSpec = namedtuple('StepSpec', 'id name help default')
+WizardSpec = namedtuple('WizardSpec', 'name steps')
+
+LABEL_HELP = """ One or more meaningful and informative 'tag' to provide context so that a machine learning model can learn from it. For example, labels might indicate whether a photo contains a bird or car, which words were uttered in an audio recording, or if an x-ray contains a tumor. Data labeling is required for a variety of use cases including computer vision, natural language processing, and speech recognition."""
+
+RI_DIAGRAM = """
+            Reward  |--------|
+            |-------| Agent  |  Action
+            | |-----|        |-------|
+            | |	    |--------|       |
+            | |state                 |
+            | |	                     |
+            | |	   |-----------|     |
+            | |----|Environment|     |
+            |------|           |-----|
+    	           |-----------|
+            """
+
+MAIN_L1 = WizardSpec(Bcolors.OKBLUE+"Do you Need ML - Data Availability"+Bcolors.ENDC, (
+    StepSpec("data_availability",
+             Bcolors.HEADER+"Do you have access to data about different situations, or that describes a lot of examples of situations"+Bcolors.ENDC,
+             "Y/N/U - Yes/No/Unknown",
+             'Y'),
+))
+
+MAIN_L2_A = WizardSpec(Bcolors.OKBLUE+"Do you Need ML - Data Creation"+Bcolors.ENDC, (
+    StepSpec("data_creativity",
+             Bcolors.HEADER+"Will a system be able to gather a lot of data by trying sequences of actions in many different situations and seeing the results"+Bcolors.ENDC,
+             "Y/N/U - Yes/No/Unknown",
+             'Y'),
+))
+
+MAIN_L2_B = WizardSpec(Bcolors.OKBLUE+"Do you Need ML - Data Programmability"+Bcolors.ENDC, (
+    StepSpec("data_label",
+             Bcolors.HEADER+" Do you have Labelled data? (Type Y/N/U - Yes/No/Unknown). Type help for description of label. "+Bcolors.ENDC,
+             LABEL_HELP,
+             'Y'),
+    StepSpec("data_programmability",
+             Bcolors.HEADER+"Can a program or set of rules decide what actions to take based on the data you have about the situations"+Bcolors.ENDC,
+             "Y/N/U - Yes/No/Unknown",
+             'Y'),
+))
+
+MAIN_L3 = WizardSpec(Bcolors.OKBLUE+"Do you Need ML - Data Knowledge"+Bcolors.ENDC, (
+    StepSpec("data_knowledge",
+             Bcolors.HEADER+"Could a knowledgeable human decide what actions to take based on the data you have about the situations"+Bcolors.ENDC,
+             "Y/N/U - Yes/No/Unknown",
+             'Y'),
+))
+
+MAIN_L4 = WizardSpec(Bcolors.OKBLUE+"Do you Need ML - Data Pattern"+Bcolors.ENDC, (
+    StepSpec("data_pattern",
+             Bcolors.HEADER+"Could there be patterns in these situations that the humans haven't recognized before"+Bcolors.ENDC,
+             "Y/N/U - Yes/No/Unknown",
+             'Y'),
+))
+
+GENERIC = WizardSpec(Bcolors.OKBLUE+"Understanding Goal, Metrics, Data and Output Type"+Bcolors.ENDC, (
+    StepSpec("data_goal",
+             Bcolors.HEADER+" What is your goal with the data? Predict, Describe or Explore"+Bcolors.ENDC,
+             "Enter one of Predict/Describe/Explore",
+             'Explore'),
+    StepSpec("metric_accuracy",
+             Bcolors.HEADER+" How important the metric 'Accuracy' is for you? 1-5: 1- Least important 5- Most Important"+Bcolors.ENDC,
+             "Enter 1-5: 1 being least important, and 5 being most important",
+             '1'),
+    StepSpec("metric_speed",
+             Bcolors.HEADER+" How important the metric 'Speed' is for you? 1-5: 1- Least important 5- Most Important"+Bcolors.ENDC,
+             "Enter 1-5: 1 being least important, and 5 being most important",
+             '1'),
+    StepSpec("metric_interpretability",
+             Bcolors.HEADER+" How important the metric 'Interpretability' is for you? 1-5: 1- Least important 5- Most Important"+Bcolors.ENDC,
+             "Enter 1-5: 1 being least important, and 5 being most important",
+             '1'),
+    StepSpec("metric_reproducibility",
+             Bcolors.HEADER+" How important the metric 'Reproducibility' is for you? 1-5: 1- Least important 5- Most Important"+Bcolors.ENDC,
+             "Enter 1-5: 1 being least important, and 5 being most important",
+             '1'),
+    StepSpec("metric_implementation",
+             Bcolors.HEADER+" How important the metric 'Ease of Implementation and Maintenance' is for you? 1-5: 1- Least important 5- Most Important"+Bcolors.ENDC,
+             "Enter 1-5: 1 being least important, and 5 being most important",
+             '1'),
+    StepSpec("data_column",
+             Bcolors.HEADER+" What does the data (columns) represent? well defined 'Features', 'signals' (Timeseries, pixels, etc) or Text - (Please type the associated number)"+Bcolors.ENDC,
+             "1. Well Defined Features\n 2. Signals\n 3. Text - Unstructured\n 4. None of the above\n",
+             'Features'),
+    StepSpec("data_signal_type",
+             Bcolors.HEADER+" If Signals, can you choose any one from the below list? "+Bcolors.ENDC,
+             "1. Image\n 2. Audio\n 3. Timeseries\n 4. None of the above\n 5. Not Applicable\n  ",
+             '3'),
+    StepSpec("data_text_type",
+             Bcolors.HEADER+" If Text, can you choose any one from the below list? "+Bcolors.ENDC,
+             "1. Webpages\n 2. Emails\n 3. Social-Media Posts\n 4. Books\n 5. Formal Articles\n 6. Speech converted to text\n 7. None of the above\n 8. Not Applicable\n  ",
+             '3'),
+    StepSpec("data_features",
+             Bcolors.HEADER+" If features, are they well defined? i.e., are all the variables well understood? "+Bcolors.ENDC,
+             "Y/N/NA",
+             'Y'),
+    StepSpec("data_features_count",
+             Bcolors.HEADER+" If features, How many are there? "+Bcolors.ENDC,
+             "Number or NA",
+             '10'),
+    StepSpec("data_distribution",
+             Bcolors.HEADER+" Are you aware of any 'Distribution' that is inherent to the data, we can take advantage of?"+Bcolors.ENDC,
+             "Y/N/U",
+             'Y'),
+    StepSpec("data_io_relation",
+             Bcolors.HEADER+" Is the probability of 'Linear Relation' between input and the output is high?"+Bcolors.ENDC,
+             "Y/N/U",
+             'Y'),
+    StepSpec("data_correlation",
+             Bcolors.HEADER+" Are you confident that there is NO high correlation among the independent variables in your day?"+Bcolors.ENDC,
+             "Y/N/U. Change in one  ",
+             'Y'),
+    StepSpec("data_cond_indep",
+             Bcolors.HEADER+" Are you confident that the variables are conditionally independent?"+Bcolors.ENDC,
+             "Y/N/U. If probability that it rains given lightining and thunder is same as probability that it rains given lightining, then rain and thunder are conditionally independent",
+             'Y'),
+    StepSpec("data_missing",
+             Bcolors.HEADER+" Are there any missing values in the data? "+Bcolors.ENDC,
+             "Y/N/U",
+             'N'),
+    StepSpec("data_size_bytes",
+             Bcolors.HEADER+" How big is the data in terms of size? (Use K/M/G Bytes unit) "+Bcolors.ENDC,
+             "Number(integer) and unit: K for Kilo, M for Mega and G for Giga. Ex: 10G for 10 Giga bytes",
+             '1G'),
+    StepSpec("data_size_samples",
+             Bcolors.HEADER+" How big is the data in terms of samples? (Use T/M/B Samples) "+Bcolors.ENDC,
+             "Number(integer) and unit: T for Thousand, M for Million and B for Billion. Ex: 1M for 1 Million Samples",
+             '1M'),
+    StepSpec("data_type_output",
+             Bcolors.HEADER+" What is the expected output data type ? (Please type number associated with type in 'help') "+Bcolors.ENDC,
+             " 1:Numerical-Discrete\n 2:Numerical-Continuous\n 3:Ordinal\n 4:Categorical-Binary\n 5:Categorical-Multiclass",
+             '1'),
+    StepSpec("data_output_prob",
+             Bcolors.HEADER+" Is the expected output data a probability value ? "+Bcolors.ENDC,
+             "Y/N",
+             'N'),
+))
+
+UNSUPERVISED_QUESTIONS = WizardSpec(Bcolors.OKBLUE+"Understanding Goal, Metrics, Data and Output Type"+Bcolors.ENDC, (
+    StepSpec("unsup_goal",
+             Bcolors.HEADER+" What is the main goal? (Please type number associated with type in 'help')"+Bcolors.ENDC,
+             "1: Explore Similar Groups (clustering) \n 2: Perform Dimensionality Reduction\n 3: Others\n",
+             '1'),
+    StepSpec("unsup_dr_topic_mod",
+             Bcolors.HEADER+" If dimensionality reduction, do you prefer topic modelling ? (Please type NA is you are not sure)"+Bcolors.ENDC,
+             "Y/N/NA",
+             'NA'),
+    StepSpec("unsup_clus_dv",
+             Bcolors.HEADER+" Are you aware of density variations in your data ? (Please type NA is you are not sure)"+Bcolors.ENDC,
+             "Y/N/NA",
+             'NA'),
+    StepSpec("unsup_clus_outliers",
+             Bcolors.HEADER+" Are there too many outliers in your data ? (Please type NA is you are not sure)"+Bcolors.ENDC,
+             "Y/N/NA",
+             'NA'),
+    StepSpec("unsup_clus_groups",
+             Bcolors.HEADER+" If clustering, do you know how many groups to form? (Please type NA is you are not sure)"+Bcolors.ENDC,
+             "Y/N/NA",
+             'NA'),
+))
+
+REINFORCEMENT_QUESTIONS = WizardSpec(Bcolors.OKBLUE+"Reinforcement Specific"+Bcolors.ENDC, (
+    StepSpec("ri_info",
+             Bcolors.HEADER+" Type help for reference diagram for reinforcement-learning"+Bcolors.ENDC,
+             RI_DIAGRAM,
+             'Type Help or Press Enter'),
+    StepSpec("ri_model_preference",
+             Bcolors.HEADER+" Do you prefer model-based approach? (Type NA if you are not sure) "+Bcolors.ENDC,
+             "Y/N/NA",
+             'Y'),
+    StepSpec("ri_model_availability",
+             Bcolors.HEADER+" Do you have a model for model-based approach? (Type NA if not applicable) "+Bcolors.ENDC,
+             "Y/N/NA",
+             'Y'),
+    StepSpec("ri_modelfree_value",
+             Bcolors.HEADER+" In Model-Free approach, do you prefer value-based approach? (Type NA if not applicable) "+Bcolors.ENDC,
+             "Y/N/NA",
+             'Y'),
+    StepSpec("ri_modelfree_value_state",
+             Bcolors.HEADER+" In Model-Free Value-Based approach, do you prefer state-only model? (Type NA if not applicable) "+Bcolors.ENDC,
+             "Y/N/NA",
+             'Y'),
+    StepSpec("ri_app_domain",
+             Bcolors.HEADER+" What is the application domain ? (Please type number associated with type in 'help') "+Bcolors.ENDC,
+             " 1:Computer Resource Mgmt.\n 2:Robotics\n 3:Traffic-Control\n 4:Reccommenders\n 5:Autonomous Vehicles\n 6:Games\n 7:Chemistry\n 8:Others\n",
+             '1'),
+))
+
+WIZARD_SPECS = (MAIN_L1, MAIN_L2_A, MAIN_L2_B, MAIN_L3, MAIN_L4, GENERIC,
+                UNSUPERVISED_QUESTIONS, REINFORCEMENT_QUESTIONS)
+STEP_SPECS = dict((step.id, step) for spec in WIZARD_SPECS for step in spec.steps)
@@ -0,0 +1,122 @@
+# Copyright 2021 Spirent Communications.
+# sridhar.rao@spirent.com
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Recommendation API requests over a loopback socket: answers, and every
+error status.
+"""
+
+import asyncio
+import json
+
+import pytest
+
+import api
+from engine import get_engine
+
+ANSWERS = {'data_availability': 'Y', 'data_label': 'Y', 'data_programmability': 'N', 'data_knowledge': 'Y',
+           'data_creativity': 'N', 'data_pattern': 'N', 'metric_accuracy': 2, 'metric_speed': 2,
+           'metric_interpretability': 2, 'metric_reproducibility': 2, 'metric_implementation': 2,
+           'data_size_bytes': '10k', 'data_size_samples': '1t', 'data_features_count': '100',
+           'data_type_output': '2', 'data_io_relation': 'Y', 'data_output_prob': 'N',
+           'data_cond_indep': 'Y', 'data_correlation': 'N', 'data_column': '1', 'data_signal_type': '1'}
+
+
+def exchange(data):
+    """
+    Send raw bytes to a fresh API server and read until it closes:
+    [(status, decoded body), ...] in order.
+    """
+    async def run():
+        server = await asyncio.get_running_loop().create_server(
+            lambda: api.RecommendationProtocol({}, get_engine()), '127.0.0.1', 0)
+        port = server.sockets[0].getsockname()[1]
+        reader, writer = await asyncio.open_connection('127.0.0.1', port)
+        writer.write(data)
+        await writer.drain()
+        received = await asyncio.wait_for(reader.read(), 10)
+        writer.close()
+        server.close()
+        await server.wait_closed()
+        return received
+    received = asyncio.run(run())
+    replies = []
+    while received:
+        head, _, rest = received.partition(b'\r\n\r\n')
+        lines = head.decode('latin-1').split('\r\n')
+        length = int(next(line.split(':')[1] for line in lines if line.lower().startswith('content-length')))
+        replies.append((int(lines[0].split()[1]), json.loads(rest[:length])))
+        received = rest[length:]
+    return replies
+
+def request(body=b'', method='POST', target='/recommend', headers='', close=True):
+    """
+    One HTTP/1.1 request - the body JSON encoded unless it is bytes.
+    """
+    if not isinstance(body, bytes):
+        body = json.dumps(body).encode()
+    return '{0} {1} HTTP/1.1\r\nContent-Length: {2}\r\n{3}{4}\r\n'.format(
+        method, target, len(body), headers, 'Connection: close\r\n' if close else '').encode() + body
+
+
+def test_recommend_one_and_many():
+    status, result = exchange(request(ANSWERS))[0]
+    assert status == 200 and result['leaf'] == 'sup_linear' and result['error'] is None
+    status, results = exchange(request([dict(ANSWERS, id=number) for number in range(40)]))[0]
+    assert status == 200 and [result['id'] for result in results] == list(range(40))
+    assert set(result['leaf'] for result in results) == {'sup_linear'}
+
+def test_pipelined_requests_are_answered_in_order():
+    replies = exchange(request(ANSWERS, close=False) + request(method='GET', target='/health', close=False)
+                       + request(dict(ANSWERS, metric_speed='fast')))
+    assert [status for status, _ in replies] == [200, 200, 200]
+    assert replies[0][1]['leaf'] == 'sup_linear'
+    assert replies[1][1] == {'status': 'ok'}
+    assert replies[2][1]['error'] and replies[2][1]['leaf'] is None
+
+@pytest.mark.parametrize('value', (10 ** 30, -10 ** 30, '99999999999999999999'))
+def test_huge_numbers_are_answered(value):
+    pytest.importorskip('numpy')
+    single = exchange(request(dict(ANSWERS, metric_speed=value)))[0]
+    many = exchange(request([dict(ANSWERS, metric_speed=value)] * api.COLUMNAR_BATCH))[0]
+    top = exchange(request(dict(ANSWERS, metric_speed=value), target='/recommend?top=2'))[0]
+    assert single[0] == many[0] == top[0] == 200
+    assert many[1][0] == single[1] and top[1]['leaf'] == single[1]['leaf']
+
+@pytest.mark.parametrize('body, message', (
+    (b'{"data_label": ', 'Expecting value'),
+    (b'"\xc3\x28"', 'codec'),
+    (b'[1, 2]', 'expected an answer object or a list of them'),
+    (b'"Y"', 'expected an answer object or a list of them'),
+))
+def test_bad_payloads(body, message):
+    status, result = exchange(request(body))[0]
+    assert status == 400 and message in result['error']
+
+@pytest.mark.parametrize('data, status', (
+    (request(method='GET'), 405),
+    (request(target='/elsewhere'), 404),
+    (request(ANSWERS, target='/recommend?top=0'), 400),
+    (b'POST /recommend\r\n\r\n', 400),
+    (b'POST /recommend HTTP/1.1\r\nContent-Length: many\r\n\r\n', 400),
+    (b'POST /recommend HTTP/1.1\r\nContent-Length: -5\r\n\r\n{"a": 1}', 400),
+    (b'POST /recommend HTTP/1.1\r\nTransfer-Encoding: chunked\r\n\r\n', 501),
+    (b'POST /recommend HTTP/1.1\r\nX-Padding: ' + b'x' * (api.MAX_HEADER + 1), 431),
+    ('POST /recommend HTTP/1.1\r\nContent-Length: {0}\r\n\r\n'.format(api.MAX_BODY + 1).encode(), 413),
+))
+def test_error_statuses(data, status):
+    replies = exchange(data)
+    assert [reply[0] for reply in replies] == [status]
+    assert replies[0][1]['error']
@@ -0,0 +1,85 @@
+# Copyright 2021 Spirent Communications.
+# sridhar.rao@spirent.com
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Bake-off trials: each kind of leaf is scored by its own metric.
+"""
+
+import pytest
+
+np = pytest.importorskip('numpy')
+
+import bakeoff  # pylint: disable=wrong-import-position
+
+
+def blobs(rows=600, seed=0):
+    """
+    Three separated groups in 4 dimensions, labelled by group.
+    """
+    rng = np.random.default_rng(seed)
+    labels = rng.integers(0, 3, rows)
+    centers = np.array([[0, 0, 0, 0], [8, 8, 0, 0], [0, 8, 8, 8]], dtype=float)
+    return centers[labels] + rng.standard_normal((rows, 4)), labels
+
+def split(labelled=True):
+    features, labels = blobs()
+    sample = bakeoff.Sample(features, labels if labelled else None, True, ['f0', 'f1', 'f2', 'f3'])
+    return bakeoff.holdout_split(sample)
+
+
+class TransformingKMeans(bakeoff.KMeans):
+    """
+    Shaped like scikit-learn's KMeans: transform (distances to the
+    centers) but no inverse_transform.
+    """
+    def transform(self, X):
+        """
+        Distances to the centers.
+        """
+        return np.sqrt(np.maximum(self._distances(X), 0))
+
+
+@pytest.mark.parametrize('labelled', (True, False))
+def test_clustering_with_transform_is_scored_by_silhouette(monkeypatch, labelled):
+    monkeypatch.setattr(bakeoff, 'make_model', lambda leaf, classification, backend, seed=0, features=1: TransformingKMeans(3, seed))
+    status, _, _, score, metric = bakeoff.trial('unsup_kmeans', 'sklearn', split(labelled), True)
+    assert (status, metric) == ('ok', 'silhouette')
+    assert score > 0.5
+
+@pytest.mark.parametrize('leaf', ('unsup_pca', 'unsup_svd'))
+def test_projections_are_scored_by_variance_kept(leaf):
+    status, _, _, score, metric = bakeoff.trial(leaf, 'builtin', split(False), True)
+    assert (status, metric) == ('ok', 'variance')
+    assert 0.5 < score <= 1.0
+
+@pytest.mark.parametrize('leaf', ('unsup_kmeans', 'unsup_gmm'))
+def test_builtin_clusterings(leaf):
+    status, _, _, score, metric = bakeoff.trial(leaf, 'builtin', split(True), True)
+    assert (status, metric) == ('ok', 'silhouette')
+    # costs.CLUSTERS groups over three blobs: positive, not clear.
+    assert 0 < score <= 1
+
+@pytest.mark.parametrize('leaf', ('sup_logistic', 'sup_knn', 'sup_dt', 'sup_nb'))
+def test_builtin_classifiers(leaf):
+    status, _, _, score, metric = bakeoff.trial(leaf, 'builtin', split(True), True)
+    assert (status, metric) == ('ok', 'accuracy')
+    assert score > 0.9
+
+def test_run_reports_every_leaf():
+    features, labels = blobs(300)
+    sample = bakeoff.Sample(features, labels, True, ['f0', 'f1', 'f2', 'f3'])
+    trials = bakeoff.run(sample, ['sup_logistic', 'sup_rnn'], budget=60, workers=2, backend='builtin')
+    assert [trial.leaf for trial in trials] == ['sup_logistic', 'sup_rnn']
+    assert trials[0].status == 'ok' and trials[1].status == 'no baseline'
@@ -0,0 +1,171 @@
+# Copyright 2021 Spirent Communications.
+# sridhar.rao@spirent.com
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Batch mode: serial, columnar and sharded runs give the same results.
+"""
+
+import csv
+import json
+import os
+import random
+import subprocess
+import sys
+
+import pytest
+
+import batch
+
+# pylint: disable=redefined-outer-name
+
+YES_NO = ('Y', 'N', 'NA', 'U')
+RECORDS = 1500
+
+
+def random_record(rng, number):
+    """
+    One answer record - a few with a missing or invalid answer.
+    """
+    record = dict(id=number, data_availability=rng.choice('YN'), data_creativity=rng.choice('YN'),
+                  data_label=rng.choice('YN'), data_programmability=rng.choice('YN'),
+                  data_knowledge=rng.choice('YN'), data_pattern=rng.choice('YN'),
+                  metric_accuracy=rng.randint(1, 5), metric_speed=rng.randint(1, 5),
+                  metric_interpretability=rng.randint(1, 5), metric_reproducibility=rng.randint(1, 5),
+                  metric_implementation=rng.randint(1, 5), data_column=rng.randint(1, 4),
+                  data_signal_type=rng.randint(1, 5), data_type_output=rng.randint(1, 5),
+                  data_features_count=rng.choice(['10', '60', '6000', '600000', 'NA']),
+                  data_io_relation=rng.choice(YES_NO), data_correlation=rng.choice(YES_NO),
+                  data_cond_indep=rng.choice(YES_NO), data_output_prob=rng.choice(YES_NO),
+                  data_size_bytes=rng.choice(['10K', '5M', '1G']), data_size_samples=rng.choice(['1T', '1M', '1B']),
+                  unsup_goal=rng.randint(1, 3), unsup_dr_topic_mod=rng.choice(YES_NO),
+                  unsup_clus_dv=rng.choice(YES_NO), unsup_clus_groups=rng.choice(YES_NO),
+                  unsup_clus_outliers=rng.choice(YES_NO), ri_model_preference=rng.choice(YES_NO),
+                  ri_model_availability=rng.choice(YES_NO), ri_modelfree_value=rng.choice(YES_NO),
+                  ri_modelfree_value_state=rng.choice(YES_NO))
+    if rng.random() < 0.05:
+        del record[rng.choice(sorted(set(record) - {'id'}))]
+    if rng.random() < 0.02:
+        record['metric_speed'] = 'fast'
+    return record
+
+@pytest.fixture(scope='module')
+def inputs(tmp_path_factory):
+    """
+    The same records as JSONL and as CSV.
+    """
+    rng = random.Random(7)
+    records = [random_record(rng, number) for number in range(RECORDS)]
+    folder = tmp_path_factory.mktemp('batch')
+    jsonl = folder / 'answers.jsonl'
+    jsonl.write_text(''.join(json.dumps(record) + '\n' for record in records), encoding='utf-8')
+    table = folder / 'answers.csv'
+    with open(table, 'w', newline='', encoding='utf-8') as stream:
+        writer = csv.DictWriter(stream, fieldnames=sorted(set().union(*records)))
+        writer.writeheader()
+        writer.writerows(records)
+    return {'jsonl': str(jsonl), 'csv': str(table)}
+
+def run(path, tmp_path, name, **options):
+    output = tmp_path / (name + '.jsonl')
+    count = batch.run_batch(path, str(output), **options)
+    results = [json.loads(line) for line in output.read_text(encoding='utf-8').splitlines()]
+    assert count == len(results) == RECORDS
+    return results
+
+
+@pytest.mark.parametrize('fmt', ('jsonl', 'csv'))
+@pytest.mark.parametrize('top', (None, 3))
+def test_serial_columnar_and_workers_agree(inputs, tmp_path, fmt, top):
+    pytest.importorskip('numpy')
+    serial = run(inputs[fmt], tmp_path, 'serial', top=top)
+    assert [str(result['id']) for result in serial] == [str(number) for number in range(RECORDS)]
+    assert any(result['error'] for result in serial) and any(result['leaf'] for result in serial)
+    for name, options in (('columnar', dict(columnar=True, chunk_size=256)),
+                          ('workers', dict(workers=2, chunk_size=400)),
+                          ('columnar_workers', dict(columnar=True, workers=2, chunk_size=400))):
+        assert run(inputs[fmt], tmp_path, name, top=top, **options) == serial, name
+
+def test_csv_and_jsonl_agree(inputs, tmp_path):
+    from_json = run(inputs['jsonl'], tmp_path, 'json')
+    from_csv = run(inputs['csv'], tmp_path, 'csv')
+    for result in from_json + from_csv:
+        result['id'] = str(result['id'])
+    assert from_json == from_csv
+
+@pytest.mark.parametrize('fmt', ('jsonl', 'csv'))
+def test_shard_is_one_columnar_chunk(inputs, monkeypatch, fmt):
+    pytest.importorskip('numpy')
+    import columnar
+    calls = []
+    evaluate_columns = columnar.evaluate_columns
+    def counted(columns, engine=None):
+        calls.append(len(next(iter(columns.values()))))
+        return evaluate_columns(columns, engine)
+    monkeypatch.setattr(columnar, 'evaluate_columns', counted)
+    with open(inputs[fmt], encoding='utf-8', newline='') as stream:
+        shard = next(batch.read_shards(stream, fmt, 1000))
+    count, _ = batch.evaluate_shard(shard, columnar=True)
+    assert count == 1000
+    assert calls == [1000]
+
+@pytest.mark.parametrize('options', (dict(), dict(columnar=True), dict(workers=2, chunk_size=2), dict(top=2)))
+def test_malformed_lines_become_error_records(tmp_path, options):
+    if options.get('columnar') or options.get('top'):
+        pytest.importorskip('numpy')
+    good = random_record(random.Random(1), 'first')
+    path = tmp_path / 'answers.jsonl'
+    path.write_text('\n'.join([json.dumps(good), '{"id": 7, "data_av', '[1, 2]', json.dumps(dict(good, id='last'))]) + '\n',
+                    encoding='utf-8')
+    output = tmp_path / 'results.jsonl'
+    assert batch.run_batch(str(path), str(output), **options) == 4
+    results = [json.loads(line) for line in output.read_text(encoding='utf-8').splitlines()]
+    assert [result['id'] for result in results] == ['first', 1, 2, 'last']
+    assert results[1]['error'].startswith('invalid JSON:')
+    assert results[2]['error'] == 'not a JSON object: list'
+    assert results[0]['error'] is None and results[3]['error'] is None
+
+@pytest.mark.parametrize('value', (10 ** 30, -10 ** 30, '99999999999999999999', -128, '-128'))
+def test_out_of_range_numbers_agree(tmp_path, value):
+    pytest.importorskip('numpy')
+    rng = random.Random(3)
+    records = [dict(random_record(rng, number), **{field: value})
+               for number in range(40) for field in ('metric_speed', 'data_features_count', 'data_column')]
+    path = tmp_path / 'answers.jsonl'
+    path.write_text(''.join(json.dumps(record) + '\n' for record in records), encoding='utf-8')
+    serial, columnar = tmp_path / 'serial.jsonl', tmp_path / 'columnar.jsonl'
+    batch.run_batch(str(path), str(serial))
+    batch.run_batch(str(path), str(columnar), columnar=True)
+    assert columnar.read_text(encoding='utf-8') == serial.read_text(encoding='utf-8')
+
+@pytest.mark.parametrize('suffix', ('jsonl', 'csv'))
+def test_files_are_utf8_whatever_the_locale(tmp_path, suffix):
+    records = [dict(random_record(random.Random(5), number), id='r\u00e9ponse-\u4e00-{0}'.format(number)) for number in range(3)]
+    path = tmp_path / ('answers.' + suffix)
+    if suffix == 'jsonl':
+        path.write_text(''.join(json.dumps(record, ensure_ascii=False) + '\n' for record in records), encoding='utf-8')
+    else:
+        with open(path, 'w', newline='', encoding='utf-8') as stream:
+            writer = csv.DictWriter(stream, fieldnames=sorted(set().union(*records)))
+            writer.writeheader()
+            writer.writerows(records)
+    output = tmp_path / ('results.' + suffix)
+    # Opening a file without an encoding is an error here, as it would
+    # depend on the locale.
+    subprocess.run([sys.executable, '-X', 'warn_default_encoding', '-W', 'error::EncodingWarning', '-c',
+                    'import sys, batch; batch.run_batch(sys.argv[1], sys.argv[2])', str(path), str(output)],
+                   check=True, cwd=os.path.dirname(os.path.abspath(batch.__file__)))
+    with open(output, newline='', encoding='utf-8') as stream:
+        results = list(csv.DictReader(stream)) if suffix == 'csv' else [json.loads(line) for line in stream]
+    assert [result['id'] for result in results] == [record['id'] for record in records]
@@ -0,0 +1,85 @@
+# Copyright 2021 Spirent Communications.
+# sridhar.rao@spirent.com
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Cluster structure answers on planted blobs, with and without scattered
+outliers, and the target column left out of labelled files.
+"""
+
+import pytest
+
+np = pytest.importorskip('numpy')
+
+import algoselector  # pylint: disable=wrong-import-position
+import clusters  # pylint: disable=wrong-import-position
+
+# Four well-separated blob centres.
+CENTRES = np.array([[-8, -8, -8], [8, 8, -8], [8, -8, 8], [-8, 8, 8]], dtype=float)
+
+
+def planted(rows=2000, scattered=0, seed=0):
+    """
+    rows rows of tight blobs around CENTRES - the last scattered of them
+    uniform over a box around all the blobs instead.
+    """
+    rng = np.random.default_rng(seed)
+    blobs = CENTRES[rng.integers(0, len(CENTRES), rows - scattered)] + 0.5 * rng.standard_normal((rows - scattered, 3))
+    return np.vstack([blobs, rng.uniform(-16, 16, (scattered, 3))])
+
+def write_labelled(path, rows=2000, scattered=200, seed=0):
+    """
+    The planted features and a uniform noise 'label' column, as CSV.
+    """
+    data = planted(rows, scattered, seed)
+    label = np.random.default_rng(seed + 1).uniform(0, 10 ** 6, rows)
+    np.savetxt(str(path), np.column_stack([data, label]), fmt='%.5f', delimiter=',', header='x,y,z,label', comments='')
+    return str(path)
+
+
+@pytest.mark.parametrize('scattered, outliers', ((0, 'N'), (200, 'Y')))
+def test_planted_blobs_and_outliers(scattered, outliers):
+    report = clusters.analyse_sample(planted(scattered=scattered))
+    answers = clusters.answers(report)
+    assert answers['unsup_clus_outliers'] == outliers
+    assert answers['unsup_clus_groups'] == 'Y'
+    assert report.clusters == len(CENTRES) and report.silhouette >= clusters.CLEAR_SILHOUETTE
+    assert (report.outlier_share > clusters.OUTLIER_SHARE) == (outliers == 'Y')
+
+def test_uniform_rows_have_no_clear_groups():
+    report = clusters.analyse_sample(np.random.default_rng(3).uniform(-10, 10, (2000, 3)))
+    assert clusters.answers(report)['unsup_clus_groups'] == 'N' and report.clusters == 1
+    assert clusters.answers(report)['unsup_clus_outliers'] == 'N'
+
+def test_labelled_file_leaves_the_target_out(tmp_path):
+    path = write_labelled(tmp_path / 'data.csv')
+    labelled = clusters.analyse_file(path, target='label', labelled=True)
+    assert labelled.features == 3 and labelled.clusters == len(CENTRES)
+    assert clusters.answers(labelled)['unsup_clus_outliers'] == 'Y'
+    assert clusters.answers(labelled)['unsup_clus_groups'] == 'Y'
+    assert clusters.analyse_file(path).features == 4
+
+def test_command_line_passes_the_target(tmp_path, monkeypatch):
+    path = write_labelled(tmp_path / 'data.csv', rows=200, scattered=0)
+    calls = []
+    def analyse_file(*args, **kwargs):
+        calls.append((args, kwargs))
+        raise ValueError("stop here")
+    monkeypatch.setattr(clusters, 'analyse_file', analyse_file)
+    with pytest.raises(SystemExit):
+        algoselector.main(['--profile', path, '--clusters', '--target', 'label'])
+    with pytest.raises(SystemExit):
+        algoselector.main(['--profile', path, '--clusters'])
+    assert calls == [((path, None), {'target': 'label', 'labelled': True}),
+                     ((path, None), {'target': None, 'labelled': False})]
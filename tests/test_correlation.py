@@ -0,0 +1,92 @@
+# Copyright 2021 Spirent Communications.
+# sridhar.rao@spirent.com
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Planted correlated and anti-correlated features are found, by comparing
+every pair and through the SimHash signatures.
+"""
+
+import pytest
+
+np = pytest.importorskip('numpy')
+
+import correlation  # pylint: disable=wrong-import-position
+
+
+def planted(features, groups, rows=2000, seed=0):
+    """
+    Independent features, except that in each group the later members
+    copy (or negate, alternately) the first one plus a little noise.
+    Features are offset far from zero, as real measurements often are.
+    """
+    rng = np.random.default_rng(seed)
+    data = rng.standard_normal((rows, features))
+    for group in groups:
+        for number, member in enumerate(group[1:]):
+            sign = -1 if number % 2 else 1
+            data[:, member] = sign * data[:, group[0]] + 0.05 * rng.standard_normal(rows)
+    return data + 1000.0
+
+def sketched(data, blocks=4):
+    """
+    A CorrelationSketch of data, folded in blocks.
+    """
+    sketch = correlation.CorrelationSketch(data.shape[1])
+    for block in np.array_split(data, blocks):
+        sketch.update(block)
+    assert sketch.sketch.dtype == np.float32 and sketch.sketch.flags.f_contiguous
+    return sketch
+
+@pytest.mark.parametrize('features, groups', (
+    (200, [[3, 50, 120], [7, 8]]),
+    (correlation.EXACT_LIMIT + 300, [[5, 2000, correlation.EXACT_LIMIT + 250], [10, 11], [600, 4000]]),
+))
+def test_planted_groups_are_found(monkeypatch, features, groups):
+    hashed = []
+    hashed_pairs = correlation.CorrelationSketch._hashed_pairs  # pylint: disable=protected-access
+    def spy(*args):
+        hashed.append(True)
+        return hashed_pairs(*args)
+    monkeypatch.setattr(correlation.CorrelationSketch, '_hashed_pairs', staticmethod(spy))
+    pairs = sketched(planted(features, groups)).correlated_pairs()
+    assert bool(hashed) == (features > correlation.EXACT_LIMIT)
+    assert correlation.groups_of(pairs) == sorted(groups, key=lambda group: (-len(group), group))
+    signs = dict(((first, second), value) for first, second, value in pairs)
+    assert signs[tuple(sorted(groups[0][:2]))] > 0.9
+    assert signs[tuple(sorted((groups[0][0], groups[0][2])))] < -0.9
+
+def test_independent_features_are_not_grouped():
+    assert sketched(planted(300, [])).correlated_pairs() == []
+
+def test_constant_and_missing_columns():
+    data = planted(20, [[0, 1]])
+    data[:, 5] = 3.0
+    data[::7, 2] = np.nan
+    columns, units = sketched(data).normalized()
+    assert 5 not in columns and len(columns) == 19
+    assert np.allclose(np.linalg.norm(units, axis=0), 1, atol=1e-4)
+
+def test_screen_file(tmp_path):
+    data = planted(30, [[2, 9, 17]], rows=3000)
+    target = (data[:, 0] > 1000).astype(int)
+    path = tmp_path / 'wide.csv'
+    header = ','.join(['f{0}'.format(column) for column in range(30)] + ['target'])
+    np.savetxt(str(path), np.column_stack([data, target]), fmt='%.5f', delimiter=',', header=header, comments='')
+    report = correlation.screen_file(str(path))
+    assert (report.samples, report.features) == (3000, 30)
+    assert report.groups == [[2, 9, 17]] and report.max_correlation > 0.9
+    assert [report.names[member] for member in report.groups[0]] == ['f2', 'f9', 'f17']
+    assert correlation.answer(report) == 'N'
+    assert any('correlated group of 3: f2, f9, f17' in line for line in correlation.describe(report))
@@ -0,0 +1,83 @@
+# Copyright 2021 Spirent Communications.
+# sridhar.rao@spirent.com
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Size answers as numbers, and candidates ranked by their estimated cost.
+"""
+
+import pytest
+
+import costs
+from answers import Answers
+from engine import LEAVES, LEAF_IDS, SUPERVISED, UNSUPERVISED, REINFORCEMENT
+
+
+def answers(**values):
+    """
+    Answers with the given size (and other) answers.
+    """
+    record = Answers()
+    record.update(values)
+    return record
+
+
+@pytest.mark.parametrize('value, size', (
+    ('10k', 10 * 2 ** 10), ('5 MB', 5 * 2 ** 20), ('1G', 2 ** 30), ('2gb', 2 * 2 ** 30),
+    ('1.5t', 1.5 * 2 ** 40), ('512', 512), ('64b', 64), (' 3 m ', 3 * 2 ** 20),
+))
+def test_parse_bytes(value, size):
+    assert costs.parse_bytes(value) == size
+
+@pytest.mark.parametrize('value, count', (
+    ('1t', 1e3), ('2m', 2e6), ('1b', 1e9), ('1.5M', 1.5e6), ('300', 300), ('4k', 4e3),
+))
+def test_parse_samples(value, count):
+    assert costs.parse_samples(value) == count
+
+@pytest.mark.parametrize('value', (None, '', 'lots', '10x', '1.2.3g', '-5k', 'k10', '10 k b'))
+def test_garbage_does_not_parse(value):
+    assert costs.parse_bytes(value) is None
+    assert costs.parse_samples(value) is None
+
+
+def test_shape_estimates_samples_from_bytes():
+    dims = costs.shape(answers(data_size_bytes='8m', data_features_count='8'))
+    assert dims == costs.Shape(2 ** 20 / 8.0, 8, 8 * 2 ** 20)
+    assert costs.shape(answers(data_size_samples='1t', data_features_count='NA')).features is None
+
+@pytest.mark.parametrize('learning', (SUPERVISED, UNSUPERVISED))
+def test_rank_answers_is_cheapest_first(learning):
+    ranking = costs.rank_answers(answers(data_size_samples='2m', data_features_count='100'), learning)
+    assert [est.seconds for est in ranking] == sorted(est.seconds for est in ranking)
+    assert set(LEAVES[LEAF_IDS[est.leaf]].learning for est in ranking) == {learning}
+    assert all(est.fits is None for est in ranking)
+
+@pytest.mark.parametrize('goal, leaves', sorted(costs.GOAL_LEAVES.items()))
+def test_rank_answers_respects_the_goal(goal, leaves):
+    ranking = costs.rank_answers(answers(data_size_samples='1m', data_features_count='20', unsup_goal=str(goal)),
+                                 UNSUPERVISED)
+    assert sorted(est.leaf for est in ranking) == sorted(leaves)
+
+def test_memory_limit_puts_what_fits_first():
+    limit = 2 ** 30
+    ranking = costs.rank_answers(answers(data_size_samples='1m', data_features_count='10'), UNSUPERVISED, limit)
+    fits = [est.fits for est in ranking]
+    assert fits == sorted(fits, reverse=True) and True in fits and False in fits
+    hierarchical = next(est for est in ranking if est.leaf == 'unsup_hc')
+    assert not hierarchical.fits and hierarchical.memory > limit
+
+def test_rank_answers_needs_the_shape():
+    assert costs.rank_answers(answers(data_features_count='10'), SUPERVISED) is None
+    assert costs.rank_answers(answers(data_size_samples='1m', data_features_count='10'), REINFORCEMENT) is None
@@ -0,0 +1,179 @@
+# Copyright 2021 Spirent Communications.
+# sridhar.rao@spirent.com
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+The compiled decision tables against the original decide_* trees.
+"""
+
+import random
+
+import pytest
+
+import engine
+from answers import Answers
+
+# pylint: disable=line-too-long,too-many-return-statements,too-many-branches
+
+YES_NO = ('Y', 'N', 'NA', 'U', 'yes', 'no')
+
+
+def original_size(gen):
+    """
+    data_size and ftod_ratio as the original wizard decided with them:
+    'high' (its initial value) unless the data is K bytes or thousands
+    of samples (either unit in either case).
+    """
+    size_bytes, size_samples = gen['data_size_bytes'].lower(), gen['data_size_samples'].lower()
+    small = 'k' in size_bytes or 't' in size_samples
+    medium = 'm' in size_bytes or 'm' in size_samples
+    threshold = 50 if small else 5000 if medium else 500000
+    ratio = 'high' if int(gen['data_features_count']) > threshold else 'low'
+    return ('low' if small else 'high'), ratio
+
+def original_supervised(gen):
+    """
+    decide_supervised, as the leaf it printed.
+    """
+    data_size, ftod_ratio = original_size(gen)
+    if data_size == 'high':
+        if int(gen['metric_interpretability']) >= 3:
+            return 'sup_dt' if int(gen['metric_speed']) >= 3 else 'sup_rf'
+        if int(gen['data_column']) == 3:
+            return 'sup_rnn'
+        if int(gen['data_column']) == 2 and int(gen['data_signal_type']) == 1:
+            return 'sup_cnn'
+        if int(gen['data_column']) == 2 and int(gen['data_signal_type']) in (2, 3):
+            return 'sup_nb' if 'y' in gen['data_output_prob'].lower() else 'sup_ann'
+        return 'sup_ann'
+    if ftod_ratio != 'high':
+        return 'sup_svm'
+    if int(gen['data_type_output']) == 2:
+        return 'sup_linear' if 'y' in gen['data_io_relation'].lower() else 'sup_poly'
+    if int(gen['data_type_output']) == 4:
+        if 'y' not in gen['data_output_prob'].lower():
+            return 'sup_poly'
+        if 'y' in gen['data_cond_indep'].lower():
+            return 'sup_nb'
+        return 'sup_lasso' if 'y' in gen['data_correlation'].lower() else 'sup_logistic'
+    return 'sup_knn'
+
+def original_unsupervised(gen, unsup):
+    """
+    decide_unsupervised, as the leaf it printed.
+    """
+    data_size, _ = original_size(gen)
+    if int(unsup['unsup_goal']) == 1:
+        if data_size == 'high':
+            repro = int(gen['metric_reproducibility']) >= 3
+        elif 'y' in unsup['unsup_clus_dv'].lower():
+            if 'y' not in unsup['unsup_clus_groups'].lower():
+                return 'unsup_hc'
+            repro = False
+        else:
+            repro = True
+        if repro:
+            return 'unsup_hc' if 'y' in unsup['unsup_clus_outliers'].lower() else 'unsup_dbscan'
+        return 'unsup_gmm' if 'y' in gen['data_output_prob'].lower() else 'unsup_kmeans'
+    if int(unsup['unsup_goal']) == 2:
+        if 'y' in unsup['unsup_dr_topic_mod'].lower():
+            return 'unsup_svd' if 'y' in gen['data_output_prob'].lower() else 'unsup_lda'
+        return 'unsup_pca'
+    return 'contact'
+
+def original_reinforcement(gen, ri):
+    """
+    decide_reinforcement, as the leaf it printed.
+    """
+    if int(gen['data_type_output']) == 2 or 'y' in ri['ri_model_preference'].lower():
+        return 'ri_alphazero' if 'y' in ri['ri_model_availability'].lower() else 'ri_world_models'
+    if 'n' in ri['ri_model_preference'].lower():
+        if 'y' not in ri['ri_modelfree_value'].lower():
+            return 'ri_policy_gradient'
+        return 'ri_td' if 'y' in ri['ri_modelfree_value_state'].lower() else 'ri_sarsa'
+    return 'contact'
+
+def random_session(rng):
+    """
+    Random generic, unsupervised and reinforcement answers.
+    """
+    gen = dict(metric_speed=str(rng.randint(1, 5)), metric_interpretability=str(rng.randint(1, 5)),
+               metric_reproducibility=str(rng.randint(1, 5)), data_column=str(rng.randint(1, 4)),
+               data_signal_type=str(rng.randint(1, 5)), data_type_output=str(rng.randint(1, 5)),
+               data_features_count=str(rng.choice([1, 60, 6000, 600000])),
+               data_io_relation=rng.choice(YES_NO), data_correlation=rng.choice(YES_NO),
+               data_cond_indep=rng.choice(YES_NO), data_output_prob=rng.choice(YES_NO),
+               data_size_bytes=rng.choice(['10K', '5M', '1G']), data_size_samples=rng.choice(['1T', '1M', '1B']))
+    unsup = dict(unsup_goal=str(rng.randint(1, 3)), unsup_dr_topic_mod=rng.choice(YES_NO),
+                 unsup_clus_dv=rng.choice(YES_NO), unsup_clus_groups=rng.choice(YES_NO),
+                 unsup_clus_outliers=rng.choice(YES_NO))
+    ri = dict(ri_model_preference=rng.choice(YES_NO), ri_model_availability=rng.choice(YES_NO),
+              ri_modelfree_value=rng.choice(YES_NO), ri_modelfree_value_state=rng.choice(YES_NO))
+    return gen, unsup, ri
+
+SESSIONS = [random_session(random.Random(seed)) for seed in range(3000)]
+
+
+@pytest.mark.parametrize('learning', (engine.SUPERVISED, engine.UNSUPERVISED, engine.REINFORCEMENT))
+def test_tables_match_original_trees(learning):
+    decider = engine.get_engine()
+    for gen, unsup, ri in SESSIONS:
+        answers = Answers(gen, unsup, ri)
+        if learning == engine.SUPERVISED:
+            expected = original_supervised(gen)
+            got = decider.supervised(answers, engine.infer(answers))
+        elif learning == engine.UNSUPERVISED:
+            expected = original_unsupervised(gen, unsup)
+            got = decider.unsupervised(answers, engine.infer(answers))
+        else:
+            expected = original_reinforcement(gen, ri)
+            got = decider.reinforcement(answers)
+        assert got.leaf == expected, (gen, unsup, ri)
+
+@pytest.mark.parametrize('learning', (engine.SUPERVISED, engine.UNSUPERVISED, engine.REINFORCEMENT))
+def test_adaptive_resolve_matches_tables(learning):
+    decider = engine.get_engine()
+    for gen, unsup, ri in SESSIONS[:500]:
+        answers = Answers(gen, unsup, ri)
+        recommendation, question = engine.resolve(answers, learning)
+        assert question is None
+        if learning == engine.REINFORCEMENT:
+            assert recommendation == decider.reinforcement(answers)
+        elif learning == engine.SUPERVISED:
+            assert recommendation == decider.supervised(answers, engine.infer(answers))
+        else:
+            assert recommendation == decider.unsupervised(answers, engine.infer(answers))
+
+def test_every_supervised_leaf_is_reachable():
+    leaves = set(engine.recommend(Answers(dict(gen, data_availability='Y', data_label='Y',
+                                               data_programmability='N', data_knowledge='Y')))[1].leaf
+                 for gen, _, _ in SESSIONS)
+    assert leaves == set(leaf for leaf in engine.LEAF_IDS if leaf.startswith('sup_'))
+
+@pytest.mark.parametrize('size_bytes, size_samples, expected', (
+    ('10k', '1m', ('low', 50)), ('1g', '1t', ('low', 50)),
+    ('5m', '1b', ('high', 5000)), ('1g', '1m', ('high', 5000)), ('1g', '1b', ('high', 500000))))
+def test_size_class(size_bytes, size_samples, expected):
+    assert engine.size_class(size_bytes, size_samples) == expected
+
+def test_columnar_inference_matches_engine():
+    np = pytest.importorskip('numpy')
+    import columnar
+    records = [dict(gen) for gen, _, _ in SESSIONS]
+    derived = columnar.infer(columnar.encode(columnar.records_to_columns(records)))
+    for row, record in enumerate(records):
+        inference = engine.infer(Answers(record))
+        assert derived['data_size'][row] == engine.SIZE_CODES[inference.data_size]
+        assert derived['ftod_ratio'][row] == engine.RATIO_CODES[inference.ftod_ratio]
+    assert set(np.unique(derived['data_size'])) == {engine.SIZE_LOW, engine.SIZE_HIGH}
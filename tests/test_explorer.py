@@ -0,0 +1,39 @@
+# Copyright 2021 Spirent Communications.
+# sridhar.rao@spirent.com
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+The whole decision space: no path raises, every replay agrees and every
+leaf is reached.
+"""
+
+import explorer
+from engine import LEAVES
+
+
+def test_decision_space_has_no_defects():
+    report = explorer.explore()
+    assert explorer.defects(report) == []
+    assert set(path.leaf for path in report.paths) >= set(leaf.leaf for leaf in LEAVES)
+
+def test_defects_fail_the_run(monkeypatch, capsys):
+    report = explorer.explore()
+    broken = report._replace(unreachable=('sup_dt',))
+    monkeypatch.setattr(explorer, 'explore', lambda fold=True: broken)
+    assert explorer.main(['--format', 'jsonl']) == 1
+    assert 'unreachable leaf: sup_dt' in capsys.readouterr().err
+
+def test_clean_run_passes(capsys):
+    assert explorer.main([]) == 0
+    assert 'Unreachable leaves: none' in capsys.readouterr().out
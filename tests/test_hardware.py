@@ -0,0 +1,80 @@
+# Copyright 2021 Spirent Communications.
+# sridhar.rao@spirent.com
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Detected and given hardware, and recommendations swapped for their
+out-of-core variant when the data will not fit.
+"""
+
+import pytest
+
+import algoselector
+import hardware
+from engine import OUT_OF_CORE
+
+# An SVM on 1000 x 20: the 1000 x 1000 Gram matrix needs about 8 MB.
+SVM = {'data_size_bytes': '10k', 'data_size_samples': '1t', 'data_features_count': '20',
+       'data_column': '1', 'data_type_output': '2', 'data_io_relation': 'Y', 'data_output_prob': 'N',
+       'data_cond_indep': 'Y', 'data_correlation': 'N', 'metric_accuracy': '2', 'metric_speed': '2',
+       'metric_interpretability': '2', 'metric_reproducibility': '2', 'metric_implementation': '2'}
+
+
+@pytest.mark.parametrize('memory, expected', (('16g', 16 * 2 ** 30), ('512 MB', 512 * 2 ** 20), (2 ** 33, 2 ** 33)))
+def test_detect_takes_what_is_given(memory, expected):
+    assert hardware.detect(memory, 6) == hardware.Hardware(expected, 6)
+
+def test_detect_fills_in_what_is_not_given():
+    detected = hardware.detect()
+    assert detected.cores >= 1
+    assert detected.memory is None or detected.memory > 0
+    assert hardware.detect('1g').cores == detected.cores
+
+@pytest.mark.parametrize('memory, cores', (('lots', None), ('1g', 0), ('1g', -2)))
+def test_detect_rejects_nonsense(memory, cores):
+    with pytest.raises(ValueError):
+        hardware.detect(memory, cores)
+
+@pytest.mark.parametrize('cores', ('0', '-1'))
+def test_invalid_cores_is_a_usage_error(cores):
+    with pytest.raises(SystemExit) as exited:
+        algoselector.main(['--cores', cores])
+    assert "--cores needs N >= 1" in str(exited.value.code)
+
+
+def decide(machine):
+    """
+    A headless decision for the SVM answers on machine.
+    """
+    wizard = algoselector.AlgoSelectorWizard()
+    wizard.hardware = machine
+    wizard.answers.update(SVM)
+    wizard.perform_inference()
+    return wizard, wizard.decide_supervised()
+
+def test_fitting_recommendation_is_kept():
+    wizard, recommendation = decide(hardware.Hardware(2 ** 30, 4))
+    assert recommendation.leaf == 'sup_svm'
+    assert wizard.advice.headroom > 0 and wizard.advice.recommendation is wizard.advice.original
+
+def test_over_budget_recommendation_goes_out_of_core(capsys):
+    wizard, recommendation = decide(hardware.Hardware(4 * 2 ** 20, 4))
+    assert recommendation is OUT_OF_CORE['sup_svm']
+    assert wizard.advice.original.leaf == 'sup_svm'
+    assert wizard.advice.needed > 4 * 2 ** 20 * hardware.USABLE_FRACTION > 0 > wizard.advice.headroom
+    assert "use the out-of-core variant instead" in capsys.readouterr().out
+
+def test_without_hardware_nothing_is_swapped():
+    wizard, recommendation = decide(None)
+    assert recommendation.leaf == 'sup_svm' and wizard.advice is None
@@ -0,0 +1,38 @@
+# Copyright 2021 Spirent Communications.
+# sridhar.rao@spirent.com
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+The headless modules, imported in a fresh interpreter, leave the
+interactive (pypsi) stack unloaded and start within the import budget.
+"""
+
+import subprocess
+import sys
+
+import pytest
+
+import benchmark
+
+
+@pytest.mark.parametrize('module', benchmark.HEADLESS_MODULES)
+def test_headless_import_leaves_pypsi_unloaded(module):
+    code = "import {0}; import sys; assert 'pypsi' not in sys.modules, sorted(sys.modules)".format(module)
+    done = subprocess.run([sys.executable, '-c', code], cwd=benchmark.HERE, universal_newlines=True,
+                          stdout=subprocess.PIPE, stderr=subprocess.PIPE, check=False)
+    assert done.returncode == 0, done.stderr
+
+def test_algoselector_imports_within_budget():
+    best = min(benchmark.import_time('algoselector')[0] for _ in range(3))
+    assert best * 1e3 <= benchmark.IMPORT_BUDGET_MS
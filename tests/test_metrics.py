@@ -0,0 +1,86 @@
+# Copyright 2021 Spirent Communications.
+# sridhar.rao@spirent.com
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Recording a decision, exporting it, and unwrapping again.
+"""
+
+import json
+
+import pytest
+
+import algoselector
+import metrics
+
+# pylint: disable=redefined-outer-name
+
+pytest.importorskip('pypsi')
+
+ANSWERS = {'data_size_bytes': '10k', 'data_size_samples': '1t', 'data_features_count': '100',
+           'data_type_output': '2', 'data_io_relation': 'Y', 'metric_accuracy': '2', 'metric_speed': '2',
+           'metric_interpretability': '2', 'metric_reproducibility': '2', 'metric_implementation': '2',
+           'data_column': '1', 'data_output_prob': 'N', 'data_cond_indep': 'Y', 'data_correlation': 'N'}
+
+
+@pytest.fixture
+def registry():
+    """
+    Recording enabled for the test, and disabled after it.
+    """
+    try:
+        yield metrics.enable(algoselector.AlgoSelectorWizard)
+    finally:
+        metrics.disable()
+
+
+def decide():
+    """
+    One headless supervised decision.
+    """
+    wizard = algoselector.AlgoSelectorWizard()
+    wizard.answers.update(ANSWERS)
+    wizard.perform_inference()
+    return wizard.decide_supervised()
+
+def test_decision_is_recorded_and_exported(registry, tmp_path):
+    assert decide().leaf == 'sup_linear'
+    snapshot = tmp_path / 'metrics.json'
+    metrics.export(registry, str(snapshot))
+    report = json.loads(snapshot.read_text(encoding='utf-8'))
+    assert report['counters'][metrics.RECOMMENDATIONS] == [{'labels': {'leaf': 'sup_linear'}, 'value': 1}]
+    timing, = report['summaries'][metrics.DECIDE_SECONDS]
+    assert timing['labels'] == {'learning': 'supervised'} and timing['count'] == 1 and timing['sum'] >= 0
+    text = tmp_path / 'metrics.prom'
+    metrics.export(registry, str(text))
+    lines = text.read_text(encoding='utf-8').splitlines()
+    assert '# TYPE {0} counter'.format(metrics.RECOMMENDATIONS) in lines
+    assert '{0}{{leaf="sup_linear"}} 1'.format(metrics.RECOMMENDATIONS) in lines
+    assert '{0}_count{{learning="supervised"}} 1'.format(metrics.DECIDE_SECONDS) in lines
+    assert any(line.startswith('{0}_sum{{learning="supervised"}} '.format(metrics.DECIDE_SECONDS)) for line in lines)
+    assert metrics.FALLBACKS not in text.read_text(encoding='utf-8').replace('# HELP', '')
+
+def test_disable_restores_the_methods():
+    from pypsi import wizard as wiz
+    originals = dict((name, algoselector.AlgoSelectorWizard.__dict__[name]) for name in metrics.WIZARD_METHODS)
+    get_input = wiz.WizardStep.get_input
+    registry = metrics.enable(algoselector.AlgoSelectorWizard)
+    assert algoselector.AlgoSelectorWizard.decide_supervised is not originals['decide_supervised']
+    assert wiz.WizardStep.get_input is not get_input
+    assert metrics.disable() is registry
+    for name, func in originals.items():
+        assert algoselector.AlgoSelectorWizard.__dict__[name] is func, name
+    assert wiz.WizardStep.get_input is get_input
+    decide()
+    assert not registry.counters
@@ -0,0 +1,100 @@
+# Copyright 2021 Spirent Communications.
+# sridhar.rao@spirent.com
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Profiler answers on small delimited files, scanned whole, in blocks, in
+byte ranges and through the csv module.
+"""
+
+import random
+
+import pytest
+
+import profiler
+
+ROWS = 3000
+
+
+def write_table(path, target, rows=ROWS, delimiter=',', quoted=False, missing=False, seed=0):
+    """
+    Normal and uniform features, a label column, and a target column
+    drawn by target(rng).
+    """
+    rng = random.Random(seed)
+    lines = [delimiter.join(('height', 'width', 'label', 'target'))]
+    for number in range(rows):
+        label = '"group, {0}"'.format(number % 3) if quoted else 'group{0}'.format(number % 3)
+        height = '' if missing and number == rows // 2 else '{0:.4f}'.format(rng.gauss(170, 10))
+        lines.append(delimiter.join((height, '{0:.4f}'.format(rng.uniform(0, 1)), label, str(target(rng)))))
+    path.write_text('\n'.join(lines) + '\n', encoding='utf-8')
+    return str(path)
+
+
+@pytest.mark.parametrize('target, output_type, output_prob', (
+    (lambda rng: rng.randint(0, 1), profiler.BINARY, 'N'),
+    (lambda rng: rng.choice('abcd'), profiler.MULTICLASS, 'N'),
+    (lambda rng: rng.randint(1, 6), profiler.MULTICLASS, 'N'),
+    (lambda rng: rng.randint(0, 10 ** 6), profiler.DISCRETE, 'N'),
+    (lambda rng: round(rng.gauss(0, 5), 4), profiler.CONTINUOUS, 'N'),
+    (lambda rng: round(rng.random(), 4), profiler.CONTINUOUS, 'Y'),
+))
+def test_output_answers(tmp_path, target, output_type, output_prob):
+    answers = profiler.profile_file(write_table(tmp_path / 'data.csv', target)).answers()
+    assert answers['data_type_output'] == output_type
+    assert answers['data_output_prob'] == output_prob
+
+def test_size_and_feature_answers(tmp_path):
+    path = write_table(tmp_path / 'data.csv', lambda rng: rng.randint(0, 1))
+    profile = profiler.profile_file(path)
+    assert (profile.rows, profile.columns, profile.target) == (ROWS, 4, 'target')
+    answers = profile.answers()
+    assert answers['data_size_samples'] == '3T'
+    assert answers['data_size_bytes'].endswith('K')
+    assert answers['data_features_count'] == '3'
+    assert answers['data_missing'] == 'N'
+    assert answers['data_distribution'] == 'Y'
+    unlabelled = profile.answers(labelled=False)
+    assert unlabelled['data_features_count'] == '4'
+    assert 'data_type_output' not in unlabelled
+
+def test_missing_values(tmp_path):
+    path = write_table(tmp_path / 'data.csv', lambda rng: rng.randint(0, 1), missing=True)
+    assert profiler.profile_file(path).answers()['data_missing'] == 'Y'
+
+def test_target_by_name_and_index(tmp_path):
+    path = write_table(tmp_path / 'data.csv', lambda rng: rng.randint(0, 1))
+    assert profiler.profile_file(path, target='label').answers()['data_type_output'] == profiler.MULTICLASS
+    assert profiler.profile_file(path, target=1).answers()['data_output_prob'] == 'Y'
+
+def test_blocks_ranges_and_quoted_files_agree(tmp_path, monkeypatch):
+    target = lambda rng: rng.randint(0, 1)
+    whole = profiler.profile_file(write_table(tmp_path / 'data.csv', target))
+    blocks = profiler.profile_file(whole.path, chunk_size=4096)
+    monkeypatch.setattr(profiler, 'RANGE_SIZE', 16 * 1024)
+    ranges = profiler.profile_file(whole.path, workers=2)
+    quoted = profiler.profile_file(write_table(tmp_path / 'quoted.csv', target, quoted=True))
+    semicolons = profiler.profile_file(write_table(tmp_path / 'data.txt', target, delimiter=';'))
+    assert semicolons.delimiter == ';'
+    for profile in (blocks, ranges, quoted, semicolons):
+        assert profile.rows == whole.rows
+        assert profile.answers().keys() == whole.answers().keys()
+        for key in ('data_size_samples', 'data_features_count', 'data_type_output', 'data_output_prob', 'data_missing'):
+            assert profile.answers()[key] == whole.answers()[key], key
+
+def test_format_sizes():
+    assert profiler.format_bytes(1) == '1K'
+    assert profiler.format_bytes(3 * 2 ** 20 + 1) == '4M'
+    assert profiler.format_samples(999) == '1T'
+    assert profiler.format_samples(2 * 10 ** 9) == '2B'
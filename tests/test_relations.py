@@ -0,0 +1,71 @@
+# Copyright 2021 Spirent Communications.
+# sridhar.rao@spirent.com
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Linearity and conditional independence on small synthetic samples.
+"""
+
+import pytest
+
+np = pytest.importorskip('numpy')
+
+import bakeoff  # pylint: disable=wrong-import-position
+import relations  # pylint: disable=wrong-import-position
+
+
+def sample(rows=3000, features=20, correlated=None, classification=True, quadratic=False, seed=0):
+    """
+    Independent normal features (f1 correlated with f0 by correlated),
+    and an output of f2 alone - an output of two features would make
+    them dependent given the output.
+    """
+    rng = np.random.default_rng(seed)
+    X = rng.standard_normal((rows, features))
+    if correlated is not None:
+        X[:, 1] = correlated * X[:, 0] + np.sqrt(1 - correlated ** 2) * rng.standard_normal(rows)
+    signal = X[:, 2] ** 2 if quadratic else X[:, 2]
+    y = signal + 0.5 * rng.standard_normal(rows)
+    if classification:
+        y = (y > np.median(y)).astype(int)
+    return bakeoff.Sample(X, y, classification, ['f{0}'.format(column) for column in range(features)])
+
+
+def test_independent_features():
+    report = relations.evaluate_sample(sample())
+    assert (report.cond_indep, report.dependent_pairs) == ('Y', 0)
+    assert relations.answers(report)['data_cond_indep'] == 'Y'
+
+@pytest.mark.parametrize('correlated', (0.98, 0.6))
+def test_one_dependent_pair_is_enough(correlated):
+    report = relations.evaluate_sample(sample(correlated=correlated))
+    assert report.cond_indep == 'N'
+    assert report.cond_confidence >= relations.MIN_CONFIDENCE
+    assert report.dependent_pairs == 1 and report.pairs == 190
+    assert relations.answers(report)['data_cond_indep'] == 'N'
+
+def test_z_critical_is_corrected_for_the_pairs():
+    assert relations.z_critical(1) == pytest.approx(1.96, abs=0.01)
+    assert relations.z_critical(190) > 3.5
+
+@pytest.mark.parametrize('quadratic, expected', ((False, 'Y'), (True, 'N')))
+def test_linearity(quadratic, expected):
+    report = relations.evaluate_sample(sample(features=5, classification=False, quadratic=quadratic))
+    assert report.io_relation == expected
+    assert relations.answers(report)['data_io_relation'] == expected
+
+def test_classes_are_not_tested_for_linearity():
+    report = relations.evaluate_sample(sample())
+    assert report.io_relation is None
+    assert 'data_io_relation' not in relations.answers(report)
@@ -0,0 +1,83 @@
+# Copyright 2021 Spirent Communications.
+# sridhar.rao@spirent.com
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Top-k scoring: padding of short rankings, the unsup_goal candidates, and
+the columnar path agreeing with the scalar one.
+"""
+
+import random
+
+import pytest
+
+np = pytest.importorskip('numpy')
+
+import scoring  # pylint: disable=wrong-import-position
+from answers import Answers  # pylint: disable=wrong-import-position
+from engine import LEAF_IDS, LEAVES, UNSUPERVISED, gate  # pylint: disable=wrong-import-position
+
+UNSUPERVISED_ANSWERS = {'data_availability': 'Y', 'data_label': 'N', 'data_programmability': 'N',
+                        'data_knowledge': 'Y', 'data_size_bytes': '5M', 'data_size_samples': '1M',
+                        'data_features_count': '60', 'metric_speed': '5'}
+
+
+def random_record(rnd):
+    """
+    Raw answers of any learning type - metrics sometimes missing, and
+    features sometimes NA or missing.
+    """
+    record = dict((field, rnd.choice('YN')) for field in ('data_availability', 'data_label', 'data_programmability',
+                                                          'data_knowledge', 'data_pattern', 'data_creativity'))
+    for field in scoring.METRIC_FIELDS:
+        if rnd.random() < 0.7:
+            record[field] = str(rnd.randint(1, 5))
+    record['data_features_count'] = rnd.choice(('1', '60', '6000', '600000', 'NA', None))
+    record['data_size_bytes'] = rnd.choice(('10K', '5M', '1G', None))
+    record['data_size_samples'] = rnd.choice(('1T', '1M', '1B'))
+    record['unsup_goal'] = rnd.choice(('1', '2', '3', None))
+    return dict((field, value) for field, value in record.items() if value is not None)
+
+
+def test_rank_pads_short_rows():
+    candidates = np.zeros((2, len(LEAVES)), dtype=bool)
+    candidates[0, [LEAF_IDS['sup_dt'], LEAF_IDS['sup_rf']]] = True
+    leaf_ids, scores = scoring.rank(np.ones((2, len(scoring.COLUMNS))), candidates, top=4)
+    assert leaf_ids.shape == scores.shape == (2, 4)
+    assert sorted(leaf_ids[0, :2]) == sorted([LEAF_IDS['sup_dt'], LEAF_IDS['sup_rf']])
+    assert np.all(np.isfinite(scores[0, :2])) and scores[0, 0] >= scores[0, 1]
+    assert list(leaf_ids[0, 2:]) == [-1, -1] and np.all(np.isnan(scores[0, 2:]))
+    assert list(leaf_ids[1]) == [-1] * 4 and np.all(np.isnan(scores[1]))
+
+@pytest.mark.parametrize('goal, expected', (
+    ('1', scoring.GOALS[1]),
+    ('2', scoring.GOALS[2]),
+    ('3', scoring.GOALS[1] + scoring.GOALS[2]),
+))
+def test_top_k_follows_the_unsupervised_goal(goal, expected):
+    ranked = scoring.top_k(Answers(UNSUPERVISED_ANSWERS, {'unsup_goal': goal}), UNSUPERVISED, top=len(LEAVES))
+    assert sorted(item.leaf for item in ranked) == sorted(expected)
+    assert [item.score for item in ranked] == sorted((item.score for item in ranked), reverse=True)
+
+def test_top_k_records_matches_top_k():
+    rnd = random.Random(5)
+    records = [random_record(rnd) for _ in range(500)]
+    columnar = scoring.top_k_records(records, top=4)
+    assert len(columnar) == len(records)
+    for record, ranked in zip(records, columnar):
+        answers = Answers(record)
+        verdict = gate(answers)
+        expected = scoring.top_k(answers, verdict.learning, top=4) if verdict.ml_needed else []
+        assert ranked == [{'leaf': item.leaf, 'score': round(item.score, 3)} for item in expected], record
+    assert any(not ranked for ranked in columnar) and any(len(ranked) == 4 for ranked in columnar)
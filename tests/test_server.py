@@ -0,0 +1,73 @@
+# Copyright 2021 Spirent Communications.
+# sridhar.rao@spirent.com
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Session server conversations over a loopback socket, including the
+error paths.
+"""
+
+import asyncio
+
+import server
+
+SUPERVISED = b'Y\nY\nN\nY\n'
+
+
+def converse(lines, idle_timeout=5.0):
+    """
+    Send lines to a fresh server session and read until it closes.
+    """
+    async def run():
+        sessions = server.SessionServer(idle_timeout)
+        listener = await sessions.start('127.0.0.1:0')
+        port = listener.sockets[0].getsockname()[1]
+        reader, writer = await asyncio.open_connection('127.0.0.1', port)
+        writer.write(lines)
+        await writer.drain()
+        received = await asyncio.wait_for(reader.read(), 10)
+        writer.close()
+        await sessions.close()
+        return received.decode()
+    return asyncio.run(run())
+
+
+def test_default_session_recommends():
+    transcript = converse(SUPERVISED + b'\n' * 10)
+    assert "Supervised Learning model to consider  - ANN" in transcript
+    assert transcript.rstrip().endswith("Hope our suggestion will be useful")
+
+def test_features_count_na():
+    transcript = converse(SUPERVISED + b'10k\n1t\nNA\n')
+    assert "SVM with Gaussian Kernel" in transcript
+
+def test_invalid_answer_is_asked_again():
+    transcript = converse(SUPERVISED + b'10k\n1t\nmany\n10\n')
+    assert "Invalid answer data_features_count='many'" in transcript
+    assert "SVM with Gaussian Kernel" in transcript
+
+def test_decision_error_is_reported(monkeypatch):
+    def broken(answers, learning):
+        raise ValueError("broken rule")
+    monkeypatch.setattr(server, 'resolve', broken)
+    transcript = converse(SUPERVISED)
+    assert "Cannot decide: broken rule - no suggestion can be provided" in transcript
+
+def test_overlong_answer_closes_with_a_message():
+    transcript = converse(b'Y' * (2 * server.LINE_LIMIT) + b'\n')
+    assert "Answer longer than {0} bytes".format(server.LINE_LIMIT) in transcript
+
+def test_quit_ends_the_session():
+    transcript = converse(b'Y\nquit\n')
+    assert "Thanks" not in transcript
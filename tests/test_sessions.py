@@ -0,0 +1,112 @@
+# Copyright 2021 Spirent Communications.
+# sridhar.rao@spirent.com
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+The session store: appending and reopening, repairing an interrupted
+append, the nearest-profile index, and recording the leaf used.
+"""
+
+import os
+
+import pytest
+
+np = pytest.importorskip('numpy')
+
+import sessions  # pylint: disable=wrong-import-position
+from answers import Answers  # pylint: disable=wrong-import-position
+from engine import LEAVES  # pylint: disable=wrong-import-position
+
+RECOMMENDATIONS = dict((rec.leaf, rec) for rec in LEAVES)
+ANSWERS = {'data_availability': 'Y', 'data_label': 'Y', 'data_size_bytes': '10k', 'data_size_samples': '1t',
+           'data_features_count': '100', 'data_type_output': '2', 'metric_accuracy': '4'}
+
+
+def random_vectors(count, seed=0):
+    """
+    count random encoded sessions.
+    """
+    return np.random.default_rng(seed).integers(0, 256, (count, sessions.VECTOR_WIDTH), dtype=np.uint8)
+
+def brute_force(store, query, k):
+    """
+    Ids of the k stored vectors nearest to query, by a scan of every one.
+    """
+    rows = np.asarray(store.column('vectors.u8'), dtype=np.int64)
+    distances = ((rows - query.astype(np.int64)) ** 2).sum(axis=1)
+    return list(np.lexsort((np.arange(len(rows)), distances))[:k])
+
+
+def test_append_and_reopen(tmp_path):
+    store = sessions.SessionStore(str(tmp_path))
+    assert len(store) == 0 and store.nearest(Answers(ANSWERS)) == []
+    first = store.append(Answers(ANSWERS), RECOMMENDATIONS['sup_linear'])
+    second = store.append(Answers(ANSWERS, {'metric_accuracy': '1'}), RECOMMENDATIONS['sup_rf'], used='sup_dt')
+    third = store.append(Answers(), None)
+    assert (first, second, third) == (0, 1, 2) and len(store) == 3
+    reopened = sessions.SessionStore(str(tmp_path))
+    assert len(reopened) == 3
+    assert [reopened.leaf_name(code) for code in reopened.column('leaf.u8')[:, 0]] == ['sup_linear', 'sup_rf', None]
+    assert [reopened.leaf_name(code) for code in reopened.column('used.u8')[:, 0]] == [None, 'sup_dt', None]
+    assert np.array_equal(reopened.column('vectors.u8')[0], sessions.encode(Answers(ANSWERS)))
+    nearest = reopened.nearest(Answers(ANSWERS), k=2)
+    assert nearest[0] == sessions.Neighbor(0, 0.0, 'sup_linear', None)
+    assert nearest[1].session == 1 and nearest[1].leaf == 'sup_rf' and nearest[1].used == 'sup_dt'
+
+def test_interrupted_append_is_repaired(tmp_path):
+    store = sessions.SessionStore(str(tmp_path))
+    store.extend(random_vectors(10), ['sup_svm'] * 10)
+    vectors = os.path.join(str(tmp_path), 'vectors.u8')
+    with open(vectors, 'r+b') as stream:
+        stream.truncate(os.path.getsize(vectors) - 3)
+    reopened = sessions.SessionStore(str(tmp_path))
+    assert len(reopened) == 9
+    for name, (dtype, width) in sessions.COLUMNS.items():
+        assert os.path.getsize(os.path.join(str(tmp_path), name)) == 9 * np.dtype(dtype).itemsize * width, name
+    assert np.array_equal(reopened.column('vectors.u8'), random_vectors(10)[:9])
+    assert reopened.extend(random_vectors(1, seed=1), ['sup_rf']) == 9
+    assert len(sessions.SessionStore(str(tmp_path))) == 10
+
+def test_index_and_later_appends_agree_with_a_scan(tmp_path):
+    store = sessions.SessionStore(str(tmp_path))
+    # Sessions around one profile per index run, so the probed runs hold the nearest ones.
+    rng = np.random.default_rng(2)
+    profiles = random_vectors(40, seed=3).astype(np.int64)
+    def near_profiles(count):
+        noise = rng.integers(-6, 7, (count, sessions.VECTOR_WIDTH))
+        return np.clip(profiles[rng.integers(0, len(profiles), count)] + noise, 0, 255).astype(np.uint8)
+    store.extend(near_profiles(3000), ['sup_rf'] * 3000)
+    store.build_index(clusters=40)
+    assert store.index['count'] == 3000
+    later = near_profiles(400)
+    assert store.extend(later, ['sup_svm'] * 400) == 3000
+    reopened = sessions.SessionStore(str(tmp_path))
+    assert reopened.index['count'] == 3000 and len(reopened) == 3400
+    for query in np.vstack([near_profiles(10), later[:5]]):
+        expected = brute_force(reopened, query, 10)
+        assert [neighbor.session for neighbor in reopened.nearest(query, k=10)] == expected
+    assert reopened.nearest(later[0], k=1)[0][:3] == (3000, 0.0, 'sup_svm')
+
+def test_set_used(tmp_path):
+    store = sessions.SessionStore(str(tmp_path))
+    store.extend(random_vectors(3), ['sup_rf'] * 3)
+    store.set_used(1, 'sup_dt')
+    assert [store.leaf_name(code) for code in store.column('used.u8')[:, 0]] == [None, 'sup_dt', None]
+    with pytest.raises(ValueError):
+        store.set_used(0, 'sup_nonsense')
+    for session in (-1, 3):
+        with pytest.raises(IndexError):
+            store.set_used(session, 'sup_dt')
+    assert sessions.main([str(tmp_path), '--used', '7', 'sup_dt']) == 1
+    assert [store.leaf_name(code) for code in store.column('used.u8')[:, 0]] == [None, 'sup_dt', None]
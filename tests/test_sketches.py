@@ -0,0 +1,129 @@
+# Copyright 2021 Spirent Communications.
+# sridhar.rao@spirent.com
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Sketch estimates against exact answers, whole and merged from parts.
+"""
+
+import random
+
+import pytest
+
+import sketches
+
+
+def test_hyperloglog_small_counts():
+    hll = sketches.HyperLogLog()
+    for value in range(500):
+        hll.add(str(value % 100))
+    assert abs(hll.estimate() - 100) <= 2
+
+@pytest.mark.parametrize('distinct', (5000, 60000))
+def test_hyperloglog_estimate(distinct):
+    hll = sketches.HyperLogLog()
+    for value in range(distinct):
+        hll.add('value-{0}'.format(value))
+    assert abs(hll.estimate() - distinct) < 0.05 * distinct
+
+def test_hyperloglog_merge_is_the_union():
+    whole, first, second = sketches.HyperLogLog(), sketches.HyperLogLog(), sketches.HyperLogLog()
+    for value in range(20000):
+        whole.add(str(value))
+        (first if value < 12000 else second).add(str(value))
+        if value % 3 == 0:
+            second.add(str(value))
+    first.merge(second)
+    assert first.estimate() == whole.estimate()
+
+def test_stable_hash_is_the_same_for_str_and_bytes():
+    assert sketches.stable_hash('abc') == sketches.stable_hash(b'abc')
+    assert sketches.stable_hash('abc') != sketches.stable_hash('abd')
+
+
+def uniform_values(count, seed=0):
+    rng = random.Random(seed)
+    return [rng.random() for _ in range(count)]
+
+def test_quantiles_are_within_the_rank_error():
+    values = uniform_values(50000)
+    sketch = sketches.QuantileSketch()
+    for value in values:
+        sketch.add(value)
+    assert sum(len(items) for items in sketch.levels) < 4 * sketches.QUANTILE_K
+    fractions = (0.1, 0.25, 0.5, 0.75, 0.9)
+    ordered = sorted(values)
+    for fraction, estimate in zip(fractions, sketch.quantiles(fractions)):
+        assert abs(ordered.index(estimate) / float(len(ordered)) - fraction) < 0.03
+    assert sketch.quantiles((0, 1)) == [ordered[0], ordered[-1]]
+
+def test_merged_quantiles():
+    values = uniform_values(40000, 1)
+    parts = [sketches.QuantileSketch(seed=number) for number in range(4)]
+    for number, value in enumerate(values):
+        parts[number % 4].add(value)
+    merged = parts[0]
+    for part in parts[1:]:
+        merged.merge(part)
+    assert merged.count == len(values)
+    assert (merged.minimum, merged.maximum) == (min(values), max(values))
+    assert merged.quantiles((0.5,))[0] == pytest.approx(0.5, abs=0.03)
+
+def test_empty_sketch():
+    sketch = sketches.QuantileSketch()
+    assert sketch.quantiles((0.5,)) == [None]
+    assert sketch.shape() == (None, None)
+
+def test_shape_tells_skew_and_tails():
+    rng = random.Random(2)
+    symmetric, skewed = sketches.QuantileSketch(), sketches.QuantileSketch()
+    for _ in range(20000):
+        symmetric.add(rng.gauss(0, 1))
+        skewed.add(rng.expovariate(1))
+    skewness, tails = symmetric.shape()
+    assert abs(skewness) < 0.05 and tails == pytest.approx(1.23, abs=0.1)
+    assert skewed.shape()[0] > 0.2
+
+
+def test_reservoir_merge_keeps_the_size_and_the_proportions():
+    first, second = sketches.Reservoir(100, 0), sketches.Reservoir(100, 1)
+    for value in range(3000):
+        first.add(value)
+    for value in range(3000, 4000):
+        second.add(value)
+    first.merge(second)
+    assert len(first.items) == 100 and first.seen == 4000
+    assert 10 <= sum(value >= 3000 for value in first.items) <= 45
+
+
+@pytest.mark.parametrize('family, draw', (
+    ('normal', lambda rng: rng.gauss(10, 2)),
+    ('lognormal', lambda rng: rng.lognormvariate(0, 1)),
+    ('exponential', lambda rng: rng.expovariate(0.5)),
+    ('uniform', lambda rng: rng.uniform(-3, 5)),
+))
+def test_fit_distribution_finds_the_family(family, draw):
+    rng = random.Random(3)
+    fitted, distance, fits = sketches.fit_distribution([draw(rng) for _ in range(1000)])
+    assert (fitted, fits) == (family, True)
+    assert distance < 0.05
+
+def test_fit_distribution_rejects_a_mixture():
+    rng = random.Random(4)
+    values = [rng.gauss(0, 1) for _ in range(500)] + [rng.gauss(8, 1) for _ in range(500)]
+    assert sketches.fit_distribution(values)[2] is False
+
+def test_fit_distribution_needs_enough_varying_values():
+    assert sketches.fit_distribution(list(range(sketches.MIN_FIT_SAMPLES - 1))) is None
+    assert sketches.fit_distribution([1.0] * 100) is None
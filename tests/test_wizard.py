@@ -0,0 +1,133 @@
+# Copyright 2021 Spirent Communications.
+# sridhar.rao@spirent.com
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Interactive sessions, with the pypsi prompts scripted: every step takes
+the next scripted answer for its id, or its default.
+"""
+
+import json
+
+import pytest
+
+import algoselector
+import engine
+
+# pylint: disable=redefined-outer-name,unused-argument
+
+pytest.importorskip('pypsi')
+
+SUPERVISED = {'data_availability': ['Y'], 'data_label': ['Y'],
+              'data_programmability': ['N'], 'data_knowledge': ['Y']}
+
+
+@pytest.fixture
+def session(monkeypatch):
+    """
+    Run a whole session over scripted answers, with profiles (e.g.
+    timeseries=Report) set on the wizard: (recommendation, asked ids in
+    order, output).
+    """
+    from pypsi import wizard as wiz
+    from pypsi.namespace import Namespace
+
+    def run(script, adaptive=True, capsys=None, **profiles):
+        script = dict((question, list(values)) for question, values in script.items())
+        asked = []
+        def prompt(self, shell, print_header=True):
+            values = {}
+            for step in self.steps:
+                asked.append(step.id)
+                pending = script.get(step.id)
+                values[step.id] = pending.pop(0) if pending else step.default
+            # What PromptWizard.run returns - not a dict.
+            return Namespace(**values)
+        monkeypatch.setattr(wiz.PromptWizard, 'run', prompt)
+        wizard = algoselector.AlgoSelectorWizard()
+        for name, report in profiles.items():
+            setattr(wizard, name, report)
+        recommendation = wizard.ask_and_decide(adaptive=adaptive)
+        return recommendation, asked, capsys.readouterr().out if capsys else ''
+    return run
+
+
+@pytest.mark.parametrize('adaptive', (True, False))
+def test_default_session_recommends(session, capsys, adaptive):
+    recommendation, _, out = session(SUPERVISED, adaptive, capsys)
+    assert recommendation is not None and not recommendation.fallback
+    assert recommendation.leaf == 'sup_ann'
+    assert engine.CONTACT not in out
+
+def test_adaptive_session_asks_less(session):
+    _, adaptive, _ = session(SUPERVISED, True)
+    _, everything, _ = session(SUPERVISED, False)
+    assert len(adaptive) < len(everything)
+
+def test_all_questions_with_prefilled_answers(session, tmp_path):
+    import profiler
+    path = tmp_path / 'data.csv'
+    path.write_text('height,width,target\n' + ''.join('{0},{1},{2}\n'.format(170 + number % 7, number % 5, number % 2)
+                                                       for number in range(200)), encoding='utf-8')
+    recommendation, asked, _ = session(SUPERVISED, False, profile=profiler.profile_file(str(path)))
+    assert 'data_size_bytes' not in asked and 'data_type_output' not in asked
+    assert 'data_column' in asked
+    assert recommendation.leaf == 'sup_svm'
+
+@pytest.mark.parametrize('adaptive', (True, False))
+def test_features_count_na_does_not_crash(session, adaptive):
+    script = dict(SUPERVISED, data_size_bytes=['10k'], data_size_samples=['1t'], data_features_count=['NA'])
+    recommendation, _, _ = session(script, adaptive)
+    assert recommendation.leaf == 'sup_svm'
+
+def test_invalid_answer_is_asked_again(session, capsys):
+    script = dict(SUPERVISED, data_size_bytes=['10k'], data_size_samples=['1t'],
+                  data_features_count=['many', '100'], data_type_output=['2'], data_io_relation=['Y'])
+    recommendation, asked, out = session(script, True, capsys)
+    assert asked.count('data_features_count') == 2
+    assert 'Invalid answer' in out
+    assert recommendation.leaf == 'sup_linear'
+
+def test_invalid_memory_is_a_usage_error():
+    with pytest.raises(SystemExit) as exited:
+        algoselector.main(['--memory', 'lots'])
+    assert "--memory needs a size" in str(exited.value.code)
+
+@pytest.mark.parametrize('output_prob, leaf', (('Y', 'sup_nb'), ('N', 'sup_ann')))
+def test_profiled_signals_reach_the_signal_leaves(session, tmp_path, output_prob, leaf):
+    np = pytest.importorskip('numpy')
+    import timeseries
+    rng = np.random.default_rng(0)
+    values = np.sin(np.arange(64) / 4.0) + 0.1 * rng.standard_normal((200, 64))
+    path = tmp_path / 'signals.csv'
+    np.savetxt(str(path), values, fmt='%.6f', delimiter=',')
+    # Counted as a collection of millions of series, so that the data size is high.
+    report = timeseries.profile_series(str(path))._replace(size_bytes=2 ** 30, series=5 * 10 ** 6)
+    recommendation, asked, _ = session(dict(SUPERVISED, data_output_prob=[output_prob]), timeseries=report)
+    assert 'data_column' not in asked and 'data_signal_type' not in asked
+    assert recommendation.leaf == leaf
+
+def test_profiled_corpus_reaches_the_text_leaf(session, tmp_path):
+    import corpus
+    path = tmp_path / 'mails.jsonl'
+    mail = "From: ops@example.com\nSubject: report {0}\n\nHello team,\nthe run {0} finished.\nRegards,\n"
+    path.write_text(''.join(json.dumps({'text': mail.format(number)}) + '\n' for number in range(200)),
+                    encoding='utf-8')
+    report = corpus.profile_corpus(str(path))
+    assert corpus.answers(report)['data_text_type'] == corpus.EMAILS
+    # Counted as millions of documents, so that the data size is high.
+    report.stats.documents, report.stats.bytes = 5 * 10 ** 6, 2 ** 30
+    recommendation, asked, _ = session(SUPERVISED, corpus=report)
+    assert 'data_column' not in asked and 'data_text_type' not in asked
+    assert recommendation.leaf == 'sup_rnn'
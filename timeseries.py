@@ -0,0 +1,313 @@
+# Copyright 2021 Spirent Communications.
+# sridhar.rao@spirent.com
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Time-Series Profiler.
+Measures a file of many series - how long they are, whether they are
+sampled regularly, stationary or periodic - and answers the questions of
+signal data from it: data_column (signals), data_signal_type
+(timeseries), data_size_*, data_features_count (the median length),
+data_missing (gaps or irregular sampling) and data_distribution
+(mostly stationary or periodic series have a structure to exploit).
+Layouts, all memory-mapped and read in batches of BATCH_SERIES series:
+    .npy     a 2-D array, one series per row (NaN padded)
+    wide     a delimited file, one series per line (ragged is fine)
+    long     a delimited file of series id, time, value rows (or id,
+             value), grouped by series - ids and times numeric
+Every batch is one NaN-padded matrix, and every statistic one NumPy
+pass over it (rfft for the periodicities) - no loop per series.
+Requires numpy.
+"""
+
+from __future__ import print_function
+import io
+import mmap
+import os
+import time
+from collections import namedtuple
+
+import numpy as np
+
+import profiler
+
+# pylint: disable=line-too-long,too-many-locals,invalid-name
+
+BATCH_SERIES = 1024
+# Text read at a time, at most.
+BLOCK_BYTES = 16 * 2 ** 20
+# Series are cut into SEGMENTS parts: stationary when the part means stay
+# within DRIFT standard deviations and their variances within VARIANCE_RATIO.
+SEGMENTS = 4
+DRIFT = 0.5
+VARIANCE_RATIO = 2.0
+# Periodic when the strongest frequency holds this share of the power
+# (white noise gives about log(n)/n).
+PERIODIC_POWER = 0.1
+# Regular sampling: time steps within this coefficient of variation.
+REGULAR_CV = 0.01
+MIN_LENGTH = 8
+PERIODS_SHOWN = 3
+
+Batch = namedtuple('Batch', 'values times')
+Report = namedtuple('Report', 'path size_bytes series lengths regular_share gap_share '
+                              'stationary_share periodic_share structured_share periods seconds')
+
+
+############### Reading ######################
+
+def _blocks(path, start):
+    """
+    Blocks of whole lines of path from start, each at most about
+    BLOCK_BYTES - the file is memory-mapped.
+    """
+    with open(path, 'rb') as stream, \
+         mmap.mmap(stream.fileno(), 0, access=mmap.ACCESS_READ) as data:
+        position = start
+        while position < len(data):
+            stop = min(position + BLOCK_BYTES, len(data))
+            if stop < len(data):
+                newline = data.rfind(b'\n', position, stop)
+                if newline < 0:
+                    newline = data.find(b'\n', stop)
+                stop = len(data) if newline < 0 else newline + 1
+            yield data[position:stop]
+            position = stop
+
+def _padded(groups, positions, values, count):
+    """
+    A count x longest matrix, NaN padded, with values at (groups, positions).
+    """
+    matrix = np.full((count, int(positions.max()) + 1 if positions.size else 0), np.nan)
+    matrix[groups, positions] = values
+    return matrix
+
+def _parse_wide(block, delimiter):
+    """
+    The series of a block of lines, one per line - missing or unparsable
+    values are NaN.
+    """
+    block = block.replace(b'\r', b'')
+    lines = [line for line in block.split(b'\n') if line.strip()]
+    text = b'\n'.join(lines)
+    raw = np.frombuffer(text + b'\n', dtype=np.uint8)
+    ends = np.flatnonzero(raw == ord('\n'))
+    separators = np.cumsum(raw == ord(delimiter))
+    counts = np.diff(np.r_[0, separators[ends]]) + 1
+    try:
+        values = np.array(text.replace(b'\n', delimiter.encode()).split(delimiter.encode()), dtype=float)
+    except ValueError:
+        values = np.array([_number(field) for field in text.replace(b'\n', delimiter.encode()).split(delimiter.encode())])
+    groups = np.repeat(np.arange(len(counts)), counts)
+    positions = np.arange(len(values)) - np.repeat(np.cumsum(counts) - counts, counts)
+    return _padded(groups, positions, values, len(counts))
+
+def _number(field):
+    try:
+        return float(field)
+    except ValueError:
+        return np.nan
+
+def read_wide(path, shape):
+    """
+    Batches of the series of a wide file.
+    """
+    for block in _blocks(path, shape.start):
+        matrix = _parse_wide(block, shape.delimiter)
+        for first in range(0, len(matrix), BATCH_SERIES):
+            yield Batch(matrix[first:first + BATCH_SERIES], None)
+
+def read_long(path, shape):
+    """
+    Batches of the series of a long file - a series that continues past
+    a block is carried over to the next one.
+    """
+    carry = np.zeros((0, shape.columns))
+    for block in _blocks(path, shape.start):
+        try:
+            rows = np.loadtxt(io.BytesIO(block), delimiter=shape.delimiter, ndmin=2)
+        except ValueError as err:
+            raise ValueError("long layout needs numeric ids, times and values: {0}".format(err)) from None
+        rows = np.vstack([carry, rows])
+        last = np.flatnonzero(rows[:, 0] != rows[-1, 0])
+        cut = last[-1] + 1 if last.size else 0
+        rows, carry = rows[:cut], rows[cut:]
+        for batch in _long_batches(rows):
+            yield batch
+    for batch in _long_batches(carry):
+        yield batch
+
+def _long_batches(rows):
+    if not len(rows):
+        return
+    starts = np.flatnonzero(np.r_[True, rows[1:, 0] != rows[:-1, 0]])
+    groups = np.cumsum(np.r_[True, rows[1:, 0] != rows[:-1, 0]]) - 1
+    positions = np.arange(len(rows)) - starts[groups]
+    for first in range(0, len(starts), BATCH_SERIES):
+        chosen = (groups >= first) & (groups < first + BATCH_SERIES)
+        count = min(BATCH_SERIES, len(starts) - first)
+        values = _padded(groups[chosen] - first, positions[chosen], rows[chosen, -1], count)
+        times = _padded(groups[chosen] - first, positions[chosen], rows[chosen, 1], count) if rows.shape[1] > 2 else None
+        yield Batch(values, times)
+
+def read_npy(path):
+    """
+    Batches of the rows of a 2-D .npy array, memory-mapped.
+    """
+    array = np.load(path, mmap_mode='r')
+    if array.ndim != 2:
+        raise ValueError("expected a 2-D array of series, got {0} dimensions".format(array.ndim))
+    for first in range(0, len(array), BATCH_SERIES):
+        yield Batch(np.array(array[first:first + BATCH_SERIES], dtype=float), None)
+
+def read_series(path, delimiter=None, layout='auto'):
+    """
+    Batches (values, times or None) of the series in path; layout is
+    'npy', 'wide', 'long' or 'auto' (.npy by extension, long for 2 or 3
+    columns, wide otherwise).
+    """
+    if layout == 'npy' or (layout == 'auto' and path.endswith('.npy')):
+        return read_npy(path)
+    shape = profiler.layout(path, delimiter)
+    if layout == 'long' or (layout == 'auto' and shape.columns in (2, 3)):
+        if shape.columns not in (2, 3):
+            raise ValueError("long layout needs id,value or id,time,value columns")
+        return read_long(path, shape)
+    return read_wide(path, shape)
+
+
+############### Measuring ######################
+
+def _segment_stats(values, lengths):
+    """
+    Means and variances of SEGMENTS equal parts of every series - series
+    x SEGMENTS each.
+    """
+    columns = np.arange(values.shape[1])
+    segment = np.minimum(columns[None, :] * SEGMENTS // np.maximum(lengths[:, None], 1), SEGMENTS - 1)
+    known = ~np.isnan(values)
+    means = np.zeros((len(values), SEGMENTS))
+    variances = np.zeros((len(values), SEGMENTS))
+    filled = np.where(known, values, 0.0)
+    for part in range(SEGMENTS):
+        inside = known & (segment == part)
+        count = np.maximum(inside.sum(axis=1), 1)
+        means[:, part] = (filled * inside).sum(axis=1) / count
+        variances[:, part] = (((filled - means[:, part:part + 1]) ** 2) * inside).sum(axis=1) / count
+    return means, variances
+
+def measure(batch):
+    """
+    Per series of a Batch: (length, gaps, regular or None, stationary,
+    periodic, dominant period in samples).
+    """
+    values = batch.values
+    known = ~np.isnan(values)
+    columns = np.arange(values.shape[1])
+    lengths = np.where(known.any(axis=1), values.shape[1] - np.argmax(known[:, ::-1], axis=1), 0)
+    gaps = (~known & (columns[None, :] < lengths[:, None])).any(axis=1)
+    regular = None
+    if batch.times is not None:
+        steps = np.diff(batch.times, axis=1)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            spread = np.nanstd(steps, axis=1) / np.abs(np.nanmean(steps, axis=1))
+        regular = np.nan_to_num(spread, nan=np.inf) <= REGULAR_CV
+    counts = np.maximum(known.sum(axis=1), 1)
+    filled = np.where(known, values, 0.0)
+    mean = filled.sum(axis=1) / counts
+    deviation = np.sqrt((((filled - mean[:, None]) ** 2) * known).sum(axis=1) / counts)
+    means, variances = _segment_stats(values, lengths)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        drift = (means.max(axis=1) - means.min(axis=1)) / deviation
+        ratio = variances.max(axis=1) / variances.min(axis=1)
+    stationary = (drift <= DRIFT) & (ratio <= VARIANCE_RATIO)
+    # Detrend (least squares line through the known points), then one rfft for the batch.
+    x = np.where(known, columns[None, :], 0.0)
+    x_mean = x.sum(axis=1) / counts
+    slope_num = ((x - x_mean[:, None]) * (filled - mean[:, None]) * known).sum(axis=1)
+    slope_den = (((x - x_mean[:, None]) ** 2) * known).sum(axis=1)
+    slope = np.where(slope_den > 0, slope_num / np.maximum(slope_den, 1e-300), 0.0)
+    residual = np.where(known, filled - mean[:, None] - slope[:, None] * (columns[None, :] - x_mean[:, None]), 0.0)
+    power = np.abs(np.fft.rfft(residual, axis=1)) ** 2
+    power[:, 0] = 0
+    total = power.sum(axis=1)
+    peak = power.argmax(axis=1)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        share = power[np.arange(len(power)), peak] / total
+        period = np.where(peak > 0, values.shape[1] / np.maximum(peak, 1), np.inf)
+    periodic = (share >= PERIODIC_POWER) & (period <= lengths / 2.0)
+    short = lengths < MIN_LENGTH
+    return lengths, gaps, regular, stationary & ~short, periodic & ~short, np.where(periodic & ~short, period, np.nan)
+
+def profile_series(path, delimiter=None, layout='auto'):
+    """
+    A Report of the series in path.
+    """
+    start = time.perf_counter()
+    lengths, gaps, regular, stationary, periodic, structured, periods = [], 0, None, 0, 0, 0, []
+    for batch in read_series(path, delimiter, layout):
+        if not len(batch.values):
+            continue
+        length, gap, steady, still, cyclic, period = measure(batch)
+        lengths.append(length)
+        gaps += int(gap.sum())
+        if steady is not None:
+            regular = (regular or 0) + int(steady.sum())
+        stationary += int(still.sum())
+        periodic += int(cyclic.sum())
+        structured += int((still | cyclic).sum())
+        periods.append(np.round(period[~np.isnan(period)], 1))
+    lengths = np.concatenate(lengths) if lengths else np.zeros(0, dtype=int)
+    series = len(lengths)
+    if not series:
+        raise ValueError("no series found")
+    values, counts = np.unique(np.concatenate(periods), return_counts=True)
+    common = [(float(values[index]), int(counts[index])) for index in np.argsort(-counts, kind='stable')[:PERIODS_SHOWN]]
+    return Report(path, os.path.getsize(path), series, np.percentile(lengths, [0, 25, 50, 75, 100]).tolist(),
+                  None if regular is None else regular / float(series), gaps / float(series),
+                  stationary / float(series), periodic / float(series), structured / float(series), common,
+                  time.perf_counter() - start)
+
+
+def answers(report):
+    """
+    The WizardStep answers a Report gives.
+    """
+    irregular = report.regular_share is not None and report.regular_share < 1
+    return {
+        'data_column': '2',
+        'data_signal_type': '3',
+        'data_size_bytes': profiler.format_bytes(report.size_bytes),
+        'data_size_samples': profiler.format_samples(report.series),
+        'data_features_count': str(max(1, int(report.lengths[2]))),
+        'data_missing': 'Y' if report.gap_share > 0 or irregular else 'N',
+        'data_distribution': 'Y' if report.structured_share >= 0.5 else 'N',
+    }
+
+def describe(report):
+    """
+    Printable lines for a Report.
+    """
+    lines = ["Time-series profile of {0} series in {1:.2f}s ({2:.0f} series/s):".format(
+        report.series, report.seconds, report.series / max(report.seconds, 1e-9)),
+             " length: min {0:.0f}, quartiles {1:.0f} / {2:.0f} / {3:.0f}, max {4:.0f}".format(*report.lengths),
+             " sampling: {0}, {1:.1%} with gaps".format(
+                 'no timestamps' if report.regular_share is None else '{0:.1%} regular'.format(report.regular_share),
+                 report.gap_share),
+             " stationary: {0:.1%}, periodic: {1:.1%}, either: {2:.1%}".format(
+                 report.stationary_share, report.periodic_share, report.structured_share)]
+    if report.periods:
+        lines.append(" dominant periods (samples): " + ', '.join('{0:g} ({1} series)'.format(period, count)
+                                                               for period, count in report.periods))
+    return lines